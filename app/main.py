@@ -488,8 +488,12 @@ async def lifespan(app: FastAPI):
 
             # Job 1: limpieza de caché (si existe)
             try:
-                from app.shared.scheduler.jobs import register_cache_cleanup_job
+                from app.shared.scheduler.jobs import (
+                    register_cache_cleanup_job,
+                    register_ocr_page_cache_cleanup_job,
+                )
                 register_cache_cleanup_job(scheduler)
+                register_ocr_page_cache_cleanup_job(scheduler)
             except Exception as e:
                 logger.debug(f"Cache cleanup job no disponible: {e}")
 
@@ -575,6 +579,34 @@ async def lifespan(app: FastAPI):
                 # PayPal clients cleanup (legacy payments module removed)
                 # No action needed - billing uses Stripe only
 
+                # Cliente OpenAI embeddings (pool keep-alive)
+                try:
+                    from app.shared.integrations.openai_embeddings_client import close_openai_embeddings_client
+                    await close_openai_embeddings_client()
+                except Exception as e:
+                    logger.warning(f"⚠️ Error cerrando cliente OpenAI embeddings: {e}")
+
+                # Cliente Azure Document Intelligence (pool keep-alive)
+                try:
+                    from app.modules.rag.adapters.azure.azure_document_intelligence_client import close_azure_ocr_client
+                    await close_azure_ocr_client()
+                except Exception as e:
+                    logger.warning(f"⚠️ Error cerrando cliente Azure OCR: {e}")
+
+                # Pool de procesos de extracción de texto (fase convert)
+                try:
+                    from app.modules.rag.services.text_extractors import shutdown_extraction_pool
+                    shutdown_extraction_pool(wait=False)
+                except Exception as e:
+                    logger.warning(f"⚠️ Error deteniendo pool de extracción: {e}")
+
+                # Builds de ZIP prearmados en curso
+                try:
+                    from app.modules.files.services.archive_job_service import get_archive_job_manager
+                    await get_archive_job_manager().shutdown()
+                except Exception as e:
+                    logger.warning(f"⚠️ Error deteniendo jobs de archivo ZIP: {e}")
+
                 # Cierre de recursos cacheados
                 try:
                     await shutdown_all()
@@ -26,6 +26,7 @@ Decisiones Files v2:
 
 Autor: Ixchel Beristáin Mendoza
 Fecha: 2025-11-22
+Actualizado: 2025-12-19 - upload_input_file_stream (subida por bloques con checksum)
 """
 
 from __future__ import annotations
@@ -39,7 +40,9 @@ from app.modules.files.enums import StorageBackend
 from app.modules.files.facades.errors import (
     FileNotFoundError,
     FileStorageError,
+    FileValidationError,
 )
+from app.modules.files.facades.input_files.upload_stream import InputFileUploadStream
 from app.modules.files.schemas import InputFileUpload, InputFileResponse
 from app.modules.files.services import (
     register_uploaded_input_file,
@@ -53,6 +56,7 @@ from app.modules.files.services.input_file_lookup_service import (
 from app.modules.files.services.storage_ops_service import (
     AsyncStorageClient,
     upload_file_bytes,
+    upload_file_stream,
     generate_download_url,
     delete_file_from_storage,
 )
@@ -136,6 +140,31 @@ class InputFilesFacade:
                 f"No se pudo subir el archivo al storage: {exc}"
             ) from exc
 
+        return await self._register_uploaded_input_file(
+            upload=upload,
+            uploaded_by=uploaded_by,
+            storage_key=storage_key,
+            input_file_id=input_file_id,
+            checksum=checksum,
+            parser_version=parser_version,
+        )
+
+    async def _register_uploaded_input_file(
+        self,
+        *,
+        upload: InputFileUpload,
+        uploaded_by: UUID,
+        storage_key: str,
+        input_file_id: Optional[UUID] = None,
+        checksum: Optional[str] = None,
+        parser_version: Optional[str] = None,
+    ) -> InputFileResponse:
+        """
+        Registra en BD un archivo insumo ya subido a storage_key.
+
+        Crea InputFile + FilesBase + (opcional) InputFileMetadata y devuelve
+        el InputFileResponse. No realiza commit.
+        """
         input_file, _, _ = await register_uploaded_input_file(
             session=self._db,
             upload=upload,
@@ -171,6 +200,56 @@ class InputFilesFacade:
             uploaded_at=input_file.input_file_uploaded_at,
         )
 
+    async def upload_input_file_stream(
+        self,
+        *,
+        upload: InputFileUpload,
+        uploaded_by: UUID,
+        stream: InputFileUploadStream,
+        storage_key: str,
+        input_file_id: Optional[UUID] = None,
+        parser_version: Optional[str] = None,
+    ) -> InputFileResponse:
+        """
+        Variante en streaming de upload_input_file.
+
+        Sube el contenido por bloques (memoria acotada por el tamaño de
+        bloque) y registra tamaño y SHA-256 calculados al vuelo, sin releer
+        el archivo.
+
+        NOTA:
+        - Un archivo que excede el límite corta la subida y lanza
+          FileValidationError (nada queda registrado en BD).
+        - Cualquier otro error de storage se reporta como FileStorageError.
+        """
+        stream.check_declared_size()
+        try:
+            await upload_file_stream(
+                self._storage,
+                bucket=self._bucket,
+                key=storage_key,
+                stream=stream,
+                mime_type=upload.mime_type,
+            )
+        except FileValidationError:
+            raise
+        except Exception as exc:
+            # El cliente HTTP puede envolver el error levantado por el stream
+            if stream.limit_exceeded:
+                raise FileValidationError(str(exc.__cause__ or exc)) from exc
+            raise FileStorageError(
+                f"No se pudo subir el archivo al storage: {exc}"
+            ) from exc
+
+        return await self._register_uploaded_input_file(
+            upload=upload.model_copy(update={"size_bytes": stream.size_bytes}),
+            uploaded_by=uploaded_by,
+            storage_key=storage_key,
+            input_file_id=input_file_id,
+            checksum=stream.checksum,
+            parser_version=parser_version,
+        )
+
     # ------------------------------------------------------------------
     # Consultas y listados
     # ------------------------------------------------------------------
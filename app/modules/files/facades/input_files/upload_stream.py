@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/modules/files/facades/input_files/upload_stream.py
+
+Stream de subida de archivos insumo con límite de tamaño y checksum
+incremental.
+
+InputFileUploadStream envuelve el archivo recibido (UploadFile de FastAPI o
+cualquier objeto con `async read(n)`) y lo entrega al storage por bloques:
+- Nunca materializa el archivo completo: la memoria queda acotada por
+  chunk_size (el multipart ya viene volcado a un SpooledTemporaryFile).
+- Calcula el SHA-256 y el tamaño mientras los bloques pasan.
+- Corta en cuanto se supera max_bytes, antes de enviar el bloque excedente.
+
+Autor: DoxAI
+Fecha: 2025-12-19
+"""
+
+from __future__ import annotations
+
+from typing import AsyncIterator, Optional, Protocol
+
+from app.modules.files.enums import ChecksumAlgo
+from app.modules.files.facades.errors import FileValidationError
+from app.modules.files.services.file_checksum_service import StreamingChecksum
+from app.modules.files.services.storage_ops_service import DEFAULT_STREAM_CHUNK_SIZE
+
+
+class _AsyncReadable(Protocol):
+    async def read(self, size: int = -1) -> bytes: ...
+
+
+def _size_error(max_bytes: int, size_bytes: Optional[int] = None) -> FileValidationError:
+    max_mb = max_bytes / (1024 * 1024)
+    if size_bytes is None:
+        return FileValidationError(f"Archivo excede tamaño máximo permitido: > {max_mb:.0f} MB")
+    return FileValidationError(
+        f"Archivo excede tamaño máximo permitido: "
+        f"{size_bytes / (1024 * 1024):.2f} MB > {max_mb:.0f} MB"
+    )
+
+
+class InputFileUploadStream:
+    """
+    Iterable asíncrono de bloques del archivo subido.
+
+    Tras consumirlo, `size_bytes` y `checksum` describen el contenido
+    enviado. Si se superó el límite, `limit_exceeded` es True y la
+    iteración terminó con FileValidationError.
+    """
+
+    def __init__(
+        self,
+        source: _AsyncReadable,
+        *,
+        max_bytes: int,
+        chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+        declared_size: Optional[int] = None,
+        algo: ChecksumAlgo | str = "sha256",
+    ) -> None:
+        self._source = source
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.declared_size = declared_size
+        self._checksum = StreamingChecksum(algo)
+        self._consumed = False
+        self.limit_exceeded = False
+
+    def check_declared_size(self) -> None:
+        """Rechaza antes de leer si el tamaño conocido ya excede el límite."""
+        if self.declared_size is not None and self.declared_size > self.max_bytes:
+            self.limit_exceeded = True
+            raise _size_error(self.max_bytes, self.declared_size)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._checksum.size
+
+    @property
+    def checksum(self) -> Optional[str]:
+        """SHA-256 del contenido; None hasta consumir el stream completo."""
+        return self._checksum.hexdigest() if self._consumed else None
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        self.check_declared_size()
+        while True:
+            chunk = await self._source.read(self.chunk_size)
+            if not chunk:
+                break
+            if self._checksum.size + len(chunk) > self.max_bytes:
+                self.limit_exceeded = True
+                raise _size_error(self.max_bytes)
+            self._checksum.update(chunk)
+            yield chunk
+        self._consumed = True
+
+
+__all__ = ["InputFileUploadStream"]
+
+# Fin del archivo backend/app/modules/files/facades/input_files/upload_stream.py
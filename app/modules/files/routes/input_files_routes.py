@@ -14,6 +14,8 @@ Incluye:
 
 Autor: Ixchel Beristáin Mendoza
 Fecha: 2025-11-22
+Actualizado: 2025-12-19 - Subida en streaming (sin leer el archivo completo en memoria)
+Actualizado: 2025-12-20 - Fábrica del cliente de storage movida a services/storage_client_factory
 """
 
 from __future__ import annotations
@@ -54,11 +56,14 @@ from app.modules.files.facades import (
     FileValidationError,
 )
 from app.modules.files.facades.input_files import InputFilesFacade
+from app.modules.files.facades.input_files.upload_stream import InputFileUploadStream
 from app.modules.files.facades.input_files.validate import (
+    DEFAULT_MAX_FILE_SIZE_MB,
     validate_file_type_consistency,
 )
 from app.modules.files.schemas import InputFileUpload, InputFileResponse
 from app.modules.files.services.storage_ops_service import AsyncStorageClient
+from app.modules.files.services.storage_client_factory import get_storage_client
 from app.modules.files.services.storage.storage_paths import get_storage_paths_service
 
 from app.shared.observability.timed_route import TimedAPIRoute
@@ -72,80 +77,7 @@ router = APIRouter(tags=["files:input"], route_class=TimedAPIRoute)
 
 
 # Usar get_db directamente como dependencia, sin wrapper que intente awaitar un generator
-
-
-async def get_storage_client() -> AsyncStorageClient:
-    """
-    Devuelve un cliente de storage que implemente AsyncStorageClient.
-
-    Usa el SupabaseStorageHTTPClient real en producción.
-    """
-    from app.shared.utils.http_storage_client import get_http_storage_client
-    from app.shared.config import settings
-    
-    # Obtener el cliente HTTP real de Supabase
-    http_client = get_http_storage_client()
-    
-    # Adaptador que implementa la interfaz AsyncStorageClient
-    class RealStorageClient:
-        """
-        Adaptador que conecta SupabaseStorageHTTPClient con AsyncStorageClient.
-        """
-        def __init__(self, client, bucket: str):
-            self._client = client
-            self._default_bucket = bucket
-        
-        async def upload_bytes(
-            self,
-            bucket: str,
-            key: str,
-            data: bytes,
-            mime_type: str | None = None,
-        ) -> None:
-            """Sube bytes al storage usando el cliente HTTP real."""
-            import logging
-            _logger = logging.getLogger("files.upload.diagnostic")
-            
-            _logger.info(
-                "storage_upload_start: bucket=%s key=%s size=%d mime=%s",
-                bucket, key[:60] if key else "<none>", len(data), mime_type,
-            )
-            
-            await self._client.upload_file(
-                bucket=bucket,
-                path=key,
-                file_data=data,
-                content_type=mime_type or "application/octet-stream",
-                overwrite=False,
-            )
-            
-            _logger.info(
-                "storage_upload_ok: bucket=%s key=%s",
-                bucket, key[:60] if key else "<none>",
-            )
-        
-        async def get_download_url(
-            self,
-            bucket: str,
-            key: str,
-            expires_in_seconds: int = 3600,
-        ) -> str:
-            """Genera una URL de descarga temporal firmada."""
-            return await self._client.create_signed_url(
-                bucket=bucket,
-                path=key,
-                expires_in=expires_in_seconds,
-            )
-        
-        async def delete_object(
-            self,
-            bucket: str,
-            key: str,
-        ) -> None:
-            """Elimina un objeto del storage."""
-            await self._client.delete_file(bucket=bucket, path=key)
-    
-    return RealStorageClient(http_client, settings.supabase_bucket_name)
+# get_storage_client: services/storage_client_factory
 
 
 def get_input_files_facade(
@@ -305,9 +237,15 @@ async def upload_input_file(
                 mime_type=mime_type,
             )
 
-        with telemetry.measure("read_ms"):
-            file_bytes = await file.read()
-            size_bytes = len(file_bytes)
+        # Lectura por bloques: el archivo nunca se materializa completo; el
+        # tamaño conocido del multipart se valida antes de subir nada
+        upload_stream = InputFileUploadStream(
+            file,
+            max_bytes=DEFAULT_MAX_FILE_SIZE_MB * 1024 * 1024,
+            declared_size=getattr(file, "size", None),
+        )
+        upload_stream.check_declared_size()
+        size_bytes = upload_stream.declared_size or 0
 
         # SSOT v2: Generar input_file_id antes del upload para usarlo en el path
         input_file_id = uuid4()
@@ -344,10 +282,10 @@ async def upload_input_file(
         )
 
         with telemetry.measure("db_ms"):
-            response = await facade.upload_input_file(
+            response = await facade.upload_input_file_stream(
                 upload=upload_dto,
                 uploaded_by=ctx.auth_user_id,
-                file_bytes=file_bytes,
+                stream=upload_stream,
                 storage_key=storage_key,
                 input_file_id=input_file_id,  # Pasar el ID pre-generado
             )
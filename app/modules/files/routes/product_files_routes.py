@@ -14,6 +14,8 @@ Incluye:
 
 Autor: Ixchel Beristáin Mendoza
 Fecha: 2025-11-22
+Actualizado: 2025-12-20 - RealStorageClient implementa iter_bytes/upload_stream
+Actualizado: 2025-12-20 - Cliente de storage compartido (services/storage_client_factory)
 """
 
 from __future__ import annotations
@@ -57,6 +59,7 @@ from app.modules.files.facades.product_files import (
 )
 from app.modules.files.schemas import ProductFileResponse
 from app.modules.files.services.storage_ops_service import AsyncStorageClient
+from app.modules.files.services.storage_client_factory import get_storage_client
 from app.modules.files.services.billing import FilesBillingService
 
 from app.shared.observability.timed_route import TimedAPIRoute
@@ -70,80 +73,7 @@ router = APIRouter(tags=["files:product"], route_class=TimedAPIRoute)
 
 
 # Usar get_db directamente como dependencia, sin wrapper que intente awaitar un generator
-
-
-async def get_storage_client() -> AsyncStorageClient:
-    """
-    Devuelve un cliente de storage que implemente AsyncStorageClient.
-
-    Usa el SupabaseStorageHTTPClient real en producción.
-    """
-    from app.shared.utils.http_storage_client import get_http_storage_client
-    from app.shared.config import settings
-    
-    # Obtener el cliente HTTP real de Supabase
-    http_client = get_http_storage_client()
-    
-    # Adaptador que implementa la interfaz AsyncStorageClient
-    class RealStorageClient:
-        """
-        Adaptador que conecta SupabaseStorageHTTPClient con AsyncStorageClient.
-        """
-        def __init__(self, client, bucket: str):
-            self._client = client
-            self._default_bucket = bucket
-        
-        async def upload_bytes(
-            self,
-            bucket: str,
-            key: str,
-            data: bytes,
-            mime_type: str | None = None,
-        ) -> None:
-            """Sube bytes al storage usando el cliente HTTP real."""
-            import logging
-            _logger = logging.getLogger("files.upload.diagnostic")
-            
-            _logger.info(
-                "storage_upload_start: bucket=%s key=%s size=%d mime=%s",
-                bucket, key[:60] if key else "<none>", len(data), mime_type,
-            )
-            
-            await self._client.upload_file(
-                bucket=bucket,
-                path=key,
-                file_data=data,
-                content_type=mime_type or "application/octet-stream",
-                overwrite=False,
-            )
-            
-            _logger.info(
-                "storage_upload_ok: bucket=%s key=%s",
-                bucket, key[:60] if key else "<none>",
-            )
-        
-        async def get_download_url(
-            self,
-            bucket: str,
-            key: str,
-            expires_in_seconds: int = 3600,
-        ) -> str:
-            """Genera una URL de descarga temporal firmada."""
-            return await self._client.create_signed_url(
-                bucket=bucket,
-                path=key,
-                expires_in=expires_in_seconds,
-            )
-        
-        async def delete_object(
-            self,
-            bucket: str,
-            key: str,
-        ) -> None:
-            """Elimina un objeto del storage."""
-            await self._client.delete_file(bucket=bucket, path=key)
-    
-    return RealStorageClient(http_client, settings.supabase_bucket_name)
+# get_storage_client: services/storage_client_factory (mismo adaptador que insumos)
 
 
 # ---------------------------------------------------------------------------
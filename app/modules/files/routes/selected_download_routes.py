@@ -7,25 +7,32 @@ Endpoint para descarga de archivos seleccionados como ZIP.
 POST /files/{project_id}/download-selected
 - Recibe lista de paths de storage
 - Valida ownership del proyecto
-- Genera ZIP con los archivos solicitados
+- Genera ZIP con los archivos solicitados (en streaming)
 - Retorna ZIP binario o error estructurado
 
+POST /files/{project_id}/download-selected/archive
+GET  /files/{project_id}/download-selected/archive/{job_id}
+- Igual que el anterior, pero el ZIP se arma en segundo plano y se guarda
+  en storage (cacheado por hash del manifiesto); el cliente consulta el
+  estado y descarga con URL firmada
+
 Autor: DoxAI
 Fecha: 2026-01-21
+Actualizado:
+- 2025-12-19: ZIP en streaming (StreamingResponse) con read-ahead acotado
+- 2025-12-19: Jobs de ZIP prearmado con resultado cacheado (archive_job_service)
 """
 
 from __future__ import annotations
 
 import asyncio
-import io
 import logging
 import time
-import zipfile
-from typing import List, Optional, Tuple
+from typing import AsyncIterator, List, Optional, Set, Tuple
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import Response, JSONResponse
+from fastapi.responses import Response, JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -37,6 +44,17 @@ from app.modules.auth.services import get_current_user_ctx
 from app.modules.auth.schemas.auth_context_dto import AuthContextDTO
 from app.modules.projects.models import Project
 from app.shared.observability.timed_route import TimedAPIRoute
+from app.modules.files.services.zip_stream_service import (
+    ZipStreamEntry,
+    ZipStreamStats,
+    stream_zip,
+)
+from app.modules.files.services.archive_job_service import (
+    ARCHIVE_STATUS_FAILED,
+    ARCHIVE_STATUS_READY,
+    get_archive_job_manager,
+    unique_member_name,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -60,6 +78,19 @@ class SelectedDownloadRequest(BaseModel):
     )
 
 
+class ArchiveJobResponse(BaseModel):
+    """Estado de un job de ZIP prearmado."""
+    job_id: str
+    status: str
+    cached: bool = False
+    file_count: int = 0
+    missing_count: int = 0
+    failed_count: int = 0
+    bytes: Optional[int] = None
+    error: Optional[str] = None
+    download_url: Optional[str] = None
+
+
 class DownloadErrorResponse(BaseModel):
     """Respuesta de error para descarga."""
     error: str
@@ -167,66 +198,124 @@ async def download_file_content(path: str, bucket: str) -> Tuple[Optional[bytes]
         return None, None
 
 
-async def download_files_parallel(
+async def probe_files_parallel(
     paths: List[str],
     bucket: str,
     concurrency_limit: int = DOWNLOAD_CONCURRENCY_LIMIT,
-) -> Tuple[List[Tuple[str, Optional[bytes]]], List[str], Optional[StorageRequestError], float]:
+) -> Tuple[List[Tuple[str, Optional[int]]], List[str], float]:
     """
-    Descarga múltiples archivos en paralelo con límite de concurrencia.
+    Comprueba en paralelo (HEAD) qué archivos existen antes de abrir el ZIP.
     
-    Args:
-        paths: Lista de rutas a descargar
-        bucket: Nombre del bucket
-        concurrency_limit: Máximo de descargas simultáneas
+    El código de estado (200/207/404) debe decidirse antes del primer byte,
+    así que solo se consultan metadatos; el contenido se lee después en
+    streaming.
     
     Returns:
         Tuple de:
-        - Lista de (path, content|None) para archivos procesados
+        - Lista de (path, tamaño|None) presentes, en el orden pedido
         - Lista de paths faltantes (404)
-        - StorageRequestError si hubo error crítico (None si no)
-        - Tiempo total de fetch en ms
+        - Tiempo total de las consultas en ms
     """
+    from app.shared.utils.http_storage_client import get_http_storage_client
+    
+    client = get_http_storage_client()
     semaphore = asyncio.Semaphore(concurrency_limit)
-    results: List[Tuple[str, Optional[bytes]]] = []
-    missing_paths: List[str] = []
-    critical_error: Optional[StorageRequestError] = None
     
-    async def download_with_semaphore(path: str) -> Tuple[str, Optional[bytes], Optional[StorageRequestError]]:
+    async def probe(path: str):
         async with semaphore:
-            content, error = await download_file_content(path, bucket)
-            return (path, content, error)
+            return await client.get_file_metadata(bucket, path)
     
     start_time = time.perf_counter()
+    metadata = await asyncio.gather(*(probe(p) for p in paths), return_exceptions=True)
+    probe_ms = (time.perf_counter() - start_time) * 1000
     
-    # Ejecutar todas las descargas en paralelo (respetando el semáforo)
-    tasks = [download_with_semaphore(path) for path in paths]
-    download_results = await asyncio.gather(*tasks, return_exceptions=True)
+    present: List[Tuple[str, Optional[int]]] = []
+    missing_paths: List[str] = []
+    for path, meta in zip(paths, metadata):
+        if isinstance(meta, Exception) or meta is None:
+            # Sin metadatos: se intentará la descarga y se decidirá ahí
+            present.append((path, None))
+        elif not meta.get("exists"):
+            missing_paths.append(path)
+        else:
+            present.append((path, meta.get("content_length") or None))
     
-    fetch_ms = (time.perf_counter() - start_time) * 1000
+    return present, missing_paths, probe_ms
+
+
+def _unique_zip_name(path: str, existing_names: Set[str]) -> str:
+    """
+    Nombre de la entrada en el ZIP: solo el nombre del archivo, con sufijo
+    numérico si ya existe.
+    """
+    return unique_member_name(path, existing_names)
+
+
+def _storage_stream(bucket: str, path: str):
+    """Fábrica del stream de un objeto para ZipStreamEntry."""
+    def open_stream() -> AsyncIterator[bytes]:
+        from app.shared.utils.http_storage_client import get_http_storage_client
+        return get_http_storage_client().iter_bytes(bucket, path)
+    return open_stream
+
+
+def _filter_paths(
+    paths: List[str],
+    auth_user_id: UUID,
+    project_id: UUID,
+) -> List[str]:
+    """
+    Descarta dotfiles y paths fuera del proyecto del usuario.
+
+    Raises:
+        HTTPException 400: Si no queda ningún path válido
+    """
+    valid_paths: List[str] = []
+    invalid_paths: List[str] = []
+    system_files: List[str] = []
     
-    # Procesar resultados manteniendo orden determinista
-    for i, result in enumerate(download_results):
-        path = paths[i]
-        
-        if isinstance(result, Exception):
-            logger.warning("download_parallel_exception path=%s error=%s", path, str(result))
-            missing_paths.append(path)
+    for path in paths:
+        if is_system_file(path):
+            system_files.append(path)
             continue
         
-        r_path, content, error = result
-        
-        # Si hay error de storage crítico (400/401/403/5xx), abort
-        if error is not None:
-            critical_error = error
-            break
+        if not validate_path_ownership(path, auth_user_id, project_id):
+            logger.warning(
+                "download_selected_invalid_path path=%s user=%s project=%s",
+                path, auth_user_id, project_id
+            )
+            invalid_paths.append(path)
+            continue
         
-        if content is None:
-            missing_paths.append(path)
-        else:
-            results.append((path, content))
+        valid_paths.append(path)
+    
+    if not valid_paths:
+        logger.warning(
+            "download_selected_no_valid_paths project_id=%s invalid=%d system=%d",
+            project_id, len(invalid_paths), len(system_files)
+        )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "no_valid_paths",
+                "message": "No hay archivos válidos para descargar",
+                "invalid_count": len(invalid_paths),
+                "system_files_count": len(system_files),
+            }
+        )
     
-    return results, missing_paths, critical_error, fetch_ms
+    return valid_paths
+
+
+def _normalize_user_id(raw_auth_user_id) -> UUID:
+    """Robust UUID normalization - handles both str and UUID objects."""
+    if isinstance(raw_auth_user_id, UUID):
+        return raw_auth_user_id
+    return UUID(str(raw_auth_user_id))
+
+
+def _project_prefix(auth_user_id: UUID, project_id: UUID) -> str:
+    return f"users/{auth_user_id}/projects/{project_id}/"
 
 
 # ---------------------------------------------------------------------------
@@ -262,21 +351,16 @@ async def download_selected_files(
     Descarga archivos seleccionados.
     
     - Si hay 1 archivo: descarga directa (no ZIP)
-    - Si hay 2+: genera ZIP
+    - Si hay 2+: ZIP en streaming (memoria constante, primer byte con el primer objeto)
     - Valida ownership del proyecto
     - Filtra paths inválidos y archivos del sistema
     - Retorna 200 si todos existen
     - Retorna 207 con ZIP parcial si algunos faltan (solo para multi-file, header X-Download-Missing-Count)
     - Retorna 404 si todos faltan o si el único archivo solicitado no existe
-    - Retorna 502 si hay error de storage (400/401/403/5xx desde Supabase)
+    - Retorna 502 si hay error de storage (400/401/403/5xx desde Supabase) en descarga directa;
+      en el ZIP el estado ya se envió, así que un archivo que falla se omite y se registra
     """
-    # Robust UUID normalization - handles both str and UUID objects
-    raw_auth_user_id = ctx.auth_user_id
-    if isinstance(raw_auth_user_id, UUID):
-        auth_user_id = raw_auth_user_id
-    else:
-        auth_user_id = UUID(str(raw_auth_user_id))
-    
+    auth_user_id = _normalize_user_id(ctx.auth_user_id)
     paths = request.paths
     
     logger.info(
@@ -288,39 +372,7 @@ async def download_selected_files(
     await validate_project_ownership(db, project_id, auth_user_id)
     
     # Filtrar paths
-    valid_paths: List[str] = []
-    invalid_paths: List[str] = []
-    system_files: List[str] = []
-    
-    for path in paths:
-        if is_system_file(path):
-            system_files.append(path)
-            continue
-        
-        if not validate_path_ownership(path, auth_user_id, project_id):
-            logger.warning(
-                "download_selected_invalid_path path=%s user=%s project=%s",
-                path, auth_user_id, project_id
-            )
-            invalid_paths.append(path)
-            continue
-        
-        valid_paths.append(path)
-    
-    if not valid_paths:
-        logger.warning(
-            "download_selected_no_valid_paths project_id=%s invalid=%d system=%d",
-            project_id, len(invalid_paths), len(system_files)
-        )
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail={
-                "error": "no_valid_paths",
-                "message": "No hay archivos válidos para descargar",
-                "invalid_count": len(invalid_paths),
-                "system_files_count": len(system_files),
-            }
-        )
+    valid_paths = _filter_paths(paths, auth_user_id, project_id)
     
     bucket = settings.supabase_bucket_name
     
@@ -376,59 +428,18 @@ async def download_selected_files(
             },
         )
     
-    # --- MULTIPLE FILES: descarga paralela + generar ZIP ---
+    # --- MULTIPLE FILES: ZIP en streaming ---
     total_start = time.perf_counter()
     
-    # Fase 1: Descargar archivos en paralelo
-    downloaded_files, missing_paths, critical_error, fetch_ms = await download_files_parallel(
+    # Fase 1: Existencia/tamaños (HEAD) para decidir el código de estado
+    present, missing_paths, probe_ms = await probe_files_parallel(
         valid_paths, bucket, DOWNLOAD_CONCURRENCY_LIMIT
     )
     
-    # Si hay error de storage crítico (400/401/403/5xx) -> 502
-    if critical_error is not None:
+    if not present:
         logger.warning(
-            "download_selected_multi_storage_error project_id=%s status=%d fetch_ms=%.2f",
-            project_id, critical_error.status_code, fetch_ms
-        )
-        return JSONResponse(
-            status_code=502,
-            content=critical_error.to_dict(),
-        )
-    
-    # Fase 2: Generar ZIP
-    zip_start = time.perf_counter()
-    zip_buffer = io.BytesIO()
-    downloaded_count = 0
-    
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-        existing_names: List[str] = []
-        
-        for path, content in downloaded_files:
-            if content is None:
-                continue
-            
-            # Usar solo el nombre del archivo en el ZIP (no la ruta completa)
-            filename = path.split("/")[-1] if "/" in path else path
-            
-            # Si hay duplicados, añadir sufijo numérico
-            if filename in existing_names:
-                base, ext = filename.rsplit(".", 1) if "." in filename else (filename, "")
-                counter = 1
-                while f"{base}_{counter}.{ext}" in existing_names:
-                    counter += 1
-                filename = f"{base}_{counter}.{ext}" if ext else f"{base}_{counter}"
-            
-            existing_names.append(filename)
-            zf.writestr(filename, content)
-            downloaded_count += 1
-    
-    zip_ms = (time.perf_counter() - zip_start) * 1000
-    
-    # Verificar resultado
-    if downloaded_count == 0:
-        logger.warning(
-            "download_selected_all_missing project_id=%s missing_count=%d fetch_ms=%.2f",
-            project_id, len(missing_paths), fetch_ms
+            "download_selected_all_missing project_id=%s missing_count=%d probe_ms=%.2f",
+            project_id, len(missing_paths), probe_ms
         )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -440,15 +451,21 @@ async def download_selected_files(
             }
         )
     
-    # Fase 3: Construir respuesta
-    response_start = time.perf_counter()
-    zip_content = zip_buffer.getvalue()
-    zip_size = len(zip_content)
+    # Fase 2: Entradas del ZIP (nombres únicos, contenido leído al emitir)
+    existing_names: Set[str] = set()
+    entries = [
+        ZipStreamEntry(
+            name=_unique_zip_name(path, existing_names),
+            open_stream=_storage_stream(bucket, path),
+            size=size,
+        )
+        for path, size in present
+    ]
     
     # Headers de respuesta
     headers = {
         "Content-Disposition": f'attachment; filename="project-{project_id}-selected.zip"',
-        "X-Download-Count": str(downloaded_count),
+        "X-Download-Count": str(len(entries)),
         "X-Download-Missing-Count": str(len(missing_paths)),
     }
     
@@ -456,33 +473,139 @@ async def download_selected_files(
         # Incluir hasta 5 paths faltantes en header (para debug)
         headers["X-Download-Missing-Paths"] = ",".join(missing_paths[:5])
     
-    response_obj = Response(
-        content=zip_content,
+    async def zip_body() -> AsyncIterator[bytes]:
+        stats = ZipStreamStats()
+        stream_start = time.perf_counter()
+        first_byte_ms: Optional[float] = None
+        
+        async for block in stream_zip(entries, read_ahead=DOWNLOAD_CONCURRENCY_LIMIT, stats=stats):
+            if first_byte_ms is None:
+                first_byte_ms = (time.perf_counter() - total_start) * 1000
+            yield block
+        
+        stream_ms = (time.perf_counter() - stream_start) * 1000
+        total_ms = (time.perf_counter() - total_start) * 1000
+        
+        # Log con breakdown de fases
+        if missing_paths or stats.failed:
+            logger.info(
+                "download_selected_partial project_id=%s downloaded=%d missing=%d failed=%d bytes=%d "
+                "probe_ms=%.2f first_byte_ms=%.2f stream_ms=%.2f total_ms=%.2f",
+                project_id, stats.entries_written, len(missing_paths), len(stats.failed),
+                stats.bytes_out, probe_ms, first_byte_ms or 0.0, stream_ms, total_ms
+            )
+        else:
+            logger.info(
+                "download_selected_ok project_id=%s files=%d bytes=%d "
+                "probe_ms=%.2f first_byte_ms=%.2f stream_ms=%.2f total_ms=%.2f",
+                project_id, stats.entries_written, stats.bytes_out,
+                probe_ms, first_byte_ms or 0.0, stream_ms, total_ms
+            )
+    
+    return StreamingResponse(
+        zip_body(),
         status_code=207 if missing_paths else 200,
         media_type="application/zip",
         headers=headers,
     )
+
+
+async def _archive_job_response(job) -> ArchiveJobResponse:
+    """ArchiveJobResponse del job, con URL firmada si está listo."""
+    response = ArchiveJobResponse(**job.to_dict())
+    if job.status == ARCHIVE_STATUS_READY:
+        response.download_url = await get_archive_job_manager().signed_url(job)
+    return response
+
+
+@router.post(
+    "/{project_id}/download-selected/archive",
+    summary="Preparar ZIP de archivos seleccionados en segundo plano",
+    response_model=ArchiveJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={
+        200: {"description": "ZIP ya disponible (cache): incluye download_url"},
+        202: {"description": "ZIP en preparación: consultar el job"},
+        400: {"description": "Request inválido"},
+        403: {"description": "Sin acceso al proyecto"},
+        404: {"description": "Proyecto no encontrado o ningún archivo encontrado"},
+    },
+)
+async def create_selected_archive_job(
+    project_id: UUID,
+    request: SelectedDownloadRequest,
+    ctx: AuthContextDTO = Depends(get_current_user_ctx),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Encola la preparación del ZIP de los archivos seleccionados.
+    
+    - El id del job es el hash del manifiesto (rutas + ETag + tamaño): pedir
+      de nuevo los mismos archivos sin cambios devuelve el ZIP ya guardado
+      (200 con download_url) sin recomprimir
+    - Si no existe, se arma en segundo plano y responde 202; el cliente
+      consulta GET .../archive/{job_id} hasta status=ready
+    - Los archivos faltantes se omiten (missing_count); 404 si faltan todos
+    """
+    auth_user_id = _normalize_user_id(ctx.auth_user_id)
+    await validate_project_ownership(db, project_id, auth_user_id)
+    valid_paths = _filter_paths(request.paths, auth_user_id, project_id)
     
-    response_ms = (time.perf_counter() - response_start) * 1000
-    total_ms = (time.perf_counter() - total_start) * 1000
+    job = await get_archive_job_manager().submit(
+        str(project_id), _project_prefix(auth_user_id, project_id), valid_paths
+    )
     
-    # Log con breakdown de fases
-    if missing_paths:
-        logger.info(
-            "download_selected_partial project_id=%s downloaded=%d missing=%d bytes=%d "
-            "fetch_ms=%.2f zip_ms=%.2f response_ms=%.2f total_ms=%.2f",
-            project_id, downloaded_count, len(missing_paths), zip_size,
-            fetch_ms, zip_ms, response_ms, total_ms
-        )
-    else:
-        logger.info(
-            "download_selected_ok project_id=%s files=%d bytes=%d "
-            "fetch_ms=%.2f zip_ms=%.2f response_ms=%.2f total_ms=%.2f",
-            project_id, downloaded_count, zip_size,
-            fetch_ms, zip_ms, response_ms, total_ms
+    if job.status == ARCHIVE_STATUS_FAILED and not job.members:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={
+                "error": "all_files_missing",
+                "message": "Ninguno de los archivos solicitados fue encontrado",
+                "missing_paths": job.missing_paths[:10],
+                "missing_count": len(job.missing_paths),
+            }
         )
     
-    return response_obj
+    response = await _archive_job_response(job)
+    return JSONResponse(
+        status_code=200 if job.status == ARCHIVE_STATUS_READY else 202,
+        content=response.model_dump(),
+    )
+
+
+@router.get(
+    "/{project_id}/download-selected/archive/{job_id}",
+    summary="Estado del ZIP preparado en segundo plano",
+    response_model=ArchiveJobResponse,
+    responses={
+        403: {"description": "Sin acceso al proyecto"},
+        404: {"description": "Job desconocido (volver a enviar la solicitud)"},
+    },
+)
+async def get_selected_archive_job(
+    project_id: UUID,
+    job_id: str,
+    ctx: AuthContextDTO = Depends(get_current_user_ctx),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Estado del job de ZIP; con status=ready incluye download_url (firmada).
+    
+    Un job que no está en memoria de esta instancia se busca en storage por
+    su hash; si tampoco está ahí responde 404 y el cliente debe reenviar el
+    POST (idempotente).
+    """
+    auth_user_id = _normalize_user_id(ctx.auth_user_id)
+    await validate_project_ownership(db, project_id, auth_user_id)
+    
+    if len(job_id) != 64 or any(c not in "0123456789abcdef" for c in job_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job no encontrado")
+    
+    job = await get_archive_job_manager().get(_project_prefix(auth_user_id, project_id), job_id)
+    if job is None or (job.project_id and job.project_id != str(project_id)):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job no encontrado")
+    
+    return await _archive_job_response(job)
 
 
 def _guess_content_type(filename: str) -> str:
@@ -0,0 +1,438 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/modules/files/services/archive_job_service.py
+
+Jobs asíncronos de archivos ZIP prearmados, con resultado cacheado en storage.
+
+Flujo:
+1. submit() consulta (HEAD) los objetos pedidos y calcula el hash del
+   manifiesto: rutas + ETag + tamaño de cada objeto. El hash es el id del job.
+2. Si el ZIP de ese hash ya existe en storage, el job queda 'ready' al
+   instante: exportar de nuevo un proyecto sin cambios no recomprime nada.
+3. Si no, se lanza en segundo plano un build que genera el ZIP con
+   stream_zip y lo sube en streaming (upload_stream), con memoria acotada,
+   a una clave temporal ({hash}.zip.partial). Solo un build completo se
+   mueve a la clave final, así que nunca se sirve un ZIP a medias.
+   Builds simultáneos limitados por un semáforo; pedir dos veces el mismo
+   manifiesto reutiliza el job en curso.
+4. El cliente consulta el estado con get() y, cuando está 'ready', descarga
+   el ZIP con una URL firmada (signed_url()).
+
+El ZIP se guarda bajo el prefijo del proyecto
+(users/{user}/projects/{project}/.archives/{hash}.zip), así que la política de
+retención lo elimina junto con el resto de archivos del proyecto y cualquier
+cambio en un archivo produce otro hash.
+
+El estado en curso vive en memoria del proceso; el resultado terminado es
+durable (storage), así que otra instancia lo encuentra con el mismo hash.
+Un build en el que algún miembro no se pudo leer no es la versión del
+manifiesto: el job queda 'failed' (error members_failed) y el ZIP incompleto
+se elimina para que nunca se sirva desde la cache.
+
+Autor: DoxAI
+Fecha: 2025-12-19
+Actualizado: 2025-12-20 - Build bajo clave .partial, movida a la final al terminar
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from app.modules.files.services.zip_stream_service import (
+    ZipStreamEntry,
+    ZipStreamStats,
+    stream_zip,
+)
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_STATUS_PENDING = "pending"
+ARCHIVE_STATUS_RUNNING = "running"
+ARCHIVE_STATUS_READY = "ready"
+ARCHIVE_STATUS_FAILED = "failed"
+
+ARCHIVES_DIR = ".archives"
+PARTIAL_SUFFIX = ".partial"
+DEFAULT_MAX_CONCURRENT_BUILDS = 2
+DEFAULT_PROBE_CONCURRENCY = 6
+DEFAULT_READ_AHEAD = 4
+DEFAULT_SIGNED_URL_TTL = 3600
+# Tiempo que un job terminado sigue consultable en memoria
+DEFAULT_JOB_RETENTION_SECONDS = 3600
+
+
+@dataclass(frozen=True)
+class ArchiveMember:
+    """Objeto de storage incluido en el archivo, con su versión (ETag)."""
+    path: str
+    name: str
+    size: Optional[int] = None
+    etag: Optional[str] = None
+
+
+@dataclass
+class ArchiveJob:
+    """Estado de un job de archivo; job_id es el hash del manifiesto."""
+    job_id: str
+    project_id: str
+    storage_path: str
+    status: str = ARCHIVE_STATUS_PENDING
+    members: List[ArchiveMember] = field(default_factory=list)
+    missing_paths: List[str] = field(default_factory=list)
+    failed_members: List[str] = field(default_factory=list)
+    cached: bool = False
+    error: Optional[str] = None
+    bytes_out: int = 0
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def is_done(self) -> bool:
+        return self.status in (ARCHIVE_STATUS_READY, ARCHIVE_STATUS_FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "cached": self.cached,
+            "file_count": len(self.members),
+            "missing_count": len(self.missing_paths),
+            "failed_count": len(self.failed_members),
+            "bytes": self.bytes_out or None,
+            "error": self.error,
+        }
+
+
+def compute_manifest_hash(project_id: str, members: Sequence[ArchiveMember]) -> str:
+    """
+    Hash estable del contenido del archivo.
+
+    Incluye nombre en el ZIP, ruta, ETag y tamaño de cada miembro: mismo
+    conjunto de archivos sin cambios -> mismo hash, en cualquier orden.
+    """
+    digest = hashlib.sha256(str(project_id).encode("utf-8"))
+    for m in sorted(members, key=lambda m: (m.path, m.name)):
+        digest.update(b"\0")
+        digest.update(f"{m.path}\x1f{m.name}\x1f{m.etag or ''}\x1f{m.size if m.size is not None else ''}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def archive_storage_path(project_prefix: str, manifest_hash: str) -> str:
+    """Ruta del ZIP cacheado bajo el prefijo del proyecto (users/.../projects/.../)."""
+    return f"{project_prefix.rstrip('/')}/{ARCHIVES_DIR}/{manifest_hash}.zip"
+
+
+def unique_member_name(path: str, existing_names: Set[str]) -> str:
+    """Nombre de archivo de path, con sufijo numérico si ya está en existing_names."""
+    filename = path.split("/")[-1] if "/" in path else path
+
+    if filename in existing_names:
+        base, ext = filename.rsplit(".", 1) if "." in filename else (filename, "")
+        counter = 1
+        while (f"{base}_{counter}.{ext}" if ext else f"{base}_{counter}") in existing_names:
+            counter += 1
+        filename = f"{base}_{counter}.{ext}" if ext else f"{base}_{counter}"
+
+    existing_names.add(filename)
+    return filename
+
+
+def _default_storage_client():
+    from app.shared.utils.http_storage_client import get_http_storage_client
+    return get_http_storage_client()
+
+
+class ArchiveJobManager:
+    """
+    Registro en proceso de jobs de archivo y ejecutor de sus builds.
+
+    Args:
+        bucket: Bucket de storage (por defecto settings.supabase_bucket_name)
+        storage_client_factory: Fábrica del cliente HTTP de storage (inyectable)
+        max_concurrent_builds: Builds simultáneos como máximo
+        read_ahead: Descargas simultáneas dentro de un build
+        job_retention_seconds: Tiempo que un job terminado se conserva en memoria
+    """
+
+    def __init__(
+        self,
+        *,
+        bucket: Optional[str] = None,
+        storage_client_factory: Optional[Callable[[], Any]] = None,
+        max_concurrent_builds: int = DEFAULT_MAX_CONCURRENT_BUILDS,
+        read_ahead: int = DEFAULT_READ_AHEAD,
+        job_retention_seconds: float = DEFAULT_JOB_RETENTION_SECONDS,
+    ):
+        self._bucket = bucket
+        self._client_factory = storage_client_factory or _default_storage_client
+        self._max_concurrent_builds = max(1, max_concurrent_builds)
+        self._build_slots: Optional[asyncio.Semaphore] = None
+        self.read_ahead = read_ahead
+        self.job_retention_seconds = job_retention_seconds
+        self._jobs: Dict[str, ArchiveJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @property
+    def bucket(self) -> str:
+        if self._bucket is None:
+            from app.shared.config import settings
+            self._bucket = settings.supabase_bucket_name
+        return self._bucket
+
+    def _slots(self) -> asyncio.Semaphore:
+        # Creado en el primer uso para ligarlo al event loop en marcha
+        if self._build_slots is None:
+            self._build_slots = asyncio.Semaphore(self._max_concurrent_builds)
+        return self._build_slots
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.job_retention_seconds
+        for job_id in [j for j, job in self._jobs.items() if job.is_done and (job.finished_at or 0) < cutoff]:
+            del self._jobs[job_id]
+
+    async def probe_members(
+        self,
+        paths: Sequence[str],
+        concurrency_limit: int = DEFAULT_PROBE_CONCURRENCY,
+    ) -> Tuple[List[ArchiveMember], List[str]]:
+        """
+        HEAD en paralelo de paths.
+
+        Returns:
+            (miembros presentes en el orden pedido, paths faltantes)
+        """
+        client = self._client_factory()
+        semaphore = asyncio.Semaphore(concurrency_limit)
+
+        async def probe(path: str):
+            async with semaphore:
+                return await client.get_file_metadata(self.bucket, path)
+
+        metadata = await asyncio.gather(*(probe(p) for p in paths), return_exceptions=True)
+
+        members: List[ArchiveMember] = []
+        missing: List[str] = []
+        names: Set[str] = set()
+        for path, meta in zip(paths, metadata):
+            if isinstance(meta, Exception) or meta is None:
+                # Sin metadatos no hay versión fiable: entra sin ETag
+                members.append(ArchiveMember(path, unique_member_name(path, names)))
+            elif not meta.get("exists"):
+                missing.append(path)
+            else:
+                members.append(ArchiveMember(
+                    path,
+                    unique_member_name(path, names),
+                    size=meta.get("content_length") or None,
+                    etag=meta.get("etag") or None,
+                ))
+        return members, missing
+
+    async def submit(
+        self,
+        project_id: str,
+        project_prefix: str,
+        paths: Sequence[str],
+    ) -> ArchiveJob:
+        """
+        Crea (o reutiliza) el job de archivo de paths.
+
+        Args:
+            project_id: Proyecto dueño de los archivos
+            project_prefix: Prefijo de storage del proyecto (users/{u}/projects/{p}/)
+            paths: Rutas de storage ya validadas
+
+        Returns:
+            ArchiveJob en estado ready (cache), pending/running (build en curso)
+            o failed si ninguno de los archivos existe
+        """
+        self._prune()
+        members, missing = await self.probe_members(paths)
+        manifest_hash = compute_manifest_hash(project_id, members)
+
+        job = self._jobs.get(manifest_hash)
+        if job is not None and job.status != ARCHIVE_STATUS_FAILED:
+            return job
+
+        job = ArchiveJob(
+            job_id=manifest_hash,
+            project_id=str(project_id),
+            storage_path=archive_storage_path(project_prefix, manifest_hash),
+            members=members,
+            missing_paths=missing,
+        )
+        self._jobs[manifest_hash] = job
+
+        if not members:
+            job.status = ARCHIVE_STATUS_FAILED
+            job.error = "all_files_missing"
+            job.finished_at = time.time()
+            return job
+
+        # Un manifiesto sin ETag en algún miembro no se puede validar: sin cache
+        if all(m.etag for m in members) and await self._archive_exists(job.storage_path):
+            job.status = ARCHIVE_STATUS_READY
+            job.cached = True
+            job.finished_at = time.time()
+            logger.info(
+                "archive_job_cache_hit project_id=%s job_id=%s files=%d",
+                project_id, manifest_hash, len(members),
+            )
+            return job
+
+        self._tasks[manifest_hash] = asyncio.create_task(self._build(job))
+        logger.info(
+            "archive_job_enqueued project_id=%s job_id=%s files=%d missing=%d",
+            project_id, manifest_hash, len(members), len(missing),
+        )
+        return job
+
+    async def get(self, project_prefix: str, job_id: str) -> Optional[ArchiveJob]:
+        """
+        Estado de job_id; si no está en memoria (otra instancia o reinicio)
+        busca el resultado en storage.
+        """
+        self._prune()
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        storage_path = archive_storage_path(project_prefix, job_id)
+        if await self._archive_exists(storage_path):
+            return ArchiveJob(
+                job_id=job_id,
+                project_id="",
+                storage_path=storage_path,
+                status=ARCHIVE_STATUS_READY,
+                cached=True,
+            )
+        return None
+
+    async def signed_url(self, job: ArchiveJob, expires_in: int = DEFAULT_SIGNED_URL_TTL) -> str:
+        """URL firmada del ZIP de un job ready."""
+        if job.status != ARCHIVE_STATUS_READY:
+            raise ValueError(f"Archive job {job.job_id} is not ready ({job.status})")
+        return await self._client_factory().create_signed_url(self.bucket, job.storage_path, expires_in)
+
+    async def _archive_exists(self, storage_path: str) -> bool:
+        try:
+            meta = await self._client_factory().get_file_metadata(self.bucket, storage_path)
+        except Exception:
+            return False
+        return bool(meta and meta.get("exists"))
+
+    async def _publish_archive(self, partial_path: str, storage_path: str) -> None:
+        """Mueve el ZIP completo de partial_path a su clave final."""
+        try:
+            await self._client_factory().move_file(self.bucket, partial_path, storage_path)
+        except FileExistsError:
+            # Otra instancia publicó el mismo hash (mismo contenido)
+            await self._discard_archive(partial_path)
+
+    async def _discard_archive(self, storage_path: str) -> None:
+        try:
+            await self._client_factory().delete_file(self.bucket, storage_path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning("archive_job_discard_failed path=%s error=%s", storage_path, e)
+
+    def _entry(self, member: ArchiveMember) -> ZipStreamEntry:
+        client_factory, bucket = self._client_factory, self.bucket
+
+        def open_stream():
+            return client_factory().iter_bytes(bucket, member.path)
+
+        return ZipStreamEntry(name=member.name, open_stream=open_stream, size=member.size)
+
+    async def _build(self, job: ArchiveJob) -> None:
+        start = time.perf_counter()
+        stats = ZipStreamStats()
+        try:
+            async with self._slots():
+                job.status = ARCHIVE_STATUS_RUNNING
+                body = stream_zip(
+                    [self._entry(m) for m in job.members],
+                    read_ahead=self.read_ahead,
+                    stats=stats,
+                )
+                partial_path = job.storage_path + PARTIAL_SUFFIX
+                await self._client_factory().upload_stream(
+                    self.bucket,
+                    partial_path,
+                    body,
+                    content_type="application/zip",
+                    overwrite=True,
+                )
+            job.bytes_out = stats.bytes_out
+            if stats.failed:
+                # ZIP incompleto: no corresponde al hash del manifiesto
+                await self._discard_archive(partial_path)
+                job.failed_members = [name for name, _ in stats.failed]
+                job.status = ARCHIVE_STATUS_FAILED
+                job.error = "members_failed"
+                logger.warning(
+                    "archive_job_incomplete project_id=%s job_id=%s failed=%d members=%s",
+                    job.project_id, job.job_id, len(job.failed_members), job.failed_members[:5],
+                )
+                return
+            await self._publish_archive(partial_path, job.storage_path)
+            job.status = ARCHIVE_STATUS_READY
+            logger.info(
+                "archive_job_ready project_id=%s job_id=%s files=%d bytes=%d build_ms=%.2f",
+                job.project_id, job.job_id, stats.entries_written, stats.bytes_out, (time.perf_counter() - start) * 1000,
+            )
+        except asyncio.CancelledError:
+            job.status = ARCHIVE_STATUS_FAILED
+            job.error = "cancelled"
+            raise
+        except Exception as e:
+            job.status = ARCHIVE_STATUS_FAILED
+            job.error = str(e) or type(e).__name__
+            logger.warning(
+                "archive_job_failed project_id=%s job_id=%s error=%s",
+                job.project_id, job.job_id, job.error,
+            )
+        finally:
+            job.finished_at = time.time()
+            self._tasks.pop(job.job_id, None)
+
+    async def shutdown(self) -> None:
+        """Cancela los builds en curso (shutdown del lifespan)."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+_archive_job_manager: Optional[ArchiveJobManager] = None
+
+
+def get_archive_job_manager() -> ArchiveJobManager:
+    """Instancia compartida del gestor de jobs de archivo."""
+    global _archive_job_manager
+    if _archive_job_manager is None:
+        _archive_job_manager = ArchiveJobManager()
+    return _archive_job_manager
+
+
+__all__ = [
+    "ARCHIVE_STATUS_PENDING",
+    "ARCHIVE_STATUS_RUNNING",
+    "ARCHIVE_STATUS_READY",
+    "ARCHIVE_STATUS_FAILED",
+    "ArchiveMember",
+    "ArchiveJob",
+    "ArchiveJobManager",
+    "compute_manifest_hash",
+    "archive_storage_path",
+    "unique_member_name",
+    "get_archive_job_manager",
+]
+
+# Fin del archivo backend/app/modules/files/services/archive_job_service.py
@@ -18,6 +18,7 @@ Fecha: 2025-11-22
 
 from __future__ import annotations
 
+import asyncio
 from typing import List
 from uuid import UUID
 
@@ -29,6 +30,7 @@ from app.modules.files.enums import FileRole
 from app.modules.files.models.files_base_models import FilesBase
 from app.modules.files.models.input_file_models import InputFile
 from app.modules.files.models.product_file_models import ProductFile
+from app.modules.files.services.zip_creator_service import create_zip_from_bytes
 from app.modules.files.schemas.bulk_download_schemas import (
     BulkDownloadFileInfo,
     BulkDownloadRequest,
@@ -151,8 +153,6 @@ class BulkDownloadService:
         """
         Crea un ZIP con archivos del proyecto.
         """
-        import io
-        import zipfile
         from app.modules.files.enums import FileCategory
 
         # Validar acceso
@@ -199,13 +199,8 @@ class BulkDownloadService:
                     # Skip missing files
                     continue
 
-        # Crear ZIP
-        buffer = io.BytesIO()
-        with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
-            for name, content in files_data.items():
-                zf.writestr(name, content)
-
-        return buffer.getvalue()
+        # Crear ZIP fuera del event loop (compresión por miembro)
+        return await asyncio.to_thread(create_zip_from_bytes, files_data)
 
 
 __all__ = ["build_bulk_download_manifest", "BulkDownloadService"]
@@ -3,6 +3,8 @@
 backend/app/modules/files/services/file_checksum_service.py
 
 Servicios utilitarios para cálculo y verificación de checksums de archivos.
+
+Actualizado: 2025-12-19 - StreamingChecksum para streams asíncronos (uploads)
 """
 
 from __future__ import annotations
@@ -63,6 +65,24 @@ def compute_checksum_stream(
     return h.hexdigest()
 
 
+class StreamingChecksum:
+    """
+    Checksum incremental: se alimenta bloque a bloque mientras el contenido
+    fluye hacia otro destino (p. ej. un upload en streaming), sin releerlo.
+    """
+
+    def __init__(self, algo: Union[ChecksumAlgo, str] = "sha256") -> None:
+        self._hash = _get_hash_instance(algo)
+        self.size = 0
+
+    def update(self, chunk: bytes) -> None:
+        self._hash.update(chunk)
+        self.size += len(chunk)
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
 def compute_checksum(
     data: Union[bytes, BinaryIO],
     algo: Union[ChecksumAlgo, str],
@@ -111,5 +131,6 @@ __all__ = [
     "compute_checksum",
     "compute_checksum_bytes",
     "compute_checksum_stream",
+    "StreamingChecksum",
     "verify_checksum",
 ]
@@ -7,11 +7,15 @@ Soporta múltiples algoritmos y detecta automáticamente cuando comprimir.
 
 Autor: DoxAI
 Fecha: 2025-11-05
+Actualizado:
+- 2025-12-19: Formatos OOXML/ODF como ya comprimidos; is_already_compressed y estimate_entropy
 """
 
 import gzip
+import math
 import zlib
 import brotli
+from collections import Counter
 from typing import Optional, Literal
 from dataclasses import dataclass
 import logging
@@ -78,8 +82,44 @@ class CompressionService:
         "application/gzip",
         "application/x-rar-compressed",
         "application/x-7z-compressed",
+        # Office (OOXML/ODF) son contenedores ZIP con miembros deflate
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+        "application/vnd.oasis.opendocument.text",
+        "application/vnd.oasis.opendocument.spreadsheet",
+        "application/vnd.oasis.opendocument.presentation",
+        "application/epub+zip",
     }
     
+    # Entropía (bits/byte) a partir de la cual los datos no comprimen
+    INCOMPRESSIBLE_ENTROPY = 7.5
+    
+    def is_already_compressed(self, mime_type: Optional[str]) -> bool:
+        """True si el tipo MIME corresponde a un formato ya comprimido."""
+        if not mime_type:
+            return False
+        mime_lower = mime_type.lower()
+        if mime_lower in self.ALREADY_COMPRESSED_MIME_TYPES:
+            return True
+        # Audio/vídeo e imágenes salvo los formatos sin compresión o de texto
+        return (
+            mime_lower.startswith(("image/", "video/", "audio/"))
+            and mime_lower not in ("image/svg+xml", "image/bmp", "image/tiff", "audio/wav", "audio/x-wav")
+        )
+    
+    @staticmethod
+    def estimate_entropy(sample: bytes) -> float:
+        """
+        Entropía de Shannon de una muestra, en bits por byte (0-8).
+        
+        Cerca de 8: datos aleatorios o ya comprimidos; texto ronda 4-5.
+        """
+        if not sample:
+            return 0.0
+        total = len(sample)
+        return -sum((n / total) * math.log2(n / total) for n in Counter(sample).values())
+    
     def should_compress(
         self,
         data: bytes,
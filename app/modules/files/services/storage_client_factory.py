@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/modules/files/services/storage_client_factory.py
+
+Fábrica del cliente de storage real (SupabaseStorageHTTPClient adaptado a
+AsyncStorageClient).
+
+Vive en services y no en una ruta: rutas de Files, el worker de indexación
+RAG y los jobs del scheduler la usan sin importar routers de FastAPI.
+
+- get_storage_client: insumos y productos (nunca sobrescribe).
+- get_pipeline_storage_client: artefactos del pipeline RAG (sobrescribe).
+
+Autor: DoxAI
+Fecha: 2025-12-20
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import AsyncIterable, AsyncIterator
+
+from app.modules.files.services.storage_ops_service import (
+    AsyncStorageClient,
+    DEFAULT_STREAM_CHUNK_SIZE,
+)
+
+_upload_logger = logging.getLogger("files.upload.diagnostic")
+
+
+class SupabaseAsyncStorageClient:
+    """
+    Adaptador que conecta SupabaseStorageHTTPClient con AsyncStorageClient.
+
+    overwrite decide si upload_bytes/upload_stream sobrescriben (x-upsert) un
+    objeto existente o lo conservan (409 → duplicate).
+    """
+
+    def __init__(self, client, bucket: str, overwrite: bool):
+        self._client = client
+        self._default_bucket = bucket
+        self._overwrite = overwrite
+
+    async def upload_bytes(
+        self,
+        bucket: str,
+        key: str,
+        data: bytes,
+        mime_type: str | None = None,
+    ) -> None:
+        """Sube bytes al storage usando el cliente HTTP real."""
+        _upload_logger.info(
+            "storage_upload_start: bucket=%s key=%s size=%d mime=%s",
+            bucket, key[:60] if key else "<none>", len(data), mime_type,
+        )
+
+        await self._client.upload_file(
+            bucket=bucket,
+            path=key,
+            file_data=data,
+            content_type=mime_type or "application/octet-stream",
+            overwrite=self._overwrite,
+        )
+
+        _upload_logger.info(
+            "storage_upload_ok: bucket=%s key=%s",
+            bucket, key[:60] if key else "<none>",
+        )
+
+    async def get_download_url(
+        self,
+        bucket: str,
+        key: str,
+        expires_in_seconds: int = 3600,
+    ) -> str:
+        """Genera una URL de descarga temporal firmada."""
+        return await self._client.create_signed_url(
+            bucket=bucket,
+            path=key,
+            expires_in=expires_in_seconds,
+        )
+
+    async def delete_object(
+        self,
+        bucket: str,
+        key: str,
+    ) -> None:
+        """Elimina un objeto del storage."""
+        await self._client.delete_file(bucket=bucket, path=key)
+
+    def iter_bytes(
+        self,
+        bucket: str,
+        key: str,
+        chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+    ) -> AsyncIterator[bytes]:
+        """Descarga un objeto en streaming por bloques."""
+        return self._client.iter_bytes(bucket, key, chunk_size)
+
+    async def upload_stream(
+        self,
+        bucket: str,
+        key: str,
+        stream: AsyncIterable[bytes],
+        mime_type: str | None = None,
+    ) -> None:
+        """Sube un objeto a partir de un stream de bloques."""
+        await self._client.upload_stream(
+            bucket,
+            key,
+            stream,
+            content_type=mime_type or "application/octet-stream",
+            overwrite=self._overwrite,
+            # Tamaño conocido (InputFileUploadStream): los grandes van por partes reanudables
+            content_length=getattr(stream, "declared_size", None),
+        )
+
+
+def _build_storage_client(*, overwrite: bool) -> AsyncStorageClient:
+    """Adaptador sobre el SupabaseStorageHTTPClient compartido."""
+    from app.shared.utils.http_storage_client import get_http_storage_client
+    from app.shared.config import settings
+
+    return SupabaseAsyncStorageClient(get_http_storage_client(), settings.supabase_bucket_name, overwrite)
+
+
+async def get_storage_client() -> AsyncStorageClient:
+    """
+    Devuelve un cliente de storage que implemente AsyncStorageClient.
+
+    Usa el SupabaseStorageHTTPClient real en producción. Insumos y productos
+    se suben a una ruta nueva por uuid, así que no sobrescriben nada.
+    """
+    return _build_storage_client(overwrite=False)
+
+
+async def get_pipeline_storage_client() -> AsyncStorageClient:
+    """
+    Cliente de storage para artefactos del pipeline RAG.
+
+    Las fases escriben claves fijas por job (rag-cache-jobs/{job_id}/...);
+    un reintento o reanudación debe reemplazar el objeto anterior, no
+    conservarlo, o los checksums registrados no corresponderían al archivo.
+    """
+    return _build_storage_client(overwrite=True)
+
+
+__all__ = [
+    "SupabaseAsyncStorageClient",
+    "get_storage_client",
+    "get_pipeline_storage_client",
+]
+
+# Fin del archivo backend/app/modules/files/services/storage_client_factory.py
@@ -4,11 +4,29 @@ backend/app/modules/files/services/storage_ops_service.py
 
 Servicio de alto nivel para operaciones de storage.
 Define AsyncStorageClient como protocolo y funciones helper.
+
+Incluye I/O en streaming (iter_bytes / upload_stream) para que los
+consumidores de archivos grandes mantengan la memoria acotada por el
+tamaño de bloque en lugar del tamaño del objeto.
 """
 
 from __future__ import annotations
 
-from typing import List, Optional, Protocol, runtime_checkable
+import hashlib
+import tempfile
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    BinaryIO,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+    runtime_checkable,
+)
+
+DEFAULT_STREAM_CHUNK_SIZE = 1024 * 1024
+DEFAULT_SPOOL_MAX_MEMORY = 8 * 1024 * 1024
 
 
 @runtime_checkable
@@ -47,9 +65,182 @@ class AsyncStorageClient(Protocol):
         """Elimina un objeto del storage."""
         ...
 
+    def iter_bytes(
+        self,
+        bucket: str,
+        key: str,
+        chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+    ) -> AsyncIterator[bytes]:
+        """Descarga un objeto como stream de bloques de hasta chunk_size bytes."""
+        ...
+
+    async def upload_stream(
+        self,
+        bucket: str,
+        key: str,
+        stream: AsyncIterable[bytes],
+        mime_type: str | None = None,
+    ) -> None:
+        """Sube un objeto a partir de un stream de bloques de bytes."""
+        ...
+
 
 # --- Funciones helper que usan AsyncStorageClient ---
 
+def split_storage_uri(uri: str) -> Tuple[str, str]:
+    """
+    Separa una URI 'bucket/path/to/file' en (bucket, path).
+
+    Acepta un esquema opcional ('supabase://bucket/path').
+
+    Raises:
+        ValueError: Si la URI no tiene el formato esperado
+    """
+    _, scheme_sep, rest = uri.partition("://")
+    if scheme_sep:
+        uri = rest
+    bucket, _, key = uri.partition("/")
+    if not bucket or not key:
+        raise ValueError(f"Invalid storage uri: '{uri}'. Expected 'bucket/path'")
+    return bucket, key
+
+
+async def iter_file_chunks(
+    fileobj: BinaryIO,
+    chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+) -> AsyncIterator[bytes]:
+    """Itera un archivo local abierto en bloques (para upload_stream)."""
+    while True:
+        block = fileobj.read(chunk_size)
+        if not block:
+            return
+        yield block
+
+
+class StreamDigest:
+    """SHA-256 y tamaño acumulados de los bloques que pasan por un stream."""
+
+    def __init__(self) -> None:
+        self._sha256 = hashlib.sha256()
+        self.byte_size = 0
+
+    def update(self, block: bytes) -> None:
+        self._sha256.update(block)
+        self.byte_size += len(block)
+
+    def hexdigest(self) -> str:
+        return self._sha256.hexdigest()
+
+
+async def iter_text_chunks(
+    text: str,
+    chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+    encoding: str = "utf-8",
+    digest: Optional[StreamDigest] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Codifica un str por bloques para subirlo sin duplicarlo entero en bytes.
+
+    Si se pasa `digest`, se actualiza con cada bloque emitido (checksum y
+    tamaño del objeto subido sin volver a codificar el texto).
+    """
+    for start in range(0, len(text), chunk_size):
+        block = text[start:start + chunk_size].encode(encoding)
+        if digest is not None:
+            digest.update(block)
+        yield block
+
+
+async def download_to_file(
+    storage_client: AsyncStorageClient,
+    fileobj: BinaryIO,
+    *,
+    bucket: str,
+    key: str,
+    chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+) -> int:
+    """
+    Descarga un objeto en streaming sobre un archivo local abierto.
+
+    Returns:
+        Número de bytes escritos
+    """
+    written = 0
+    async for block in storage_client.iter_bytes(bucket, key, chunk_size):
+        fileobj.write(block)
+        written += len(block)
+    fileobj.flush()
+    return written
+
+
+async def spool_object(
+    storage_client: AsyncStorageClient,
+    *,
+    bucket: str,
+    key: str,
+    chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+    max_memory: int = DEFAULT_SPOOL_MAX_MEMORY,
+) -> tempfile.SpooledTemporaryFile:
+    """
+    Descarga un objeto a un SpooledTemporaryFile rebobinado.
+
+    Hasta max_memory bytes quedan en memoria; por encima se vuelca a disco.
+    El llamador es responsable de cerrarlo.
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=max_memory, mode="w+b")
+    try:
+        await download_to_file(
+            storage_client, spooled, bucket=bucket, key=key, chunk_size=chunk_size
+        )
+        spooled.seek(0)
+        return spooled
+    except BaseException:
+        spooled.close()
+        raise
+
+
+async def checksum_object(
+    storage_client: AsyncStorageClient,
+    *,
+    bucket: str,
+    key: str,
+    chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+) -> Tuple[int, str]:
+    """
+    Calcula tamaño y SHA-256 de un objeto leyéndolo en streaming.
+
+    Returns:
+        Tupla (byte_size, checksum hexadecimal)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    async for block in storage_client.iter_bytes(bucket, key, chunk_size):
+        digest.update(block)
+        size += len(block)
+    return size, digest.hexdigest()
+
+
+async def upload_file_stream(
+    storage_client: AsyncStorageClient,
+    *,
+    bucket: str,
+    key: str,
+    stream: AsyncIterable[bytes],
+    mime_type: str | None = None,
+) -> None:
+    """
+    Sube un stream de bloques de bytes usando el cliente proporcionado.
+
+    Args:
+        storage_client: Cliente de storage que implementa AsyncStorageClient
+        bucket: Nombre del bucket
+        key: Ruta/clave del archivo en el storage
+        stream: Iterable asíncrono de bloques (p.ej. iter_file_chunks)
+        mime_type: Tipo MIME del archivo (opcional)
+    """
+    await storage_client.upload_stream(bucket, key, stream, mime_type)
+
+
 async def upload_file_bytes(
     storage_client: AsyncStorageClient,
     *,
@@ -180,6 +371,16 @@ class StorageOpsService:
 __all__ = [
     "AsyncStorageClient",
     "StorageOpsService",
+    "StreamDigest",
+    "DEFAULT_STREAM_CHUNK_SIZE",
+    "DEFAULT_SPOOL_MAX_MEMORY",
+    "split_storage_uri",
+    "iter_file_chunks",
+    "iter_text_chunks",
+    "download_to_file",
+    "spool_object",
+    "checksum_object",
+    "upload_file_stream",
     "upload_file_bytes",
     "generate_download_url",
     "delete_file_from_storage",
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/modules/files/services/zip_compression_policy.py
+
+Política de compresión por miembro para los ZIP exportados.
+
+PDFs, imágenes, DOCX/XLSX (contenedores ZIP) y similares no se reducen al
+recomprimirlos: deflate solo gasta CPU. choose_zip_compression decide por
+entrada entre ZIP_STORED y ZIP_DEFLATED con un nivel:
+
+1. Tipo MIME (explícito o deducido de la extensión) ya comprimido -> stored
+2. Archivos diminutos -> stored (la cabecera deflate no compensa)
+3. Tipo de texto conocido -> deflate nivel por defecto
+4. Resto: entropía de una muestra (primer bloque) -> stored / nivel rápido /
+   nivel por defecto
+
+Reutiliza las listas de CompressionService para no duplicar heurísticas.
+
+Autor: DoxAI
+Fecha: 2025-12-19
+"""
+
+from __future__ import annotations
+
+import mimetypes
+import zipfile
+from dataclasses import dataclass
+from typing import Optional
+
+from app.modules.files.services.storage.compression_service import get_compression_service
+
+# Muestra usada para estimar entropía
+SAMPLE_BYTES = 64 * 1024
+# Entre esta entropía y la de "incompresible" se usa el nivel rápido
+FAST_LEVEL_ENTROPY = 6.0
+DEFAULT_LEVEL = 6
+FAST_LEVEL = 1
+
+# Extensiones que mimetypes no siempre conoce
+_EXTRA_MIME_TYPES = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    "odt": "application/vnd.oasis.opendocument.text",
+    "ods": "application/vnd.oasis.opendocument.spreadsheet",
+    "odp": "application/vnd.oasis.opendocument.presentation",
+    "webp": "image/webp",
+    "7z": "application/x-7z-compressed",
+    "rar": "application/x-rar-compressed",
+}
+
+
+@dataclass(frozen=True)
+class ZipCompression:
+    """Método (ZIP_STORED / ZIP_DEFLATED) y nivel de un miembro."""
+    compress_type: int
+    level: Optional[int] = None
+
+    @property
+    def is_stored(self) -> bool:
+        return self.compress_type == zipfile.ZIP_STORED
+
+    def apply(self, info: zipfile.ZipInfo) -> zipfile.ZipInfo:
+        """Aplica la política a un ZipInfo (zipfile lee el nivel de _compresslevel)."""
+        info.compress_type = self.compress_type
+        info._compresslevel = self.level
+        return info
+
+
+STORED = ZipCompression(zipfile.ZIP_STORED)
+DEFLATE_FAST = ZipCompression(zipfile.ZIP_DEFLATED, FAST_LEVEL)
+DEFLATE_DEFAULT = ZipCompression(zipfile.ZIP_DEFLATED, DEFAULT_LEVEL)
+
+
+def guess_mime_type(name: str) -> Optional[str]:
+    """Tipo MIME a partir del nombre del miembro."""
+    ext = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+    if ext in _EXTRA_MIME_TYPES:
+        return _EXTRA_MIME_TYPES[ext]
+    return mimetypes.guess_type(name)[0]
+
+
+def choose_zip_compression(
+    name: str,
+    *,
+    mime_type: Optional[str] = None,
+    sample: Optional[bytes] = None,
+    size: Optional[int] = None,
+) -> ZipCompression:
+    """
+    Elige la compresión de un miembro del ZIP.
+
+    Args:
+        name: Nombre del miembro (para deducir el tipo si no se da)
+        mime_type: Tipo MIME conocido
+        sample: Primeros bytes del contenido (hasta SAMPLE_BYTES)
+        size: Tamaño total si se conoce
+
+    Returns:
+        ZipCompression a aplicar
+    """
+    service = get_compression_service()
+    mime_type = mime_type or guess_mime_type(name)
+
+    if service.is_already_compressed(mime_type):
+        return STORED
+
+    if size is not None and size < service.MIN_SIZE_FOR_COMPRESSION:
+        return STORED
+
+    if mime_type and (mime_type.lower() in service.COMPRESSIBLE_MIME_TYPES or mime_type.startswith("text/")):
+        return DEFLATE_DEFAULT
+
+    if sample:
+        entropy = service.estimate_entropy(sample[:SAMPLE_BYTES])
+        if entropy >= service.INCOMPRESSIBLE_ENTROPY:
+            return STORED
+        if entropy >= FAST_LEVEL_ENTROPY:
+            return DEFLATE_FAST
+
+    return DEFLATE_DEFAULT
+
+
+__all__ = [
+    "ZipCompression",
+    "STORED",
+    "DEFLATE_FAST",
+    "DEFLATE_DEFAULT",
+    "guess_mime_type",
+    "choose_zip_compression",
+]
+
+# Fin del archivo backend/app/modules/files/services/zip_compression_policy.py
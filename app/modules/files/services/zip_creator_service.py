@@ -3,31 +3,51 @@
 backend/app/modules/files/services/zip_creator_service.py
 
 Servicio para creación de archivos ZIP.
+
+Actualizado: 2025-12-19 - Compresión por miembro (zip_compression_policy)
 """
 
 from __future__ import annotations
 
 import io
+import time
 import zipfile
-from typing import Dict
+from typing import Dict, Mapping, Optional
+
+from app.modules.files.services.zip_compression_policy import choose_zip_compression
 
 
-def create_zip_from_bytes(files: Dict[str, bytes]) -> bytes:
+def create_zip_from_bytes(
+    files: Dict[str, bytes],
+    mime_types: Optional[Mapping[str, str]] = None,
+) -> bytes:
     """
     Crea un archivo ZIP en memoria a partir de un diccionario de archivos.
-    
+
+    Los miembros ya comprimidos (PDF, imágenes, Office...) se guardan sin
+    recomprimir; el resto se comprime con el nivel que elija la política.
+    Es CPU pura: desde código async conviene llamarla con asyncio.to_thread.
+
     Args:
         files: Diccionario de nombre -> contenido (bytes)
-        
+        mime_types: Tipos MIME conocidos por nombre (opcional)
+
     Returns:
         Bytes del archivo ZIP
     """
     buffer = io.BytesIO()
-    
+    mime_types = mime_types or {}
+    date_time = time.localtime()[:6]
+
     with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
         for name, content in files.items():
-            zf.writestr(name, content)
-    
+            info = zipfile.ZipInfo(name, date_time=date_time)
+            info.external_attr = 0o600 << 16
+            choose_zip_compression(
+                name, mime_type=mime_types.get(name), sample=content, size=len(content)
+            ).apply(info)
+            zf.writestr(info, content)
+
     return buffer.getvalue()
 
 
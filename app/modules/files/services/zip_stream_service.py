@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/modules/files/services/zip_stream_service.py
+
+Generación de ZIP en streaming con memoria constante.
+
+stream_zip() produce el ZIP como un iterador asíncrono de bloques, apto para
+StreamingResponse:
+- zipfile escribe sobre un sumidero no posicionable, así que cada entrada
+  lleva data descriptor (CRC y tamaños después de los datos) y no hace falta
+  conocer el tamaño antes de empezar. ZIP64 se activa por entrada cuando el
+  tamaño es desconocido o grande, y en el directorio central cuando hace falta.
+- Los objetos se leen con read-ahead acotado: como mucho `read_ahead`
+  descargas en curso y `queue_chunks` bloques en cola por descarga. La
+  memoria queda en read_ahead * queue_chunks * tamaño de bloque.
+- Las entradas se emiten en el orden recibido; el primer byte sale en cuanto
+  llega el primer bloque del primer objeto.
+- Cada entrada se guarda (ZIP_STORED) o se comprime con un nivel según
+  zip_compression_policy, a partir del tipo y del primer bloque recibido.
+
+Autor: DoxAI
+Fecha: 2025-12-19
+Actualizado: 2025-12-19 - Política de compresión por entrada
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import zipfile
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Deque, Iterable, List, Optional, Tuple
+
+from app.modules.files.services.zip_compression_policy import choose_zip_compression
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_READ_AHEAD = 4
+DEFAULT_QUEUE_CHUNKS = 4
+
+_END = object()
+
+
+@dataclass
+class ZipStreamEntry:
+    """Una entrada del ZIP: nombre y fábrica del stream de su contenido."""
+    name: str
+    open_stream: Callable[[], AsyncIterator[bytes]]
+    size: Optional[int] = None  # tamaño conocido (HEAD); None = desconocido
+    mime_type: Optional[str] = None
+
+
+@dataclass
+class ZipStreamStats:
+    """Resumen de un stream_zip, disponible al terminar de consumirlo."""
+    entries_written: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    entries_stored: int = 0
+    failed: Optional[List[Tuple[str, Exception]]] = None
+
+
+class _ChunkSink:
+    """Destino no posicionable para zipfile: acumula lo escrito hasta drain()."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def _pump(entry: ZipStreamEntry, queue: "asyncio.Queue") -> None:
+    """Descarga entry hacia queue; termina con _END o con la excepción."""
+    try:
+        async for block in entry.open_stream():
+            if block:
+                await queue.put(block)
+        await queue.put(_END)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        await queue.put(e)
+
+
+def _zip_info(entry: ZipStreamEntry, sample: bytes) -> Tuple[zipfile.ZipInfo, bool]:
+    """ZipInfo de la entrada y si debe forzarse ZIP64 (tamaño desconocido)."""
+    info = zipfile.ZipInfo(entry.name, date_time=time.localtime()[:6])
+    choose_zip_compression(
+        entry.name, mime_type=entry.mime_type, sample=sample, size=entry.size
+    ).apply(info)
+    info.external_attr = 0o644 << 16
+    if entry.size is not None:
+        # zipfile decide ZIP64 a partir de file_size
+        info.file_size = entry.size
+        return info, False
+    return info, True
+
+
+async def stream_zip(
+    entries: Iterable[ZipStreamEntry],
+    *,
+    read_ahead: int = DEFAULT_READ_AHEAD,
+    queue_chunks: int = DEFAULT_QUEUE_CHUNKS,
+    stats: Optional[ZipStreamStats] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Genera un ZIP en streaming a partir de entries.
+
+    Una entrada cuyo stream falla antes de su primer bloque se omite (queda
+    en stats.failed). Un fallo a mitad de una entrada ya emitida no se puede
+    deshacer: se propaga y el cliente recibe un ZIP truncado.
+
+    Args:
+        entries: Entradas en el orden en que deben aparecer
+        read_ahead: Descargas simultáneas como máximo
+        queue_chunks: Bloques en cola por descarga
+        stats: Contadores opcionales que se rellenan durante el stream
+
+    Yields:
+        Bloques de bytes del ZIP
+    """
+    stats = stats if stats is not None else ZipStreamStats()
+    stats.failed = stats.failed if stats.failed is not None else []
+    pending = iter(entries)
+    inflight: Deque[Tuple[ZipStreamEntry, asyncio.Queue, asyncio.Task]] = deque()
+
+    def _fill() -> None:
+        while len(inflight) < max(1, read_ahead):
+            entry = next(pending, None)
+            if entry is None:
+                return
+            queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_chunks))
+            inflight.append((entry, queue, asyncio.create_task(_pump(entry, queue))))
+
+    task: Optional[asyncio.Task] = None
+    sink = _ChunkSink()
+    zf = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED, allowZip64=True)
+    try:
+        _fill()
+        while inflight:
+            # La entrada en curso cuenta dentro de read_ahead
+            entry, queue, task = inflight.popleft()
+
+            item = await queue.get()
+            if isinstance(item, Exception):
+                logger.warning("zip_stream_entry_skipped name=%s error=%s", entry.name, item)
+                stats.failed.append((entry.name, item))
+                _fill()
+                continue
+
+            info, force_zip64 = _zip_info(entry, item if item is not _END else b"")
+            if info.compress_type == zipfile.ZIP_STORED:
+                stats.entries_stored += 1
+            with zf.open(info, mode="w", force_zip64=force_zip64) as dest:
+                while item is not _END:
+                    if isinstance(item, Exception):
+                        raise item
+                    stats.bytes_in += len(item)
+                    if info.compress_type == zipfile.ZIP_STORED:
+                        # Solo CRC: no compensa saltar a un hilo
+                        dest.write(item)
+                    else:
+                        # Compresión fuera del event loop
+                        await asyncio.to_thread(dest.write, item)
+                    out = sink.drain()
+                    if out:
+                        stats.bytes_out += len(out)
+                        yield out
+                    item = await queue.get()
+            stats.entries_written += 1
+            _fill()
+            out = sink.drain()
+            if out:
+                stats.bytes_out += len(out)
+                yield out
+
+        zf.close()
+        out = sink.drain()
+        stats.bytes_out += len(out)
+        yield out
+    finally:
+        # Cliente desconectado o error: no dejar descargas huérfanas
+        if task is not None:
+            task.cancel()
+        for _, _, queued in inflight:
+            queued.cancel()
+
+
+__all__ = [
+    "ZipStreamEntry",
+    "ZipStreamStats",
+    "stream_zip",
+    "DEFAULT_READ_AHEAD",
+]
+
+# Fin del archivo backend/app/modules/files/services/zip_stream_service.py
@@ -1,289 +1,86 @@
 # -*- coding: utf-8 -*-
 """
-backend/app/services/rag/converters/azure_document_intelligence_client.py
+backend/app/modules/rag/adapters/azure/azure_document_intelligence_client.py
 
-**CLIENTE BASE PARA AZURE DOCUMENT INTELLIGENCE**
-Define interfaces y estructura para integración futura con Azure Cognitive Services.
+Adaptador OCR de Azure Document Intelligence para el pipeline RAG.
 
-Este módulo proporciona:
-- Cliente base con métodos stub
-- Estructura de llamadas a la API
-- Transformación de respuestas al formato interno
-- Manejo de errores y reintentos
+El cliente HTTP vive en app.shared.integrations.azure_document_intelligence
+(async, pool keep-alive, polling adaptativo con Retry-After y envío de PDFs
+grandes por rangos de páginas en paralelo). Este módulo lo configura desde
+rag_config y mantiene una instancia por proceso:
+
+- get_azure_ocr_client(): cliente compartido, o None si faltan credenciales
+- close_azure_ocr_client(): cierre en el shutdown (lifespan / worker)
 
 Author: DoxAI
 Date: 14/10/2025 (FASE 4 - Interfaces OCR Cloud)
+Actualizado: 2025-12-14 - Adaptador real sobre el cliente async compartido
 """
 
 import logging
-from typing import Optional, Dict, Any, BinaryIO
-from pathlib import Path
-import time
+from typing import Optional
 
-from .azure_types import (
-    AzureConfig,
-    AzureModelId,
-    AzureAnalysisStatus,
-    AzureDocumentResult,
-    ConvertedDocument,
+from app.modules.rag.config import rag_config
+from app.shared.integrations.azure_document_intelligence import (
+    AzureDocumentIntelligenceClient,
+    AzureOcrResult,
 )
 
 
 logger = logging.getLogger(__name__)
 
-
-class AzureDocumentIntelligenceClient:
-    """
-    Cliente para Azure Document Intelligence API.
-    
-    Este es un cliente preparatorio con métodos stub que definen
-    la interfaz esperada. La implementación real se completará
-    cuando se tenga acceso a las credenciales de Azure.
-    
-    Flujo de trabajo:
-    1. submit_analysis() - Envía documento y retorna operation_id
-    2. poll_analysis_status() - Consulta estado hasta completion
-    3. get_analysis_result() - Obtiene resultado final
-    4. convert_to_internal_format() - Transforma a formato unificado
-    """
-    
-    def __init__(self, config: AzureConfig):
-        """
-        Inicializa el cliente con configuración de Azure.
-        
-        Args:
-            config: Configuración con endpoint, API key, versión, etc.
-        """
-        self.endpoint = config.get("endpoint", "")
-        self.api_key = config.get("api_key", "")
-        self.api_version = config.get("api_version", "2024-07-31-preview")
-        self.default_model = config.get("default_model", AzureModelId.PREBUILT_LAYOUT)
-        self.timeout_sec = config.get("timeout_sec", 300)
-        self.max_retries = config.get("max_retries", 3)
-        
-        logger.info(
-            f"AzureDocumentIntelligenceClient initialized with endpoint: {self.endpoint}"
-        )
-    
-    def is_configured(self) -> bool:
-        """
-        Verifica si el cliente está configurado correctamente.
-        
-        Returns:
-            True si tiene endpoint y API key, False en caso contrario
-        """
-        return bool(self.endpoint and self.api_key)
-    
-    def submit_analysis(
-        self,
-        file_path: Path,
-        model_id: Optional[str] = None,
-        features: Optional[list] = None,
-    ) -> Dict[str, Any]:
-        """
-        Envía un documento para análisis asíncrono.
-        
-        Args:
-            file_path: Ruta al archivo PDF a analizar
-            model_id: Modelo a usar (por defecto: prebuilt-layout)
-            features: Features opcionales (ej: ["keyValuePairs", "languages"])
-        
-        Returns:
-            Dict con:
-                - operation_id: ID de la operación para polling
-                - operation_location: URL para consultar estado
-                - status: Estado inicial
-        
-        Raises:
-            NotImplementedError: Hasta que se implemente con credenciales reales
-        """
-        model_id = model_id or self.default_model
-        features = features or []
-        
-        logger.info(
-            f"[STUB] submit_analysis called for {file_path.name} "
-            f"with model={model_id}, features={features}"
-        )
-        
-        # TODO: Implementar llamada real cuando tengamos credenciales
-        # Endpoint: POST {endpoint}/documentintelligence/documentModels/{modelId}:analyze
-        # Headers: Ocp-Apim-Subscription-Key: {api_key}
-        # Body: application/pdf (binary) o application/json con URL
-        
-        raise NotImplementedError(
-            "Azure Document Intelligence client not yet implemented. "
-            "This method will be completed when Azure credentials are available."
-        )
-    
-    def poll_analysis_status(
-        self,
-        operation_id: str,
-        poll_interval_sec: float = 2.0,
-        max_wait_sec: Optional[int] = None,
-    ) -> AzureAnalysisStatus:
-        """
-        Consulta el estado de una operación de análisis hasta que complete.
-        
-        Args:
-            operation_id: ID de la operación retornado por submit_analysis
-            poll_interval_sec: Intervalo entre consultas
-            max_wait_sec: Tiempo máximo de espera (None = usar self.timeout_sec)
-        
-        Returns:
-            Estado final: SUCCEEDED, FAILED, o CANCELED
-        
-        Raises:
-            TimeoutError: Si excede el tiempo máximo
-            NotImplementedError: Hasta que se implemente con credenciales reales
-        """
-        max_wait = max_wait_sec or self.timeout_sec
-        
-        logger.info(
-            f"[STUB] poll_analysis_status called for operation_id={operation_id}, "
-            f"max_wait={max_wait}s, interval={poll_interval_sec}s"
-        )
-        
-        # TODO: Implementar polling real
-        # Endpoint: GET {operation_location}
-        # Response incluye: status, createdDateTime, lastUpdatedDateTime, analyzeResult
-        
-        raise NotImplementedError(
-            "Azure Document Intelligence client not yet implemented. "
-            "This method will be completed when Azure credentials are available."
-        )
-    
-    def get_analysis_result(self, operation_id: str) -> AzureDocumentResult:
-        """
-        Obtiene el resultado completo del análisis.
-        
-        Args:
-            operation_id: ID de la operación completada
-        
-        Returns:
-            Resultado completo con pages, paragraphs, tables, etc.
-        
-        Raises:
-            NotImplementedError: Hasta que se implemente con credenciales reales
-        """
-        logger.info(f"[STUB] get_analysis_result called for operation_id={operation_id}")
-        
-        # TODO: Implementar obtención de resultado
-        # Endpoint: GET {operation_location}
-        # Parsear analyzeResult del response
-        
-        raise NotImplementedError(
-            "Azure Document Intelligence client not yet implemented. "
-            "This method will be completed when Azure credentials are available."
-        )
-    
-    def analyze_document_sync(
-        self,
-        file_path: Path,
-        model_id: Optional[str] = None,
-        features: Optional[list] = None,
-    ) -> ConvertedDocument:
-        """
-        Método de conveniencia que hace el flujo completo de forma síncrona.
-        
-        Args:
-            file_path: Ruta al archivo PDF
-            model_id: Modelo a usar
-            features: Features opcionales
-        
-        Returns:
-            Documento convertido en formato interno unificado
-        
-        Raises:
-            NotImplementedError: Hasta que se implemente con credenciales reales
-        """
-        logger.info(f"[STUB] analyze_document_sync called for {file_path.name}")
-        
-        # Flujo completo:
-        # 1. submit_analysis()
-        # 2. poll_analysis_status() hasta SUCCEEDED
-        # 3. get_analysis_result()
-        # 4. convert_to_internal_format()
-        
-        raise NotImplementedError(
-            "Azure Document Intelligence client not yet implemented. "
-            "This method will be completed when Azure credentials are available."
-        )
-    
-    def convert_to_internal_format(
-        self, azure_result: AzureDocumentResult
-    ) -> ConvertedDocument:
-        """
-        Convierte el resultado de Azure al formato interno unificado.
-        
-        Args:
-            azure_result: Resultado completo de Azure Document Intelligence
-        
-        Returns:
-            Documento en formato interno con text, pages, paragraphs, tables
-        
-        Raises:
-            NotImplementedError: Hasta que se implemente la transformación
-        """
-        logger.info("[STUB] convert_to_internal_format called")
-        
-        # TODO: Implementar transformación
-        # - Extraer texto completo de pages y paragraphs
-        # - Convertir tablas al formato esperado por el sistema
-        # - Preservar metadata (bounding boxes, confidence, etc.)
-        # - Normalizar estructura para compatibilidad con pipeline existente
-        
-        raise NotImplementedError(
-            "Result conversion not yet implemented. "
-            "This method will transform Azure results to internal format."
-        )
+_client: Optional[AzureDocumentIntelligenceClient] = None
 
 
-def create_azure_client_from_env() -> Optional[AzureDocumentIntelligenceClient]:
+def create_azure_client_from_config() -> Optional[AzureDocumentIntelligenceClient]:
     """
-    Factory function para crear cliente desde variables de entorno.
-    
-    Variables esperadas:
-    - AZURE_DOCUMENT_INTELLIGENCE_ENDPOINT
-    - AZURE_DOCUMENT_INTELLIGENCE_KEY
-    - AZURE_DOCUMENT_INTELLIGENCE_API_VERSION (opcional)
-    
+    Crea un cliente con la configuración RAG (RAG_AZURE_OCR_*).
+
     Returns:
-        Cliente configurado, o None si faltan credenciales
+        Cliente configurado, o None si faltan endpoint o API key
     """
-    import os
-    
-    endpoint = os.getenv("AZURE_DOCUMENT_INTELLIGENCE_ENDPOINT", "")
-    api_key = os.getenv("AZURE_DOCUMENT_INTELLIGENCE_KEY", "")
-    api_version = os.getenv("AZURE_DOCUMENT_INTELLIGENCE_API_VERSION", "2024-07-31-preview")
-    
-    if not endpoint or not api_key:
+    if not rag_config.azure_ocr_endpoint or not rag_config.azure_ocr_key:
         logger.warning(
-            "Azure Document Intelligence credentials not found in environment. "
-            "Client will not be available."
+            "Azure Document Intelligence credentials not configured "
+            "(RAG_AZURE_OCR_ENDPOINT / RAG_AZURE_OCR_KEY). OCR will not be available."
         )
         return None
-    
-    config: AzureConfig = {
-        "endpoint": endpoint,
-        "api_key": api_key,
-        "api_version": api_version,
-        "default_model": AzureModelId.PREBUILT_LAYOUT,
-        "timeout_sec": 300,
-        "max_retries": 3,
-    }
-    
-    return AzureDocumentIntelligenceClient(config)
-
-
-# Export
-__all__ = [
-    'AzureDocumentIntelligenceClient',
-    'create_azure_client_from_env',
-]
 
+    return AzureDocumentIntelligenceClient(
+        rag_config.azure_ocr_endpoint,
+        rag_config.azure_ocr_key,
+        api_version=rag_config.azure_ocr_api_version,
+        timeout_sec=rag_config.azure_ocr_timeout_seconds,
+        polling_interval_sec=rag_config.azure_ocr_poll_interval_seconds,
+        polling_max_interval_sec=rag_config.azure_ocr_poll_max_interval_seconds,
+        max_parallel_requests=rag_config.azure_ocr_max_parallel_requests,
+        pages_per_request=rag_config.azure_ocr_pages_per_request,
+        split_min_pages=rag_config.azure_ocr_split_min_pages,
+    )
 
 
+def get_azure_ocr_client() -> Optional[AzureDocumentIntelligenceClient]:
+    """Obtiene el cliente OCR compartido por proceso (None si no hay credenciales)."""
+    global _client
+    if _client is None:
+        _client = create_azure_client_from_config()
+    return _client
 
 
+async def close_azure_ocr_client() -> None:
+    """Cierra el cliente compartido (shutdown del lifespan o del worker)."""
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
+        logger.info("✅ Cliente Azure Document Intelligence cerrado")
 
 
+# Export
+__all__ = [
+    'AzureDocumentIntelligenceClient',
+    'AzureOcrResult',
+    'create_azure_client_from_config',
+    'get_azure_ocr_client',
+    'close_azure_ocr_client',
+]
@@ -21,6 +21,20 @@ class RagConfig(BaseSettings):
         AZURE_OCR_ENDPOINT: Endpoint de Azure Cognitive Services
         AZURE_OCR_KEY: API key de Azure
         AZURE_OCR_STRATEGY_DEFAULT: Estrategia por defecto (fast/accurate/balanced)
+        AZURE_OCR_API_VERSION: Versión de la API de Document Intelligence
+        AZURE_OCR_TIMEOUT_SECONDS: Espera máxima por análisis (o por rango de páginas)
+        AZURE_OCR_POLL_INTERVAL_SECONDS: Primer intervalo de polling sin Retry-After
+        AZURE_OCR_POLL_MAX_INTERVAL_SECONDS: Intervalo máximo de polling adaptativo
+        AZURE_OCR_MAX_PARALLEL_REQUESTS: Rangos de páginas analizándose a la vez por documento
+        AZURE_OCR_PAGES_PER_REQUEST: Páginas por rango al dividir un PDF grande
+        AZURE_OCR_SPLIT_MIN_PAGES: PDFs con al menos estas páginas se dividen en rangos
+        OCR_PAGE_CACHE_ENABLED: Habilita la caché OCR por página (bucket rag-cache-pages)
+        
+        # Conversión
+        CONVERT_MAX_WORKERS: Procesos del pool de extracción nativa (PDF/DOCX/XLSX)
+        PAGE_PLAN_ENABLED: Clasifica páginas PDF (nativa/escaneada) para OCR solo de páginas de imagen
+        PAGE_PLAN_MIN_TEXT_CHARS: Caracteres de texto por debajo de los cuales una página no es nativa
+        PAGE_PLAN_MIN_IMAGE_COVERAGE: Fracción del área cubierta por imágenes para enviar la página a OCR
         
         # Embeddings
         EMBEDDINGS_PROVIDER: Proveedor de embeddings (openai/azure)
@@ -28,21 +42,66 @@ class RagConfig(BaseSettings):
         EMBEDDINGS_ENDPOINT: Endpoint (para Azure)
         EMBEDDINGS_MODEL_DEFAULT: Modelo por defecto
         EMBEDDINGS_DIMENSION_DEFAULT: Dimensión por defecto del vector
+        EMBEDDINGS_BATCH_MAX_TOKENS: Presupuesto de tokens por request de embeddings
+        EMBEDDINGS_BATCH_MAX_ITEMS: Máximo de textos por request de embeddings
+        EMBEDDINGS_MAX_CONCURRENCY: Requests de embeddings simultáneos por archivo
+        EMBEDDING_CACHE_ENABLED: Habilita la caché persistente de embeddings por contenido
+        EMBEDDING_CACHE_MAX_ENTRIES: Máximo de entradas antes de la eviction LRU
+        EMBEDDING_CACHE_EVICT_INTERVAL_SECONDS: Intervalo mínimo entre evictions por proceso
         
         # Chunking
         CHUNK_MAX_TOKENS_DEFAULT: Máximo de tokens por chunk
         CHUNK_OVERLAP_DEFAULT: Overlap entre chunks (en tokens)
+        CHUNK_TOKENIZER_ENCODING: Codificación BPE de tiktoken para contar tokens
+        
+        # Búsqueda vectorial
+        VECTOR_SEARCH_EXACT_THRESHOLD: Máximo de candidatos para usar búsqueda exacta
+        VECTOR_SEARCH_EF_SEARCH: Tamaño de lista candidata HNSW (hnsw.ef_search)
+        VECTOR_SEARCH_ITERATIVE_SCAN: hnsw.iterative_scan en búsquedas ANN filtradas
+            (relaxed_order/strict_order; "off" para pgvector < 0.8)
         
         # Storage
         STORAGE_BACKEND: Backend de almacenamiento (supabase/local)
         STORAGE_BUCKET_NAME: Nombre del bucket
         STORAGE_BASE_PATH: Path base (para local)
+        STORAGE_STREAM_CHUNK_BYTES: Tamaño de bloque para I/O en streaming de las fases
+        STORAGE_SPOOL_MAX_MEMORY_BYTES: Bytes en memoria antes de volcar a disco (spool)
+        
+        # Worker de indexación (cola durable rag_job_queue)
+        WORKER_CONCURRENCY: Jobs ejecutados en paralelo por proceso worker
+        WORKER_POLL_INTERVAL_SECONDS: Espera entre claims cuando la cola está vacía
+        WORKER_HEARTBEAT_INTERVAL_SECONDS: Intervalo de renovación del lease de un job
+        WORKER_STALE_AFTER_SECONDS: Heartbeat más antiguo que esto se considera worker caído
+        WORKER_MAX_ATTEMPTS: Intentos por job antes de marcarlo 'dead'
+        WORKER_RETRY_BACKOFF_SECONDS: Espera antes de reintentar un job tras un error del worker
+        
+        # Concurrencia por fase (compartida entre documentos en vuelo)
+        PHASE_CONCURRENCY_CONVERT: Documentos convirtiendo a la vez (CPU)
+        PHASE_CONCURRENCY_OCR: Documentos en OCR a la vez (Azure)
+        PHASE_CONCURRENCY_CHUNK: Documentos en chunking a la vez
+        PHASE_CONCURRENCY_EMBED: Documentos generando embeddings a la vez (OpenAI)
+        PHASE_CONCURRENCY_INTEGRATE: Documentos en integración a la vez (DB)
+        PROJECT_BATCH_MAX_IN_FLIGHT: Documentos en vuelo en un batch de proyecto in-process
     """
     
     # Azure OCR
     azure_ocr_endpoint: Optional[str] = None
     azure_ocr_key: Optional[str] = None
     azure_ocr_strategy_default: str = "balanced"
+    azure_ocr_api_version: str = "2024-07-31-preview"
+    azure_ocr_timeout_seconds: int = 300
+    azure_ocr_poll_interval_seconds: float = 1.0
+    azure_ocr_poll_max_interval_seconds: float = 10.0
+    azure_ocr_max_parallel_requests: int = 4
+    azure_ocr_pages_per_request: int = 50
+    azure_ocr_split_min_pages: int = 100
+    ocr_page_cache_enabled: bool = True
+    
+    # Conversión
+    convert_max_workers: int = 2
+    page_plan_enabled: bool = True
+    page_plan_min_text_chars: int = 32
+    page_plan_min_image_coverage: float = 0.5
     
     # Embeddings
     embeddings_provider: str = "openai"
@@ -50,15 +109,46 @@ class RagConfig(BaseSettings):
     embeddings_endpoint: str = "https://api.openai.com/v1"
     embeddings_model_default: str = "text-embedding-3-large"
     embeddings_dimension_default: int = 1536
+    embeddings_batch_max_tokens: int = 100_000
+    embeddings_batch_max_items: int = 512
+    embeddings_max_concurrency: int = 4
+    embedding_cache_enabled: bool = True
+    embedding_cache_max_entries: int = 500_000
+    embedding_cache_evict_interval_seconds: int = 300
     
     # Chunking
     chunk_max_tokens_default: int = 512
     chunk_overlap_default: int = 50
+    chunk_tokenizer_encoding: str = "cl100k_base"
+    
+    # Búsqueda vectorial
+    vector_search_exact_threshold: int = 20000
+    vector_search_ef_search: int = 100
+    vector_search_iterative_scan: str = "relaxed_order"
     
     # Storage
     storage_backend: str = "supabase"
     storage_bucket_name: str = "documents"
     storage_base_path: Optional[str] = None
+    storage_stream_chunk_bytes: int = 1024 * 1024
+    storage_spool_max_memory_bytes: int = 8 * 1024 * 1024
+    
+    # Worker de indexación (documentos en vuelo por proceso; las fases se
+    # acotan por separado con phase_concurrency_*)
+    worker_concurrency: int = 4
+    worker_poll_interval_seconds: float = 2.0
+    worker_heartbeat_interval_seconds: float = 15.0
+    worker_stale_after_seconds: int = 120
+    worker_max_attempts: int = 3
+    worker_retry_backoff_seconds: int = 30
+    
+    # Concurrencia por fase
+    phase_concurrency_convert: int = 2
+    phase_concurrency_ocr: int = 4
+    phase_concurrency_chunk: int = 2
+    phase_concurrency_embed: int = 2
+    phase_concurrency_integrate: int = 2
+    project_batch_max_in_flight: int = 4
     
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -7,6 +7,7 @@ Handles PDF conversion using the adaptive controller.
 
 Author: Ixchel Beristáin Mendoza
 Date: 28/09/2025 - Refactored from conversion_dispatcher.py
+Updated: 19/12/2025 - Release the cached PDF document when conversion ends
 """
 
 from pathlib import Path
@@ -165,6 +166,14 @@ class PDFConversionHandler:
             add_job_log(job_id, "error", f"❌ Error en conversión PDF: {str(e)}")
             progress_reporter.error(e)
             raise
+        
+        finally:
+            # Conversion finished (ok or not): free the parsed document
+            try:
+                from ..rendering.pdf_document_cache import release_pdf_document
+                release_pdf_document(file_path)
+            except Exception as release_error:
+                self.logger.debug(f"Could not release cached PDF document: {release_error}")
 
 
 
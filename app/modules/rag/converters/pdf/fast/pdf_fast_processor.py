@@ -101,10 +101,9 @@ def _get_real_page_count(pdf_path: Path, pages_seen_count: int, job_id: Optional
         Número real de páginas del PDF
     """
     try:
-        import fitz  # PyMuPDF
-        doc = fitz.open(str(pdf_path))
-        real_page_count = len(doc)
-        doc.close()
+        from ..rendering.pdf_document_cache import open_pdf_document
+        with open_pdf_document(pdf_path) as doc:
+            real_page_count = len(doc)
         
         # Log si hay discrepancia (PDFs escaneados típicamente tienen pages_seen=0)
         if pages_seen_count != real_page_count:
@@ -7,8 +7,11 @@ Single responsibility: OCR execution from different input sources.
 
 Author: Ixchel Beristáin Mendoza
 Date: 28/09/2025 - Refactored from pdf_page_ocr_processor.py
+Updated: 18/12/2025 - OCR from shared-memory page images; cheaper temp image writes
+Updated: 19/12/2025 - Fall back to the regular temp dir when /dev/shm is full
 """
 
+import errno
 import logging
 import tempfile
 import os
@@ -17,6 +20,33 @@ from typing import Optional, Dict, Any, Union
 
 logger = logging.getLogger(__name__)
 
+# Temp images for the parser go to RAM-backed storage when available.
+# Docker caps /dev/shm at 64 MB by default: on ENOSPC it is dropped for the
+# rest of the process and the regular temp dir is used instead.
+_TEMP_IMAGE_DIR = "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else None
+
+
+def _write_temp_png(image: 'np.ndarray') -> str:
+    """Saves image as a temp PNG (RAM-backed dir first) and returns its path."""
+    global _TEMP_IMAGE_DIR
+    
+    while True:
+        temp_dir = _TEMP_IMAGE_DIR
+        temp_file = tempfile.NamedTemporaryFile(suffix='.png', delete=False, dir=temp_dir)
+        try:
+            with temp_file:
+                # Convert numpy array to PIL Image (shares the buffer) and save;
+                # the file is read back immediately, so favour speed over size
+                Image.fromarray(image).save(temp_file, format="PNG", compress_level=1)
+            return temp_file.name
+        except OSError as e:
+            os.unlink(temp_file.name)
+            if e.errno != errno.ENOSPC or temp_dir is None:
+                raise
+        logger.warning(f"⚠️ {temp_dir} is full, writing OCR temp images to the default temp dir")
+        _TEMP_IMAGE_DIR = None
+
+
 # Check dependencies
 try:
     # TODO: Implementar módulo RAG completo
@@ -129,12 +159,7 @@ class PDFOCREngine:
             logger.debug(f"🔄 [PAGE {page_num}] Starting image OCR with {strategy} strategy")
             
             # Save image to temporary file for OCR processing
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_file:
-                temp_path = temp_file.name
-                
-                # Convert numpy array to PIL Image and save
-                pil_image = Image.fromarray(image)
-                pil_image.save(temp_path)
+            temp_path = _write_temp_png(image)
             
             # Process with unstructured
             elements = parse_with_unstructured(
@@ -170,6 +195,38 @@ class PDFOCREngine:
                 except Exception as cleanup_error:
                     logger.warning(f"⚠️ Failed to cleanup temp file {temp_path}: {cleanup_error}")
     
+    def ocr_from_shared_image(
+        self,
+        handle: Any,
+        page_num: int,
+        strategy: str = "hi_res",
+        infer_tables: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Process OCR from a page image held in a shared-memory slot.
+        
+        Args:
+            handle: PageImageHandle filled by the renderer
+            page_num: Page number for logging (1-indexed)
+            strategy: OCR strategy ("fast" or "hi_res")
+            infer_tables: Whether to detect and extract tables
+            
+        Returns:
+            OCR results dictionary or None if failed
+        """
+        from ..rendering.pdf_page_image_buffer import read_page_image
+        
+        try:
+            image = read_page_image(handle)
+        except Exception as e:
+            logger.error(f"❌ [PAGE {page_num}] Shared page image not available: {e}")
+            return None
+        
+        try:
+            return self.ocr_from_image_array(image, page_num, strategy, infer_tables)
+        finally:
+            del image  # drop the view so the ring can be closed
+    
     def ocr_from_image_file(
         self,
         image_path: Union[str, Path],
@@ -7,6 +7,7 @@ Single responsibility: managing complete PDF processing jobs.
 
 Author: Ixchel Beristáin Mendoza
 Date: 28/09/2025 - Refactored from pdf_cached_page_processor.py
+Updated: 19/12/2025 - Release the cached PDF document when the job ends
 """
 
 from pathlib import Path
@@ -119,6 +120,9 @@ class PDFJobCoordinator:
                 'error': str(e),
                 'processing_metrics': self.metrics_collector.get_current_metrics()
             }
+        finally:
+            # The job is done with this file: free its parsed document
+            self._release_pdf_document(pdf_path)
     
     def _process_job_batch(
         self, 
@@ -188,15 +192,21 @@ class PDFJobCoordinator:
             Number of pages in PDF
         """
         try:
-            import fitz
-            pdf_doc = fitz.open(str(pdf_path))
-            page_count = len(pdf_doc)
-            pdf_doc.close()
-            return page_count
+            from ..rendering.pdf_document_cache import open_pdf_document
+            with open_pdf_document(pdf_path) as pdf_doc:
+                return len(pdf_doc)
         except Exception as e:
             logger.error(f"Error getting page count for {pdf_path}: {e}")
             return 0
     
+    def _release_pdf_document(self, pdf_path: Path) -> None:
+        """Closes the cached document handle of pdf_path in this process."""
+        try:
+            from ..rendering.pdf_document_cache import release_pdf_document
+            release_pdf_document(pdf_path)
+        except Exception as e:
+            logger.debug(f"Could not release cached PDF document {pdf_path}: {e}")
+    
     def _get_output_file_paths(self, job_id: str) -> Dict[str, str]:
         """
         Generate expected output file paths for a job.
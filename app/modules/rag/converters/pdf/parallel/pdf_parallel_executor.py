@@ -7,52 +7,92 @@ Single responsibility: executing parallel page processing with ProcessPoolExecut
 
 Author: Refactored from pdf_batch_coordinator.py
 Date: 10/10/2025
+Updated: 2025-12-18 - Batches run on the persistent, pre-warmed worker pool
+Updated: 2025-12-19 - max_workers enforced as a bounded submit window
+Updated: 2025-12-19 - Render and OCR stages hand pages over through a shared-memory ring
+Updated: 2025-12-20 - Pages that cannot be rendered into a slot fall back to the page worker
 """
 
 import logging
-from typing import Dict, Any, List, Optional
-from concurrent.futures import ProcessPoolExecutor, as_completed
+import time
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, wait
 
-from .pdf_parallel_worker import process_single_page_worker
+from .pdf_parallel_worker import (
+    ocr_shared_page_worker,
+    process_single_page_worker,
+    render_page_to_shared_worker,
+)
 
 logger = logging.getLogger(__name__)
 
 # Check dependencies
 try:
-    # TODO: Implementar módulo RAG completo
-    # from app.modules.rag.utils.progress_store import is_cancelled
-    HAS_DEPENDENCIES = False  # Temporalmente False hasta implementar RAG
+    from app.shared.core.pdf_worker_pool_cache import get_pdf_worker_pool
+    HAS_DEPENDENCIES = True
 except ImportError as e:
     logger.error(f"❌ Missing dependencies for parallel executor: {e}")
     HAS_DEPENDENCIES = False
 
+try:
+    from ..rendering.pdf_page_image_buffer import DEFAULT_SLOT_BYTES, PageImageRing, shared_memory_fits
+    HAS_SHARED_IMAGES = True
+except ImportError as e:
+    logger.warning(f"⚠️ Shared-memory page images not available, pages will be pickled: {e}")
+    HAS_SHARED_IMAGES = False
+
+_STAGE_PAGE = "page"
+_STAGE_RENDER = "render"
+_STAGE_OCR = "ocr"
+
 
 class PDFParallelExecutor:
     """
-    Executes parallel processing of PDF pages using ProcessPoolExecutor.
+    Executes parallel processing of PDF pages on the shared worker pool.
     Single responsibility: parallel execution coordination.
+
+    The pool is process-wide and long-lived (see pdf_worker_pool_cache):
+    its workers already have Unstructured and the models loaded, so a batch
+    only pays task submission. max_workers caps the pages in flight per batch.
+
+    With use_shared_images each page runs as two tasks: a render task draws
+    it into a PageImageRing slot and an OCR task reads it from there, so
+    only slot handles cross process boundaries. The ring has one slot per
+    page in flight; if /dev/shm cannot hold it the batch falls back to the
+    single-task page worker. A page whose render stage fails (e.g. a large
+    page bigger than a slot) is resubmitted to the single-task page worker
+    too, instead of being dropped.
     """
     
     def __init__(
         self,
         max_workers: int,
         page_timeout: int,
-        log_per_page: bool = True
+        log_per_page: bool = True,
+        is_cancelled: Optional[Callable[[str], bool]] = None,
+        use_shared_images: bool = True,
+        slot_bytes: Optional[int] = None
     ):
         """
         Initialize parallel executor.
         
         Args:
-            max_workers: Maximum number of parallel workers
+            max_workers: Maximum pages of a batch queued or running at once
             page_timeout: Timeout per page in seconds
             log_per_page: Enable per-page logging
+            is_cancelled: Optional job_id -> bool cancellation check
+            use_shared_images: Hand rendered pages to OCR through shared memory
+            slot_bytes: Bytes per ring slot (largest rendered page)
         """
         if not HAS_DEPENDENCIES:
             raise ImportError("Required dependencies not available for PDFParallelExecutor")
         
-        self.max_workers = max_workers
+        self.max_workers = max(1, max_workers)
         self.page_timeout = page_timeout
         self.log_per_page = log_per_page
+        self.is_cancelled = is_cancelled or (lambda job_id: False)
+        self.use_shared_images = use_shared_images and HAS_SHARED_IMAGES
+        self.slot_bytes = slot_bytes or (DEFAULT_SLOT_BYTES if HAS_SHARED_IMAGES else 0)
         
         logger.info(f"⚙️ Parallel executor initialized: {max_workers} workers, "
                    f"{page_timeout}s timeout")
@@ -65,7 +105,7 @@ class PDFParallelExecutor:
         job_id: Optional[str]
     ) -> Dict[int, Optional[Dict[str, Any]]]:
         """
-        Execute the parallel processing using ProcessPoolExecutor.
+        Execute the parallel processing on the persistent worker pool.
         
         Args:
             pdf_path_str: PDF file path as string
@@ -78,66 +118,148 @@ class PDFParallelExecutor:
         """
         batch_results = {}
         
-        # Use ProcessPoolExecutor for parallel processing
-        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
-            # Submit all pages for processing
-            future_to_page = {}
-            
-            for page_idx in page_range:
-                # Check cancellation before submitting each page
-                if job_id and is_cancelled(job_id):
-                    logger.info(f"🛑 [PARALLEL] Job {job_id} cancelled, skipping page {page_idx + 1}")
+        # Shared pool: never shut down here, workers stay warm between batches
+        executor = get_pdf_worker_pool()
+        ring = self._open_image_ring()
+        
+        # Bounded submit window: at most max_workers pages of this batch are
+        # queued or running at once, so several batches share the pool fairly
+        # and a cancellation stops feeding it immediately. A page keeps its
+        # window place (and ring slot) from render until its OCR finishes.
+        pages = iter(page_range)
+        in_flight: Dict[Future, Tuple[int, Any, str]] = {}
+        submitted = 0
+        feeding = True
+        deadline = time.monotonic() + self.page_timeout * len(page_range)
+        
+        try:
+            while True:
+                while feeding and len(in_flight) < self.max_workers:
+                    page_idx = next(pages, None)
+                    if page_idx is None:
+                        feeding = False
+                        break
+                    # Check cancellation before submitting each page
+                    if job_id and self.is_cancelled(job_id):
+                        logger.info(f"🛑 [PARALLEL] Job {job_id} cancelled, skipping page {page_idx + 1}")
+                        feeding = False
+                        break
+                    
+                    if ring is not None:
+                        handle = ring.acquire(timeout=0)
+                        future = executor.submit(render_page_to_shared_worker, pdf_path_str, page_idx, handle)
+                        in_flight[future] = (page_idx, handle, _STAGE_RENDER)
+                    else:
+                        future = self._submit_page(executor, pdf_path_str, page_idx, strategy)
+                        in_flight[future] = (page_idx, None, _STAGE_PAGE)
+                    submitted += 1
+                
+                if not in_flight:
                     break
                 
-                future = executor.submit(
-                    process_single_page_worker,
-                    pdf_path_str,
-                    page_idx,
-                    strategy,
-                    self.page_timeout,
-                    2  # max_retries
+                done, _ = wait(
+                    in_flight.keys(),
+                    timeout=max(0.0, deadline - time.monotonic()),
+                    return_when=FIRST_COMPLETED
                 )
-                future_to_page[future] = page_idx
-            
-            if self.log_per_page:
-                logger.info(f"📤 [PARALLEL] Submitted {len(future_to_page)} pages for processing")
-            
-            # Collect results as they complete
-            timeout_total = self.page_timeout * len(page_range)
-            
-            for future in as_completed(future_to_page.keys(), timeout=timeout_total):
-                # Check for cancellation during processing
-                if job_id and is_cancelled(job_id):
-                    logger.info(f"🛑 [PARALLEL] Job {job_id} cancelled, stopping result collection")
-                    # Cancel remaining futures
-                    for remaining_future in future_to_page.keys():
-                        if not remaining_future.done():
-                            remaining_future.cancel()
+                if not done:
+                    logger.warning(f"⏰ [PARALLEL] Batch exceeded {self.page_timeout * len(page_range)}s, "
+                                   f"{len(page_range) - len(batch_results)} pages pending")
                     break
                 
-                try:
-                    page_idx, result = future.result(timeout=5)  # Short timeout for result retrieval
-                    batch_results[page_idx] = result
+                for future in done:
+                    page_idx, handle, stage = in_flight.pop(future)
                     
-                    if self.log_per_page:
-                        if result:
-                            text_len = len(result.get("text", ""))
-                            tables_count = len(result.get("tables", []))
-                            logger.info(f"✅ [PARALLEL] Page {page_idx + 1} completed: "
-                                       f"{text_len} chars, {tables_count} tables")
-                        else:
-                            logger.warning(f"⚠️ [PARALLEL] Page {page_idx + 1} returned no results")
+                    if stage == _STAGE_RENDER:
+                        filled = self._rendered_handle(future, page_idx)
+                        if filled is not None:
+                            # Same slot, next stage: only the handle is pickled
+                            ocr_future = executor.submit(ocr_shared_page_worker, filled, page_idx, strategy)
+                            in_flight[ocr_future] = (page_idx, filled, _STAGE_OCR)
+                            continue
+                        # Slot too small or render error: the page worker
+                        # renders and pickles it itself (keeps its window place)
+                        ring.release(handle)
+                        page_future = self._submit_page(executor, pdf_path_str, page_idx, strategy)
+                        in_flight[page_future] = (page_idx, None, _STAGE_PAGE)
+                        continue
                     
-                except Exception as e:
-                    page_idx = future_to_page[future]
-                    logger.error(f"❌ [PARALLEL] Page {page_idx + 1} processing failed: {e}")
-                    batch_results[page_idx] = None
+                    if handle is not None:
+                        ring.release(handle)
+                    batch_results[page_idx] = self._collect_result(future, page_idx)
+                
+                # Check for cancellation during processing
+                if job_id and self.is_cancelled(job_id):
+                    logger.info(f"🛑 [PARALLEL] Job {job_id} cancelled, stopping result collection")
+                    break
+        finally:
+            # Drop queued pages of this batch; running ones finish in the pool
+            for remaining_future in in_flight:
+                if not remaining_future.done():
+                    remaining_future.cancel()
+            # Workers still attached keep their mapping until they detach
+            if ring is not None:
+                ring.close()
+        
+        if self.log_per_page:
+            logger.info(f"📤 [PARALLEL] Processed {len(batch_results)}/{submitted} submitted pages")
         
         return batch_results
-
-
-
-
-
-
-
+    
+    def _submit_page(self, executor: Any, pdf_path_str: str, page_idx: int, strategy: str) -> Future:
+        """Submits the single-task (render + OCR, pickled) page worker."""
+        return executor.submit(
+            process_single_page_worker,
+            pdf_path_str,
+            page_idx,
+            strategy,
+            self.page_timeout,
+            2  # max_retries
+        )
+    
+    def _open_image_ring(self) -> Optional["PageImageRing"]:
+        """Ring with one slot per page in flight, or None to pickle pages instead."""
+        if not self.use_shared_images:
+            return None
+        
+        needed = self.max_workers * self.slot_bytes
+        if not shared_memory_fits(needed):
+            logger.warning(f"⚠️ [PARALLEL] /dev/shm cannot hold {needed // (1024 * 1024)} MB of page images, "
+                           f"falling back to pickled pages")
+            return None
+        
+        try:
+            return PageImageRing(slots=self.max_workers, slot_bytes=self.slot_bytes)
+        except OSError as e:
+            logger.warning(f"⚠️ [PARALLEL] Could not create page image ring, falling back to pickled pages: {e}")
+            return None
+    
+    def _rendered_handle(self, future: Future, page_idx: int) -> Optional[Any]:
+        """Filled handle of a finished render future (None on failure)."""
+        try:
+            _, filled = future.result()
+        except Exception as e:
+            logger.error(f"❌ [PARALLEL] Page {page_idx + 1} rendering failed: {e}")
+            return None
+        if filled is None and self.log_per_page:
+            logger.warning(f"⚠️ [PARALLEL] Page {page_idx + 1} could not be rendered to shared memory, "
+                           f"retrying with the page worker")
+        return filled
+    
+    def _collect_result(self, future: Future, page_idx: int) -> Optional[Dict[str, Any]]:
+        """Result of a finished page future (None on worker error)."""
+        try:
+            _, result = future.result()
+        except Exception as e:
+            logger.error(f"❌ [PARALLEL] Page {page_idx + 1} processing failed: {e}")
+            return None
+        
+        if self.log_per_page:
+            if result:
+                text_len = len(result.get("text", ""))
+                tables_count = len(result.get("tables", []))
+                logger.info(f"✅ [PARALLEL] Page {page_idx + 1} completed: "
+                           f"{text_len} chars, {tables_count} tables")
+            else:
+                logger.warning(f"⚠️ [PARALLEL] Page {page_idx + 1} returned no results")
+        return result
@@ -7,6 +7,7 @@ Single responsibility: multiprocessing-compatible worker functions.
 
 Author: Ixchel Beristáin Mendoza
 Date: 28/09/2025 - Refactored from pdf_parallel_page_processor.py
+Updated: 19/12/2025 - Render/OCR stage workers exchanging pages through shared memory
 """
 
 import logging
@@ -83,6 +84,75 @@ def process_single_page_worker(
         return (page_idx, None)
 
 
+def render_page_to_shared_worker(
+    pdf_path_str: str,
+    page_idx: int,
+    handle: Any,
+    dpi: Optional[int] = None
+) -> Tuple[int, Optional[Any]]:
+    """
+    Render stage: draws a page into the PageImageRing slot reserved by the
+    coordinator. Only the (small) filled handle is pickled back.
+    
+    Args:
+        pdf_path_str: PDF file path as string
+        page_idx: Page index (0-indexed)
+        handle: PageImageHandle of the reserved slot
+        dpi: Target DPI (renderer default if None)
+        
+    Returns:
+        Tuple of (page_index, filled handle or None)
+    """
+    try:
+        from ..rendering.pdf_page_renderer import PDFPageRenderer
+        
+        filled = PDFPageRenderer().render_pdf_page_to_shared(pdf_path_str, page_idx, handle, dpi)
+        if filled is None:
+            logger.warning(f"⚠️ Render worker produced no image for page {page_idx + 1}")
+        return (page_idx, filled)
+        
+    except Exception as e:
+        logger.error(f"❌ Render worker error for page {page_idx + 1}: {e}")
+        return (page_idx, None)
+
+
+def ocr_shared_page_worker(
+    handle: Any,
+    page_idx: int,
+    strategy: str = "hi_res",
+    infer_tables: bool = True
+) -> Tuple[int, Optional[Dict[str, Any]]]:
+    """
+    OCR stage: reads the rendered page straight from shared memory.
+    
+    Args:
+        handle: Filled PageImageHandle returned by the render stage
+        page_idx: Page index (0-indexed)
+        strategy: OCR strategy ("fast" or "hi_res")
+        infer_tables: Whether to detect and extract tables
+        
+    Returns:
+        Tuple of (page_index, result_dict or None)
+    """
+    try:
+        from ..ocr.pdf_ocr_engine import PDFOCREngine
+        
+        result = PDFOCREngine().ocr_from_shared_image(handle, page_idx + 1, strategy, infer_tables)
+        
+        if result:
+            text_len = len(result.get("text", ""))
+            tables_count = len(result.get("tables", []))
+            logger.debug(f"✅ OCR worker completed page {page_idx + 1}: {text_len} chars, {tables_count} tables")
+        else:
+            logger.warning(f"⚠️ OCR worker failed for page {page_idx + 1}")
+        
+        return (page_idx, result)
+        
+    except Exception as e:
+        logger.error(f"❌ OCR worker error for page {page_idx + 1}: {e}")
+        return (page_idx, None)
+
+
 def process_batch_worker(
     pdf_path_str: str,
     page_indices: list,
@@ -5,8 +5,18 @@ backend/app/services/rag/converters/pdf_image_enhancement.py
 Image enhancement operations for PDF preprocessing.
 Single responsibility: applying image processing techniques for OCR optimization.
 
+The pipeline is quality-gated: cheap metrics are computed on a downsampled
+thumbnail first (skew, noise, whether the page is already binary) and only
+the stages a page actually needs run at full resolution. Skew is estimated
+on the thumbnail (the angle does not depend on scale) and corrected with a
+single affine warp. Without OpenCV every stage has a vectorized numpy
+fallback.
+
 Author: Ixchel Beristáin Mendoza
 Date: 28/09/2025 - Refactored from pdf_image_preprocessing.py
+Updated: 18/12/2025 - Thumbnail quality metrics, gated stages, vectorized fallbacks
+Updated: 19/12/2025 - Otsu threshold defined for uniform images
+Updated: 20/12/2025 - Noise metric ignores edges (Immerkaer sigma on flat regions)
 """
 
 import logging
@@ -21,260 +31,465 @@ try:
     import cv2
     HAS_CV2 = True
 except ImportError as e:
-    logger.warning(f"⚠️ OpenCV not available: {e}. Image enhancement will be limited.")
+    logger.warning(f"⚠️ OpenCV not available: {e}. Image enhancement will use numpy fallbacks.")
     HAS_CV2 = False
 
 
+# Longest side of the analysis thumbnail (300 DPI letter -> ~1/3 scale)
+THUMBNAIL_MAX_SIDE = 1024
+# Skew below this (degrees) is not worth a full-resolution warp
+MIN_SKEW_DEGREES = 0.5
+MAX_SKEW_DEGREES = 10.0
+# Fraction of pixels at the extremes above which the page is already binary
+BINARY_PIXEL_FRACTION = 0.97
+# Estimated noise sigma (gray levels, thumbnail) above which denoising pays off
+NOISE_THRESHOLD = 4.0
+# 3x3 windows with a wider intensity range contain an edge (text stroke, rule)
+# and are left out of the noise estimate
+NOISE_EDGE_RANGE = 48
+# Threshold for single-intensity images (no two classes to separate)
+MIDPOINT_THRESHOLD = 127
+
+
+def _box_mean_3x3(gray: np.ndarray) -> np.ndarray:
+    """3x3 mean filter with edge replication (vectorized slicing sums)."""
+    padded = np.pad(gray.astype(np.uint16), 1, mode="edge")
+    h, w = gray.shape
+    total = np.zeros((h, w), dtype=np.uint16)
+    for dy in range(3):
+        for dx in range(3):
+            total += padded[dy:dy + h, dx:dx + w]
+    return (total // 9).astype(np.uint8)
+
+
+def _noise_sigma(gray: np.ndarray) -> float:
+    """
+    Noise standard deviation from Immerkaer's Laplacian-difference mask,
+    averaged over flat 3x3 windows only.
+
+    A residual against a local mean also grows with text edges, so a clean
+    dense text page scored as noisy. Windows whose intensity range exceeds
+    NOISE_EDGE_RANGE are skipped: what remains is background, where any
+    Laplacian response is noise.
+    """
+    g = gray.astype(np.int32)
+    h, w = g.shape[:2]
+    if h < 3 or w < 3:
+        return 0.0
+    lap = 4 * g[1:-1, 1:-1]
+    win_max = g[1:-1, 1:-1].copy()
+    win_min = g[1:-1, 1:-1].copy()
+    for dy in range(3):
+        for dx in range(3):
+            if dy == 1 and dx == 1:
+                continue
+            shifted = g[dy:h - 2 + dy, dx:w - 2 + dx]
+            lap += shifted if (dy != 1 and dx != 1) else -2 * shifted
+            np.maximum(win_max, shifted, out=win_max)
+            np.minimum(win_min, shifted, out=win_min)
+    flat = (win_max - win_min) < NOISE_EDGE_RANGE
+    if not flat.any():
+        return 0.0
+    # sigma = sqrt(pi/2) / 6 * mean|I * N| (Immerkaer, 1996)
+    return float(np.sqrt(np.pi / 2) / 6.0 * np.abs(lap[flat]).mean())
+
+
+def _laplacian_var(gray: np.ndarray) -> float:
+    """Variance of the 4-neighbour Laplacian (sharpness)."""
+    if HAS_CV2:
+        return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+    g = gray.astype(np.int32)
+    lap = g[1:-1, :-2] + g[1:-1, 2:] + g[:-2, 1:-1] + g[2:, 1:-1] - 4 * g[1:-1, 1:-1]
+    return float(lap.var()) if lap.size else 0.0
+
+
+def _otsu_threshold(gray: np.ndarray) -> int:
+    """
+    Otsu threshold from the 256-bin histogram (vectorized).
+
+    A uniform image leaves one class empty at every split, so the
+    between-class variance is NaN everywhere: the midpoint is returned and
+    a blank page stays white (or black) when binarized.
+    """
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    weight_bg = np.cumsum(hist)
+    weight_fg = weight_bg[-1] - weight_bg
+    cum_mean = np.cumsum(hist * np.arange(256))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_bg = cum_mean / weight_bg
+        mean_fg = (cum_mean[-1] - cum_mean) / weight_fg
+        between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    if np.isnan(between).all():
+        return MIDPOINT_THRESHOLD
+    return int(np.nanargmax(between))
+
+
+def _skew_by_projection(gray: np.ndarray, max_angle: float = MAX_SKEW_DEGREES, step: float = 0.25) -> float:
+    """
+    Skew angle maximising the row-profile variance of dark pixels.
+
+    Each candidate angle shears the dark pixel coordinates at once; text
+    lines collapse into sharp peaks when the angle matches the skew.
+    """
+    # Otsu classes: <= threshold is the dark one (see apply_binarization)
+    ys, xs = np.nonzero(gray <= _otsu_threshold(gray))
+    if ys.size < 50 or ys.size == gray.size:
+        # Blank (or solid) page: no lines to align
+        return 0.0
+    if ys.size > 20000:
+        # Evenly spaced subset keeps the angles x pixels matrix small
+        keep = np.linspace(0, ys.size - 1, 20000).astype(np.int64)
+        ys, xs = ys[keep], xs[keep]
+    angles = np.arange(-max_angle, max_angle + step, step)
+    rows = ys[None, :] - xs[None, :] * np.tan(np.radians(angles))[:, None]
+    rows = np.rint(rows - rows.min()).astype(np.int64)
+    height = int(rows.max()) + 1
+    offsets = (np.arange(len(angles)) * height)[:, None]
+    profiles = np.bincount((rows + offsets).ravel(), minlength=len(angles) * height)
+    scores = profiles.reshape(len(angles), height).astype(np.float64).var(axis=1)
+    # Lines sloping down to the right (positive angle) need a counter-clockwise turn
+    return float(angles[int(np.argmax(scores))])
+
+
+def _warp_affine_numpy(image: np.ndarray, matrix: np.ndarray, fill: int = 255) -> np.ndarray:
+    """Nearest-neighbour inverse-mapped affine warp, processed in row bands."""
+    h, w = image.shape[:2]
+    full = np.vstack([matrix, [0.0, 0.0, 1.0]])
+    inverse = np.linalg.inv(full)[:2]
+    out = np.full_like(image, fill)
+    xs = np.arange(w, dtype=np.float32)
+    band = max(1, (4 * 1024 * 1024) // max(w, 1))
+    for y0 in range(0, h, band):
+        ys = np.arange(y0, min(h, y0 + band), dtype=np.float32)[:, None]
+        src_x = np.rint(inverse[0, 0] * xs + inverse[0, 1] * ys + inverse[0, 2]).astype(np.int64)
+        src_y = np.rint(inverse[1, 0] * xs + inverse[1, 1] * ys + inverse[1, 2]).astype(np.int64)
+        valid = (src_x >= 0) & (src_x < w) & (src_y >= 0) & (src_y < h)
+        target = out[y0:y0 + ys.shape[0]]
+        target[valid] = image[src_y[valid], src_x[valid]]
+    return out
+
+
 class PDFImageEnhancer:
     """
     Applies image enhancement techniques for OCR optimization.
     Single responsibility: image processing operations.
     """
-    
-    def __init__(self):
+
+    def __init__(self, thumbnail_max_side: int = THUMBNAIL_MAX_SIDE):
         """Initialize enhancer with configuration."""
-        pass
-    
+        self.thumbnail_max_side = thumbnail_max_side
+
+    def make_thumbnail(self, image: np.ndarray) -> np.ndarray:
+        """
+        Downsample a (grayscale) image so its longest side fits the analysis size.
+
+        Args:
+            image: Input image array
+
+        Returns:
+            Grayscale thumbnail (the input itself if already small)
+        """
+        gray = self.convert_to_grayscale(image)
+        h, w = gray.shape[:2]
+        scale = self.thumbnail_max_side / max(h, w)
+        if scale >= 1.0:
+            return gray
+        if HAS_CV2:
+            return cv2.resize(gray, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+        stride = int(np.ceil(1.0 / scale))
+        return gray[::stride, ::stride]
+
     def convert_to_grayscale(self, image: np.ndarray) -> np.ndarray:
         """
         Convert image to grayscale for faster OCR processing.
-        
+
         Args:
             image: Input image array (RGB or already grayscale)
-            
+
         Returns:
             Grayscale image array
         """
         try:
-            if len(image.shape) == 3 and image.shape[2] == 3:
+            if len(image.shape) == 3 and image.shape[2] >= 3:
                 # RGB to grayscale conversion
                 if HAS_CV2:
-                    grayscale = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-                else:
-                    # Fallback using numpy weighted average
-                    grayscale = np.dot(image[...,:3], [0.2989, 0.5870, 0.1140])
-                
-                return grayscale.astype(np.uint8)
-            
-            # Already grayscale or single channel
+                    code = cv2.COLOR_RGBA2GRAY if image.shape[2] == 4 else cv2.COLOR_RGB2GRAY
+                    return cv2.cvtColor(image, code)
+                # Fixed-point BT.601 weights (77, 150, 29) / 256 in uint16
+                rgb = image[..., :3].astype(np.uint16)
+                return ((rgb[..., 0] * 77 + rgb[..., 1] * 150 + rgb[..., 2] * 29) >> 8).astype(np.uint8)
+
+            if len(image.shape) == 3:
+                # Single channel with explicit axis
+                return image[..., 0]
+
+            # Already grayscale
             return image
-            
+
         except Exception as e:
             logger.warning(f"⚠️ Grayscale conversion failed: {e}, using original image")
             return image
-    
-    def apply_deskewing(self, image: np.ndarray) -> np.ndarray:
+
+    def estimate_skew_angle(self, thumbnail: np.ndarray) -> float:
+        """
+        Estimate document skew (degrees, counter-clockwise correction) on a thumbnail.
+
+        Args:
+            thumbnail: Grayscale thumbnail (see make_thumbnail)
+
+        Returns:
+            Rotation angle to apply, 0.0 when none is detected
         """
-        Apply deskewing to correct document rotation using Hough line detection.
-        
+        try:
+            if HAS_CV2:
+                edges = cv2.Canny(thumbnail, 50, 150, apertureSize=3)
+                lines = cv2.HoughLines(edges, 1, np.pi / 720, threshold=max(50, min(thumbnail.shape) // 8))
+                if lines is None or len(lines) == 0:
+                    return 0.0
+                # Use top lines to avoid noise; keep only near-horizontal ones
+                angles = np.degrees(lines[:20, 0, 1]) - 90.0
+                angles = angles[np.abs(angles) < MAX_SKEW_DEGREES]
+                return float(np.median(angles)) if angles.size else 0.0
+            return _skew_by_projection(thumbnail)
+        except Exception as e:
+            logger.warning(f"⚠️ Skew estimation failed: {e}")
+            return 0.0
+
+    def apply_deskewing(self, image: np.ndarray, angle: Optional[float] = None) -> np.ndarray:
+        """
+        Correct document rotation with a single affine warp.
+
         Args:
             image: Input image array
-            
+            angle: Precomputed skew angle (estimated on a thumbnail if None)
+
         Returns:
             Deskewed image array
         """
-        if not HAS_CV2:
-            logger.warning("⚠️ OpenCV not available, skipping deskewing")
-            return image
-        
         try:
-            # Ensure grayscale for edge detection
-            if len(image.shape) == 3:
-                gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+            if angle is None:
+                angle = self.estimate_skew_angle(self.make_thumbnail(image))
+
+            # Only correct if angle is significant
+            if abs(angle) <= MIN_SKEW_DEGREES:
+                return image
+
+            (h, w) = image.shape[:2]
+            center = (w / 2.0, h / 2.0)
+
+            if HAS_CV2:
+                M = cv2.getRotationMatrix2D(center, angle, 1.0)
+                rotated = cv2.warpAffine(
+                    image, M, (w, h),
+                    flags=cv2.INTER_LINEAR,
+                    borderMode=cv2.BORDER_REPLICATE
+                )
             else:
-                gray = image.copy()
-            
-            # Apply edge detection
-            edges = cv2.Canny(gray, 50, 150, apertureSize=3)
-            
-            # Detect lines using HoughLines
-            lines = cv2.HoughLines(edges, 1, np.pi/180, threshold=100)
-            
-            if lines is not None and len(lines) > 0:
-                # Calculate average angle of detected lines
-                angles = []
-                for line in lines[:10]:  # Use top 10 lines to avoid noise
-                    rho, theta = line[0]
-                    angle = np.degrees(theta) - 90
-                    if abs(angle) < 45:  # Only consider reasonable angles
-                        angles.append(angle)
-                
-                if angles:
-                    avg_angle = np.median(angles)
-                    
-                    # Only correct if angle is significant (> 0.5 degrees)
-                    if abs(avg_angle) > 0.5:
-                        # Calculate rotation matrix and apply transformation
-                        (h, w) = image.shape[:2]
-                        center = (w // 2, h // 2)
-                        M = cv2.getRotationMatrix2D(center, avg_angle, 1.0)
-                        
-                        # Rotate image
-                        rotated = cv2.warpAffine(
-                            image, M, (w, h), 
-                            flags=cv2.INTER_CUBIC, 
-                            borderMode=cv2.BORDER_REPLICATE
-                        )
-                        
-                        if settings.logging.ocr_per_page:
-                            logger.info(f"🔄 Applied deskewing: {avg_angle:.2f} degrees")
-                        
-                        return rotated
-            
-            # No significant skew detected
-            return image
-            
+                theta = np.radians(angle)
+                cos, sin = np.cos(theta), np.sin(theta)
+                M = np.array([
+                    [cos, sin, (1 - cos) * center[0] - sin * center[1]],
+                    [-sin, cos, sin * center[0] + (1 - cos) * center[1]],
+                ])
+                rotated = _warp_affine_numpy(image, M)
+
+            if settings.logging.ocr_per_page:
+                logger.info(f"🔄 Applied deskewing: {angle:.2f} degrees")
+
+            return rotated
+
         except Exception as e:
             logger.warning(f"⚠️ Deskewing failed: {e}, using original image")
             return image
-    
+
     def apply_binarization(self, image: np.ndarray) -> np.ndarray:
         """
         Apply Otsu binarization for better text recognition.
-        
+
         Args:
             image: Input image array
-            
+
         Returns:
             Binarized image array
         """
-        if not HAS_CV2:
-            logger.warning("⚠️ OpenCV not available, skipping binarization")
-            return image
-        
         try:
-            # Ensure grayscale
-            if len(image.shape) == 3:
-                gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+            gray = self.convert_to_grayscale(image)
+
+            if HAS_CV2:
+                _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
             else:
-                gray = image.copy()
-            
-            # Apply Otsu's thresholding
-            _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            
+                binary = np.where(gray > _otsu_threshold(gray), 255, 0).astype(np.uint8)
+
             if settings.logging.ocr_per_page:
                 logger.info(f"🎯 Applied Otsu binarization")
-            
+
             return binary
-            
+
         except Exception as e:
             logger.warning(f"⚠️ Binarization failed: {e}, using original image")
             return image
-    
+
     def apply_noise_reduction(self, image: np.ndarray) -> np.ndarray:
         """
         Apply light smoothing and noise reduction.
-        
+
         Args:
             image: Input image array
-            
+
         Returns:
             Smoothed image array
         """
-        if not HAS_CV2:
-            logger.warning("⚠️ OpenCV not available, skipping noise reduction")
-            return image
-        
         try:
-            # Apply light Gaussian blur to reduce noise
-            smoothed = cv2.GaussianBlur(image, (3, 3), 0)
-            
-            # Apply morphological opening to remove small noise (for grayscale images)
-            if len(image.shape) == 2:  # Grayscale
-                kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
-                smoothed = cv2.morphologyEx(smoothed, cv2.MORPH_OPEN, kernel)
-            
+            if HAS_CV2:
+                # Apply light Gaussian blur to reduce noise
+                smoothed = cv2.GaussianBlur(image, (3, 3), 0)
+
+                # Apply morphological opening to remove small noise (for grayscale images)
+                if len(image.shape) == 2:  # Grayscale
+                    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
+                    smoothed = cv2.morphologyEx(smoothed, cv2.MORPH_OPEN, kernel)
+            elif len(image.shape) == 2:
+                smoothed = _box_mean_3x3(image)
+            else:
+                smoothed = np.stack([_box_mean_3x3(image[..., c]) for c in range(image.shape[2])], axis=-1)
+
             if settings.logging.ocr_per_page:
                 logger.debug("✨ Applied noise reduction")
-            
+
             return smoothed
-            
+
         except Exception as e:
             logger.warning(f"⚠️ Noise reduction failed: {e}, using original image")
             return image
-    
+
+    def plan_enhancements(
+        self,
+        metrics: dict,
+        grayscale: bool = False,
+        deskew: bool = False,
+        binarize: bool = False,
+        noise_reduction: bool = False
+    ) -> dict:
+        """
+        Decide which requested stages the page actually needs.
+
+        Args:
+            metrics: Output of get_image_quality_metrics
+            grayscale/deskew/binarize/noise_reduction: Stages enabled by configuration
+
+        Returns:
+            Dictionary stage -> bool
+        """
+        if 'error' in metrics:
+            # No metrics: behave like the unconditional pipeline
+            return {
+                'grayscale': grayscale,
+                'deskew': deskew,
+                'binarize': binarize,
+                'noise_reduction': noise_reduction,
+            }
+
+        shape = metrics['image_shape']
+        return {
+            'grayscale': grayscale and len(shape) == 3,
+            'deskew': deskew and abs(metrics['skew_angle']) > MIN_SKEW_DEGREES,
+            'binarize': binarize and metrics['binary_fraction'] < BINARY_PIXEL_FRACTION,
+            'noise_reduction': noise_reduction and metrics['noise_score'] > NOISE_THRESHOLD,
+        }
+
     def enhance_image_pipeline(
-        self, 
+        self,
         image: np.ndarray,
         grayscale: bool = False,
-        deskew: bool = False, 
+        deskew: bool = False,
         binarize: bool = False,
         noise_reduction: bool = False
     ) -> np.ndarray:
         """
-        Apply complete image enhancement pipeline based on configuration.
-        
+        Apply the enhancement stages this page needs, based on configuration.
+
+        Thumbnail metrics gate each enabled stage: clean, straight pages skip
+        deskew/denoise, and already-binary scans skip binarization.
+
         Args:
             image: Input image array
             grayscale: Whether to convert to grayscale
             deskew: Whether to apply deskewing
             binarize: Whether to apply binarization
             noise_reduction: Whether to apply noise reduction
-            
+
         Returns:
-            Enhanced image array
+            Enhanced image array (the input itself if no stage runs)
         """
-        result = image.copy()
-        
-        # Step 1: Convert to grayscale if requested
-        if grayscale:
+        if not (grayscale or deskew or binarize or noise_reduction):
+            return image
+
+        metrics = self.get_image_quality_metrics(image, with_skew=deskew)
+        stages = self.plan_enhancements(metrics, grayscale, deskew, binarize, noise_reduction)
+
+        if settings.logging.ocr_per_page:
+            skipped = [name for name, requested in (
+                ('grayscale', grayscale), ('deskew', deskew),
+                ('binarize', binarize), ('noise_reduction', noise_reduction),
+            ) if requested and not stages[name]]
+            if skipped:
+                logger.debug(f"⏭️ Skipping enhancement stages not needed: {', '.join(skipped)}")
+
+        result = image
+
+        # Step 1: Grayscale first so every later stage works on one channel
+        if stages['grayscale']:
             result = self.convert_to_grayscale(result)
-        
-        # Step 2: Apply deskewing if enabled
-        if deskew:
-            result = self.apply_deskewing(result)
-        
-        # Step 3: Apply binarization if enabled
-        if binarize:
+
+        # Step 2: Single full-resolution warp with the thumbnail angle
+        if stages['deskew']:
+            result = self.apply_deskewing(result, angle=metrics.get('skew_angle'))
+
+        # Step 3: Apply binarization if needed
+        if stages['binarize']:
             result = self.apply_binarization(result)
-        
-        # Step 4: Apply noise reduction if enabled
-        if noise_reduction:
+
+        # Step 4: Apply noise reduction if needed
+        if stages['noise_reduction']:
             result = self.apply_noise_reduction(result)
-        
+
         return result
-    
-    def get_image_quality_metrics(self, image: np.ndarray) -> dict:
+
+    def get_image_quality_metrics(self, image: np.ndarray, with_skew: bool = True) -> dict:
         """
-        Calculate image quality metrics for preprocessing assessment.
-        
+        Calculate image quality metrics on a downsampled thumbnail.
+
         Args:
             image: Input image array
-            
+            with_skew: Whether to estimate the skew angle as well
+
         Returns:
             Dictionary with quality metrics
         """
         try:
-            if not HAS_CV2:
-                return {'error': 'OpenCV not available for quality metrics'}
-            
-            # Convert to grayscale for analysis
-            if len(image.shape) == 3:
-                gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-            else:
-                gray = image
-            
-            # Calculate metrics
-            mean_intensity = np.mean(gray)
-            std_intensity = np.std(gray)
-            
-            # Simple sharpness measure using Laplacian variance
-            laplacian = cv2.Laplacian(gray, cv2.CV_64F)
-            sharpness = laplacian.var()
-            
+            thumb = self.make_thumbnail(image)
+
+            mean_intensity = thumb.mean()
+            std_intensity = thumb.std()
+
+            # Pixels already at the extremes (already-binarized scans)
+            extremes = np.count_nonzero((thumb < 16) | (thumb > 239))
+            binary_fraction = extremes / thumb.size if thumb.size else 1.0
+
+            # Noise sigma on flat regions: text edges do not count as noise
+            noise_score = _noise_sigma(thumb)
+
             return {
                 'mean_intensity': float(mean_intensity),
                 'std_intensity': float(std_intensity),
-                'sharpness_score': float(sharpness),
+                'sharpness_score': _laplacian_var(thumb),
+                'binary_fraction': float(binary_fraction),
+                'noise_score': noise_score,
+                'skew_angle': self.estimate_skew_angle(thumb) if with_skew else 0.0,
+                'thumbnail_shape': thumb.shape,
                 'image_shape': image.shape
             }
-            
+
         except Exception as e:
             logger.warning(f"⚠️ Quality metrics calculation failed: {e}")
             return {'error': str(e)}
-
-
-
-
-
-
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/modules/rag/converters/pdf/rendering/pdf_document_cache.py
+
+Per-process cache of open PyMuPDF documents.
+Single responsibility: parse each PDF once per process and lend the handle.
+
+Rendering, page counting and validation used to call fitz.open() per page,
+re-reading the file and its xref every time. open_pdf_document() borrows a
+handle from a small LRU keyed by (path, size, mtime), so a rewritten file
+is reopened while an unchanged one is reused.
+
+fitz.Document is not thread-safe: each entry has its own lock, held while
+the handle is borrowed. Handles are never shared across processes; a
+forked worker starts with an empty cache.
+
+Lifetime: the job that converts a PDF calls release_pdf_document() when it
+finishes. Pool workers cannot be reached that way, so every miss also drops
+idle handles of deleted files (the job's temp PDF) and of older versions of
+the file being opened, instead of pinning them until LRU eviction.
+
+Author: DoxAI
+Date: 2025-12-17
+Updated: 2025-12-19 - Release on job end; drop handles of deleted files
+"""
+
+import atexit
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fitz  # PyMuPDF
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+
+DEFAULT_MAX_OPEN_DOCUMENTS = 8
+
+_CacheKey = Tuple[str, int, int]
+
+
+class _Entry:
+    __slots__ = ("doc", "lock", "borrowed")
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.lock = threading.RLock()
+        self.borrowed = 0
+
+
+class PDFDocumentCache:
+    """
+    LRU of open fitz.Document handles for the current process.
+
+    Usage:
+        with get_document_cache().open(pdf_path) as doc:
+            page = doc.load_page(0)
+    """
+
+    def __init__(self, max_open: int = DEFAULT_MAX_OPEN_DOCUMENTS):
+        self.max_open = max(1, max_open)
+        self._entries: "OrderedDict[_CacheKey, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.opens = 0
+        self.hits = 0
+
+    @staticmethod
+    def _key(pdf_path: Union[str, Path]) -> _CacheKey:
+        path = os.path.realpath(str(pdf_path))
+        stat = os.stat(path)
+        return path, stat.st_size, stat.st_mtime_ns
+
+    def _checkout(self, pdf_path: Union[str, Path]) -> _Entry:
+        key = self._key(pdf_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry.borrowed += 1
+                self.hits += 1
+                return entry
+
+        doc = fitz.open(key[0])
+        with self._lock:
+            # Another thread may have opened it meanwhile: keep one handle
+            existing = self._entries.get(key)
+            if existing is not None:
+                doc.close()
+                existing.borrowed += 1
+                self.hits += 1
+                return existing
+            entry = _Entry(doc)
+            entry.borrowed = 1
+            self._entries[key] = entry
+            self.opens += 1
+            self._drop_stale_locked(key)
+            self._evict_locked()
+        return entry
+
+    def _drop_stale_locked(self, current: _CacheKey) -> None:
+        """Closes idle handles of older versions of current's file or of deleted files."""
+        stale = [
+            key for key, entry in self._entries.items()
+            if entry.borrowed == 0 and key != current
+            and (key[0] == current[0] or not os.path.exists(key[0]))
+        ]
+        for key in stale:
+            self._entries.pop(key).doc.close()
+
+    def _evict_locked(self) -> None:
+        """Closes least recently used handles beyond max_open (if not borrowed)."""
+        for key in list(self._entries):
+            if len(self._entries) <= self.max_open:
+                return
+            entry = self._entries[key]
+            if entry.borrowed == 0:
+                del self._entries[key]
+                entry.doc.close()
+
+    def _checkin(self, entry: _Entry) -> None:
+        with self._lock:
+            entry.borrowed -= 1
+            self._evict_locked()
+
+    @contextmanager
+    def open(self, pdf_path: Union[str, Path]) -> Iterator["fitz.Document"]:
+        """Borrows the open document for pdf_path (opening it on first use)."""
+        if not HAS_PYMUPDF:
+            raise ImportError("PyMuPDF not available")
+        entry = self._checkout(pdf_path)
+        try:
+            with entry.lock:
+                yield entry.doc
+        finally:
+            self._checkin(entry)
+
+    def release(self, pdf_path: Union[str, Path]) -> None:
+        """Closes every cached handle of pdf_path (e.g. when a job finishes)."""
+        path = os.path.realpath(str(pdf_path))
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == path]
+            entries = [self._entries.pop(key) for key in keys]
+        for entry in entries:
+            with entry.lock:
+                entry.doc.close()
+
+    def close_all(self) -> None:
+        """Closes every cached handle."""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            with entry.lock:
+                try:
+                    entry.doc.close()
+                except Exception as e:
+                    logger.debug(f"Error closing cached PDF document: {e}")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "name": "pdf_documents",
+                "size": len(self._entries),
+                "max_size": self.max_open,
+                "opens": self.opens,
+                "hits": self.hits,
+            }
+
+
+_cache: Optional[PDFDocumentCache] = None
+_cache_pid: Optional[int] = None
+_cache_lock = threading.Lock()
+
+
+def get_document_cache() -> PDFDocumentCache:
+    """Process-wide document cache (a new, empty one after fork)."""
+    global _cache, _cache_pid
+    pid = os.getpid()
+    with _cache_lock:
+        if _cache is None or _cache_pid != pid:
+            _cache = PDFDocumentCache()
+            _cache_pid = pid
+        return _cache
+
+
+@contextmanager
+def open_pdf_document(pdf_path: Union[str, Path]) -> Iterator["fitz.Document"]:
+    """Shortcut for get_document_cache().open(pdf_path)."""
+    with get_document_cache().open(pdf_path) as doc:
+        yield doc
+
+
+def release_pdf_document(pdf_path: Union[str, Path]) -> None:
+    """Closes this process's handles of pdf_path; never raises (job cleanup)."""
+    if _cache is None or _cache_pid != os.getpid():
+        return
+    try:
+        _cache.release(pdf_path)
+    except Exception as e:
+        logger.debug(f"Error releasing cached PDF document {pdf_path}: {e}")
+
+
+def close_pdf_documents() -> None:
+    """Closes the handles of the current process (worker shutdown / atexit)."""
+    if _cache is not None and _cache_pid == os.getpid():
+        _cache.close_all()
+
+
+atexit.register(close_pdf_documents)
+
+
+__all__ = [
+    "PDFDocumentCache",
+    "get_document_cache",
+    "open_pdf_document",
+    "release_pdf_document",
+    "close_pdf_documents",
+]
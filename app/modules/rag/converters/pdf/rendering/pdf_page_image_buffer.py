@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/modules/rag/converters/pdf/rendering/pdf_page_image_buffer.py
+
+Shared-memory ring buffer for rendered page images.
+Single responsibility: handing page bitmaps between processes without pickling.
+
+A 300 DPI letter page is ~25 MB of RGB. Returning it from a pool worker (or
+sending it to one) pickles the whole array twice. Instead the coordinator
+owns a PageImageRing: one multiprocessing.shared_memory block split into
+fixed-size slots. Only a small PageImageHandle (block name, slot, shape,
+dtype) crosses the process boundary; the renderer writes the pixels into
+the slot and the OCR stage reads them through a numpy view of the same
+memory.
+
+Ownership:
+- The coordinator creates the ring, acquire()s a slot per page and
+  release()s it once the page result is collected; it unlinks the block.
+- Workers only attach by name (attach_page_image_ring, cached per process)
+  and never unlink. Attaching to a new ring closes the attachments to
+  previous ones, so a long-lived pool worker maps one ring at a time.
+
+/dev/shm is a size-limited tmpfs (64 MB by default in Docker) and touching
+pages beyond its capacity raises SIGBUS instead of an error, so callers
+check shared_memory_fits() before creating a ring and fall back to the
+pickled path when it does not.
+
+Author: DoxAI
+Date: 2025-12-18
+"""
+
+import logging
+import os
+import threading
+from dataclasses import dataclass, replace
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 300 DPI letter page (2550 x 3300 RGB) plus headroom for A4 / slight zoom
+DEFAULT_SLOT_BYTES = 32 * 1024 * 1024
+
+_SHM_DIR = "/dev/shm"
+
+
+def shared_memory_fits(nbytes: int) -> bool:
+    """True if the shared-memory filesystem has room for nbytes (unknown -> True)."""
+    try:
+        stats = os.statvfs(_SHM_DIR)
+    except (OSError, AttributeError):
+        # No /dev/shm (macOS, Windows): shared memory is not tmpfs-bound there
+        return True
+    return stats.f_bavail * stats.f_frsize >= nbytes
+
+
+@dataclass(frozen=True)
+class PageImageHandle:
+    """Picklable reference to an image stored in a ring slot."""
+    ring_name: str
+    slot: int
+    slot_bytes: int
+    shape: Tuple[int, ...] = ()
+    dtype: str = "uint8"
+
+    @property
+    def offset(self) -> int:
+        return self.slot * self.slot_bytes
+
+    @property
+    def nbytes(self) -> int:
+        return int(np.prod(self.shape, dtype=np.int64)) * np.dtype(self.dtype).itemsize if self.shape else 0
+
+
+def _image_view(shm: shared_memory.SharedMemory, handle: PageImageHandle) -> np.ndarray:
+    return np.ndarray(handle.shape, dtype=np.dtype(handle.dtype), buffer=shm.buf, offset=handle.offset)
+
+
+def _write_image(shm: shared_memory.SharedMemory, handle: PageImageHandle, image: np.ndarray) -> PageImageHandle:
+    if image.nbytes > handle.slot_bytes:
+        raise ValueError(
+            f"Page image of {image.nbytes} bytes does not fit in a {handle.slot_bytes}-byte slot"
+        )
+    filled = replace(handle, shape=tuple(image.shape), dtype=image.dtype.str)
+    np.copyto(_image_view(shm, filled), image, casting="no")
+    return filled
+
+
+class PageImageRing:
+    """
+    Fixed-slot shared-memory ring owned by the coordinating process.
+
+    Usage (coordinator):
+        with PageImageRing(slots=max_workers * 2) as ring:
+            handle = ring.acquire()
+            future = pool.submit(render_worker, pdf_path, page_idx, handle)
+            ...
+            ring.release(handle)
+    """
+
+    def __init__(self, slots: int, slot_bytes: int = DEFAULT_SLOT_BYTES):
+        self.slots = max(1, slots)
+        self.slot_bytes = slot_bytes
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slots * slot_bytes)
+        self._free: List[int] = list(range(self.slots))
+        self._cond = threading.Condition()
+        logger.debug(f"🧠 Page image ring {self._shm.name}: {self.slots} x {slot_bytes // (1024 * 1024)} MB")
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def acquire(self, timeout: Optional[float] = None) -> PageImageHandle:
+        """Reserves a free slot, waiting while all slots are in flight."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._free, timeout=timeout):
+                raise TimeoutError("No free page image slot")
+            slot = self._free.pop()
+        return PageImageHandle(self._shm.name, slot, self.slot_bytes)
+
+    def release(self, handle: PageImageHandle) -> None:
+        """Returns the slot of handle to the ring."""
+        with self._cond:
+            if handle.slot not in self._free:
+                self._free.append(handle.slot)
+                self._cond.notify()
+
+    def write(self, handle: PageImageHandle, image: np.ndarray) -> PageImageHandle:
+        """Copies image into the slot; returns the handle with shape/dtype filled in."""
+        return _write_image(self._shm, handle, image)
+
+    def view(self, handle: PageImageHandle) -> np.ndarray:
+        """Zero-copy view of the image in handle's slot (valid until release)."""
+        return _image_view(self._shm, handle)
+
+    def close(self) -> None:
+        """Closes and unlinks the shared block (owner only)."""
+        try:
+            self._shm.close()
+        except BufferError:
+            # A caller still holds a view; the mapping goes away with it
+            logger.warning(f"⚠️ Page image ring {self._shm.name} closed with live views")
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "PageImageRing":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# Per-process attachments to rings created elsewhere (worker side)
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+_attached_pid: Optional[int] = None
+_attached_lock = threading.Lock()
+
+
+def attach_page_image_ring(name: str) -> shared_memory.SharedMemory:
+    """Attaches (once per process) to the ring block called name."""
+    global _attached_pid
+    with _attached_lock:
+        if _attached_pid != os.getpid():
+            _attached.clear()
+            _attached_pid = os.getpid()
+        shm = _attached.get(name)
+        if shm is None:
+            # Rings are per batch: drop mappings of rings this worker no longer serves
+            _close_attachments()
+            try:
+                # Python 3.13+: attachments stay out of the resource tracker
+                shm = shared_memory.SharedMemory(name=name, track=False)
+            except TypeError:
+                # Older Pythons register the block again with the tracker the
+                # pool shares with the owner (pdf_worker_pool_cache); that is a
+                # no-op there and the owner's unlink clears it. Unregistering
+                # here would drop the owner's entry instead.
+                shm = shared_memory.SharedMemory(name=name)
+            _attached[name] = shm
+        return shm
+
+
+def write_page_image(handle: PageImageHandle, image: np.ndarray) -> PageImageHandle:
+    """Worker side: stores image in handle's slot and returns the filled handle."""
+    return _write_image(attach_page_image_ring(handle.ring_name), handle, image)
+
+
+def read_page_image(handle: PageImageHandle) -> np.ndarray:
+    """Worker side: zero-copy view of the image referenced by handle."""
+    return _image_view(attach_page_image_ring(handle.ring_name), handle)
+
+
+def _close_attachments() -> None:
+    for shm in _attached.values():
+        try:
+            shm.close()
+        except Exception as e:
+            logger.debug(f"Error detaching page image ring: {e}")
+    _attached.clear()
+
+
+def detach_page_image_rings() -> None:
+    """Closes this process's attachments (e.g. when the owner closed the ring)."""
+    with _attached_lock:
+        _close_attachments()
+
+
+__all__ = [
+    "PageImageHandle",
+    "PageImageRing",
+    "attach_page_image_ring",
+    "write_page_image",
+    "read_page_image",
+    "detach_page_image_rings",
+    "shared_memory_fits",
+    "DEFAULT_SLOT_BYTES",
+]
@@ -5,22 +5,34 @@ backend/app/services/rag/converters/pdf_page_renderer.py
 PDF page rendering operations for image preprocessing.
 Single responsibility: converting PDF pages to image arrays at specified DPI.
 
+Documents are borrowed from the per-process PDFDocumentCache, so rendering
+N pages of a PDF parses the file once instead of N times.
+
 Author: Ixchel Beristáin Mendoza
 Date: 28/09/2025 - Refactored from pdf_image_preprocessing.py
+Updated: 17/12/2025 - Reuse open documents (pdf_document_cache)
+Updated: 18/12/2025 - Pixmap samples to numpy without PPM round trip; render into shared-memory slots
 """
 
-import io
 import logging
 from pathlib import Path
 from typing import Optional, Union
 import time
 
 import numpy as np
-from PIL import Image
 from app.shared.config import settings
+from .pdf_document_cache import open_pdf_document
+from .pdf_page_image_buffer import PageImageHandle, write_page_image
 
 logger = logging.getLogger(__name__)
 
+
+def _pixmap_view(pix) -> np.ndarray:
+    """Zero-copy (h, w[, n]) view of a pixmap's samples (valid while pix lives)."""
+    samples = getattr(pix, "samples_mv", None) or pix.samples
+    shape = (pix.height, pix.width) if pix.n == 1 else (pix.height, pix.width, pix.n)
+    return np.frombuffer(samples, dtype=np.uint8).reshape(shape)
+
 # Check PyMuPDF availability
 try:
     import fitz  # PyMuPDF
@@ -70,35 +82,28 @@ class PDFPageRenderer:
             logger.info(f"📄 [PAGE {page_num + 1}] Rendering at {effective_dpi} DPI")
         
         try:
-            doc = fitz.open(str(pdf_path))
-            
-            # Validate page number
-            if page_num >= len(doc):
-                logger.error(f"❌ Page {page_num + 1} out of range (max: {len(doc)})")
-                doc.close()
-                return None
-            
-            # Check timeout before processing
-            if timeout_sec and (time.time() - start_time) > timeout_sec:
-                logger.warning(f"⏰ [PAGE {page_num + 1}] Timeout before rendering")
-                doc.close()
-                return None
-            
-            page = doc.load_page(page_num)
-            
-            # Calculate zoom factor for target DPI (PyMuPDF default is 72 DPI)
-            zoom = effective_dpi / 72.0
-            mat = fitz.Matrix(zoom, zoom)
-            
-            # Render page to pixmap
-            pix = page.get_pixmap(matrix=mat)
-            
-            # Convert to PIL Image then to numpy array
-            img_data = pix.tobytes("ppm")
-            pil_image = Image.open(io.BytesIO(img_data))
-            image_array = np.array(pil_image)
-            
-            doc.close()
+            with open_pdf_document(pdf_path) as doc:
+                # Validate page number
+                if page_num >= len(doc):
+                    logger.error(f"❌ Page {page_num + 1} out of range (max: {len(doc)})")
+                    return None
+                
+                # Check timeout before processing
+                if timeout_sec and (time.time() - start_time) > timeout_sec:
+                    logger.warning(f"⏰ [PAGE {page_num + 1}] Timeout before rendering")
+                    return None
+                
+                page = doc.load_page(page_num)
+                
+                # Calculate zoom factor for target DPI (PyMuPDF default is 72 DPI)
+                zoom = effective_dpi / 72.0
+                mat = fitz.Matrix(zoom, zoom)
+                
+                # Render page to pixmap
+                pix = page.get_pixmap(matrix=mat)
+            
+            # Single copy out of the pixmap (no PPM encode/decode)
+            image_array = _pixmap_view(pix).copy()
             
             render_time = time.time() - start_time
             
@@ -111,6 +116,47 @@ class PDFPageRenderer:
             logger.error(f"❌ Failed to render PDF page {page_num + 1}: {e}")
             return None
     
+    def render_pdf_page_to_shared(
+        self,
+        pdf_path: Union[str, Path],
+        page_num: int,
+        handle: PageImageHandle,
+        dpi: Optional[int] = None
+    ) -> Optional[PageImageHandle]:
+        """
+        Render PDF page straight into a shared-memory slot (see PageImageRing).
+        
+        The pixmap samples are copied once into the slot; only the returned
+        handle travels back to the coordinator.
+        
+        Args:
+            pdf_path: Path to PDF file
+            page_num: Page number (0-indexed)
+            handle: Slot reserved by the coordinator
+            dpi: Target DPI resolution (uses default if None)
+            
+        Returns:
+            Handle with shape/dtype filled in, or None if failed
+        """
+        if not HAS_PYMUPDF:
+            logger.error("❌ PyMuPDF not available for PDF rendering")
+            return None
+        
+        zoom = (dpi or self.default_dpi) / 72.0
+        
+        try:
+            with open_pdf_document(pdf_path) as doc:
+                if page_num >= len(doc):
+                    logger.error(f"❌ Page {page_num + 1} out of range (max: {len(doc)})")
+                    return None
+                pix = doc.load_page(page_num).get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+            
+            return write_page_image(handle, _pixmap_view(pix))
+            
+        except Exception as e:
+            logger.error(f"❌ Failed to render PDF page {page_num + 1} to shared memory: {e}")
+            return None
+    
     def render_with_fallback_dpi(
         self,
         pdf_path: Union[str, Path], 
@@ -163,10 +209,8 @@ class PDFPageRenderer:
             return 0
         
         try:
-            doc = fitz.open(str(pdf_path))
-            page_count = len(doc)
-            doc.close()
-            return page_count
+            with open_pdf_document(pdf_path) as doc:
+                return len(doc)
         except Exception as e:
             logger.error(f"❌ Failed to get page count for {pdf_path}: {e}")
             return 0
@@ -185,10 +229,8 @@ class PDFPageRenderer:
             return False
         
         try:
-            doc = fitz.open(str(pdf_path))
-            is_valid = len(doc) > 0
-            doc.close()
-            return is_valid
+            with open_pdf_document(pdf_path) as doc:
+                return len(doc) > 0
         except Exception as e:
             logger.error(f"❌ PDF validation failed for {pdf_path}: {e}")
             return False
@@ -14,7 +14,17 @@ from .ocr_facade import run_ocr, OcrText
 from .chunk_facade import chunk_text, ChunkParams, ChunkingResult
 from .embed_facade import generate_embeddings, ChunkSelector, EmbeddingResult
 from .integrate_facade import integrate_vector_index, IntegrationResult
-from .orchestrator_facade import run_indexing_job, OrchestrationSummary
+from .orchestrator_facade import (
+    run_indexing_job,
+    enqueue_indexing_job,
+    requeue_indexing_job,
+    fail_dead_indexing_job,
+    enqueue_project_indexing,
+    run_project_indexing,
+    OrchestrationSummary,
+    ProjectDocument,
+    ProjectIndexingResult,
+)
 
 __all__ = [
     # Convert
@@ -36,5 +46,12 @@ __all__ = [
     "IntegrationResult",
     # Orchestrator
     "run_indexing_job",
+    "enqueue_indexing_job",
+    "requeue_indexing_job",
+    "fail_dead_indexing_job",
+    "enqueue_project_indexing",
+    "run_project_indexing",
     "OrchestrationSummary",
+    "ProjectDocument",
+    "ProjectIndexingResult",
 ]
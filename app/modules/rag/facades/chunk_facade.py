@@ -6,7 +6,9 @@ Facade para fase 'chunk': segmentación semántica y persistencia.
 Divide texto en chunks y persiste en ChunkMetadata.
 
 Responsabilidades:
-- Segmentar texto según parámetros (max_tokens, overlap, reglas)
+- Segmentar texto según parámetros (max_tokens, overlap, reglas) con
+  ChunkerService (tokenizer BPE, streaming, páginas separadas por \f)
+- Leer el texto en streaming (spool en memoria acotado, desborda a disco)
 - Persistir chunks en ChunkMetadata con índices y metadatos
 - Validar constraints (token_count >= 0, páginas válidas)
 - Idempotencia por (file_id, params_hash)
@@ -17,16 +19,25 @@ Fecha: 2025-11-28 (FASE 3 - Implementación completa)
 
 from dataclasses import dataclass
 from uuid import UUID
-import re
+import io
+import itertools
 import logging
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.modules.rag.models.chunk_models import ChunkMetadata
 from app.modules.rag.repositories.chunk_metadata_repository import chunk_metadata_repository
-from app.modules.rag.repositories.rag_job_event_repository import rag_job_event_repository
+from app.modules.rag.repositories.rag_job_event_repository import (
+    RagJobEventRepository,
+    rag_job_event_repository,
+)
+from app.modules.rag.config import rag_config
 from app.modules.rag.enums import RagPhase
-from app.modules.files.services.storage_ops_service import AsyncStorageClient
+from app.modules.rag.services.chunker import ChunkerService, ChunkParams as ChunkerParams
+from app.modules.files.services.storage_ops_service import (
+    AsyncStorageClient,
+    spool_object,
+    split_storage_uri,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -46,36 +57,8 @@ class ChunkingResult:
     chunk_ids: list[UUID]
 
 
-def _simple_tokenize(text: str) -> list[str]:
-    """Tokenización simple por whitespace para estimación."""
-    return re.findall(r'\S+', text)
-
-
-def _split_text_into_chunks(
-    text: str, 
-    max_tokens: int = 400, 
-    overlap: int = 60
-) -> list[tuple[str, int]]:
-    """
-    Divide texto en chunks con overlap.
-    
-    Returns:
-        Lista de tuplas (chunk_text, token_count)
-    """
-    tokens = _simple_tokenize(text)
-    chunks = []
-    
-    i = 0
-    while i < len(tokens):
-        # Tomar max_tokens tokens
-        chunk_tokens = tokens[i:i + max_tokens]
-        chunk_text = ' '.join(chunk_tokens)
-        chunks.append((chunk_text, len(chunk_tokens)))
-        
-        # Avanzar con overlap
-        i += max(1, max_tokens - overlap)
-    
-    return chunks if chunks else [("", 0)]
+# Chunks por INSERT en bloque (memoria acotada en documentos grandes)
+_INSERT_BATCH_SIZE = 500
 
 
 async def chunk_text(
@@ -86,6 +69,7 @@ async def chunk_text(
     params: ChunkParams,
     *,
     storage_client: AsyncStorageClient | None = None,
+    event_repo: RagJobEventRepository = None,
 ) -> ChunkingResult:
     """
     Segmenta texto y persiste chunks en ChunkMetadata.
@@ -97,6 +81,7 @@ async def chunk_text(
         text_uri: URI del texto a segmentar (formato: bucket/path)
         params: Parámetros de chunking
         storage_client: Cliente de almacenamiento (opcional para tests)
+        event_repo: Repository de eventos (inyectable)
         
     Returns:
         ChunkingResult con total y IDs de chunks creados
@@ -121,8 +106,10 @@ async def chunk_text(
         },
     )
     
+    event_repo = event_repo or rag_job_event_repository
+    
     # Log event: phase started
-    await rag_job_event_repository.log_event(
+    await event_repo.log_event(
         db,
         job_id=job_id,
         event_type="phase_started",
@@ -141,100 +128,95 @@ async def chunk_text(
             raise ValueError("storage_client is required for chunking")
         
         # Parse text_uri: formato "bucket/path/to/file"
-        parts = text_uri.split('/', 1)
-        if len(parts) != 2:
-            raise ValueError(f"Invalid text_uri format: {text_uri}. Expected 'bucket/path'")
-        
-        bucket_name, storage_path = parts
+        bucket_name, storage_path = split_storage_uri(text_uri)
         
-        # ========== CARGAR TEXTO DESDE STORAGE ==========
+        # ========== CARGAR TEXTO DESDE STORAGE (STREAMING) ==========
         
-        logger.info(f"[chunk_text] Downloading text from {bucket_name}/{storage_path}")
+        logger.info(f"[chunk_text] Streaming text from {bucket_name}/{storage_path}")
         
         try:
-            text_bytes = await storage_client.download_file(bucket_name, storage_path)
+            spooled = await spool_object(
+                storage_client,
+                bucket=bucket_name,
+                key=storage_path,
+                chunk_size=rag_config.storage_stream_chunk_bytes,
+                max_memory=rag_config.storage_spool_max_memory_bytes,
+            )
         except Exception as storage_err:
             logger.error(f"[chunk_text] Failed to read from {text_uri}: {storage_err}")
             raise FileNotFoundError(f"Cannot read text_uri {text_uri}: {storage_err}") from storage_err
         
-        text_content = text_bytes.decode('utf-8', errors='replace').strip()
-        
-        if not text_content:
-            raise ValueError(f"Empty text content at {text_uri}")
-        
-        logger.info(
-            "[chunk_text] Text loaded from storage",
-            extra={
-                "job_id": str(job_id),
-                "file_id": str(file_id),
-                "char_count": len(text_content),
-                "text_uri": text_uri,
-            },
-        )
-        
-        # 2) Idempotencia: limpiar chunks previos
-        existing_count = await chunk_metadata_repository.count_by_file(db, file_id)
-        
-        if existing_count > 0:
-            logger.info(f"[chunk_text] Removing {existing_count} existing chunks for file_id={file_id}")
-            await chunk_metadata_repository.delete_by_file(db, file_id)
-            await db.flush()
-        
-        # 3) Segmentar texto
-        logger.info(f"[chunk_text] Splitting text with max_tokens={params.max_tokens}, overlap={params.overlap}")
-        chunks = _split_text_into_chunks(
-            text_content,
-            max_tokens=params.max_tokens,
-            overlap=params.overlap,
-        )
-        
-        if not chunks:
+        with spooled:
+            # 3) Segmentar texto (generador con tokenizer BPE) leyendo el spool por líneas
+            logger.info(f"[chunk_text] Splitting text with max_tokens={params.max_tokens}, overlap={params.overlap}")
+            text_stream = io.TextIOWrapper(spooled, encoding="utf-8", errors="replace")
+            chunker = ChunkerService()
+            chunk_stream = chunker.iter_chunks(
+                text_stream,
+                ChunkerParams(max_tokens=params.max_tokens, overlap=params.overlap),
+            )
+            
+            first_chunk = next(chunk_stream, None)
+            if first_chunk is None:
+                raise ValueError(f"Empty text content at {text_uri}")
+            
+            logger.info(
+                "[chunk_text] Text stream opened from storage",
+                extra={
+                    "job_id": str(job_id),
+                    "file_id": str(file_id),
+                    "text_uri": text_uri,
+                },
+            )
+            
+            # 2) Idempotencia: limpiar chunks previos
+            existing_count = await chunk_metadata_repository.count_by_file(db, file_id)
+            
+            if existing_count > 0:
+                logger.info(f"[chunk_text] Removing {existing_count} existing chunks for file_id={file_id}")
+                await chunk_metadata_repository.delete_by_file(db, file_id)
+                await db.flush()
+            
+            # 4) Persistir por lotes sin ORM
+            chunk_ids: list[UUID] = []
+            batch: list[dict] = []
+            for chunk in itertools.chain([first_chunk], chunk_stream):
+                batch.append({
+                    "chunk_index": chunk.index,
+                    "chunk_text": chunk.text,
+                    "token_count": chunk.token_count,
+                    "source_page_start": chunk.source_page_start,
+                    "source_page_end": chunk.source_page_end,
+                })
+                if len(batch) >= _INSERT_BATCH_SIZE:
+                    chunk_ids.extend(await chunk_metadata_repository.bulk_insert_chunks(db, file_id, batch))
+                    batch = []
+            if batch:
+                chunk_ids.extend(await chunk_metadata_repository.bulk_insert_chunks(db, file_id, batch))
+        
+        if not chunk_ids:
             raise RuntimeError("Text segmentation produced no chunks")
         
-        logger.info(
-            "[chunk_text] Text segmented into chunks",
-            extra={
-                "job_id": str(job_id),
-                "file_id": str(file_id),
-                "total_chunks": len(chunks),
-                "max_tokens": params.max_tokens,
-                "overlap": params.overlap,
-            },
-        )
-        
-        # 4) Persistir chunks con nombres de campos alineados con SQL
-        chunk_records = []
-        for idx, (chunk_text, token_count) in enumerate(chunks):
-            chunk_records.append(ChunkMetadata(
-                file_id=file_id,
-                chunk_index=idx,
-                chunk_text=chunk_text,
-                token_count=token_count,
-                metadata_json={},
-            ))
-        
-        inserted_chunks = await chunk_metadata_repository.insert_chunks(db, chunk_records)
-        await db.flush()
-        
-        chunk_ids = [c.chunk_id for c in inserted_chunks]
-        
         logger.info(
             "[chunk_text] Chunks persisted to database",
             extra={
                 "job_id": str(job_id),
                 "file_id": str(file_id),
                 "chunks_persisted": len(chunk_ids),
+                "max_tokens": params.max_tokens,
+                "overlap": params.overlap,
             },
         )
         
         # Log event: phase completed
-        await rag_job_event_repository.log_event(
+        await event_repo.log_event(
             db,
             job_id=job_id,
             event_type="phase_completed",
             rag_phase=RagPhase.chunk,
             progress_pct=50,
             message=f"Chunking completed: {len(chunk_ids)} chunks created",
+            event_payload={"total_chunks": len(chunk_ids)},
         )
         
         return ChunkingResult(
@@ -246,7 +228,7 @@ async def chunk_text(
         logger.error(f"[chunk_text] Chunking failed: {e}", exc_info=True)
         
         # Log event: phase failed
-        await rag_job_event_repository.log_event(
+        await event_repo.log_event(
             db,
             job_id=job_id,
             event_type="phase_failed",
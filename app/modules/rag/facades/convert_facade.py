@@ -3,7 +3,8 @@
 backend/app/modules/rag/facades/convert_facade.py
 
 Facade para fase 'convert': conversión de binario a texto sin OCR.
-Extrae texto nativo de PDFs, DOCX, etc. sin procesamiento de imágenes.
+Extrae texto nativo de PDFs, DOCX, XLSX, etc. sin procesamiento de imágenes.
+El parseo CPU-bound corre en un pool de procesos acotado (text_extractors).
 
 INTEGRACIÓN: Usa clientes de Storage y extractores de texto.
 
@@ -11,22 +12,35 @@ Responsabilidades:
 - Detectar extractor apropiado por mime_type
 - Extraer texto nativo (no escaneado)
 - Guardar resultado en storage (rag-cache-jobs)
+- Clasificar páginas PDF nativa/escaneada (plan de páginas para la fase OCR)
 - Actualizar job con eventos de progreso
 
 Autor: Ixchel Beristain
 Fecha: 2025-11-28 (FASE 2)
+Actualizado: 2025-12-16 - Plan de páginas para OCR solo de páginas de imagen
 """
 
-import hashlib
 import logging
+import os
+import tempfile
 from dataclasses import dataclass
 from datetime import datetime, timezone
+from typing import List, Optional
 from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.modules.rag.repositories import RagJobRepository, RagJobEventRepository
+from app.modules.rag.config import rag_config
 from app.modules.rag.enums import RagPhase
+from app.modules.rag.services.text_extractors import PDF_MIME, extract_text_file_async
+from app.modules.rag.services.page_plan import plan_pdf_pages_async
+from app.modules.files.services.storage_ops_service import (
+    download_to_file,
+    iter_file_chunks,
+    split_storage_uri,
+    upload_file_stream,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +51,9 @@ class ConvertedText:
     result_uri: str
     byte_size: int
     checksum: str
+    # Plan de páginas (solo PDF): índices desde 0 que requieren OCR
+    total_pages: Optional[int] = None
+    ocr_pages: Optional[List[int]] = None
 
 
 async def convert_to_text(
@@ -59,12 +76,13 @@ async def convert_to_text(
         file_id: ID del archivo a convertir
         source_uri: URI del archivo fuente en storage (ej: users-files/...)
         mime_type: Tipo MIME del documento
-        storage_client: Cliente de storage (inyectable para testing)
+        storage_client: Cliente AsyncStorageClient con iter_bytes/upload_stream
         job_repo: Repository de jobs (inyectable)
         event_repo: Repository de eventos (inyectable)
         
     Returns:
-        ConvertedText con URI del resultado, tamaño y checksum
+        ConvertedText con URI del resultado, tamaño, checksum y, para PDFs,
+        el plan de páginas (ocr_pages)
         
     Raises:
         ValueError: Si mime_type no soportado
@@ -73,8 +91,14 @@ async def convert_to_text(
         
     Notas:
         - No incluye OCR (fase independiente)
+        - PDF/DOCX/XLSX se extraen en el pool de procesos (no bloquea el loop)
+        - PDF/XLSX separan páginas/hojas con "\\f" (convención del chunker)
+        - Storage en streaming (iter_bytes/upload_stream) vía archivos temporales:
+          la memoria del proceso API queda acotada por storage_stream_chunk_bytes
         - Idempotente por checksum del source
         - Guarda resultado en rag-cache-jobs/{job_id}/converted.txt
+        - PDF: el plan de páginas (páginas de imagen → OCR) va en el
+          payload de phase_completed para el resume del orquestador
     """
     job_repo = job_repo or RagJobRepository()
     event_repo = event_repo or RagJobEventRepository()
@@ -105,34 +129,56 @@ async def convert_to_text(
         )
     
     try:
-        # 2. Descargar archivo de storage
-        logger.info(f"[convert_to_text] Descargando archivo desde {source_uri}")
-        file_bytes = await storage_client.read(source_uri)
-        
-        # 3. Extraer texto según mime_type
-        extracted_text = _extract_text_by_mimetype(mime_type, file_bytes)
-        
-        # 4. Calcular checksum
-        checksum = hashlib.sha256(extracted_text.encode("utf-8")).hexdigest()
-        byte_size = len(extracted_text.encode("utf-8"))
-        
-        logger.info(
-            "[convert_to_text] Text extracted successfully",
-            extra={
-                "job_id": str(job_id),
-                "file_id": str(file_id),
-                "byte_size": byte_size,
-                "checksum": checksum[:8],
-            },
-        )
-        
-        # 5. Guardar texto en storage (rag-cache-jobs)
         result_uri = f"rag-cache-jobs/{job_id}/converted.txt"
-        await storage_client.write(
-            result_uri,
-            extracted_text.encode("utf-8"),
-            content_type="text/plain",
-        )
+        result_bucket, result_key = split_storage_uri(result_uri)
+        source_bucket, source_key = split_storage_uri(source_uri)
+        chunk_size = rag_config.storage_stream_chunk_bytes
+        
+        with tempfile.TemporaryDirectory(prefix="rag-convert-") as workdir:
+            source_path = os.path.join(workdir, "source")
+            text_path = os.path.join(workdir, "converted.txt")
+            
+            # 2. Descargar archivo de storage en streaming a disco
+            logger.info(f"[convert_to_text] Descargando archivo desde {source_uri}")
+            with open(source_path, "wb") as source_file:
+                await download_to_file(
+                    storage_client,
+                    source_file,
+                    bucket=source_bucket,
+                    key=source_key,
+                    chunk_size=chunk_size,
+                )
+            
+            # 3-4. Extraer texto (pool de procesos, archivo → archivo) y checksum
+            byte_size, checksum = await extract_text_file_async(mime_type, source_path, text_path)
+            
+            # Plan de páginas (nativa vs escaneada); sin plan, OCR decide por documento
+            plan = None
+            if mime_type == PDF_MIME and rag_config.page_plan_enabled:
+                try:
+                    plan = await plan_pdf_pages_async(source_path)
+                except Exception as e:
+                    logger.warning(f"[convert_to_text] Page plan failed, OCR will cover the whole document: {e}")
+            
+            logger.info(
+                "[convert_to_text] Text extracted successfully",
+                extra={
+                    "job_id": str(job_id),
+                    "file_id": str(file_id),
+                    "byte_size": byte_size,
+                    "checksum": checksum[:8],
+                },
+            )
+            
+            # 5. Guardar texto en storage (rag-cache-jobs) en streaming
+            with open(text_path, "rb") as text_file:
+                await upload_file_stream(
+                    storage_client,
+                    bucket=result_bucket,
+                    key=result_key,
+                    stream=iter_file_chunks(text_file, chunk_size),
+                    mime_type="text/plain",
+                )
         
         logger.info(
             "[convert_to_text] Text saved to storage",
@@ -144,6 +190,11 @@ async def convert_to_text(
             },
         )
         
+        payload = {"checksum": checksum, "byte_size": byte_size, "result_uri": result_uri}
+        if plan is not None:
+            payload["total_pages"] = plan.total_pages
+            payload["ocr_pages"] = plan.ocr_pages
+        
         # 6. Registrar éxito (solo si tenemos db)
         if db is not None:
             await event_repo.log_event(
@@ -153,18 +204,17 @@ async def convert_to_text(
                 rag_phase=RagPhase.convert,
                 progress_pct=100,
                 message=f"Conversión completada: {byte_size} bytes",
-                event_payload={"checksum": checksum, "byte_size": byte_size},
+                event_payload=payload,
             )
         
         return ConvertedText(
             result_uri=result_uri,
             byte_size=byte_size,
             checksum=checksum,
+            total_pages=plan.total_pages if plan else None,
+            ocr_pages=plan.ocr_pages if plan else None,
         )
     
-    except NotImplementedError:
-        # Dejar que NotImplementedError se propague sin envolver (para tests de contrato)
-        raise
     except Exception as e:
         logger.error(f"[convert_to_text] Error en conversión: {e}", exc_info=True)
         
@@ -180,34 +230,3 @@ async def convert_to_text(
             )
         
         raise RuntimeError(f"Error en conversión de texto: {e}") from e
-
-
-def _extract_text_by_mimetype(mime_type: str, file_bytes: bytes) -> str:
-    """
-    Extrae texto nativo según mime_type.
-    
-    NOTA: Implementación simplificada para FASE 2.
-    En producción, usar bibliotecas especializadas (PyPDF2, python-docx, etc.)
-    """
-    # Soporte básico para texto plano y markdown
-    if mime_type in ["text/plain", "text/markdown", "text/html"]:
-        try:
-            return file_bytes.decode("utf-8")
-        except UnicodeDecodeError:
-            # Intenta con latin-1 como fallback
-            return file_bytes.decode("latin-1", errors="replace")
-    
-    # PDF y otros formatos: pendiente de implementación completa
-    if mime_type == "application/pdf":
-        # TODO: Usar PyPDF2 o pdfplumber
-        raise NotImplementedError(
-            "PDF text extraction requires PyPDF2/pdfplumber (FASE 2 pendiente)"
-        )
-    
-    if mime_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-        # TODO: Usar python-docx
-        raise NotImplementedError(
-            "DOCX text extraction requires python-docx (FASE 2 pendiente)"
-        )
-    
-    raise ValueError(f"Mime type no soportado para extracción: {mime_type}")
@@ -12,11 +12,14 @@ Responsabilidades:
 - Persistir en DocumentEmbedding (vector 1536d, metadatos)
 - Manejar file_category, is_active
 - Idempotencia por (file_id, chunk_index, embedding_model, dimension)
+- Lotes acotados por tokens con concurrencia limitada y persistencia por lote
+- Caché de embeddings por contenido (reindexación / archivos casi duplicados)
 
 Autor: Ixchel Beristain
 Fecha: 2025-11-28 (FASE 2)
 """
 
+import asyncio
 import logging
 from dataclasses import dataclass
 from uuid import UUID
@@ -30,8 +33,13 @@ from app.modules.rag.repositories import (
     DocumentEmbeddingRepository,
     document_embedding_repository,
 )
-from app.modules.rag.models import DocumentEmbedding
+from app.modules.rag.config import rag_config
+from app.modules.rag.models import ChunkMetadata
 from app.modules.rag.enums import RagPhase, FileCategory
+from app.modules.rag.services.embedding_cache_service import (
+    EmbeddingCacheService,
+    embedding_cache_service,
+)
 from app.shared.integrations.openai_embeddings_client import generate_embeddings as openai_generate_embeddings
 
 logger = logging.getLogger(__name__)
@@ -56,6 +64,39 @@ class EmbeddingResult:
         return self.total_chunks - self.embedded
 
 
+def _estimate_tokens(chunk: ChunkMetadata) -> int:
+    """Tokens del chunk: usa token_count si existe, si no ~4 caracteres por token."""
+    if chunk.token_count:
+        return chunk.token_count
+    return len(chunk.chunk_text or "") // 4 + 1
+
+
+def _build_batches(
+    chunks: list[ChunkMetadata],
+    *,
+    max_tokens: int,
+    max_items: int,
+) -> list[list[ChunkMetadata]]:
+    """
+    Agrupa chunks en lotes consecutivos que respetan el presupuesto de tokens
+    y el máximo de textos por request. Un chunk que excede el presupuesto por
+    sí solo va en su propio lote.
+    """
+    batches: list[list[ChunkMetadata]] = []
+    current: list[ChunkMetadata] = []
+    current_tokens = 0
+    for chunk in chunks:
+        tokens = _estimate_tokens(chunk)
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(chunk)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
 async def generate_embeddings(
     db: AsyncSession,
     job_id: UUID,
@@ -69,6 +110,10 @@ async def generate_embeddings(
     event_repo: RagJobEventRepository = None,
     chunk_repo: ChunkMetadataRepository = None,
     embedding_repo: DocumentEmbeddingRepository = None,
+    batch_max_tokens: int | None = None,
+    batch_max_items: int | None = None,
+    max_concurrency: int | None = None,
+    embedding_cache: EmbeddingCacheService = None,
 ) -> EmbeddingResult:
     """
     Genera embeddings y persiste en DocumentEmbedding.
@@ -85,6 +130,10 @@ async def generate_embeddings(
         event_repo: Repository de eventos (inyectable)
         chunk_repo: Repository de chunks (inyectable)
         embedding_repo: Repository de embeddings (inyectable)
+        batch_max_tokens: Presupuesto de tokens por request (default rag_config)
+        batch_max_items: Máximo de textos por request (default rag_config)
+        max_concurrency: Requests simultáneos a OpenAI (default rag_config)
+        embedding_cache: Caché de embeddings por contenido (inyectable)
         
     Returns:
         EmbeddingResult con conteo de chunks procesados
@@ -110,11 +159,16 @@ async def generate_embeddings(
         - Idempotente por (file_id, chunk_index, embedding_model)
         - Dimensión fija 1536 en BD (valida contra param si difiere)
         - Respeta fase del pipeline en rag_phase para trazabilidad
+        - Antes de llamar a OpenAI consulta la caché por contenido
+          (model, dimension, hash del texto); los vectores nuevos se cachean
+        - Lotes por presupuesto de tokens, con commit por lote: un fallo a mitad
+          de archivo conserva los lotes ya persistidos
     """
     job_repo = job_repo or RagJobRepository()
     event_repo = event_repo or RagJobEventRepository()
     chunk_repo = chunk_repo or ChunkMetadataRepository()
     embedding_repo = embedding_repo or document_embedding_repository
+    embedding_cache = embedding_cache or embedding_cache_service
     
     # FASE 3 - Issue #30: Validar que dimension == 1536 (fijado en SQL)
     if dimension != 1536:
@@ -137,7 +191,7 @@ async def generate_embeddings(
     
     # 1. Registrar inicio de fase embed
     await event_repo.log_event(
-        db=db,
+        session=db,
         job_id=job_id,
         event_type="phase_started",
         rag_phase=RagPhase.embed,
@@ -146,15 +200,11 @@ async def generate_embeddings(
     )
     
     try:
-        # 2. Seleccionar chunks según selector
+        # 2. Seleccionar chunks según selector (una consulta por rama)
         total_file_chunks = 0
         if selector.chunk_ids:
             # Selección por IDs específicos
-            chunks = []
-            for chunk_id in selector.chunk_ids:
-                chunk = await chunk_repo.get_by_id(db, chunk_id)
-                if chunk:
-                    chunks.append(chunk)
+            chunks = list(await chunk_repo.get_by_ids(db, selector.chunk_ids))
             total_file_chunks = len(chunks)
         elif selector.index_range:
             # Selección por rango de índices
@@ -170,9 +220,10 @@ async def generate_embeddings(
 
         if not chunks:
             logger.warning(f"[generate_embeddings] No se encontraron chunks para file_id={file_id} y/o para el selector proporcionado")
-            # Aun si el rango no coincide, total_chunks debe reflejar todos los chunks del archivo
-            all_chunks_for_count = await chunk_repo.list_by_file(db, file_id)
-            return EmbeddingResult(total_chunks=len(all_chunks_for_count), embedded=0)
+            # Aun si el selector no coincide, total_chunks debe reflejar todos los chunks del archivo
+            if selector.chunk_ids:
+                total_file_chunks = await chunk_repo.count_by_file(db, file_id)
+            return EmbeddingResult(total_chunks=total_file_chunks, embedded=0)
         
         logger.info(
             "[generate_embeddings] Chunks selected for embedding",
@@ -183,14 +234,14 @@ async def generate_embeddings(
             },
         )
         
-        # 3. Filtrar chunks ya embebidos (idempotencia)
-        chunks_to_embed = []
-        for chunk in chunks:
-            exists = await embedding_repo.exists_for_file_and_chunk(
-                db, file_id, chunk.chunk_index, embedding_model
-            )
-            if not exists:
-                chunks_to_embed.append(chunk)
+        # 3. Filtrar chunks ya embebidos (idempotencia, una sola consulta)
+        embedded_indexes = await embedding_repo.list_embedded_chunk_indexes(
+            db,
+            file_id,
+            embedding_model,
+            chunk_indexes=[chunk.chunk_index for chunk in chunks] if selector.chunk_ids else None,
+        )
+        chunks_to_embed = [c for c in chunks if c.chunk_index not in embedded_indexes]
         
         skipped = len(chunks) - len(chunks_to_embed)
         logger.info(
@@ -205,7 +256,7 @@ async def generate_embeddings(
         
         if not chunks_to_embed:
             await event_repo.log_event(
-                db=db,
+                session=db,
                 job_id=job_id,
                 event_type="phase_completed",
                 rag_phase=RagPhase.embed,
@@ -217,46 +268,94 @@ async def generate_embeddings(
                 embedded=0,
             )
         
-        # 4. Extraer textos de los chunks
-        texts = [chunk.chunk_text for chunk in chunks_to_embed]
+        def _to_rows(pairs) -> list[dict]:
+            return [
+                {
+                    "file_id": file_id,
+                    "chunk_id": chunk.chunk_id,
+                    "file_category": FileCategory.INPUT,  # Asumimos INPUT por defecto
+                    "rag_phase": RagPhase.embed,
+                    "chunk_index": chunk.chunk_index,
+                    "embedding_vector": vector,
+                    "embedding_model": embedding_model,
+                    "is_active": True,
+                }
+                for chunk, vector in pairs
+            ]
+        
+        # 4. Reutilizar vectores de la caché por contenido (una consulta)
+        inserted = []
+        cached_vectors = await embedding_cache.lookup(
+            db, embedding_model, dimension, [chunk.chunk_text for chunk in chunks_to_embed]
+        )
+        cached_pairs = [
+            (chunk, vector)
+            for chunk, vector in zip(chunks_to_embed, cached_vectors)
+            if vector is not None
+        ]
+        pending = [
+            chunk
+            for chunk, vector in zip(chunks_to_embed, cached_vectors)
+            if vector is None
+        ]
+        if cached_pairs:
+            inserted.extend(await embedding_repo.bulk_insert_embeddings(db, _to_rows(cached_pairs)))
+            await db.commit()
         
-        # 5. Generar embeddings con OpenAI
-        logger.info(f"[generate_embeddings] Llamando a OpenAI API...")
-        vectors = await openai_generate_embeddings(
-            texts,
-            api_key=openai_api_key,
-            model=embedding_model,
-            dimension=dimension,
+        # 5. Agrupar el resto en lotes acotados por tokens/ítems
+        batches = _build_batches(
+            pending,
+            max_tokens=batch_max_tokens or rag_config.embeddings_batch_max_tokens,
+            max_items=batch_max_items or rag_config.embeddings_batch_max_items,
         )
+        semaphore = asyncio.Semaphore(max(1, max_concurrency or rag_config.embeddings_max_concurrency))
         
+        async def _embed_batch(batch: list[ChunkMetadata]) -> tuple[list[ChunkMetadata], list[list[float]]]:
+            async with semaphore:
+                vectors = await openai_generate_embeddings(
+                    [chunk.chunk_text for chunk in batch],
+                    api_key=openai_api_key,
+                    model=embedding_model,
+                    dimension=dimension,
+                )
+            if len(vectors) != len(batch):
+                raise ValueError(
+                    f"OpenAI returned {len(vectors)} vectors for a batch of {len(batch)} texts"
+                )
+            return batch, vectors
+        
+        # 6. Generar embeddings con OpenAI (requests concurrentes, acotados por semáforo)
         logger.info(
-            "[generate_embeddings] Embeddings generated by OpenAI",
+            "[generate_embeddings] Llamando a OpenAI API...",
             extra={
                 "job_id": str(job_id),
                 "file_id": str(file_id),
-                "vectors_generated": len(vectors),
-                "embedding_model": embedding_model,
-                "dimension": dimension,
+                "batches": len(batches),
+                "cache_hits": len(cached_pairs),
             },
         )
+        tasks = [asyncio.ensure_future(_embed_batch(batch)) for batch in batches]
         
-        # 6. Persistir embeddings en DocumentEmbedding
-        embeddings_to_insert = []
-        for chunk, vector in zip(chunks_to_embed, vectors):
-            embedding = DocumentEmbedding(
-                file_id=file_id,
-                chunk_id=chunk.chunk_id,
-                file_category=FileCategory.INPUT,  # Asumimos INPUT por defecto
-                rag_phase=RagPhase.embed,
-                chunk_index=chunk.chunk_index,
-                embedding_vector=vector,
-                embedding_model=embedding_model,
-                is_active=True,
-            )
-            embeddings_to_insert.append(embedding)
+        # 7. Persistir cada lote (y alimentar la caché) en cuanto termina; la sesión se usa
+        #    de forma secuencial. Si un lote falla, los ya confirmados se omiten en el
+        #    reintento por idempotencia.
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                batch, vectors = await next_done
+                inserted.extend(await embedding_repo.bulk_insert_embeddings(db, _to_rows(zip(batch, vectors))))
+                await embedding_cache.store(
+                    db, embedding_model, dimension, [chunk.chunk_text for chunk in batch], vectors
+                )
+                await db.commit()
+        finally:
+            # Cancelar los lotes pendientes y esperarlos: ninguno queda vivo (ni con
+            # excepciones sin recoger) cuando la sesión de BD se cierra o reintenta.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
         
-        inserted = await embedding_repo.insert_embeddings(db, embeddings_to_insert)
-        await db.commit()
+        if batches and await embedding_cache.maybe_evict(db):
+            await db.commit()
         
         logger.info(
             "[generate_embeddings] Embeddings persisted to database",
@@ -264,13 +363,16 @@ async def generate_embeddings(
                 "job_id": str(job_id),
                 "file_id": str(file_id),
                 "embeddings_persisted": len(inserted),
+                "batches": len(batches),
+                "cache_hits": len(cached_pairs),
                 "embedding_model": embedding_model,
+                "dimension": dimension,
             },
         )
         
-        # 7. Registrar éxito
+        # 8. Registrar éxito
         await event_repo.log_event(
-            db=db,
+            session=db,
             job_id=job_id,
             event_type="phase_completed",
             rag_phase=RagPhase.embed,
@@ -281,6 +383,8 @@ async def generate_embeddings(
                 "skipped": skipped,
                 "model": embedding_model,
                 "dimension": dimension,
+                "batches": len(batches),
+                "cache_hits": len(cached_pairs),
             },
         )
         
@@ -294,7 +398,7 @@ async def generate_embeddings(
         
         # Registrar error
         await event_repo.log_event(
-            db=db,
+            session=db,
             job_id=job_id,
             event_type="phase_failed",
             rag_phase=RagPhase.embed,
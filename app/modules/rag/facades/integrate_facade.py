@@ -23,7 +23,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.modules.rag.repositories.document_embedding_repository import DocumentEmbeddingRepository
 from app.modules.rag.repositories.chunk_metadata_repository import ChunkMetadataRepository
-from app.modules.rag.repositories.rag_job_event_repository import rag_job_event_repository
+from app.modules.rag.repositories.rag_job_event_repository import (
+    RagJobEventRepository,
+    rag_job_event_repository,
+)
 from app.modules.rag.enums import RagPhase
 
 logger = logging.getLogger(__name__)
@@ -42,6 +45,8 @@ async def integrate_vector_index(
     db: AsyncSession,
     job_id: UUID,
     file_id: UUID,
+    *,
+    event_repo: RagJobEventRepository = None,
 ) -> IntegrationResult:
     """
     Integra embeddings al índice vectorial y marca como ready.
@@ -50,6 +55,7 @@ async def integrate_vector_index(
         db: Sesión de base de datos
         job_id: ID del job de indexación
         file_id: ID del archivo procesado
+        event_repo: Repository de eventos (inyectable)
         
     Returns:
         IntegrationResult con conteos de activación y estado ready
@@ -76,8 +82,10 @@ async def integrate_vector_index(
         },
     )
     
+    event_repo = event_repo or rag_job_event_repository
+    
     # Log event: phase started
-    await rag_job_event_repository.log_event(
+    await event_repo.log_event(
         db,
         job_id=job_id,
         event_type="phase_started",
@@ -143,7 +151,7 @@ async def integrate_vector_index(
         )
         
         # Log event: phase completed
-        await rag_job_event_repository.log_event(
+        await event_repo.log_event(
             db,
             job_id=job_id,
             event_type="phase_completed",
@@ -168,7 +176,7 @@ async def integrate_vector_index(
         logger.error(f"[integrate_vector_index] Integration failed: {e}", exc_info=True)
         
         # Log event: phase failed
-        await rag_job_event_repository.log_event(
+        await event_repo.log_event(
             db,
             job_id=job_id,
             event_type="phase_failed",
@@ -11,20 +11,52 @@ Responsabilidades:
 - Ejecutar OCR con estrategia configurable (fast/accurate/balanced)
 - Extraer texto de documentos escaneados o imágenes
 - Detectar idioma y confianza del resultado
-- Guardar resultado en storage y actualizar eventos de job
+- Guardar resultado en storage (upload en streaming) y actualizar eventos de job
+
+source_uri público (http/https) se envía a Azure como urlSource; un URI de
+storage (bucket/path) se descarga y se envía en binario, lo que permite al
+cliente dividir PDFs grandes en rangos de páginas analizados en paralelo.
+Los PDFs de storage pasan por la caché OCR por página (OcrPageCache): solo
+las páginas cuyo contenido no está cacheado se envían a Azure.
+
+Con plan de páginas (pages + native_text_uri, ver services/page_plan) solo
+se analizan las páginas de imagen y su texto sustituye al de esas páginas en
+la extracción nativa; el resultado conserva el orden de página ("\f").
 
 Autor: Ixchel Beristain
 Fecha: 2025-11-28 (FASE 2)
+Actualizado: 2025-12-14 - Envío binario desde storage (rangos de páginas en paralelo)
+Actualizado: 2025-12-15 - Caché OCR por página para PDFs de storage
+Actualizado: 2025-12-16 - OCR solo de páginas de imagen + fusión con texto nativo
+Actualizado: 2025-12-19 - Tipo MIME del job para claves de storage sin extensión
+Actualizado: 2025-12-20 - El spool de storage se envía sin cargarlo entero; checksum por bloques
 """
 
+import codecs
 import logging
+import mimetypes
 from dataclasses import dataclass
+from typing import Optional, Sequence
 from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.modules.rag.repositories import RagJobRepository, RagJobEventRepository
+from app.modules.rag.config import rag_config
 from app.modules.rag.enums import RagPhase, OcrOptimization
+from app.modules.rag.services.ocr_page_cache import (
+    OcrPageCache,
+    analyze_pdf_with_page_cache,
+    ocr_page_cache,
+)
+from app.modules.rag.services.page_plan import merge_page_texts
+from app.modules.files.services.storage_ops_service import (
+    StreamDigest,
+    iter_text_chunks,
+    spool_object,
+    split_storage_uri,
+    upload_file_stream,
+)
 from app.shared.integrations.azure_document_intelligence import (
     AzureDocumentIntelligenceClient,
     AzureOcrResult as AzureOcrResultExt,
@@ -42,6 +74,13 @@ class OcrText:
     confidence: float | None = None
 
 
+def _normalize_mime_type(mime_type: Optional[str]) -> Optional[str]:
+    """'Image/PNG; charset=x' -> 'image/png'; None si viene vacío."""
+    if not mime_type:
+        return None
+    return mime_type.split(";", 1)[0].strip().lower() or None
+
+
 async def run_ocr(
     db: AsyncSession,
     job_id: UUID,
@@ -53,6 +92,10 @@ async def run_ocr(
     storage_client=None,
     job_repo: RagJobRepository = None,
     event_repo: RagJobEventRepository = None,
+    page_cache: OcrPageCache = None,
+    pages: Optional[Sequence[int]] = None,
+    native_text_uri: Optional[str] = None,
+    mime_type: Optional[str] = None,
 ) -> OcrText:
     """
     Ejecuta OCR sobre documento escaneado o imagen.
@@ -61,12 +104,19 @@ async def run_ocr(
         db: Sesión de base de datos
         job_id: ID del job RAG en curso
         file_id: ID del documento a procesar
-        source_uri: URI del archivo fuente (PDF/imagen) con acceso público
+        source_uri: URI del archivo fuente (PDF/imagen): URL pública o
+            'bucket/path' en storage
         strategy: Estrategia de optimización (fast/accurate/balanced)
         azure_client: Cliente de Azure Document Intelligence (inyectable)
         storage_client: Cliente de storage (inyectable)
         job_repo: Repository de jobs (inyectable)
         event_repo: Repository de eventos (inyectable)
+        page_cache: Caché OCR por página (inyectable)
+        pages: Índices de página (desde 0) a analizar; None = documento completo
+        native_text_uri: Texto nativo de convert ("\f" entre páginas) con el
+            que se fusionan las páginas OCR (solo con pages)
+        mime_type: Tipo MIME del documento; las claves de storage no suelen
+            tener extensión, así que solo sin él se deduce del nombre
         
     Returns:
         OcrText con URI del resultado, idioma detectado y confianza
@@ -84,6 +134,7 @@ async def run_ocr(
     """
     job_repo = job_repo or RagJobRepository()
     event_repo = event_repo or RagJobEventRepository()
+    page_cache = page_cache or ocr_page_cache
     
     # ========== VALIDACIÓN DE PARÁMETROS ==========
     
@@ -115,7 +166,7 @@ async def run_ocr(
     
     # 1. Registrar inicio de fase OCR
     await event_repo.log_event(
-        db=db,
+        session=db,
         job_id=job_id,
         event_type="phase_started",
         rag_phase=RagPhase.ocr,
@@ -126,10 +177,44 @@ async def run_ocr(
     try:
         # 2. Ejecutar OCR con Azure
         logger.info(f"[run_ocr] Llamando a Azure Document Intelligence...")
-        azure_result: AzureOcrResultExt = await azure_client.analyze_document(
-            file_uri=source_uri,
-            strategy=strategy.value,
-        )
+        if source_uri.startswith(("http://", "https://")):
+            azure_result: AzureOcrResultExt = await azure_client.analyze_document(
+                file_uri=source_uri,
+                strategy=strategy.value,
+            )
+        else:
+            source_bucket, source_key = split_storage_uri(source_uri)
+            spooled = await spool_object(
+                storage_client,
+                bucket=source_bucket,
+                key=source_key,
+                chunk_size=rag_config.storage_stream_chunk_bytes,
+                max_memory=rag_config.storage_spool_max_memory_bytes,
+            )
+            content_type = (
+                _normalize_mime_type(mime_type)
+                or mimetypes.guess_type(source_key)[0]
+                or "application/pdf"
+            )
+            # El spool (en disco por encima de max_memory) se pasa tal cual: las
+            # páginas se leen de él al enviarse, nunca el documento entero
+            with spooled:
+                if content_type == "application/pdf":
+                    azure_result = await analyze_pdf_with_page_cache(
+                        db,
+                        azure_client=azure_client,
+                        storage_client=storage_client,
+                        data=spooled,
+                        strategy=strategy.value,
+                        pages=pages,
+                        cache=page_cache,
+                    )
+                else:
+                    azure_result = await azure_client.analyze_document_bytes(
+                        spooled,
+                        content_type=content_type,
+                        strategy=strategy.value,
+                    )
         
         logger.info(
             "[run_ocr] OCR completed successfully",
@@ -143,13 +228,38 @@ async def run_ocr(
             },
         )
         
-        # 3. Guardar resultado en storage
+        # 3. Fusionar con el texto nativo si solo se analizaron páginas de imagen
+        text = azure_result.text
+        if pages is not None and native_text_uri:
+            native_bucket, native_key = split_storage_uri(native_text_uri)
+            # Decodificación incremental: no se retienen los bytes además del texto
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            native_parts = [
+                decoder.decode(block) async for block in storage_client.iter_bytes(
+                    native_bucket, native_key, rag_config.storage_stream_chunk_bytes
+                )
+            ]
+            native_parts.append(decoder.decode(b"", final=True))
+            text = merge_page_texts(
+                "".join(native_parts),
+                {page["page_number"] - 1: page.get("text", "") for page in azure_result.pages},
+            )
+            del native_parts
+        
+        # 4. Guardar resultado en storage; checksum y tamaño (para el resume del
+        #    orquestador) se acumulan sobre los bloques subidos
+        digest = StreamDigest()
         result_uri = f"rag-cache-pages/{job_id}/ocr_result.txt"
-        await storage_client.write(
-            result_uri,
-            azure_result.text.encode("utf-8"),
-            content_type="text/plain",
+        result_bucket, result_key = split_storage_uri(result_uri)
+        await upload_file_stream(
+            storage_client,
+            bucket=result_bucket,
+            key=result_key,
+            stream=iter_text_chunks(text, rag_config.storage_stream_chunk_bytes, digest=digest),
+            mime_type="text/plain",
         )
+        checksum = digest.hexdigest()
+        byte_size = digest.byte_size
         
         logger.info(
             "[run_ocr] OCR result saved to storage",
@@ -160,9 +270,9 @@ async def run_ocr(
             },
         )
         
-        # 4. Registrar éxito
+        # 5. Registrar éxito
         await event_repo.log_event(
-            db=db,
+            session=db,
             job_id=job_id,
             event_type="phase_completed",
             rag_phase=RagPhase.ocr,
@@ -170,9 +280,13 @@ async def run_ocr(
             message=f"OCR completado: {len(azure_result.text)} chars extraídos",
             event_payload={
                 "pages": len(azure_result.pages),
+                "planned_pages": list(pages) if pages is not None else None,
                 "confidence": azure_result.confidence,
                 "lang": azure_result.lang,
                 "model_used": azure_result.model_used,
+                "result_uri": result_uri,
+                "checksum": checksum,
+                "byte_size": byte_size,
             },
         )
         
@@ -188,7 +302,7 @@ async def run_ocr(
         
         # Registrar error
         await event_repo.log_event(
-            db=db,
+            session=db,
             job_id=job_id,
             event_type="phase_failed",
             rag_phase=RagPhase.ocr,
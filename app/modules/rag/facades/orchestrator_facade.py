@@ -11,24 +11,67 @@ Responsabilidades:
 - Integrar con módulo Payments (reserva/consumo/liberación de créditos)
 - Aplicar reintentos y compensaciones ante fallos
 - Registrar métricas y trazas por fase
-- Manejar flujo condicional (OCR opcional)
+- Manejar flujo condicional (OCR opcional; en PDFs solo páginas de imagen
+  según el plan de páginas de convert, fusionadas con el texto nativo)
+
+Ejecución diferida: enqueue_indexing_job crea el RagJob y lo encola en la
+cola durable (RagJobQueue); el worker lo ejecuta luego con
+run_indexing_job(..., queued_job_id=job_id).
+
+Batch de proyecto: run_project_indexing ejecuta varios documentos en paralelo
+compartiendo un PhaseLimiter (cupos por fase), de modo que los documentos se
+solapan en fases distintas (A embebe mientras B chunkea y C convierte).
+enqueue_project_indexing hace lo mismo vía cola: los workers comparten el
+limiter de su proceso.
+
+Resume: con resume=True, las fases completadas en intentos previos del job
+(eventos phase_completed + artefactos con checksum en storage) se reutilizan
+y solo se re-ejecutan la fase fallida y las siguientes.
+
+Round-trips: los eventos de timeline de las fases se acumulan en un
+RagJobEventBuffer y se escriben junto con el avance de fase/estado en una
+sola sentencia (RagJobRepository.advance_phase) al cerrar cada fase o al
+fallar.
 
 Autor: Ixchel Beristain
 Fecha: 2025-11-28 (FASE 3 - Implementación completa v2)
+Actualizado: 2025-12-10 - Encolado para ejecución en worker
+Actualizado: 2025-12-11 - Checkpoints por fase y resume
+Actualizado: 2025-12-12 - Batch de proyecto con pipelining por fase
+Actualizado: 2025-12-13 - Eventos en buffer + avance de fase en un statement
+Actualizado: 2025-12-16 - Plan de páginas: OCR solo de páginas de imagen en PDFs
+Actualizado: 2025-12-20 - Jobs cuya tarea de cola muere se marcan failed (fail_dead_indexing_job)
+Actualizado: 2025-12-20 - embed recibe la API key de embeddings; total_embeddings desde EmbeddingResult
 """
 
-from dataclasses import dataclass
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Callable, Optional
 from uuid import UUID
+import asyncio
 import logging
 
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.modules.rag.config import rag_config
 from app.modules.rag.enums import RagPhase, RagJobPhase, OcrOptimization
 from app.modules.rag.models.job_models import RagJob
 from app.modules.rag.repositories.rag_job_repository import RagJobRepository
-from app.modules.rag.repositories.rag_job_event_repository import rag_job_event_repository
+from app.modules.rag.repositories.rag_job_event_repository import (
+    RagJobEventBuffer,
+    rag_job_event_repository,
+)
 from app.modules.rag.facades import convert_facade, ocr_facade, chunk_facade, embed_facade, integrate_facade
-from app.modules.files.services.storage_ops_service import AsyncStorageClient
+from app.modules.rag.adapters.azure.azure_document_intelligence_client import get_azure_ocr_client
+from app.modules.rag.services.job_queue import QueuedIndexingTask, RagJobQueue, get_job_queue
+from app.modules.rag.services.phase_limiter import PhaseLimiter
+from app.modules.rag.repositories.chunk_metadata_repository import chunk_metadata_repository
+from app.modules.files.services.storage_ops_service import (
+    AsyncStorageClient,
+    checksum_object,
+    split_storage_uri,
+)
 
 # Imports de Billing para integración de créditos (servicios reales)
 from app.modules.billing.credits import (
@@ -53,6 +96,32 @@ class OrchestrationSummary:
     total_embeddings: int = 0
     credits_used: int = 0
     reservation_id: int | None = None
+    phases_skipped: list[RagPhase] = field(default_factory=list)
+
+
+@dataclass
+class ProjectDocument:
+    """Documento de un batch de indexación de proyecto."""
+    file_id: UUID
+    mime_type: str
+    source_uri: str
+    needs_ocr: bool = False
+
+
+@dataclass
+class ProjectIndexingResult:
+    """Resultado de run_project_indexing (un summary por documento que creó job)."""
+    summaries: list[OrchestrationSummary] = field(default_factory=list)
+    errors: dict[UUID, str] = field(default_factory=dict)
+
+
+@dataclass
+class PhaseCheckpoints:
+    """Fases de intentos previos cuyo artefacto sigue siendo válido (resume)."""
+    converted: convert_facade.ConvertedText | None = None
+    ocr: ocr_facade.OcrText | None = None
+    total_chunks: int | None = None
+    failed_attempts: int = 0
 
 
 @dataclass
@@ -109,6 +178,474 @@ def _calculate_actual_credits(
     return credits
 
 
+def _embeddings_api_key() -> str:
+    """API key de embeddings: RAG_EMBEDDINGS_API_KEY o, si no, OPENAI_API_KEY."""
+    if rag_config.embeddings_api_key:
+        return rag_config.embeddings_api_key
+    from app.shared.config import settings
+
+    return settings.openai_api_key.get_secret_value() if settings.openai_api_key else ""
+
+
+def _phase_slot(phase_limiter: PhaseLimiter | None, phase: RagPhase):
+    """Cupo de la fase en el limiter compartido, o no-op si no hay limiter."""
+    return phase_limiter.slot(phase) if phase_limiter is not None else nullcontext()
+
+
+async def _advance_job(
+    db: AsyncSession,
+    job_repo: RagJobRepository,
+    job: RagJob,
+    events: RagJobEventBuffer,
+    phase: RagPhase | None = None,
+    *,
+    status: RagJobPhase | None = None,
+) -> None:
+    """
+    Avanza fase/estado del job y escribe los eventos en buffer en un solo
+    statement. La instancia ORM se sincroniza sin marcarla dirty (evita un
+    UPDATE extra en el siguiente flush).
+    """
+    await job_repo.advance_phase(db, job.job_id, phase, status=status, events=events.drain())
+    if not isinstance(job, RagJob):
+        return
+    if phase is not None:
+        set_committed_value(job, "phase_current", phase)
+    if status is not None:
+        set_committed_value(job, "status", status)
+
+
+async def _artifact_matches(
+    storage_client: AsyncStorageClient,
+    payload: dict,
+) -> bool:
+    """Verifica que el artefacto de una fase exista y conserve su checksum."""
+    result_uri = payload.get("result_uri")
+    checksum = payload.get("checksum")
+    if not result_uri or not checksum:
+        return False
+    try:
+        bucket, key = split_storage_uri(result_uri)
+        byte_size, actual = await checksum_object(storage_client, bucket=bucket, key=key)
+    except Exception as e:
+        logger.info(f"[run_indexing_job] Checkpoint artifact unavailable {result_uri}: {e}")
+        return False
+    return actual == checksum and byte_size == payload.get("byte_size", byte_size)
+
+
+def _ocr_page_plan(
+    needs_ocr: bool,
+    conv: convert_facade.ConvertedText,
+) -> tuple[bool, Optional[list[int]]]:
+    """
+    Decide si corre la fase OCR y sobre qué páginas.
+    
+    needs_ocr sigue siendo la decisión por documento; con plan de páginas
+    (PDF) solo las páginas de imagen van a OCR, y si no hay ninguna la fase
+    se omite.
+    
+    Returns:
+        (ejecutar OCR, índices de página desde 0 o None = documento completo)
+    """
+    if not needs_ocr:
+        return False, None
+    ocr_pages = getattr(conv, "ocr_pages", None)
+    if ocr_pages is None:
+        return True, None
+    return bool(ocr_pages), list(ocr_pages)
+
+
+def _reservation_operation_id(job_id: UUID, failed_attempts: int) -> str:
+    """
+    operation_id de la reserva de créditos de un intento del job.
+    
+    Cada intento fallido canceló su reserva: un reintento reserva con
+    operation_id propio para no reutilizar la reserva cancelada.
+    """
+    operation_id = f"rag_job_{job_id}"
+    if failed_attempts:
+        operation_id = f"{operation_id}:retry{failed_attempts}"
+    return operation_id
+
+
+async def _load_checkpoints(
+    db: AsyncSession,
+    job_id: UUID,
+    file_id: UUID,
+    *,
+    needs_ocr: bool,
+    storage_client: AsyncStorageClient,
+) -> PhaseCheckpoints:
+    """
+    Reconstruye las fases reutilizables de un job a partir de sus eventos.
+    
+    Cada fase se acepta solo si todas las anteriores también lo fueron
+    (convert → ocr → chunk): si un artefacto falta o su checksum no coincide,
+    esa fase y las siguientes se re-ejecutan.
+    
+    embed no se checkpointea: generate_embeddings ya omite los chunks con
+    embedding, de modo que un reintento solo embebe los que faltan.
+    """
+    events = await rag_job_event_repository.list_by_types(
+        db, job_id, ["phase_completed", "job_failed"]
+    )
+    checkpoints = PhaseCheckpoints(
+        failed_attempts=sum(1 for ev in events if ev.event_type == "job_failed"),
+    )
+    # El último phase_completed de cada fase es el vigente
+    completed = {
+        ev.rag_phase: (ev.event_payload or {})
+        for ev in events
+        if ev.event_type == "phase_completed"
+    }
+    
+    convert_payload = completed.get(RagPhase.convert)
+    if convert_payload is None:
+        return checkpoints
+    convert_payload = {
+        "result_uri": f"rag-cache-jobs/{job_id}/converted.txt",
+        **convert_payload,
+    }
+    if not await _artifact_matches(storage_client, convert_payload):
+        return checkpoints
+    checkpoints.converted = convert_facade.ConvertedText(
+        result_uri=convert_payload["result_uri"],
+        byte_size=convert_payload["byte_size"],
+        checksum=convert_payload["checksum"],
+        total_pages=convert_payload.get("total_pages"),
+        ocr_pages=convert_payload.get("ocr_pages"),
+    )
+    
+    run_ocr_phase, _ = _ocr_page_plan(needs_ocr, checkpoints.converted)
+    if run_ocr_phase:
+        ocr_payload = completed.get(RagPhase.ocr)
+        if ocr_payload is None or not await _artifact_matches(storage_client, ocr_payload):
+            return checkpoints
+        checkpoints.ocr = ocr_facade.OcrText(
+            result_uri=ocr_payload["result_uri"],
+            total_pages=ocr_payload.get("pages", 0),
+            lang=ocr_payload.get("lang"),
+            confidence=ocr_payload.get("confidence"),
+        )
+    
+    chunk_payload = completed.get(RagPhase.chunk)
+    if chunk_payload is None or not chunk_payload.get("total_chunks"):
+        return checkpoints
+    persisted = await chunk_metadata_repository.count_by_file(db, file_id)
+    if persisted == chunk_payload["total_chunks"]:
+        checkpoints.total_chunks = persisted
+    return checkpoints
+
+
+async def _create_queued_job(
+    db: AsyncSession,
+    project_id: UUID,
+    file_id: UUID,
+    *,
+    needs_ocr: bool,
+) -> RagJob:
+    """Crea el RagJob en estado queued y registra el evento job_queued."""
+    job_repo = RagJobRepository()
+    job = await job_repo.create(
+        db,
+        project_id=project_id,
+        file_id=file_id,
+        status=RagJobPhase.queued,
+        phase_current=RagPhase.convert,
+        needs_ocr=needs_ocr,
+    )
+    await db.flush()
+    
+    logger.info(
+        "[run_indexing_job] RAG job created",
+        extra={"job_id": str(job.job_id), "file_id": str(file_id), "status": "queued"},
+    )
+    
+    # Log event: job queued
+    await rag_job_event_repository.log_event(
+        db,
+        job_id=job.job_id,
+        event_type="job_queued",
+        rag_phase=RagPhase.convert,
+        progress_pct=0,
+        message=f"Job queued for file {file_id}",
+    )
+    return job
+
+
+async def enqueue_indexing_job(
+    db: AsyncSession,
+    project_id: UUID,
+    file_id: UUID,
+    user_id: UUID,
+    *,
+    mime_type: str,
+    needs_ocr: bool,
+    source_uri: str,
+    ocr_strategy: OcrOptimization = OcrOptimization.balanced,
+    queue: RagJobQueue | None = None,
+) -> RagJob:
+    """
+    Crea un RagJob (queued) y lo encola para que un worker ejecute el pipeline.
+    
+    Job y fila de cola se escriben en la sesión del caller: al hacer commit
+    ambos quedan visibles a la vez, y un rollback no deja tareas huérfanas.
+    
+    Args:
+        db: Sesión de base de datos (el caller hace commit)
+        project_id: ID del proyecto
+        file_id: ID del documento a indexar
+        user_id: ID del usuario que inicia el job
+        mime_type: Tipo MIME del documento
+        needs_ocr: Si requiere OCR explícito
+        source_uri: URI del archivo fuente (formato: bucket/path)
+        ocr_strategy: Estrategia de OCR (fast/accurate/balanced)
+        queue: Cola de jobs (default: get_job_queue())
+        
+    Returns:
+        RagJob creado en estado queued
+        
+    Raises:
+        ValueError: Si falta source_uri
+    """
+    if not source_uri:
+        raise ValueError("source_uri is required for orchestration")
+    
+    queue = queue or get_job_queue()
+    job = await _create_queued_job(db, project_id, file_id, needs_ocr=needs_ocr)
+    await queue.enqueue(
+        db,
+        QueuedIndexingTask(
+            job_id=job.job_id,
+            project_id=project_id,
+            file_id=file_id,
+            user_id=user_id,
+            mime_type=mime_type,
+            needs_ocr=needs_ocr,
+            ocr_strategy=ocr_strategy.value,
+            source_uri=source_uri,
+        ),
+    )
+    await db.flush()
+    return job
+
+
+async def enqueue_project_indexing(
+    db: AsyncSession,
+    project_id: UUID,
+    user_id: UUID,
+    documents: list[ProjectDocument],
+    *,
+    ocr_strategy: OcrOptimization = OcrOptimization.balanced,
+    queue: RagJobQueue | None = None,
+) -> list[RagJob]:
+    """
+    Encola un job por documento en la transacción del caller.
+    
+    Los workers los reclaman en paralelo y los pipelinean por fase.
+    
+    Returns:
+        RagJobs creados (en el orden de documents)
+    """
+    queue = queue or get_job_queue()
+    jobs: list[RagJob] = []
+    for doc in documents:
+        jobs.append(
+            await enqueue_indexing_job(
+                db,
+                project_id,
+                doc.file_id,
+                user_id,
+                mime_type=doc.mime_type,
+                needs_ocr=doc.needs_ocr,
+                source_uri=doc.source_uri,
+                ocr_strategy=ocr_strategy,
+                queue=queue,
+            )
+        )
+    return jobs
+
+
+async def run_project_indexing(
+    project_id: UUID,
+    user_id: UUID,
+    documents: list[ProjectDocument],
+    *,
+    session_factory: Callable[[], AsyncSession],
+    storage_client: AsyncStorageClient,
+    ocr_strategy: OcrOptimization = OcrOptimization.balanced,
+    max_in_flight: int | None = None,
+    phase_limiter: PhaseLimiter | None = None,
+) -> ProjectIndexingResult:
+    """
+    Indexa los documentos de un proyecto in-process con pipelining por fase.
+    
+    Hasta max_in_flight documentos avanzan a la vez, cada uno con su propia
+    sesión (commit por documento); el PhaseLimiter compartido acota cuántos
+    están en cada fase. Un documento fallido no detiene al resto.
+    
+    Args:
+        project_id: ID del proyecto
+        user_id: ID del usuario que inicia la indexación
+        documents: Documentos a indexar
+        session_factory: Fábrica de AsyncSession (una sesión por documento)
+        storage_client: Cliente de almacenamiento
+        ocr_strategy: Estrategia de OCR
+        max_in_flight: Documentos simultáneos (default: rag_config.project_batch_max_in_flight)
+        phase_limiter: Cupos por fase (default: PhaseLimiter() con rag_config)
+        
+    Returns:
+        ProjectIndexingResult con summaries y errores por file_id
+    """
+    limiter = phase_limiter or PhaseLimiter()
+    in_flight = asyncio.Semaphore(max(1, max_in_flight or rag_config.project_batch_max_in_flight))
+    result = ProjectIndexingResult()
+    
+    async def _index(doc: ProjectDocument) -> None:
+        async with in_flight:
+            try:
+                async with session_factory() as db:
+                    summary = await run_indexing_job(
+                        db=db,
+                        project_id=project_id,
+                        file_id=doc.file_id,
+                        user_id=user_id,
+                        mime_type=doc.mime_type,
+                        needs_ocr=doc.needs_ocr,
+                        ocr_strategy=ocr_strategy,
+                        storage_client=storage_client,
+                        source_uri=doc.source_uri,
+                        phase_limiter=limiter,
+                    )
+                    await db.commit()
+                result.summaries.append(summary)
+            except Exception as e:
+                logger.error(
+                    f"[run_project_indexing] Document failed file_id={doc.file_id}: {e}",
+                    exc_info=True,
+                )
+                result.errors[doc.file_id] = str(e)
+    
+    logger.info(
+        "[run_project_indexing] Starting project batch",
+        extra={
+            "project_id": str(project_id),
+            "documents": len(documents),
+            "phase_limits": {p.value: n for p, n in limiter.limits.items()},
+        },
+    )
+    await asyncio.gather(*(_index(doc) for doc in documents))
+    
+    completed = sum(1 for s in result.summaries if s.job_status == RagJobPhase.completed)
+    logger.info(
+        "[run_project_indexing] Project batch finished",
+        extra={
+            "project_id": str(project_id),
+            "completed": completed,
+            "failed": len(documents) - completed,
+        },
+    )
+    return result
+
+
+async def requeue_indexing_job(
+    db: AsyncSession,
+    job_id: UUID,
+    *,
+    queue: RagJobQueue | None = None,
+) -> tuple[RagJob, QueuedIndexingTask]:
+    """
+    Re-encola un job fallido; el worker lo retoma desde la fase que falló.
+    
+    Args:
+        db: Sesión de base de datos (el caller hace commit)
+        job_id: ID del job a reintentar
+        queue: Cola de jobs (default: get_job_queue())
+        
+    Returns:
+        Tupla (RagJob en estado queued, tarea re-encolada)
+        
+    Raises:
+        LookupError: Si el job no existe
+        ValueError: Si el job no está en estado failed o no tiene tarea en cola
+    """
+    queue = queue or get_job_queue()
+    job_repo = RagJobRepository()
+    job = await job_repo.get_by_id(db, job_id)
+    if job is None:
+        raise LookupError(f"Job {job_id} not found")
+    if job.status != RagJobPhase.failed:
+        raise ValueError(f"Only failed jobs can be retried (status={job.status.value})")
+    task = await queue.requeue(db, job_id)
+    if task is None:
+        raise ValueError(f"Job {job_id} has no finished queue task to retry")
+    
+    job.status = RagJobPhase.queued
+    await db.flush()
+    await rag_job_event_repository.log_event(
+        db,
+        job_id=job_id,
+        event_type="job_queued",
+        rag_phase=job.phase_current,
+        progress_pct=0,
+        message="Job re-queued for retry",
+    )
+    return job, task
+
+
+async def fail_dead_indexing_job(
+    db: AsyncSession,
+    job_id: UUID,
+    *,
+    error: str,
+) -> bool:
+    """
+    Marca failed un job cuya tarea de cola pasó a 'dead' (el worker murió o
+    falló en su último intento sin que el orquestador compensara).
+    
+    En la transacción del caller (la que marca la fila dead): job failed +
+    job_failed, y se cancela la reserva de créditos del intento. El job
+    queda así reintentable con requeue_indexing_job.
+    
+    Returns:
+        True si el job se marcó failed; False si no existe o ya terminó
+    """
+    job_repo = RagJobRepository()
+    job = await job_repo.get_by_id(db, job_id)
+    if job is None or job.status in (
+        RagJobPhase.completed, RagJobPhase.failed, RagJobPhase.cancelled,
+    ):
+        return False
+    
+    failed_events = await rag_job_event_repository.list_by_types(db, job_id, ["job_failed"])
+    operation_id = _reservation_operation_id(job_id, len(failed_events))
+    
+    events = RagJobEventBuffer()
+    await events.log_event(
+        job_id=job_id,
+        event_type="job_failed",
+        rag_phase=job.phase_current or RagPhase.convert,
+        progress_pct=0,
+        message=f"Job failed: {error}",
+        event_payload={"error": error, "queue_status": "dead"},
+    )
+    await _advance_job(db, job_repo, job, events, status=RagJobPhase.failed)
+    logger.warning(f"[fail_dead_indexing_job] Job {job_id} marked as failed: {error}")
+    
+    # La reserva puede no existir (el worker murió antes de reservar)
+    reservation_service = ReservationService(
+        reservation_repo=UsageReservationRepository(),
+        wallet_repo=WalletRepository(),
+        tx_repo=CreditTransactionRepository(),
+    )
+    try:
+        async with db.begin_nested():
+            await reservation_service.cancel_reservation(db, operation_id=operation_id)
+    except Exception as release_err:
+        logger.error(f"[fail_dead_indexing_job] Failed to release reservation {operation_id}: {release_err}")
+    return True
+
+
 async def run_indexing_job(
     db: AsyncSession,
     project_id: UUID,
@@ -120,6 +657,9 @@ async def run_indexing_job(
     ocr_strategy: OcrOptimization = OcrOptimization.balanced,
     storage_client: AsyncStorageClient | None = None,
     source_uri: str | None = None,
+    queued_job_id: UUID | None = None,
+    resume: bool = False,
+    phase_limiter: PhaseLimiter | None = None,
 ) -> OrchestrationSummary:
     """
     Ejecuta pipeline completo de indexación RAG con integración de Payments.
@@ -134,6 +674,12 @@ async def run_indexing_job(
         ocr_strategy: Estrategia de OCR (fast/accurate/balanced)
         storage_client: Cliente de almacenamiento (requerido)
         source_uri: URI del archivo fuente (formato: bucket/path)
+        queued_job_id: Job ya creado por enqueue_indexing_job (modo worker);
+            si es None se crea un job nuevo
+        resume: Reutilizar fases completadas de intentos previos de
+            queued_job_id (solo aplica a jobs existentes)
+        phase_limiter: Cupos por fase compartidos con otros documentos en
+            vuelo (pipelining); None = sin límite por fase
         
     Returns:
         OrchestrationSummary con fases completadas, estado del job y créditos usados
@@ -176,9 +722,14 @@ async def run_indexing_job(
     total_embeddings = 0
     ocr_executed = False
     ocr_pages = 0
+    phases_skipped: list[RagPhase] = []
+    checkpoints = PhaseCheckpoints()
+    operation_id: str | None = None
     
     # Repositorios y servicios
     job_repo = RagJobRepository()
+    # Eventos de las fases: se escriben al avanzar fase (o al fallar)
+    events = RagJobEventBuffer()
     
     # Billing credits services (repos inyectados explícitamente)
     reservation_repo = UsageReservationRepository()
@@ -192,34 +743,38 @@ async def run_indexing_job(
     )
     
     try:
-        # ========== FASE 0: Crear job y reservar créditos ==========
+        # ========== FASE 0: Crear (o cargar) job y reservar créditos ==========
         
-        # Crear RagJob
-        job = await job_repo.create(
-            db,
-            project_id=project_id,
-            file_id=file_id,
-            status=RagJobPhase.queued,
-            phase_current=RagPhase.convert,
-            needs_ocr=needs_ocr,
-        )
-        await db.flush()
-        job_id = job.job_id
-        
-        logger.info(
-            "[run_indexing_job] RAG job created",
-            extra={"job_id": str(job_id), "file_id": str(file_id), "status": "queued"},
-        )
+        if queued_job_id is not None:
+            # Job encolado: ya existe (creado por enqueue_indexing_job)
+            job = await job_repo.get_by_id(db, queued_job_id)
+            if job is None:
+                raise ValueError(f"Queued job {queued_job_id} not found")
+            if job.status in (RagJobPhase.completed, RagJobPhase.cancelled):
+                # Entrega duplicada de la cola: no re-ejecutar
+                logger.info(
+                    "[run_indexing_job] Queued job already finished; skipping",
+                    extra={"job_id": str(job.job_id), "status": job.status.value},
+                )
+                return OrchestrationSummary(
+                    job_id=job.job_id,
+                    phases_done=[],
+                    job_status=job.status,
+                )
+            job_id = job.job_id
+            if resume:
+                checkpoints = await _load_checkpoints(
+                    db,
+                    job_id,
+                    file_id,
+                    needs_ocr=needs_ocr,
+                    storage_client=storage_client,
+                )
+        else:
+            job = await _create_queued_job(db, project_id, file_id, needs_ocr=needs_ocr)
+            job_id = job.job_id
         
-        # Log event: job queued
-        await rag_job_event_repository.log_event(
-            db,
-            job_id=job_id,
-            event_type="job_queued",
-            rag_phase=RagPhase.convert,
-            progress_pct=0,
-            message=f"Job queued for file {file_id}",
-        )
+        operation_id = _reservation_operation_id(job_id, checkpoints.failed_attempts)
         
         # Estimar créditos y reservar
         estimation = _estimate_credits(needs_ocr=needs_ocr)
@@ -246,7 +801,7 @@ async def run_indexing_job(
             db,
             user_id=numeric_user_id,
             credits=estimation.total_estimated,
-            operation_id=f"rag_job_{job_id}",
+            operation_id=operation_id,
             ttl_minutes=30,
         )
         await db.flush()
@@ -261,9 +816,30 @@ async def run_indexing_job(
             },
         )
         
-        # Marcar job como running sin nuevo SELECT
-        job.status = RagJobPhase.running
-        await db.flush()
+        if checkpoints.converted is not None:
+            resumable = [RagPhase.convert]
+            if checkpoints.ocr is not None:
+                resumable.append(RagPhase.ocr)
+            if checkpoints.total_chunks is not None:
+                resumable.append(RagPhase.chunk)
+            logger.info(
+                "[run_indexing_job] Resuming job from checkpoints",
+                extra={"job_id": str(job_id), "phases_skipped": [p.value for p in resumable]},
+            )
+            await events.log_event(
+                job_id=job_id,
+                event_type="job_resumed",
+                rag_phase=resumable[-1],
+                progress_pct=0,
+                message=f"Resuming after {resumable[-1].value}",
+                event_payload={
+                    "phases_skipped": [p.value for p in resumable],
+                    "failed_attempts": checkpoints.failed_attempts,
+                },
+            )
+        
+        # Marcar job como running (+ job_resumed) sin nuevo SELECT
+        await _advance_job(db, job_repo, job, events, status=RagJobPhase.running)
         
         # ========== FASE 1: convert (binario → texto) ==========
         
@@ -272,23 +848,35 @@ async def run_indexing_job(
             extra={"job_id": str(job_id), "file_id": str(file_id), "phase": "convert"},
         )
         
-        conv = await convert_facade.convert_to_text(
-            db=db,
-            job_id=job_id,
-            file_id=file_id,
-            source_uri=source_uri,
-            mime_type=mime_type,
-            storage_client=storage_client,
-        )
-        phases_done.append(RagPhase.convert)
-        await job_repo.update_phase(db, job_id, RagPhase.convert)
-        await db.flush()
+        if checkpoints.converted is not None:
+            conv = checkpoints.converted
+            phases_skipped.append(RagPhase.convert)
+        else:
+            async with _phase_slot(phase_limiter, RagPhase.convert):
+                conv = await convert_facade.convert_to_text(
+                    db=db,
+                    job_id=job_id,
+                    file_id=file_id,
+                    source_uri=source_uri,
+                    mime_type=mime_type,
+                    storage_client=storage_client,
+                    event_repo=events,
+                )
+            phases_done.append(RagPhase.convert)
+            await _advance_job(db, job_repo, job, events, RagPhase.convert)
         
         text_uri = conv.result_uri
         
         # ========== FASE 2: ocr (opcional, si documento es escaneado) ==========
         
-        if needs_ocr:
+        run_ocr_phase, ocr_page_plan = _ocr_page_plan(needs_ocr, conv)
+        if needs_ocr and not run_ocr_phase:
+            logger.info(
+                "[run_indexing_job] Page plan: no image pages, skipping OCR",
+                extra={"job_id": str(job_id), "file_id": str(file_id), "total_pages": getattr(conv, "total_pages", None)},
+            )
+        
+        if run_ocr_phase:
             logger.info(
                 "[run_indexing_job] Phase 2: ocr",
                 extra={
@@ -296,23 +884,33 @@ async def run_indexing_job(
                     "file_id": str(file_id),
                     "phase": "ocr",
                     "strategy": ocr_strategy.value,
+                    "ocr_pages": len(ocr_page_plan) if ocr_page_plan is not None else None,
                 },
             )
             
-            ocr_result = await ocr_facade.run_ocr(
-                db=db,
-                job_id=job_id,
-                file_id=file_id,
-                text_uri=text_uri,
-                strategy=ocr_strategy,
-                storage_client=storage_client,
-            )
+            if checkpoints.ocr is not None:
+                ocr_result = checkpoints.ocr
+                phases_skipped.append(RagPhase.ocr)
+            else:
+                async with _phase_slot(phase_limiter, RagPhase.ocr):
+                    ocr_result = await ocr_facade.run_ocr(
+                        db=db,
+                        job_id=job_id,
+                        file_id=file_id,
+                        source_uri=source_uri,
+                        strategy=ocr_strategy,
+                        azure_client=get_azure_ocr_client(),
+                        storage_client=storage_client,
+                        event_repo=events,
+                        pages=ocr_page_plan,
+                        native_text_uri=conv.result_uri if ocr_page_plan is not None else None,
+                        mime_type=mime_type,
+                    )
+                phases_done.append(RagPhase.ocr)
+                await _advance_job(db, job_repo, job, events, RagPhase.ocr)
             text_uri = ocr_result.result_uri
             ocr_executed = True
             ocr_pages = ocr_result.total_pages
-            phases_done.append(RagPhase.ocr)
-            await job_repo.update_phase(db, job_id, RagPhase.ocr)
-            await db.flush()
         
         # ========== FASE 3: chunk (segmentación semántica) ==========
         
@@ -321,18 +919,23 @@ async def run_indexing_job(
             extra={"job_id": str(job_id), "file_id": str(file_id), "phase": "chunk"},
         )
         
-        chunk_res = await chunk_facade.chunk_text(
-            db=db,
-            job_id=job_id,
-            file_id=file_id,
-            text_uri=text_uri,
-            params=chunk_facade.ChunkParams(max_tokens=400, overlap=60),
-            storage_client=storage_client,
-        )
-        total_chunks = chunk_res.total_chunks
-        phases_done.append(RagPhase.chunk)
-        await job_repo.update_phase(db, job_id, RagPhase.chunk)
-        await db.flush()
+        if checkpoints.total_chunks is not None:
+            total_chunks = checkpoints.total_chunks
+            phases_skipped.append(RagPhase.chunk)
+        else:
+            async with _phase_slot(phase_limiter, RagPhase.chunk):
+                chunk_res = await chunk_facade.chunk_text(
+                    db=db,
+                    job_id=job_id,
+                    file_id=file_id,
+                    text_uri=text_uri,
+                    params=chunk_facade.ChunkParams(max_tokens=400, overlap=60),
+                    storage_client=storage_client,
+                    event_repo=events,
+                )
+            total_chunks = chunk_res.total_chunks
+            phases_done.append(RagPhase.chunk)
+            await _advance_job(db, job_repo, job, events, RagPhase.chunk)
         
         # ========== FASE 4: embed (generación de vectores) ==========
         
@@ -346,17 +949,20 @@ async def run_indexing_job(
             },
         )
         
-        emb_res = await embed_facade.generate_embeddings(
-            db=db,
-            job_id=job_id,
-            file_id=file_id,
-            embedding_model="text-embedding-3-large",
-            selector=embed_facade.ChunkSelector(),
-        )
-        total_embeddings = emb_res.total_embeddings
+        async with _phase_slot(phase_limiter, RagPhase.embed):
+            emb_res = await embed_facade.generate_embeddings(
+                db=db,
+                job_id=job_id,
+                file_id=file_id,
+                embedding_model="text-embedding-3-large",
+                selector=embed_facade.ChunkSelector(),
+                openai_api_key=_embeddings_api_key(),
+                event_repo=events,
+            )
+        # Embeddings del documento: nuevos + los ya persistidos por un intento previo
+        total_embeddings = emb_res.embedded + emb_res.skipped
         phases_done.append(RagPhase.embed)
-        await job_repo.update_phase(db, job_id, RagPhase.embed)
-        await db.flush()
+        await _advance_job(db, job_repo, job, events, RagPhase.embed)
         
         # ========== FASE 5: integrate (activación en índice vectorial) ==========
         
@@ -370,10 +976,12 @@ async def run_indexing_job(
             },
         )
         
-        integ = await integrate_facade.integrate_vector_index(db, job_id, file_id)
+        async with _phase_slot(phase_limiter, RagPhase.integrate):
+            integ = await integrate_facade.integrate_vector_index(
+                db, job_id, file_id, event_repo=events,
+            )
         phases_done.append(RagPhase.integrate)
-        await job_repo.update_phase(db, job_id, RagPhase.integrate)
-        await db.flush()
+        await _advance_job(db, job_repo, job, events, RagPhase.integrate)
         
         # ========== FASE 6: ready (documento indexado y listo) ==========
         
@@ -401,14 +1009,9 @@ async def run_indexing_job(
         )
         
         phases_done.append(RagPhase.ready)
-        # Actualizar fase y estado directamente sobre la instancia
-        job.phase_current = RagPhase.ready
-        job.status = RagJobPhase.completed
-        await db.flush()
         
-        # Log event: job completed
-        await rag_job_event_repository.log_event(
-            db,
+        # Log event: job completed (se escribe junto con fase/estado final)
+        await events.log_event(
             job_id=job_id,
             event_type="job_completed",
             rag_phase=RagPhase.ready,
@@ -418,8 +1021,12 @@ async def run_indexing_job(
                 "total_chunks": total_chunks,
                 "total_embeddings": total_embeddings,
                 "phases_done": [p.value for p in phases_done],
+                "phases_skipped": [p.value for p in phases_skipped],
             },
         )
+        await _advance_job(
+            db, job_repo, job, events, RagPhase.ready, status=RagJobPhase.completed,
+        )
         
         # ========== Consumir créditos reservados ==========
         
@@ -444,8 +1051,8 @@ async def run_indexing_job(
         
         await reservation_service.consume_reservation(
             db,
-            operation_id=f"rag_job_{job_id}",
-            ledger_operation_id=f"rag_job_{job_id}:consume",
+            operation_id=operation_id,
+            ledger_operation_id=f"{operation_id}:consume",
         )
         # Flushear cambios; la transacción se gestiona en el caller
         await db.flush()
@@ -470,6 +1077,7 @@ async def run_indexing_job(
             total_embeddings=total_embeddings,
             credits_used=actual_credits,
             reservation_id=reservation_id,
+            phases_skipped=phases_skipped,
         )
     
     except Exception as e:
@@ -506,12 +1114,10 @@ async def run_indexing_job(
             },
         )
         
-        # Marcar job como failed directamente
+        # Marcar job como failed: phase_failed de la fase en curso + job_failed
+        # en el mismo statement que el cambio de estado
         try:
-            if job is not None:
-                job.status = RagJobPhase.failed
-            await rag_job_event_repository.log_event(
-                db,
+            await events.log_event(
                 job_id=job_id,
                 event_type="job_failed",
                 rag_phase=phases_done[-1] if phases_done else RagPhase.convert,
@@ -519,7 +1125,7 @@ async def run_indexing_job(
                 message=f"Job failed: {str(e)}",
                 event_payload={"error": str(e), "phases_done": [p.value for p in phases_done]},
             )
-            await db.flush()
+            await _advance_job(db, job_repo, job, events, status=RagJobPhase.failed)
             logger.info(f"[run_indexing_job] Job {job_id} marked as failed")
         except Exception as log_err:
             logger.error(f"[run_indexing_job] Failed to log error: {log_err}")
@@ -530,7 +1136,7 @@ async def run_indexing_job(
                 logger.info(f"[run_indexing_job] Releasing reservation {reservation_id}")
                 await reservation_service.cancel_reservation(
                     db,
-                    operation_id=f"rag_job_{job_id}",
+                    operation_id=operation_id,
                 )
                 # Flushear cambios; commit/rollback quedan a cargo del caller
                 await db.flush()
@@ -548,6 +1154,7 @@ async def run_indexing_job(
             total_embeddings=total_embeddings,
             credits_used=0,
             reservation_id=reservation_id,
+            phases_skipped=phases_skipped,
         )
 
 
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/modules/rag/jobs/__init__.py
+
+Procesos en segundo plano del módulo RAG.
+
+Jobs incluidos:
+1. indexing_worker: Ejecuta jobs de indexación encolados (rag_job_queue)
+"""
+
+from .indexing_worker import IndexingWorker
+
+__all__ = [
+    "IndexingWorker",
+]
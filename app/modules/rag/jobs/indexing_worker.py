@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/modules/rag/jobs/indexing_worker.py
+
+Worker de indexación RAG: reclama jobs de la cola durable (RagJobQueue) y
+ejecuta el pipeline con run_indexing_job, fuera del proceso de la API.
+
+Comportamiento:
+- Hasta rag_config.worker_concurrency jobs en paralelo por proceso, que
+  comparten un PhaseLimiter: cada fase tiene su propio cupo
+  (phase_concurrency_*), así los jobs se solapan en fases distintas
+- Heartbeat periódico por job; si el lease se pierde (otro worker lo
+  reclamó tras considerarlo caído) se cancela la ejecución local
+- Un fallo del pipeline lo compensa el orquestador (job failed, créditos
+  liberados) y la tarea se cierra; solo los errores inesperados del worker
+  (DB caída, commit fallido, proceso reiniciado) vuelven a la cola
+- stop() deja de reclamar y espera a que terminen los jobs en curso
+- Ejecuta con resume=True: un job reentregado o reintentado reutiliza las
+  fases ya completadas (checkpoints del orquestador)
+
+Uso:
+    python -m app.modules.rag.jobs.indexing_worker
+
+Autor: DoxAI
+Fecha: 2025-12-10
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import signal
+import socket
+from typing import Callable, Optional, Set
+from uuid import UUID, uuid4
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.modules.rag.config import rag_config
+from app.modules.rag.enums import OcrOptimization
+from app.modules.rag.facades.orchestrator_facade import run_indexing_job
+from app.modules.rag.services.job_queue import QueuedIndexingTask, RagJobQueue, get_job_queue
+from app.modules.rag.services.phase_limiter import PhaseLimiter
+from app.modules.files.services.storage_ops_service import AsyncStorageClient
+
+logger = logging.getLogger("rag.jobs.indexing_worker")
+
+
+def _default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+
+class IndexingWorker:
+    """Bucle de claim/ejecución de jobs RAG con concurrencia acotada."""
+
+    def __init__(
+        self,
+        *,
+        queue: RagJobQueue,
+        session_factory: Callable[[], AsyncSession],
+        storage_client: AsyncStorageClient,
+        concurrency: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        heartbeat_interval: Optional[float] = None,
+        worker_id: Optional[str] = None,
+        phase_limiter: Optional[PhaseLimiter] = None,
+    ):
+        self.queue = queue
+        self.session_factory = session_factory
+        self.storage_client = storage_client
+        self.concurrency = max(1, concurrency or rag_config.worker_concurrency)
+        self.poll_interval = poll_interval if poll_interval is not None else rag_config.worker_poll_interval_seconds
+        self.heartbeat_interval = (
+            heartbeat_interval if heartbeat_interval is not None
+            else rag_config.worker_heartbeat_interval_seconds
+        )
+        self.worker_id = worker_id or _default_worker_id()
+        self.phase_limiter = phase_limiter or PhaseLimiter()
+        self._stopping = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._running: Set[asyncio.Task] = set()
+
+    def stop(self) -> None:
+        """Deja de reclamar jobs nuevos (los jobs en curso terminan)."""
+        self._stopping.set()
+
+    async def run(self) -> None:
+        """Bucle principal hasta stop(); al salir espera los jobs en curso."""
+        logger.info(
+            f"[indexing_worker] started worker_id={self.worker_id} concurrency={self.concurrency}"
+        )
+        try:
+            while not self._stopping.is_set():
+                await self._slots.acquire()
+                try:
+                    task = await self.queue.claim(self.worker_id)
+                except Exception as e:
+                    self._slots.release()
+                    logger.error(f"[indexing_worker] claim failed: {e}", exc_info=True)
+                    await self._sleep(self.poll_interval)
+                    continue
+
+                if task is None:
+                    self._slots.release()
+                    await self._sleep(self.poll_interval)
+                    continue
+
+                running = asyncio.create_task(self._run_task(task))
+                self._running.add(running)
+                running.add_done_callback(self._running.discard)
+        finally:
+            if self._running:
+                await asyncio.gather(*self._running, return_exceptions=True)
+            logger.info(f"[indexing_worker] stopped worker_id={self.worker_id}")
+
+    async def run_once(self) -> bool:
+        """Reclama y ejecuta un solo job. Returns: False si la cola estaba vacía."""
+        task = await self.queue.claim(self.worker_id)
+        if task is None:
+            return False
+        await self._slots.acquire()
+        await self._run_task(task)
+        return True
+
+    async def _sleep(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run_task(self, task: QueuedIndexingTask) -> None:
+        try:
+            pipeline = asyncio.create_task(self._execute(task))
+            heartbeat = asyncio.create_task(self._heartbeat_loop(task.job_id, pipeline))
+            try:
+                await pipeline
+            except asyncio.CancelledError:
+                if not heartbeat.done():
+                    raise
+                logger.warning(
+                    f"[indexing_worker] lease lost; abandoned job_id={task.job_id}"
+                )
+                return
+            except Exception as e:
+                status = await self.queue.release(task.job_id, self.worker_id, str(e))
+                logger.error(
+                    f"[indexing_worker] job_id={task.job_id} attempt={task.attempts} "
+                    f"worker error: {e}; queue_status={status}",
+                    exc_info=True,
+                )
+                return
+            finally:
+                heartbeat.cancel()
+
+            await self.queue.complete(task.job_id, self.worker_id)
+        except Exception as e:
+            logger.error(f"[indexing_worker] queue update failed for job_id={task.job_id}: {e}")
+        finally:
+            self._slots.release()
+
+    async def _execute(self, task: QueuedIndexingTask) -> None:
+        logger.info(
+            f"[indexing_worker] running job_id={task.job_id} attempt={task.attempts}"
+        )
+        async with self.session_factory() as db:
+            summary = await run_indexing_job(
+                db=db,
+                project_id=task.project_id,
+                file_id=task.file_id,
+                user_id=task.user_id,
+                mime_type=task.mime_type,
+                needs_ocr=task.needs_ocr,
+                ocr_strategy=OcrOptimization(task.ocr_strategy),
+                storage_client=self.storage_client,
+                source_uri=task.source_uri,
+                queued_job_id=task.job_id,
+                resume=True,
+                phase_limiter=self.phase_limiter,
+            )
+            await db.commit()
+        logger.info(
+            f"[indexing_worker] finished job_id={task.job_id} status={summary.job_status.value}"
+        )
+
+    async def _heartbeat_loop(self, job_id: UUID, pipeline: asyncio.Task) -> None:
+        while not pipeline.done():
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                owned = await self.queue.heartbeat(job_id, self.worker_id)
+            except Exception as e:
+                logger.warning(f"[indexing_worker] heartbeat failed job_id={job_id}: {e}")
+                continue
+            if not owned:
+                pipeline.cancel()
+                return
+
+
+async def main() -> None:
+    """Entry point del proceso worker (SIGTERM/SIGINT → apagado ordenado)."""
+    from app.shared.database.database import SessionLocal
+    from app.modules.files.services.storage_client_factory import get_pipeline_storage_client
+
+    if SessionLocal is None:
+        raise RuntimeError("Database not initialized (SKIP_DB_INIT=1)")
+
+    worker = IndexingWorker(
+        queue=get_job_queue(),
+        session_factory=SessionLocal,
+        storage_client=await get_pipeline_storage_client(),
+    )
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, worker.stop)
+        except NotImplementedError:
+            pass
+
+    try:
+        await worker.run()
+    finally:
+        try:
+            from app.shared.integrations.openai_embeddings_client import close_openai_embeddings_client
+            await close_openai_embeddings_client()
+        except Exception as e:
+            logger.warning(f"⚠️ Error cerrando cliente OpenAI embeddings: {e}")
+        try:
+            from app.modules.rag.adapters.azure.azure_document_intelligence_client import close_azure_ocr_client
+            await close_azure_ocr_client()
+        except Exception as e:
+            logger.warning(f"⚠️ Error cerrando cliente Azure OCR: {e}")
+        from app.modules.rag.services.text_extractors import shutdown_extraction_pool
+        shutdown_extraction_pool(wait=True)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
+
+
+__all__ = [
+    "IndexingWorker",
+    "main",
+]
+
+# Fin del archivo backend/app/modules/rag/jobs/indexing_worker.py
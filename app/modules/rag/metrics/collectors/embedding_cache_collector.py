@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/modules/rag/metrics/collectors/embedding_cache_collector.py
+
+Prometheus counters para la caché de embeddings direccionada por contenido.
+
+Métricas expuestas (familias registradas en REGISTRY):
+- rag_embedding_cache_hits_total{embedding_model} - Vectores servidos desde caché
+- rag_embedding_cache_misses_total{embedding_model} - Vectores pedidos a OpenAI
+- rag_embedding_cache_evictions_total - Entradas eliminadas por límite de tamaño
+
+Autor: DoxAI
+Fecha: 2025-12-03
+"""
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+from app.shared.core.metrics_helpers import get_or_create_counter
+
+_logger = logging.getLogger("rag.embedding_cache.metrics")
+
+CACHE_HITS_COUNTER_NAME = "rag_embedding_cache_hits_total"
+CACHE_MISSES_COUNTER_NAME = "rag_embedding_cache_misses_total"
+CACHE_EVICTIONS_COUNTER_NAME = "rag_embedding_cache_evictions_total"
+
+_counters_initialized = False
+_hits_counter: Optional[object] = None
+_misses_counter: Optional[object] = None
+_evictions_counter: Optional[object] = None
+
+
+def _ensure_counters() -> bool:
+    """Registra los counters en el REGISTRY de Prometheus (lazy)."""
+    global _counters_initialized, _hits_counter, _misses_counter, _evictions_counter
+
+    if _counters_initialized:
+        return True
+
+    try:
+        _hits_counter = get_or_create_counter(
+            CACHE_HITS_COUNTER_NAME,
+            "Embeddings servidos desde la caché por modelo.",
+            labelnames=("embedding_model",),
+        )
+        _misses_counter = get_or_create_counter(
+            CACHE_MISSES_COUNTER_NAME,
+            "Embeddings no encontrados en caché (generados con el proveedor) por modelo.",
+            labelnames=("embedding_model",),
+        )
+        _evictions_counter = get_or_create_counter(
+            CACHE_EVICTIONS_COUNTER_NAME,
+            "Entradas de la caché de embeddings eliminadas por límite de tamaño.",
+        )
+        _counters_initialized = True
+        return True
+    except Exception as e:
+        _logger.error("embedding_cache_metrics_register_error: %s", str(e), exc_info=True)
+        return False
+
+
+def inc_embedding_cache_hits(embedding_model: str, amount: int = 1) -> None:
+    """Incrementa el contador de aciertos."""
+    try:
+        if amount and _ensure_counters() and _hits_counter:
+            _hits_counter.labels(embedding_model=embedding_model).inc(amount)
+    except Exception:
+        pass
+
+
+def inc_embedding_cache_misses(embedding_model: str, amount: int = 1) -> None:
+    """Incrementa el contador de fallos."""
+    try:
+        if amount and _ensure_counters() and _misses_counter:
+            _misses_counter.labels(embedding_model=embedding_model).inc(amount)
+    except Exception:
+        pass
+
+
+def inc_embedding_cache_evictions(amount: int = 1) -> None:
+    """Incrementa el contador de evictions."""
+    try:
+        if amount and _ensure_counters() and _evictions_counter:
+            _evictions_counter.inc(amount)
+    except Exception:
+        pass
+
+
+__all__ = [
+    "inc_embedding_cache_hits",
+    "inc_embedding_cache_misses",
+    "inc_embedding_cache_evictions",
+]
+
+# Fin del archivo backend/app/modules/rag/metrics/collectors/embedding_cache_collector.py
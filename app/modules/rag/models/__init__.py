@@ -9,12 +9,18 @@ Fecha: 2025-10-18
 """
 
 from .embedding_models import DocumentEmbedding
+from .embedding_cache_models import EmbeddingCacheEntry
 from .chunk_models import ChunkMetadata
 from .job_models import RagJob, RagJobEvent
+from .job_queue_models import RagJobQueueItem
+from .ocr_page_cache_models import OcrPageCacheEntry
 
 __all__ = [
     "DocumentEmbedding",
+    "EmbeddingCacheEntry",
     "ChunkMetadata",
     "RagJob",
     "RagJobEvent",
+    "RagJobQueueItem",
+    "OcrPageCacheEntry",
 ]
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/modules/rag/models/embedding_cache_models.py
+
+Modelo ORM para la caché de embeddings direccionada por contenido.
+
+Cada entrada guarda el vector calculado para un texto normalizado, con clave
+(embedding_model, dimension, text_hash). Permite que reindexaciones y archivos
+casi duplicados reutilicen vectores sin volver a llamar a OpenAI.
+
+Autor: DoxAI
+Fecha: 2025-12-03
+"""
+
+from sqlalchemy import Column, String, Integer, DateTime, Index
+from sqlalchemy.sql import func
+from pgvector.sqlalchemy import Vector
+
+from app.shared.database.database import Base
+
+
+class EmbeddingCacheEntry(Base):
+    __tablename__ = "rag_embedding_cache"
+
+    embedding_model = Column(String(100), primary_key=True)
+
+    dimension = Column(Integer, primary_key=True)
+
+    # blake2b-256 hex del texto normalizado (64 caracteres)
+    text_hash = Column(String(64), primary_key=True)
+
+    embedding_vector = Column(Vector(1536), nullable=False)
+
+    hit_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    last_used_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        # Acelera la eviction LRU (borrado de las entradas menos usadas)
+        Index("idx_rag_embedding_cache_last_used", "last_used_at"),
+    )
+
+    def __repr__(self):
+        return (
+            f"<EmbeddingCacheEntry(model={self.embedding_model}, "
+            f"dim={self.dimension}, hash={self.text_hash[:12]})>"
+        )
+# Fin del archivo
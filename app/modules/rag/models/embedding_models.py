@@ -75,6 +75,18 @@ class DocumentEmbedding(Base):
             "idx_embedding_file_active",
             "file_id", "is_active"
         ),
+        # Índice ANN (pgvector HNSW, distancia coseno) para búsqueda top-k.
+        # Equivalente SQL:
+        #   CREATE INDEX idx_document_embeddings_vector_hnsw
+        #     ON document_embeddings USING hnsw (embedding_vector vector_cosine_ops)
+        #     WITH (m = 16, ef_construction = 64);
+        Index(
+            "idx_document_embeddings_vector_hnsw",
+            "embedding_vector",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding_vector": "vector_cosine_ops"},
+        ),
     )
 
     def __repr__(self):
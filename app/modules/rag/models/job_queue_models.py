@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/modules/rag/models/job_queue_models.py
+
+Modelo ORM de la cola durable de jobs de indexación RAG.
+
+Cada RagJob encolado tiene una fila en rag_job_queue con los parámetros
+necesarios para ejecutar el pipeline fuera del request HTTP. Los workers
+reclaman filas con SELECT ... FOR UPDATE SKIP LOCKED y mantienen un
+heartbeat; una fila 'claimed' con heartbeat vencido se vuelve a reclamar
+(worker caído o pod reiniciado).
+
+Autor: DoxAI
+Fecha: 2025-12-10
+"""
+
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.shared.database.database import Base
+
+
+# Estados de una fila de la cola
+QUEUE_STATUS_PENDING = "pending"
+QUEUE_STATUS_CLAIMED = "claimed"
+QUEUE_STATUS_DONE = "done"
+QUEUE_STATUS_DEAD = "dead"
+
+
+class RagJobQueueItem(Base):
+    __tablename__ = "rag_job_queue"
+
+    job_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("rag_jobs.job_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    project_id = Column(UUID(as_uuid=True), nullable=False)
+
+    file_id = Column(UUID(as_uuid=True), nullable=False)
+
+    user_id = Column(UUID(as_uuid=True), nullable=False)
+
+    mime_type = Column(String(255), nullable=False)
+
+    needs_ocr = Column(Boolean, nullable=False, default=False)
+
+    ocr_strategy = Column(String(20), nullable=False, default="balanced")
+
+    source_uri = Column(String(1024), nullable=False)
+
+    status = Column(String(20), nullable=False, default=QUEUE_STATUS_PENDING)
+
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+
+    max_attempts = Column(Integer, nullable=False, default=3, server_default="3")
+
+    # No reclamar antes de este instante (backoff entre reintentos)
+    available_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    locked_by = Column(String(100), nullable=True)
+
+    locked_at = Column(DateTime, nullable=True)
+
+    heartbeat_at = Column(DateTime, nullable=True)
+
+    last_error = Column(String(500), nullable=True)
+
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Acelera el claim: filas pendientes por orden de disponibilidad
+        Index("idx_rag_job_queue_status_available", "status", "available_at"),
+    )
+
+    def __repr__(self):
+        return (
+            f"<RagJobQueueItem(job={self.job_id}, status={self.status}, "
+            f"attempts={self.attempts}/{self.max_attempts})>"
+        )
+# Fin del archivo
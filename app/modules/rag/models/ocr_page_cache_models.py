@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/modules/rag/models/ocr_page_cache_models.py
+
+Modelo ORM del índice de la caché OCR por página.
+
+El resultado OCR de cada página (texto + metadatos) vive como JSON en el
+bucket rag-cache-pages; esta tabla indexa esos objetos por clave de
+contenido (página + estrategia + versión de API) y guarda su expiración,
+de modo que el lookup de un documento es una sola consulta y la eviction
+por TTL no necesita listar el bucket.
+
+Autor: DoxAI
+Fecha: 2025-12-15
+"""
+
+from sqlalchemy import Column, String, DateTime, Index
+from sqlalchemy.sql import func
+
+from app.shared.database.database import Base
+
+
+class OcrPageCacheEntry(Base):
+    __tablename__ = "rag_ocr_page_cache"
+
+    # blake2b-256 hex de (digest de página, estrategia, versión de API)
+    cache_key = Column(String(64), primary_key=True)
+
+    # Ruta del JSON dentro del bucket de páginas
+    object_key = Column(String(255), nullable=False)
+
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    last_used_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        # Acelera la eviction por TTL (cache_cleanup_job)
+        Index("idx_rag_ocr_page_cache_expires", "expires_at"),
+    )
+
+    def __repr__(self):
+        return f"<OcrPageCacheEntry(key={self.cache_key[:12]}, expires_at={self.expires_at})>"
+# Fin del archivo
@@ -14,8 +14,13 @@ from app.modules.rag.repositories.rag_job_repository import (
 )
 from app.modules.rag.repositories.rag_job_event_repository import (
     RagJobEventRepository, 
+    RagJobEventBuffer,
     rag_job_event_repository
 )
+from app.modules.rag.repositories.rag_job_queue_repository import (
+    RagJobQueueRepository,
+    rag_job_queue_repository
+)
 from app.modules.rag.repositories.chunk_metadata_repository import (
     ChunkMetadataRepository,
     chunk_metadata_repository
@@ -24,16 +29,31 @@ from app.modules.rag.repositories.document_embedding_repository import (
     DocumentEmbeddingRepository,
     document_embedding_repository
 )
+from app.modules.rag.repositories.embedding_cache_repository import (
+    EmbeddingCacheRepository,
+    embedding_cache_repository
+)
+from app.modules.rag.repositories.ocr_page_cache_repository import (
+    OcrPageCacheRepository,
+    ocr_page_cache_repository
+)
 
 __all__ = [
     "RagJobRepository",
     "rag_job_repository",
     "RagJobEventRepository",
     "rag_job_event_repository",
+    "RagJobEventBuffer",
+    "RagJobQueueRepository",
+    "rag_job_queue_repository",
     "ChunkMetadataRepository",
     "chunk_metadata_repository",
     "DocumentEmbeddingRepository",
     "document_embedding_repository",
+    "EmbeddingCacheRepository",
+    "embedding_cache_repository",
+    "OcrPageCacheRepository",
+    "ocr_page_cache_repository",
 ]
 
 # Fin del archivo backend/app/modules/rag/repositories/__init__.py
@@ -6,7 +6,8 @@ Repositorio async para metadatos de chunks de documentos.
 
 Responsabilidades:
 - CRUD básico sobre ChunkMetadata
-- Listados por archivo
+- Inserción en bloque sin ORM (executemany)
+- Listados por archivo y por lista de IDs
 - Conteo de chunks por archivo
 - Consultas por rango de páginas
 
@@ -17,10 +18,10 @@ Actualizado: 2025-11-28 - FASE B: Convertido a clase y alineación con SQL
 
 from __future__ import annotations
 
-from typing import Optional, Sequence, List
-from uuid import UUID
+from typing import Any, Mapping, Optional, Sequence, List
+from uuid import UUID, uuid4
 
-from sqlalchemy import select, func, delete
+from sqlalchemy import select, func, delete, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.modules.rag.models.chunk_models import ChunkMetadata
@@ -65,6 +66,46 @@ class ChunkMetadataRepository:
         
         return chunks
 
+    async def bulk_insert_chunks(
+        self,
+        session: AsyncSession,
+        file_id: UUID,
+        rows: Sequence[Mapping[str, Any]],
+    ) -> List[UUID]:
+        """
+        Inserta chunks en bloque sin hidratar instancias ORM.
+        
+        Ejecuta un único INSERT con executemany (asyncpg lo envía en pipeline),
+        en lugar de add_all + flush del unit of work.
+        
+        Args:
+            session: Sesión async de SQLAlchemy
+            file_id: ID del archivo fuente (común a todas las filas)
+            rows: Dicts con chunk_index, chunk_text, token_count y opcionalmente
+                  source_page_start, source_page_end, metadata_json
+            
+        Returns:
+            Lista de chunk_id en el mismo orden que rows
+        """
+        if not rows:
+            return []
+        chunk_ids = [uuid4() for _ in rows]
+        params = [
+            {
+                "chunk_id": chunk_id,
+                "file_id": file_id,
+                "chunk_index": row["chunk_index"],
+                "chunk_text": row["chunk_text"],
+                "token_count": row.get("token_count", 0),
+                "source_page_start": row.get("source_page_start"),
+                "source_page_end": row.get("source_page_end"),
+                "metadata_json": row.get("metadata_json") or {},
+            }
+            for chunk_id, row in zip(chunk_ids, rows)
+        ]
+        await session.execute(insert(ChunkMetadata), params)
+        return chunk_ids
+
     async def get_by_id(
         self,
         session: AsyncSession,
@@ -84,6 +125,32 @@ class ChunkMetadataRepository:
         result = await session.execute(stmt)
         return result.scalar_one_or_none()
 
+    async def get_by_ids(
+        self,
+        session: AsyncSession,
+        chunk_ids: Sequence[UUID],
+    ) -> Sequence[ChunkMetadata]:
+        """
+        Obtiene varios chunks por ID en una sola consulta.
+        
+        Args:
+            session: Sesión async de SQLAlchemy
+            chunk_ids: IDs de los chunks
+            
+        Returns:
+            Secuencia de ChunkMetadata encontrados, ordenados por índice
+            (los IDs inexistentes se omiten)
+        """
+        if not chunk_ids:
+            return []
+        stmt = (
+            select(ChunkMetadata)
+            .where(ChunkMetadata.chunk_id.in_(list(chunk_ids)))
+            .order_by(ChunkMetadata.chunk_index.asc())
+        )
+        result = await session.execute(stmt)
+        return result.scalars().all()
+
     async def list_by_file(
         self,
         session: AsyncSession,
@@ -7,23 +7,48 @@ Repositorio async para embeddings de documentos (pgvector).
 Responsabilidades:
 - CRUD básico sobre DocumentEmbedding
 - Listados por archivo
-- Búsqueda de similaridad semántica
+- Búsqueda de similaridad semántica (top-k ANN/HNSW o exacta)
 - Verificación de idempotencia
 
 Autor: DoxAI
 Fecha: 2025-11-28
+Actualizado: 2025-12-20 - Conteo de candidatos acotado; iterative scan HNSW con filtros
 """
 
 from __future__ import annotations
 
-from typing import Optional, Sequence, List
-from uuid import UUID
+from dataclasses import dataclass
+from typing import Any, Mapping, Optional, Sequence, List
+from uuid import UUID, uuid4
 from datetime import datetime, timezone
 
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, func, and_, text, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.modules.rag.models.embedding_models import DocumentEmbedding
+from app.modules.rag.models.chunk_models import ChunkMetadata
+from app.modules.files.models.files_base_models import FilesBase
+
+
+# Valores de hnsw.iterative_scan (pgvector >= 0.8)
+_ITERATIVE_SCAN_MODES = ("relaxed_order", "strict_order")
+
+
+@dataclass
+class SimilarityMatch:
+    """Resultado de búsqueda por similitud (sin hidratar ORM)."""
+    embedding_id: UUID
+    file_id: UUID
+    chunk_id: UUID
+    chunk_index: int
+    embedding_model: str
+    distance: float
+    chunk_text: Optional[str] = None
+
+    @property
+    def score(self) -> float:
+        """Similitud coseno (1 - distancia coseno)."""
+        return 1.0 - self.distance
 
 
 class DocumentEmbeddingRepository:
@@ -53,6 +78,46 @@ class DocumentEmbeddingRepository:
         
         return embeddings
 
+    async def bulk_insert_embeddings(
+        self,
+        session: AsyncSession,
+        rows: Sequence[Mapping[str, Any]],
+    ) -> List[UUID]:
+        """
+        Inserta embeddings en bloque sin hidratar instancias ORM.
+        
+        A diferencia de insert_embeddings, no hay add_all/flush ni refresh
+        por fila: un único INSERT con executemany.
+        
+        Args:
+            session: Sesión async de SQLAlchemy
+            rows: Dicts con file_id, chunk_id, file_category, chunk_index,
+                  embedding_vector, embedding_model y opcionalmente
+                  rag_phase, is_active
+            
+        Returns:
+            Lista de embedding_id en el mismo orden que rows
+        """
+        if not rows:
+            return []
+        embedding_ids = [uuid4() for _ in rows]
+        params = [
+            {
+                "embedding_id": embedding_id,
+                "file_id": row["file_id"],
+                "chunk_id": row["chunk_id"],
+                "file_category": row["file_category"],
+                "rag_phase": row.get("rag_phase"),
+                "chunk_index": row["chunk_index"],
+                "embedding_vector": row["embedding_vector"],
+                "embedding_model": row["embedding_model"],
+                "is_active": row.get("is_active", True),
+            }
+            for embedding_id, row in zip(embedding_ids, rows)
+        ]
+        await session.execute(insert(DocumentEmbedding), params)
+        return embedding_ids
+
     async def get_by_id(
         self,
         session: AsyncSession,
@@ -168,6 +233,207 @@ class DocumentEmbeddingRepository:
         count = result.scalar() or 0
         return count > 0
 
+    async def list_embedded_chunk_indexes(
+        self,
+        session: AsyncSession,
+        file_id: UUID,
+        embedding_model: str,
+        chunk_indexes: Optional[Sequence[int]] = None,
+    ) -> set[int]:
+        """
+        Obtiene en una sola consulta los chunk_index que ya tienen embedding activo
+        para un archivo y modelo. Versión set-based de exists_for_file_and_chunk.
+        
+        Args:
+            session: Sesión async de SQLAlchemy
+            file_id: ID del archivo
+            embedding_model: Nombre del modelo de embedding
+            chunk_indexes: Restringe la consulta a estos índices (opcional)
+            
+        Returns:
+            Conjunto de chunk_index ya embebidos
+        """
+        stmt = select(DocumentEmbedding.chunk_index).where(
+            DocumentEmbedding.file_id == file_id,
+            DocumentEmbedding.embedding_model == embedding_model,
+            DocumentEmbedding.is_active == True,
+        )
+        if chunk_indexes is not None:
+            stmt = stmt.where(DocumentEmbedding.chunk_index.in_(list(chunk_indexes)))
+        result = await session.execute(stmt)
+        return set(result.scalars().all())
+
+    def _search_conditions(
+        self,
+        *,
+        project_id: Optional[UUID],
+        file_ids: Optional[Sequence[UUID]],
+        embedding_model: Optional[str],
+        only_active: bool,
+    ) -> list:
+        """Construye los filtros comunes de búsqueda por similitud."""
+        conditions = []
+        if project_id is not None:
+            conditions.append(
+                DocumentEmbedding.file_id.in_(
+                    select(FilesBase.file_id).where(FilesBase.project_id == project_id)
+                )
+            )
+        if file_ids:
+            conditions.append(DocumentEmbedding.file_id.in_(list(file_ids)))
+        if embedding_model:
+            conditions.append(DocumentEmbedding.embedding_model == embedding_model)
+        if only_active:
+            conditions.append(DocumentEmbedding.is_active == True)
+        return conditions
+
+    async def count_search_candidates(
+        self,
+        session: AsyncSession,
+        *,
+        project_id: Optional[UUID] = None,
+        file_ids: Optional[Sequence[UUID]] = None,
+        embedding_model: Optional[str] = None,
+        only_active: bool = True,
+        limit: Optional[int] = None,
+    ) -> int:
+        """
+        Cuenta los embeddings que cumplen los filtros de búsqueda.
+        
+        Permite decidir entre búsqueda exacta (proyectos pequeños) y ANN.
+        
+        Args:
+            session: Sesión async de SQLAlchemy
+            project_id: Restringe a archivos del proyecto (vía files_base)
+            file_ids: Restringe a archivos específicos
+            embedding_model: Restringe a un modelo de embedding
+            only_active: Si True, solo cuenta embeddings activos
+            limit: Deja de contar al llegar a limit filas (COUNT sobre un
+                subquery con LIMIT); None cuenta todas
+            
+        Returns:
+            Número de embeddings candidatos (como máximo limit)
+        """
+        conditions = self._search_conditions(
+            project_id=project_id,
+            file_ids=file_ids,
+            embedding_model=embedding_model,
+            only_active=only_active,
+        )
+        if limit is not None:
+            # Un proyecto grande no se recorre entero solo para saber que es grande
+            candidates = select(DocumentEmbedding.embedding_id)
+            if conditions:
+                candidates = candidates.where(and_(*conditions))
+            stmt = select(func.count()).select_from(candidates.limit(limit).subquery())
+        else:
+            stmt = select(func.count()).select_from(DocumentEmbedding)
+            if conditions:
+                stmt = stmt.where(and_(*conditions))
+        result = await session.execute(stmt)
+        return result.scalar() or 0
+
+    async def search_similar(
+        self,
+        session: AsyncSession,
+        query_vector: Sequence[float],
+        *,
+        top_k: int = 10,
+        project_id: Optional[UUID] = None,
+        file_ids: Optional[Sequence[UUID]] = None,
+        embedding_model: Optional[str] = None,
+        only_active: bool = True,
+        exact: bool = False,
+        ef_search: Optional[int] = None,
+        iterative_scan: Optional[str] = None,
+    ) -> List[SimilarityMatch]:
+        """
+        Búsqueda top-k por distancia coseno sobre embedding_vector.
+        
+        Args:
+            session: Sesión async de SQLAlchemy
+            query_vector: Vector de consulta (misma dimensión que la columna)
+            top_k: Número máximo de resultados
+            project_id: Restringe a archivos del proyecto (vía files_base)
+            file_ids: Restringe a archivos específicos
+            embedding_model: Restringe a un modelo de embedding
+            only_active: Si True, solo considera embeddings activos
+            exact: Si True, fuerza escaneo exacto (sin índice ANN)
+            ef_search: Tamaño de la lista candidata HNSW (SET LOCAL hnsw.ef_search)
+            iterative_scan: Modo hnsw.iterative_scan (pgvector >= 0.8) para
+                búsquedas ANN con filtros; None/"off" no lo activa
+            
+        Returns:
+            Lista de SimilarityMatch ordenada por distancia ascendente
+            
+        Notas:
+            - Modo ANN: ORDER BY embedding_vector <=> :q usa idx_document_embeddings_vector_hnsw.
+            - Modo exacto: se ordena por (distancia + 0), expresión que el planner no
+              puede resolver con el índice, garantizando recall 100%.
+            - ef_search aplica a la transacción en curso (SET LOCAL).
+            - Los filtros se aplican después del recorrido HNSW: sin
+              iterative_scan, si los ef_search vecinos más cercanos son de
+              otros proyectos la búsqueda devuelve menos de top_k filas.
+              Con iterative_scan el índice sigue recorriendo hasta llenar
+              top_k; en relaxed_order las filas se reordenan aquí.
+        """
+        if top_k <= 0:
+            raise ValueError(f"top_k must be > 0, got {top_k}")
+        
+        distance = DocumentEmbedding.embedding_vector.cosine_distance(list(query_vector))
+        order_expr = (distance + 0) if exact else distance
+        
+        conditions = self._search_conditions(
+            project_id=project_id,
+            file_ids=file_ids,
+            embedding_model=embedding_model,
+            only_active=only_active,
+        )
+        
+        stmt = (
+            select(
+                DocumentEmbedding.embedding_id,
+                DocumentEmbedding.file_id,
+                DocumentEmbedding.chunk_id,
+                DocumentEmbedding.chunk_index,
+                DocumentEmbedding.embedding_model,
+                distance.label("distance"),
+                ChunkMetadata.chunk_text,
+            )
+            .outerjoin(ChunkMetadata, ChunkMetadata.chunk_id == DocumentEmbedding.chunk_id)
+            .order_by(order_expr.asc())
+            .limit(top_k)
+        )
+        if conditions:
+            stmt = stmt.where(and_(*conditions))
+        
+        if ef_search and not exact:
+            # SET no admite parámetros ligados; int() evita inyección
+            await session.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+        use_iterative = bool(conditions) and not exact and iterative_scan not in (None, "off")
+        if use_iterative:
+            if iterative_scan not in _ITERATIVE_SCAN_MODES:
+                raise ValueError(f"Invalid hnsw.iterative_scan mode: {iterative_scan}")
+            await session.execute(text(f"SET LOCAL hnsw.iterative_scan = {iterative_scan}"))
+        
+        result = await session.execute(stmt)
+        matches = [
+            SimilarityMatch(
+                embedding_id=row.embedding_id,
+                file_id=row.file_id,
+                chunk_id=row.chunk_id,
+                chunk_index=row.chunk_index,
+                embedding_model=row.embedding_model,
+                distance=float(row.distance),
+                chunk_text=row.chunk_text,
+            )
+            for row in result
+        ]
+        if use_iterative:
+            # relaxed_order puede devolver distancias ligeramente desordenadas
+            matches.sort(key=lambda m: m.distance)
+        return matches
+
     async def mark_inactive(
         self,
         session: AsyncSession,
@@ -211,6 +477,7 @@ document_embedding_repository = DocumentEmbeddingRepository()
 
 
 __all__ = [
+    "SimilarityMatch",
     "DocumentEmbeddingRepository",
     "document_embedding_repository",
 ]
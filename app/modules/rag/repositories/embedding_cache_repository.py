@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/modules/rag/repositories/embedding_cache_repository.py
+
+Repositorio async para la caché persistente de embeddings (rag_embedding_cache).
+
+Responsabilidades:
+- Lookup en bloque por (embedding_model, dimension, text_hash)
+- Inserción en bloque idempotente (ON CONFLICT DO NOTHING)
+- Eviction LRU acotada por número de entradas
+
+Autor: DoxAI
+Fecha: 2025-12-03
+"""
+
+from __future__ import annotations
+
+from typing import Mapping, Sequence
+
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.modules.rag.models.embedding_cache_models import EmbeddingCacheEntry
+
+
+class EmbeddingCacheRepository:
+    """
+    Repositorio para la caché de embeddings direccionada por contenido.
+
+    Lookup e inserción son set-based: una consulta por llamada,
+    independientemente del número de textos.
+    """
+
+    async def get_many(
+        self,
+        session: AsyncSession,
+        embedding_model: str,
+        dimension: int,
+        text_hashes: Sequence[str],
+    ) -> dict[str, list[float]]:
+        """
+        Obtiene los vectores cacheados para un conjunto de hashes y marca
+        las entradas encontradas como usadas (LRU).
+
+        Args:
+            session: Sesión async de SQLAlchemy
+            embedding_model: Nombre del modelo de embedding
+            dimension: Dimensión del vector
+            text_hashes: Hashes de texto normalizado
+
+        Returns:
+            Dict text_hash -> vector para las entradas encontradas
+        """
+        if not text_hashes:
+            return {}
+        stmt = (
+            update(EmbeddingCacheEntry)
+            .where(
+                EmbeddingCacheEntry.embedding_model == embedding_model,
+                EmbeddingCacheEntry.dimension == dimension,
+                EmbeddingCacheEntry.text_hash.in_(list(set(text_hashes))),
+            )
+            .values(
+                hit_count=EmbeddingCacheEntry.hit_count + 1,
+                last_used_at=func.now(),
+            )
+            .returning(EmbeddingCacheEntry.text_hash, EmbeddingCacheEntry.embedding_vector)
+        )
+        result = await session.execute(stmt)
+        return {text_hash: vector for text_hash, vector in result.all()}
+
+    async def put_many(
+        self,
+        session: AsyncSession,
+        embedding_model: str,
+        dimension: int,
+        vectors_by_hash: Mapping[str, Sequence[float]],
+    ) -> None:
+        """
+        Inserta vectores en la caché; las claves existentes se conservan.
+
+        Args:
+            session: Sesión async de SQLAlchemy
+            embedding_model: Nombre del modelo de embedding
+            dimension: Dimensión del vector
+            vectors_by_hash: Dict text_hash -> vector
+        """
+        if not vectors_by_hash:
+            return
+        stmt = (
+            pg_insert(EmbeddingCacheEntry)
+            .values([
+                {
+                    "embedding_model": embedding_model,
+                    "dimension": dimension,
+                    "text_hash": text_hash,
+                    "embedding_vector": list(vector),
+                }
+                for text_hash, vector in vectors_by_hash.items()
+            ])
+            .on_conflict_do_nothing(
+                index_elements=["embedding_model", "dimension", "text_hash"]
+            )
+        )
+        await session.execute(stmt)
+
+    async def count(self, session: AsyncSession) -> int:
+        """Número total de entradas en la caché."""
+        result = await session.execute(
+            select(func.count()).select_from(EmbeddingCacheEntry)
+        )
+        return result.scalar() or 0
+
+    async def evict_to_size(
+        self,
+        session: AsyncSession,
+        max_entries: int,
+    ) -> int:
+        """
+        Elimina las entradas menos usadas recientemente hasta dejar
+        como máximo max_entries (los empates en last_used_at se eliminan juntos).
+
+        Args:
+            session: Sesión async de SQLAlchemy
+            max_entries: Máximo de entradas a conservar
+
+        Returns:
+            Número de entradas eliminadas
+        """
+        # Marca de corte: last_used_at de la primera entrada que sobra
+        # (recorre idx_rag_embedding_cache_last_used, sin escanear la tabla)
+        cutoff_result = await session.execute(
+            select(EmbeddingCacheEntry.last_used_at)
+            .order_by(EmbeddingCacheEntry.last_used_at.desc())
+            .offset(max_entries)
+            .limit(1)
+        )
+        cutoff = cutoff_result.scalar_one_or_none()
+        if cutoff is None:
+            return 0
+        stmt = delete(EmbeddingCacheEntry).where(
+            EmbeddingCacheEntry.last_used_at <= cutoff
+        )
+        result = await session.execute(stmt)
+        return result.rowcount or 0
+
+
+# Instancia global para compatibilidad
+embedding_cache_repository = EmbeddingCacheRepository()
+
+
+__all__ = [
+    "EmbeddingCacheRepository",
+    "embedding_cache_repository",
+]
+
+# Fin del archivo backend/app/modules/rag/repositories/embedding_cache_repository.py
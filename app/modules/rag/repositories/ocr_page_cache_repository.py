@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/modules/rag/repositories/ocr_page_cache_repository.py
+
+Repositorio async para el índice de la caché OCR por página (rag_ocr_page_cache).
+
+Responsabilidades:
+- Lookup en bloque de claves vigentes (marca last_used_at)
+- Alta/renovación en bloque con TTL (ON CONFLICT DO UPDATE)
+- Extracción de entradas expiradas para la eviction por TTL
+
+Las marcas de tiempo usan now() del servidor.
+
+Autor: DoxAI
+Fecha: 2025-12-15
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Mapping, Sequence
+
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.modules.rag.models.ocr_page_cache_models import OcrPageCacheEntry
+
+
+class OcrPageCacheRepository:
+    """
+    Repositorio para el índice de páginas OCR cacheadas.
+
+    Lookup e inserción son set-based: una consulta por documento,
+    independientemente del número de páginas.
+    """
+
+    async def get_many(
+        self,
+        session: AsyncSession,
+        cache_keys: Sequence[str],
+    ) -> dict[str, str]:
+        """
+        Obtiene las entradas vigentes para un conjunto de claves y las marca
+        como usadas.
+
+        Args:
+            session: Sesión async de SQLAlchemy
+            cache_keys: Claves de página
+
+        Returns:
+            Dict cache_key -> object_key para las entradas no expiradas
+        """
+        if not cache_keys:
+            return {}
+        stmt = (
+            update(OcrPageCacheEntry)
+            .where(
+                OcrPageCacheEntry.cache_key.in_(list(set(cache_keys))),
+                OcrPageCacheEntry.expires_at > func.now(),
+            )
+            .values(last_used_at=func.now())
+            .returning(OcrPageCacheEntry.cache_key, OcrPageCacheEntry.object_key)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(stmt)
+        return {cache_key: object_key for cache_key, object_key in result.all()}
+
+    async def put_many(
+        self,
+        session: AsyncSession,
+        object_keys_by_key: Mapping[str, str],
+        *,
+        ttl_seconds: int,
+    ) -> None:
+        """
+        Registra páginas recién cacheadas; una clave existente (p.ej. expirada
+        o con objeto perdido) se renueva con el objeto y TTL nuevos.
+
+        Args:
+            session: Sesión async de SQLAlchemy
+            object_keys_by_key: Dict cache_key -> object_key en el bucket
+            ttl_seconds: Vida de las entradas desde ahora
+        """
+        if not object_keys_by_key:
+            return
+        expires_at = func.now() + timedelta(seconds=ttl_seconds)
+        stmt = pg_insert(OcrPageCacheEntry).values([
+            {"cache_key": cache_key, "object_key": object_key, "expires_at": expires_at}
+            for cache_key, object_key in object_keys_by_key.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["cache_key"],
+            set_={
+                "object_key": stmt.excluded.object_key,
+                "expires_at": stmt.excluded.expires_at,
+                "last_used_at": func.now(),
+            },
+        )
+        await session.execute(stmt)
+
+    async def pop_expired(
+        self,
+        session: AsyncSession,
+        *,
+        limit: int,
+    ) -> list[str]:
+        """
+        Elimina hasta `limit` entradas expiradas del índice.
+
+        Args:
+            session: Sesión async de SQLAlchemy
+            limit: Máximo de entradas por llamada
+
+        Returns:
+            object_key de las entradas eliminadas (objetos a borrar del bucket)
+        """
+        expired = (
+            select(OcrPageCacheEntry.cache_key)
+            .where(OcrPageCacheEntry.expires_at <= func.now())
+            .order_by(OcrPageCacheEntry.expires_at)
+            .limit(limit)
+            .scalar_subquery()
+        )
+        stmt = (
+            delete(OcrPageCacheEntry)
+            .where(OcrPageCacheEntry.cache_key.in_(expired))
+            .returning(OcrPageCacheEntry.object_key)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(stmt)
+        return list(result.scalars().all())
+
+
+# Instancia global para compatibilidad
+ocr_page_cache_repository = OcrPageCacheRepository()
+
+
+__all__ = [
+    "OcrPageCacheRepository",
+    "ocr_page_cache_repository",
+]
+
+# Fin del archivo backend/app/modules/rag/repositories/ocr_page_cache_repository.py
@@ -8,6 +8,8 @@ Responsabilidades:
 - Registro de eventos de timeline
 - Consulta de timeline por job
 - Auditoría de cambios de fase/estado
+- Buffer en proceso (RagJobEventBuffer) para insertar los eventos de una
+  fase en una sola sentencia
 
 Autor: DoxAI
 Fecha: 2025-11-28
@@ -15,11 +17,11 @@ Fecha: 2025-11-28
 
 from __future__ import annotations
 
-from typing import Optional, Sequence
-from uuid import UUID
+from typing import List, Optional, Sequence
+from uuid import UUID, uuid4
 from datetime import datetime, timezone
 
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.modules.rag.models.job_models import RagJobEvent
@@ -76,6 +78,28 @@ class RagJobEventRepository:
         await session.refresh(event)
         return event
 
+    async def insert_many(
+        self,
+        session: AsyncSession,
+        rows: Sequence[dict],
+    ) -> int:
+        """
+        Inserta varios eventos en un solo INSERT multi-fila (sin hidratar ORM).
+        
+        Args:
+            session: Sesión async de SQLAlchemy
+            rows: Filas como las genera RagJobEventBuffer (job_event_id,
+                job_id, event_type, rag_phase, progress_pct, message,
+                event_payload, created_at)
+            
+        Returns:
+            Número de eventos insertados
+        """
+        if not rows:
+            return 0
+        await session.execute(insert(RagJobEvent).values(list(rows)))
+        return len(rows)
+
     async def get_timeline(
         self,
         session: AsyncSession,
@@ -103,6 +127,36 @@ class RagJobEventRepository:
         result = await session.execute(stmt)
         return result.scalars().all()
 
+    async def list_by_types(
+        self,
+        session: AsyncSession,
+        job_id: UUID,
+        event_types: Sequence[str],
+    ) -> Sequence[RagJobEvent]:
+        """
+        Obtiene los eventos de un job RAG filtrados por tipo.
+
+        Args:
+            session: Sesión async de SQLAlchemy
+            job_id: ID del job
+            event_types: Tipos de evento a incluir (p.ej. phase_completed)
+
+        Returns:
+            Secuencia de RagJobEvent ordenados por fecha
+        """
+        stmt = (
+            select(RagJobEvent)
+            .where(
+                and_(
+                    RagJobEvent.job_id == job_id,
+                    RagJobEvent.event_type.in_(list(event_types)),
+                )
+            )
+            .order_by(RagJobEvent.created_at.asc())
+        )
+        result = await session.execute(stmt)
+        return result.scalars().all()
+
     async def get_latest_event(
         self,
         session: AsyncSession,
@@ -132,9 +186,65 @@ class RagJobEventRepository:
 rag_job_event_repository = RagJobEventRepository()
 
 
+class RagJobEventBuffer:
+    """
+    Acumula eventos de job en memoria con la misma firma de log_event que
+    RagJobEventRepository, para inyectarlo como event_repo en las facades.
+    
+    Los eventos se escriben al drenar el buffer: con flush() (un INSERT
+    multi-fila) o junto con el cambio de fase vía
+    RagJobRepository.advance_phase(events=buffer.drain()). created_at se
+    fija al registrar, así el orden de la timeline se conserva.
+    """
+
+    def __init__(self, repo: Optional[RagJobEventRepository] = None):
+        self._repo = repo or rag_job_event_repository
+        self._rows: List[dict] = []
+
+    @property
+    def pending(self) -> int:
+        """Eventos registrados aún no escritos."""
+        return len(self._rows)
+
+    async def log_event(
+        self,
+        session: Optional[AsyncSession] = None,
+        *,
+        job_id: UUID,
+        event_type: str,
+        rag_phase: Optional[RagPhase] = None,
+        progress_pct: int = 0,
+        message: Optional[str] = None,
+        event_payload: Optional[dict] = None,
+    ) -> dict:
+        """Registra el evento en el buffer (sin I/O). Returns: la fila pendiente."""
+        row = {
+            "job_event_id": uuid4(),
+            "job_id": job_id,
+            "event_type": event_type,
+            "rag_phase": rag_phase,
+            "progress_pct": progress_pct,
+            "message": message,
+            "event_payload": event_payload or {},
+            "created_at": datetime.now(timezone.utc),
+        }
+        self._rows.append(row)
+        return row
+
+    def drain(self) -> List[dict]:
+        """Devuelve y vacía los eventos pendientes."""
+        rows, self._rows = self._rows, []
+        return rows
+
+    async def flush(self, session: AsyncSession) -> int:
+        """Inserta los eventos pendientes en una sola sentencia."""
+        return await self._repo.insert_many(session, self.drain())
+
+
 __all__ = [
     "RagJobEventRepository",
     "rag_job_event_repository",
+    "RagJobEventBuffer",
 ]
 
 # Fin del archivo backend/app/modules/rag/repositories/rag_job_event_repository.py
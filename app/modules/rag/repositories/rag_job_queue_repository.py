@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/modules/rag/repositories/rag_job_queue_repository.py
+
+Repositorio async para la cola durable de jobs RAG (rag_job_queue).
+
+Responsabilidades:
+- Encolar un RagJob con sus parámetros de ejecución
+- Reclamar la siguiente fila disponible (FOR UPDATE SKIP LOCKED)
+- Heartbeat, finalización y reintento con backoff
+- Re-encolar manualmente filas terminadas (reintento de un job fallido)
+- Marcar como 'dead' las filas sin intentos restantes
+
+Todas las marcas de tiempo usan now() del servidor para que los workers no
+dependan de la sincronización de sus relojes.
+
+Autor: DoxAI
+Fecha: 2025-12-10
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import select, update, and_, or_, case, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.modules.rag.models.job_queue_models import (
+    RagJobQueueItem,
+    QUEUE_STATUS_PENDING,
+    QUEUE_STATUS_CLAIMED,
+    QUEUE_STATUS_DONE,
+    QUEUE_STATUS_DEAD,
+)
+
+# last_error de las filas que mueren por heartbeat vencido en su último intento
+HEARTBEAT_LOST_ERROR = "worker heartbeat lost on last attempt"
+
+
+class RagJobQueueRepository:
+    """
+    Repositorio para la cola de jobs RAG.
+
+    El claim es una sola sentencia UPDATE ... WHERE job_id = (SELECT ...
+    FOR UPDATE SKIP LOCKED): varios workers pueden reclamar en paralelo sin
+    bloquearse ni tomar la misma fila.
+    """
+
+    async def enqueue(
+        self,
+        session: AsyncSession,
+        *,
+        job_id: UUID,
+        project_id: UUID,
+        file_id: UUID,
+        user_id: UUID,
+        mime_type: str,
+        needs_ocr: bool,
+        ocr_strategy: str,
+        source_uri: str,
+        max_attempts: int = 3,
+    ) -> RagJobQueueItem:
+        """
+        Inserta la fila de cola de un job (en la transacción del caller).
+
+        Returns:
+            Instancia de RagJobQueueItem creada
+        """
+        item = RagJobQueueItem(
+            job_id=job_id,
+            project_id=project_id,
+            file_id=file_id,
+            user_id=user_id,
+            mime_type=mime_type,
+            needs_ocr=needs_ocr,
+            ocr_strategy=ocr_strategy,
+            source_uri=source_uri,
+            status=QUEUE_STATUS_PENDING,
+            attempts=0,
+            max_attempts=max_attempts,
+        )
+        session.add(item)
+        await session.flush()
+        return item
+
+    async def claim_next(
+        self,
+        session: AsyncSession,
+        worker_id: str,
+        *,
+        stale_after_seconds: int,
+    ) -> Optional[RagJobQueueItem]:
+        """
+        Reclama la siguiente fila disponible para worker_id.
+
+        Disponibles: 'pending' con available_at vencido, o 'claimed' con
+        heartbeat más antiguo que stale_after_seconds (worker caído), en
+        ambos casos con intentos restantes.
+
+        Returns:
+            RagJobQueueItem reclamado (attempts ya incrementado) o None
+        """
+        now = func.now()
+        candidate = (
+            select(RagJobQueueItem.job_id)
+            .where(
+                RagJobQueueItem.attempts < RagJobQueueItem.max_attempts,
+                or_(
+                    and_(
+                        RagJobQueueItem.status == QUEUE_STATUS_PENDING,
+                        RagJobQueueItem.available_at <= now,
+                    ),
+                    and_(
+                        RagJobQueueItem.status == QUEUE_STATUS_CLAIMED,
+                        RagJobQueueItem.heartbeat_at < now - timedelta(seconds=stale_after_seconds),
+                    ),
+                ),
+            )
+            .order_by(RagJobQueueItem.available_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        stmt = (
+            update(RagJobQueueItem)
+            .where(RagJobQueueItem.job_id == candidate)
+            .values(
+                status=QUEUE_STATUS_CLAIMED,
+                locked_by=worker_id,
+                locked_at=now,
+                heartbeat_at=now,
+                attempts=RagJobQueueItem.attempts + 1,
+                updated_at=now,
+            )
+            .returning(RagJobQueueItem)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def heartbeat(
+        self,
+        session: AsyncSession,
+        job_id: UUID,
+        worker_id: str,
+    ) -> bool:
+        """
+        Renueva el heartbeat de una fila reclamada por worker_id.
+
+        Returns:
+            False si la fila ya no pertenece a worker_id (lease perdido)
+        """
+        stmt = (
+            update(RagJobQueueItem)
+            .where(
+                RagJobQueueItem.job_id == job_id,
+                RagJobQueueItem.status == QUEUE_STATUS_CLAIMED,
+                RagJobQueueItem.locked_by == worker_id,
+            )
+            .values(heartbeat_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(stmt)
+        return result.rowcount > 0
+
+    async def complete(
+        self,
+        session: AsyncSession,
+        job_id: UUID,
+        worker_id: str,
+    ) -> bool:
+        """
+        Marca la fila como 'done' (el pipeline terminó, con éxito o con un
+        fallo ya compensado por el orquestador).
+        """
+        stmt = (
+            update(RagJobQueueItem)
+            .where(
+                RagJobQueueItem.job_id == job_id,
+                RagJobQueueItem.locked_by == worker_id,
+            )
+            .values(status=QUEUE_STATUS_DONE, locked_by=None, updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(stmt)
+        return result.rowcount > 0
+
+    async def release(
+        self,
+        session: AsyncSession,
+        job_id: UUID,
+        worker_id: str,
+        *,
+        error: str,
+        retry_delay_seconds: int,
+    ) -> Optional[str]:
+        """
+        Devuelve la fila a la cola tras un error inesperado del worker.
+
+        Si quedan intentos vuelve a 'pending' con available_at = now() +
+        retry_delay_seconds; si no, pasa a 'dead'.
+
+        Returns:
+            Nuevo estado de la fila, o None si ya no pertenecía a worker_id
+        """
+        new_status = case(
+            (RagJobQueueItem.attempts >= RagJobQueueItem.max_attempts, QUEUE_STATUS_DEAD),
+            else_=QUEUE_STATUS_PENDING,
+        )
+        stmt = (
+            update(RagJobQueueItem)
+            .where(
+                RagJobQueueItem.job_id == job_id,
+                RagJobQueueItem.locked_by == worker_id,
+            )
+            .values(
+                status=new_status,
+                locked_by=None,
+                available_at=func.now() + timedelta(seconds=retry_delay_seconds),
+                last_error=error[:500],
+                updated_at=func.now(),
+            )
+            .returning(RagJobQueueItem.status)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def requeue(
+        self,
+        session: AsyncSession,
+        job_id: UUID,
+    ) -> Optional[RagJobQueueItem]:
+        """
+        Vuelve a poner en cola una fila terminada ('done' o 'dead') con los
+        intentos reiniciados (reintento manual de un job fallido).
+
+        Returns:
+            RagJobQueueItem re-encolado, o None si la fila no existe o sigue
+            pendiente/reclamada
+        """
+        stmt = (
+            update(RagJobQueueItem)
+            .where(
+                RagJobQueueItem.job_id == job_id,
+                RagJobQueueItem.status.in_([QUEUE_STATUS_DONE, QUEUE_STATUS_DEAD]),
+            )
+            .values(
+                status=QUEUE_STATUS_PENDING,
+                attempts=0,
+                locked_by=None,
+                available_at=func.now(),
+                last_error=None,
+                updated_at=func.now(),
+            )
+            .returning(RagJobQueueItem)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def mark_exhausted_dead(
+        self,
+        session: AsyncSession,
+        *,
+        stale_after_seconds: int,
+    ) -> List[UUID]:
+        """
+        Pasa a 'dead' las filas reclamadas con heartbeat vencido y sin
+        intentos restantes (el worker murió en su último intento).
+
+        Returns:
+            job_id de las filas marcadas (el caller falla sus RagJob en la
+            misma transacción)
+        """
+        stmt = (
+            update(RagJobQueueItem)
+            .where(
+                RagJobQueueItem.status == QUEUE_STATUS_CLAIMED,
+                RagJobQueueItem.attempts >= RagJobQueueItem.max_attempts,
+                RagJobQueueItem.heartbeat_at < func.now() - timedelta(seconds=stale_after_seconds),
+            )
+            .values(
+                status=QUEUE_STATUS_DEAD,
+                locked_by=None,
+                last_error=HEARTBEAT_LOST_ERROR,
+                updated_at=func.now(),
+            )
+            .returning(RagJobQueueItem.job_id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(stmt)
+        return list(result.scalars().all())
+
+
+# Instancia global para compatibilidad con código existente que importa como módulo
+rag_job_queue_repository = RagJobQueueRepository()
+
+
+__all__ = [
+    "HEARTBEAT_LOST_ERROR",
+    "RagJobQueueRepository",
+    "rag_job_queue_repository",
+]
+
+# Fin del archivo backend/app/modules/rag/repositories/rag_job_queue_repository.py
@@ -9,6 +9,7 @@ Responsabilidades:
 - Listados por proyecto y usuario
 - Actualización de estados y fases
 - Consultas de progreso
+- Avance de fase + eventos de timeline en un solo round-trip
 
 Autor: DoxAI
 Fecha: 2025-11-28
@@ -20,10 +21,10 @@ from typing import Optional, Sequence
 from uuid import UUID
 from datetime import datetime, timezone
 
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.modules.rag.models.job_models import RagJob
+from app.modules.rag.models.job_models import RagJob, RagJobEvent
 from app.modules.rag.enums import RagJobPhase, RagPhase
 
 
@@ -237,6 +238,57 @@ class RagJobRepository:
         
         return job
 
+    async def advance_phase(
+        self,
+        session: AsyncSession,
+        job_id: UUID,
+        phase_current: Optional[RagPhase] = None,
+        *,
+        status: Optional[RagJobPhase] = None,
+        events: Sequence[dict] = (),
+    ) -> None:
+        """
+        Avanza fase y/o estado de un job y escribe sus eventos pendientes en
+        una sola sentencia (WITH ... UPDATE rag_jobs ... INSERT INTO
+        rag_job_events), sin SELECT previo ni refresh.
+        
+        A diferencia de update_phase/update_status no devuelve el job: el
+        llamador ya conoce los valores nuevos.
+        
+        Args:
+            session: Sesión async de SQLAlchemy
+            job_id: ID del job
+            phase_current: Nueva fase del pipeline RAG (None = sin cambio)
+            status: Nuevo estado del job (None = sin cambio)
+            events: Filas de RagJobEventBuffer.drain() a insertar
+        """
+        now = datetime.now(timezone.utc)
+        values: dict = {"updated_at": now}
+        if phase_current is not None:
+            values["phase_current"] = phase_current
+        if status is not None:
+            values["status"] = status
+            # Marcar timestamp correspondiente según el estado final
+            if status == RagJobPhase.completed:
+                values["completed_at"] = now
+            elif status == RagJobPhase.failed:
+                values["failed_at"] = now
+            elif status == RagJobPhase.cancelled:
+                values["cancelled_at"] = now
+
+        job_update = (
+            update(RagJob)
+            .where(RagJob.job_id == job_id)
+            .values(**values)
+        )
+        if events:
+            stmt = insert(RagJobEvent).values(list(events)).add_cte(
+                job_update.returning(RagJob.job_id).cte("job_advanced")
+            )
+        else:
+            stmt = job_update.execution_options(synchronize_session=False)
+        await session.execute(stmt)
+
     async def _touch_project(
         self,
         session: AsyncSession,
@@ -8,6 +8,7 @@ Ensamblador principal de rutas del módulo RAG (Fase 1 – Indexación).
 Incluye:
 - /rag/indexing/...       → gestión y reindexación de jobs
 - /rag/status/...         → estado de documentos y proyectos
+- /rag/projects/{id}/semantic-search → recuperación top-k por similitud
 - /rag/ocr/...            → callbacks y administración de OCR
 - /rag/diagnostics/...    → vistas de diagnóstico
 - /rag/metrics/...        → métricas Prometheus y snapshots
@@ -33,6 +34,9 @@ from app.modules.rag.routes.status.routes_documents_status import (
 from app.modules.rag.routes.status.routes_projects_status import (
     router as projects_status_router,
 )
+from app.modules.rag.routes.search.routes_semantic_search import (
+    router as semantic_search_router,
+)
 from app.modules.rag.routes.ocr.routes_ocr_callbacks import (
     router as ocr_callbacks_router,
 )
@@ -54,6 +58,9 @@ router.include_router(indexing_reindex_router)
 router.include_router(documents_status_router)
 router.include_router(projects_status_router)
 
+# Búsqueda semántica
+router.include_router(semantic_search_router)
+
 # OCR
 router.include_router(ocr_callbacks_router)
 router.include_router(ocr_admin_router)
@@ -7,11 +7,14 @@ Rutas HTTP para gestión de jobs de indexación RAG.
 
 Endpoints:
 - POST /rag/projects/{project_id}/jobs/indexing
+- POST /rag/projects/{project_id}/jobs/indexing/batch
+- POST /rag/jobs/{job_id}/retry
 - GET /rag/jobs/{job_id}/progress
 - GET /rag/projects/{project_id}/jobs
 
 Autor: Ixchel Beristain
 Fecha: 2025-11-28 (FASE 3 - Implementación completa v2)
+Actualizado: 2025-12-10 - POST encola el job (202); lo ejecuta el worker
 """
 
 from uuid import UUID
@@ -23,11 +26,17 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.shared.database.database import get_async_session
 from app.modules.files.services.storage_ops_service import AsyncStorageClient
 from app.modules.rag.schemas.indexing_schemas import (
+    IndexingBatchCreate,
     IndexingJobCreate,
     IndexingJobResponse,
     JobProgressResponse,
 )
-from app.modules.rag.facades.orchestrator_facade import run_indexing_job
+from app.modules.rag.facades.orchestrator_facade import (
+    ProjectDocument,
+    enqueue_indexing_job,
+    enqueue_project_indexing,
+    requeue_indexing_job,
+)
 from app.modules.rag.repositories.rag_job_repository import RagJobRepository
 from app.modules.rag.repositories.rag_job_event_repository import RagJobEventRepository
 from app.modules.rag.enums import RagJobPhase
@@ -59,6 +68,12 @@ async def get_storage_client() -> AsyncStorageClient:
             return f"https://stub-storage/{bucket}/{key}"
         async def delete_object(self, bucket: str, key: str) -> None:
             pass
+        async def iter_bytes(self, bucket: str, key: str, chunk_size: int = 1024 * 1024):
+            return
+            yield
+        async def upload_stream(self, bucket: str, key: str, stream, mime_type: str | None = None) -> None:
+            async for _ in stream:
+                pass
     return StubStorageClient()  # type: ignore
 
 
@@ -70,25 +85,24 @@ async def get_storage_client() -> AsyncStorageClient:
 @router.post(
     "/projects/{project_id}/jobs/indexing",
     response_model=IndexingJobResponse,
-    status_code=status.HTTP_201_CREATED,
+    status_code=status.HTTP_202_ACCEPTED,
 )
 async def create_indexing_job(
     project_id: UUID,
     payload: IndexingJobCreate,
     db: AsyncSession = Depends(get_async_session),
-    storage_client: AsyncStorageClient = Depends(get_storage_client),
 ):
     """
-    Crea un job de indexación RAG para un archivo.
+    Crea un job de indexación RAG para un archivo y lo encola.
     
     Flujo:
     1. Valida que project_id coincida con payload
-    2. Reserva créditos estimados
-    3. Lanza pipeline RAG (convert → ocr? → chunk → embed → integrate → ready)
-    4. Retorna detalles del job creado
+    2. Crea el RagJob (queued) y su fila en la cola durable
+    3. Retorna 202 con el job; un worker (app.modules.rag.jobs.indexing_worker)
+       reserva créditos y ejecuta el pipeline
+       (convert → ocr? → chunk → embed → integrate → ready)
     
-    Nota: El pipeline se ejecuta de forma síncrona en esta implementación.
-    En producción considerar background tasks o queue workers.
+    El progreso se consulta en GET /rag/jobs/{job_id}/progress.
     """
     if payload.project_id != project_id:
         raise HTTPException(
@@ -97,7 +111,7 @@ async def create_indexing_job(
         )
     
     logger.info(
-        f"[create_indexing_job] Creating RAG job: "
+        f"[create_indexing_job] Queueing RAG job: "
         f"project_id={project_id}, file_id={payload.file_id}, user_id={payload.user_id}"
     )
     
@@ -106,29 +120,18 @@ async def create_indexing_job(
         # Asumimos que el archivo está en users-files bucket
         source_uri = f"users-files/{payload.file_id}"
         
-        # Ejecutar pipeline completo
-        summary = await run_indexing_job(
+        job = await enqueue_indexing_job(
             db=db,
             project_id=payload.project_id,
             file_id=payload.file_id,
             user_id=payload.user_id,
             mime_type=payload.mime_type or "application/pdf",
             needs_ocr=payload.needs_ocr,
-            storage_client=storage_client,
             source_uri=source_uri,
         )
+        await db.commit()
         
-        # Obtener job recién creado
-        job_repo = RagJobRepository()
-        job = await job_repo.get_by_id(db, summary.job_id)
-        
-        if not job:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to retrieve created job",
-            )
-        
-        logger.info(f"[create_indexing_job] Job created successfully: job_id={summary.job_id}")
+        logger.info(f"[create_indexing_job] Job queued: job_id={job.job_id}")
         
         return IndexingJobResponse(
             job_id=job.job_id,
@@ -153,6 +156,122 @@ async def create_indexing_job(
         )
 
 
+@router.post(
+    "/projects/{project_id}/jobs/indexing/batch",
+    response_model=list[IndexingJobResponse],
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def create_indexing_jobs_batch(
+    project_id: UUID,
+    payload: IndexingBatchCreate,
+    db: AsyncSession = Depends(get_async_session),
+):
+    """
+    Encola la indexación de varios archivos de un proyecto (un job por archivo).
+    
+    Los workers los ejecutan en paralelo con cupos por fase, de modo que los
+    documentos se solapan en fases distintas en lugar de correr en serie.
+    """
+    if payload.project_id != project_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="project_id in path must match project_id in payload",
+        )
+    
+    logger.info(
+        f"[create_indexing_jobs_batch] Queueing {len(payload.files)} RAG jobs: "
+        f"project_id={project_id}, user_id={payload.user_id}"
+    )
+    
+    try:
+        documents = [
+            ProjectDocument(
+                file_id=f.file_id,
+                mime_type=f.mime_type or "application/pdf",
+                # Asumimos que el archivo está en users-files bucket
+                source_uri=f"users-files/{f.file_id}",
+                needs_ocr=f.needs_ocr,
+            )
+            for f in payload.files
+        ]
+        jobs = await enqueue_project_indexing(db, project_id, payload.user_id, documents)
+        await db.commit()
+        
+        return [
+            IndexingJobResponse(
+                job_id=job.job_id,
+                project_id=job.project_id,
+                started_by=payload.user_id,
+                phase=job.status,
+                created_at=job.created_at,
+                updated_at=job.updated_at,
+            )
+            for job in jobs
+        ]
+        
+    except ValueError as ve:
+        logger.error(f"[create_indexing_jobs_batch] Validation error: {ve}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(ve),
+        )
+    except Exception as e:
+        logger.error(f"[create_indexing_jobs_batch] Unexpected error: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create indexing jobs: {str(e)}",
+        )
+
+
+@router.post(
+    "/jobs/{job_id}/retry",
+    response_model=IndexingJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def retry_indexing_job(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_async_session),
+):
+    """
+    Re-encola un job fallido.
+    
+    El worker lo retoma con resume: las fases completadas cuyo artefacto sigue
+    válido (convert/ocr/chunk) no se repiten, y embed solo procesa los chunks
+    sin embedding.
+    """
+    logger.info(f"[retry_indexing_job] Retrying job_id={job_id}")
+    
+    try:
+        job, task = await requeue_indexing_job(db, job_id)
+        await db.commit()
+        
+        return IndexingJobResponse(
+            job_id=job.job_id,
+            project_id=job.project_id,
+            started_by=task.user_id,
+            phase=job.status,
+            created_at=job.created_at,
+            updated_at=job.updated_at,
+        )
+        
+    except LookupError as le:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(le),
+        )
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(ve),
+        )
+    except Exception as e:
+        logger.error(f"[retry_indexing_job] Unexpected error: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retry indexing job: {str(e)}",
+        )
+
+
 @router.get(
     "/jobs/{job_id}/progress",
     response_model=JobProgressResponse,
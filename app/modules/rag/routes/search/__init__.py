@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/modules/rag/routes/search/__init__.py
+
+Paquete de ruteadores para recuperación semántica (top-k) sobre
+los embeddings indexados por el pipeline RAG.
+
+Incluye:
+- routes_semantic_search.py → búsqueda por similitud acotada a un proyecto
+
+Autor: DoxAI
+Fecha: 2025-12-01
+"""
+
+# Archivo de marcador para declarar el paquete `search`.
+
+# Fin del archivo backend/app/modules/rag/routes/search/__init__.py
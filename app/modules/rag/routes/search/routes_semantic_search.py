@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/modules/rag/routes/search/routes_semantic_search.py
+
+Rutas HTTP para búsqueda semántica top-k sobre DocumentEmbedding.
+
+Endpoints:
+- POST /rag/projects/{project_id}/semantic-search
+
+Estrategia:
+- Proyectos pequeños (candidatos <= RAG_VECTOR_SEARCH_EXACT_THRESHOLD):
+  búsqueda exacta (recall 100%, sin índice).
+- Proyectos grandes: ANN sobre idx_document_embeddings_vector_hnsw con
+  hnsw.ef_search configurable e hnsw.iterative_scan para que el filtro por
+  proyecto/archivos no deje la búsqueda con menos de top_k resultados.
+- El conteo de candidatos se corta en umbral + 1: basta para decidir, sin
+  recorrer todos los embeddings de un proyecto grande.
+
+Autor: DoxAI
+Fecha: 2025-12-01
+Actualizado: 2025-12-20 - Conteo acotado de candidatos; iterative scan en ANN
+"""
+
+from uuid import UUID
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.shared.database.database import get_async_session
+from app.shared.integrations.openai_embeddings_client import generate_embeddings as openai_generate_embeddings
+from app.modules.rag.config import rag_config
+from app.modules.rag.repositories.document_embedding_repository import DocumentEmbeddingRepository
+from app.modules.rag.schemas.search_schemas import (
+    EMBEDDING_DIMENSION,
+    SemanticSearchRequest,
+    SemanticSearchHit,
+    SemanticSearchResponse,
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/rag",
+    tags=["rag:search"],
+)
+
+
+async def _resolve_query_vector(payload: SemanticSearchRequest) -> list[float]:
+    """Devuelve el vector de consulta, generándolo con OpenAI si se envió texto."""
+    if payload.query_vector is not None:
+        return payload.query_vector
+
+    from app.shared.config import settings
+
+    api_key = settings.openai_api_key.get_secret_value() if settings.openai_api_key else ""
+    if not api_key:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="OPENAI_API_KEY not configured; send query_vector instead of query_text",
+        )
+
+    vectors = await openai_generate_embeddings(
+        [payload.query_text],
+        api_key=api_key,
+        model=payload.embedding_model,
+        dimension=EMBEDDING_DIMENSION,
+    )
+    return vectors[0]
+
+
+@router.post(
+    "/projects/{project_id}/semantic-search",
+    response_model=SemanticSearchResponse,
+)
+async def semantic_search(
+    project_id: UUID,
+    payload: SemanticSearchRequest,
+    db: AsyncSession = Depends(get_async_session),
+):
+    """
+    Recupera los top-k chunks más similares a la consulta dentro de un proyecto.
+
+    Filtros opcionales: file_ids, embedding_model, only_active.
+
+    Returns:
+        SemanticSearchResponse con resultados ordenados por similitud descendente
+    """
+    logger.info(
+        f"[semantic_search] project_id={project_id}, top_k={payload.top_k}, "
+        f"file_ids={len(payload.file_ids or [])}, exact={payload.exact}"
+    )
+
+    try:
+        query_vector = await _resolve_query_vector(payload)
+
+        embedding_repo = DocumentEmbeddingRepository()
+        filters = dict(
+            project_id=project_id,
+            file_ids=payload.file_ids,
+            embedding_model=payload.embedding_model,
+            only_active=payload.only_active,
+        )
+
+        threshold = rag_config.vector_search_exact_threshold
+        candidates = await embedding_repo.count_search_candidates(db, limit=threshold + 1, **filters)
+        if candidates == 0:
+            return SemanticSearchResponse(
+                project_id=project_id,
+                top_k=payload.top_k,
+                exact=True,
+                candidates=0,
+                results=[],
+            )
+
+        use_exact = payload.exact
+        if use_exact is None:
+            use_exact = candidates <= threshold
+
+        matches = await embedding_repo.search_similar(
+            db,
+            query_vector,
+            top_k=payload.top_k,
+            exact=use_exact,
+            ef_search=max(rag_config.vector_search_ef_search, payload.top_k),
+            iterative_scan=rag_config.vector_search_iterative_scan,
+            **filters,
+        )
+
+        logger.info(
+            f"[semantic_search] project_id={project_id}: {len(matches)} hits "
+            f"(candidates={candidates}, exact={use_exact})"
+        )
+
+        return SemanticSearchResponse(
+            project_id=project_id,
+            top_k=payload.top_k,
+            exact=use_exact,
+            candidates=candidates,
+            results=[
+                SemanticSearchHit(
+                    embedding_id=m.embedding_id,
+                    file_id=m.file_id,
+                    chunk_id=m.chunk_id,
+                    chunk_index=m.chunk_index,
+                    embedding_model=m.embedding_model,
+                    distance=m.distance,
+                    score=m.score,
+                    chunk_text=m.chunk_text,
+                )
+                for m in matches
+            ],
+        )
+
+    except HTTPException:
+        raise
+    except ValueError as ve:
+        logger.error(f"[semantic_search] Validation error: {ve}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(ve),
+        )
+    except Exception as e:
+        logger.error(f"[semantic_search] Unexpected error: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to run semantic search: {str(e)}",
+        )
+
+
+# Fin del archivo backend/app/modules/rag/routes/search/routes_semantic_search.py
@@ -10,6 +10,8 @@ Fecha: 2025-10-18
 
 from .indexing_schemas import (
     IndexingJobCreate,
+    IndexingBatchFile,
+    IndexingBatchCreate,
     IndexingJobResponse,
     JobProgressResponse,
     JobProgressEvent,
@@ -18,9 +20,16 @@ from .indexing_schemas import (
     EmbeddingCreate,
     EmbeddingResponse,
 )
+from .search_schemas import (
+    SemanticSearchRequest,
+    SemanticSearchHit,
+    SemanticSearchResponse,
+)
 
 __all__ = [
     "IndexingJobCreate",
+    "IndexingBatchFile",
+    "IndexingBatchCreate",
     "IndexingJobResponse",
     "JobProgressResponse",
     "JobProgressEvent",
@@ -28,4 +37,7 @@ __all__ = [
     "ChunkResponse",
     "EmbeddingCreate",
     "EmbeddingResponse",
+    "SemanticSearchRequest",
+    "SemanticSearchHit",
+    "SemanticSearchResponse",
 ]
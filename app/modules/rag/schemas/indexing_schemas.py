@@ -48,6 +48,24 @@ class IndexingJobCreate(BaseModel):
     needs_ocr: bool = False
 
 
+class IndexingBatchFile(BaseModel):
+    """
+    Archivo dentro de un batch de indexación de proyecto.
+    """
+    file_id: UUID
+    mime_type: Optional[str] = None
+    needs_ocr: bool = False
+
+
+class IndexingBatchCreate(BaseModel):
+    """
+    Schema para encolar la indexación de varios archivos de un proyecto.
+    """
+    project_id: UUID
+    user_id: UUID
+    files: list[IndexingBatchFile] = Field(..., min_length=1, max_length=1000)
+
+
 class JobProgressEvent(BaseModel):
     """
     Evento en el timeline de un job de indexación.
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/modules/rag/schemas/search_schemas.py
+
+Schemas Pydantic para búsqueda semántica (top-k) sobre DocumentEmbedding.
+
+Autor: DoxAI
+Fecha: 2025-12-01
+"""
+
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field, model_validator
+
+
+EMBEDDING_DIMENSION = 1536
+
+
+class SemanticSearchRequest(BaseModel):
+    """
+    Consulta de búsqueda semántica.
+
+    Se debe enviar exactamente uno de `query_text` o `query_vector`.
+    """
+    query_text: Optional[str] = Field(default=None, min_length=1)
+    query_vector: Optional[list[float]] = None
+    top_k: int = Field(default=10, ge=1, le=100)
+    file_ids: Optional[list[UUID]] = None
+    embedding_model: str = "text-embedding-3-large"
+    only_active: bool = True
+    exact: Optional[bool] = Field(
+        default=None,
+        description="True fuerza búsqueda exacta, False fuerza ANN, None decide según tamaño.",
+    )
+
+    @model_validator(mode="after")
+    def _check_query(self):
+        if (self.query_text is None) == (self.query_vector is None):
+            raise ValueError("Provide exactly one of query_text or query_vector")
+        if self.query_vector is not None and len(self.query_vector) != EMBEDDING_DIMENSION:
+            raise ValueError(
+                f"query_vector must have dimension {EMBEDDING_DIMENSION}, got {len(self.query_vector)}"
+            )
+        return self
+
+
+class SemanticSearchHit(BaseModel):
+    """Chunk recuperado con su puntuación de similitud."""
+    embedding_id: UUID
+    file_id: UUID
+    chunk_id: UUID
+    chunk_index: int
+    embedding_model: str
+    distance: float
+    score: float
+    chunk_text: Optional[str] = None
+
+
+class SemanticSearchResponse(BaseModel):
+    """Resultado de búsqueda semántica."""
+    project_id: UUID
+    top_k: int
+    exact: bool
+    candidates: int = Field(
+        description="Embeddings candidatos, contados hasta RAG_VECTOR_SEARCH_EXACT_THRESHOLD + 1.",
+    )
+    results: list[SemanticSearchHit] = Field(default_factory=list)
+
+
+# Fin del archivo backend/app/modules/rag/schemas/search_schemas.py
@@ -15,6 +15,10 @@ from .azure_ocr_service import AzureOcrService
 from .text_extractors import TextExtractorService
 from .embedding_provider import EmbeddingProvider
 from .chunker import ChunkerService
+from .embedding_cache_service import EmbeddingCacheService, embedding_cache_service
+from .phase_limiter import PhaseLimiter
+from .ocr_page_cache import OcrPageCache, ocr_page_cache
+from .page_plan import PagePlan, classify_pdf_pages
 
 __all__ = [
     "IndexingService",
@@ -24,4 +28,11 @@ __all__ = [
     "TextExtractorService",
     "EmbeddingProvider",
     "ChunkerService",
+    "EmbeddingCacheService",
+    "embedding_cache_service",
+    "PhaseLimiter",
+    "OcrPageCache",
+    "ocr_page_cache",
+    "PagePlan",
+    "classify_pdf_pages",
 ]
@@ -5,12 +5,44 @@ backend/app/modules/rag/services/chunker.py
 Servicio de chunking semántico para documentos.
 Divide texto en chunks optimizados para embeddings y búsqueda.
 
+Motor streaming: consume el texto como un iterable de fragmentos (líneas,
+bloques de storage, etc.) y produce ChunkDTO con un generador, de modo que
+la memoria queda acotada por max_tokens + un párrafo, sin importar el
+tamaño del documento.
+
+Convenciones de entrada:
+    - "\\f" (form feed) separa páginas; la primera página es 1
+    - Una línea en blanco separa párrafos
+
+Tokenización BPE real con tiktoken (misma codificación que los modelos
+text-embedding-3-*). Si tiktoken o su codificación no están disponibles,
+se usa una aproximación por palabras y se registra un warning.
+
 Autor: DoxAI
 Fecha: 2025-10-28
+Actualizado: 2025-12-05 - Implementación streaming con tokenizer BPE
 """
 
+import io
+import logging
 from dataclasses import dataclass
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import re
+
+from app.modules.rag.config import rag_config
+from app.modules.files.services.storage_ops_service import spool_object, split_storage_uri
+
+logger = logging.getLogger(__name__)
+
+PAGE_BREAK = "\f"
+PARAGRAPH_SEPARATOR = "\n\n"
+
+# Un "párrafo" sin líneas en blanco (p.ej. OCR) se corta a este tamaño para
+# mantener la memoria acotada.
+_MAX_PARAGRAPH_CHARS_PER_TOKEN = 8
+# Una "línea" sin saltos se corta a este tamaño (streams sin \n).
+_MAX_LINE_CHARS = 64 * 1024
 
 
 @dataclass
@@ -32,92 +64,242 @@ class ChunkDTO:
     chunk_metadata: Optional[Dict[str, Any]] = None
 
 
+class _ApproxTokenizer:
+    """
+    Tokenizer de respaldo: palabras con su espacio final como "tokens".
+
+    Mantiene la interfaz encode/decode de tiktoken para que el motor no
+    distinga entre ambos.
+    """
+
+    _pattern = re.compile(r"\S+\s*|\s+")
+
+    def encode(self, text: str) -> List[str]:
+        return self._pattern.findall(text)
+
+    def decode(self, tokens: List[str]) -> str:
+        return "".join(tokens)
+
+
+@lru_cache(maxsize=4)
+def get_default_tokenizer(encoding_name: Optional[str] = None):
+    """
+    Obtiene el tokenizer BPE (tiktoken) para la codificación configurada.
+
+    Returns:
+        Encoding de tiktoken, o _ApproxTokenizer si no está disponible
+    """
+    encoding_name = encoding_name or rag_config.chunk_tokenizer_encoding
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        logger.warning(
+            f"[chunker] tiktoken encoding '{encoding_name}' no disponible ({e}); "
+            f"usando aproximación por palabras"
+        )
+        return _ApproxTokenizer()
+
+
+def _iter_lines(pieces: Iterable[str]) -> Iterator[str]:
+    """Re-ensambla fragmentos arbitrarios en líneas (sin el '\\n')."""
+    rest = ""
+    for piece in pieces:
+        if not piece:
+            continue
+        lines = (rest + piece).split("\n")
+        rest = lines.pop()
+        yield from lines
+        while len(rest) > _MAX_LINE_CHARS:
+            cut = rest.rfind(" ", 0, _MAX_LINE_CHARS)
+            cut = cut if cut > 0 else _MAX_LINE_CHARS
+            yield rest[:cut]
+            rest = rest[cut:]
+    if rest:
+        yield rest
+
+
 class ChunkerService:
     """
     Servicio de chunking semántico.
-    
+
     Estrategias:
         - Respeta límites de párrafos
         - Aplica overlap entre chunks
         - Mantiene contexto semántico
         - Preserva metadata de origen (páginas)
     """
-    
+
     def __init__(self, tokenizer=None):
         """
         Inicializa el chunker.
-        
+
         Args:
             tokenizer: Tokenizer compatible con el modelo de embeddings
-                      (ej: tiktoken para OpenAI)
+                      (ej: tiktoken para OpenAI). Default: get_default_tokenizer()
         """
-        self.tokenizer = tokenizer
-    
+        self.tokenizer = tokenizer or get_default_tokenizer()
+
     async def make_chunks(
         self,
         text_uri: str,
-        params: ChunkParams
+        params: ChunkParams,
+        *,
+        storage_client=None,
     ) -> List[ChunkDTO]:
         """
         Divide texto en chunks semánticos.
-        
+
         Args:
-            text_uri: URI del texto fuente en storage
+            text_uri: URI del texto fuente en storage (formato bucket/path)
             params: Parámetros de chunking (max_tokens, overlap)
-            
+            storage_client: AsyncStorageClient (lectura en streaming con iter_bytes)
+
         Returns:
             Lista de ChunkDTO con chunks y metadata
-            
-        Raises:
-            NotImplementedError: Pendiente implementación
-            
+
         Notes:
-            - Respeta límites de párrafos cuando sea posible
-            - Aplica overlap para mantener contexto
-            - Calcula token_count con tokenizer apropiado
-            - Preserva información de páginas fuente
+            - Para documentos grandes preferir iter_chunks (generador)
         """
-        # TODO: Implementación completa
-        # 1. Cargar texto de text_uri
-        # 2. Detectar párrafos y secciones
-        # 3. Dividir en chunks respetando max_tokens:
-        #    - Intentar no partir párrafos
-        #    - Si un párrafo excede max_tokens, dividirlo por oraciones
-        #    - Aplicar overlap entre chunks
-        # 4. Calcular token_count para cada chunk
-        # 5. Preservar source_page_start/end si disponible
-        # 6. Determinar chunk_type (paragraph, heading, table, etc.)
-        # 7. Retornar List[ChunkDTO]
-        
-        raise NotImplementedError(
-            f"Chunking pending for text_uri={text_uri}, max_tokens={params.max_tokens}"
+        if storage_client is None:
+            raise ValueError("storage_client is required")
+        bucket_name, storage_path = split_storage_uri(text_uri)
+        spooled = await spool_object(
+            storage_client,
+            bucket=bucket_name,
+            key=storage_path,
+            chunk_size=rag_config.storage_stream_chunk_bytes,
+            max_memory=rag_config.storage_spool_max_memory_bytes,
         )
-    
+        with spooled:
+            text_stream = io.TextIOWrapper(spooled, encoding="utf-8", errors="replace")
+            return list(self.iter_chunks(text_stream, params))
+
+    def iter_chunks(
+        self,
+        pieces: Iterable[str],
+        params: ChunkParams,
+    ) -> Iterator[ChunkDTO]:
+        """
+        Genera chunks de como máximo params.max_tokens tokens.
+
+        Args:
+            pieces: Texto como iterable de fragmentos (un str también sirve
+                    envuelto en una lista; un archivo abierto itera por líneas)
+            params: Parámetros de chunking (max_tokens, overlap)
+
+        Yields:
+            ChunkDTO en orden, con source_page_start/end
+
+        Notes:
+            - Los párrafos se agrupan completos mientras quepan
+            - Un párrafo mayor que max_tokens se parte en ventanas con overlap
+            - Cada chunk nuevo arranca con los últimos `overlap` tokens del anterior
+        """
+        max_tokens = params.max_tokens
+        if max_tokens <= 0:
+            raise ValueError(f"max_tokens must be > 0, got {max_tokens}")
+        overlap = max(0, min(params.overlap, max_tokens // 2))
+        separator = self._encode(PARAGRAPH_SEPARATOR)
+
+        index = 0
+        buffer: list = []
+        fresh = 0  # tokens añadidos desde el último chunk emitido (excluye overlap)
+        page_start = page_end = None
+
+        def emit(tokens, start, end) -> ChunkDTO:
+            nonlocal index
+            chunk = ChunkDTO(
+                index=index,
+                text=self._decode(tokens).strip(),
+                token_count=len(tokens),
+                source_page_start=start,
+                source_page_end=end,
+            )
+            index += 1
+            return chunk
+
+        for page, paragraph in self._iter_paragraphs(pieces, max_tokens):
+            tokens = self._encode(paragraph)
+            sep = separator if buffer else []
+
+            # El párrafo no cabe: cerrar el chunk actual y arrancar con overlap
+            if fresh and len(buffer) + len(sep) + len(tokens) > max_tokens:
+                yield emit(buffer, page_start, page_end)
+                buffer = buffer[-overlap:] if overlap else []
+                page_start, fresh = page_end, 0
+                sep = separator if buffer else []
+
+            if not buffer:
+                page_start = page
+            combined = buffer + sep + tokens
+            fresh += len(sep) + len(tokens)
+
+            # Párrafo mayor que max_tokens: ventanas deslizantes
+            step = max_tokens - overlap
+            while len(combined) > max_tokens:
+                yield emit(combined[:max_tokens], page_start, page)
+                combined = combined[step:]
+                page_start = page
+                fresh = max(0, len(combined) - overlap)
+
+            buffer, page_end = combined, page
+
+        if fresh and buffer:
+            yield emit(buffer, page_start, page_end)
+
+    def _iter_paragraphs(
+        self,
+        pieces: Iterable[str],
+        max_tokens: int,
+    ) -> Iterator[Tuple[int, str]]:
+        """
+        Genera (página, párrafo) a partir del stream de texto.
+
+        Un párrafo nunca cruza un salto de página, y se corta si supera
+        max_tokens * _MAX_PARAGRAPH_CHARS_PER_TOKEN caracteres.
+        """
+        soft_limit = max_tokens * _MAX_PARAGRAPH_CHARS_PER_TOKEN
+        page = 1
+        lines: List[str] = []
+        size = 0
+        start_page = page
+
+        for line in _iter_lines(pieces):
+            for i, part in enumerate(line.split(PAGE_BREAK)):
+                if i > 0:
+                    if lines:
+                        yield start_page, "\n".join(lines)
+                        lines, size = [], 0
+                    page += 1
+                part = part.strip()
+                if not part:
+                    if lines:
+                        yield start_page, "\n".join(lines)
+                        lines, size = [], 0
+                    continue
+                if not lines:
+                    start_page = page
+                lines.append(part)
+                size += len(part)
+                if size >= soft_limit:
+                    yield start_page, "\n".join(lines)
+                    lines, size = [], 0
+
+        if lines:
+            yield start_page, "\n".join(lines)
+
+    def _encode(self, text: str) -> list:
+        return list(self.tokenizer.encode(text))
+
+    def _decode(self, tokens: list) -> str:
+        return self.tokenizer.decode(tokens)
+
     def _count_tokens(self, text: str) -> int:
         """Cuenta tokens en texto usando tokenizer."""
-        if not self.tokenizer:
-            # Fallback: aproximación (1 token ≈ 4 chars)
-            return len(text) // 4
-        
-        # TODO: Usar tokenizer real (tiktoken para OpenAI)
-        return len(text) // 4
-    
+        return len(self._encode(text))
+
     def _split_by_paragraphs(self, text: str) -> List[str]:
         """Divide texto en párrafos."""
-        # TODO: Implementar split inteligente
-        # - Doble salto de línea
-        # - Respeta encabezados markdown
-        # - Detecta listas
-        paragraphs = [p.strip() for p in text.split("\n\n") if p.strip()]
-        return paragraphs
-    
-    def _apply_overlap(
-        self,
-        chunks: List[str],
-        overlap_tokens: int
-    ) -> List[str]:
-        """Aplica overlap entre chunks consecutivos."""
-        # TODO: Implementar overlap
-        # - Tomar últimas overlap_tokens del chunk anterior
-        # - Prefijar al siguiente chunk
-        return chunks
+        return [paragraph for _, paragraph in self._iter_paragraphs([text], rag_config.chunk_max_tokens_default)]
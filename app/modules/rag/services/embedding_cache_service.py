@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/modules/rag/services/embedding_cache_service.py
+
+Caché persistente de embeddings direccionada por contenido.
+
+Clave: (embedding_model, dimension, blake2b(texto normalizado)). La normalización
+solo colapsa espacios en blanco: normalize_for_hash (text_normalizer) altera el
+contenido (minúsculas, números de página) y serviría vectores de textos distintos.
+
+La caché es best-effort: cualquier error se registra y se trata como miss, de modo
+que la fase embed nunca falla por ella. Las operaciones se ejecutan en un
+SAVEPOINT para no abortar la transacción del llamador.
+
+Autor: DoxAI
+Fecha: 2025-12-03
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.modules.rag.config import rag_config
+from app.modules.rag.repositories.embedding_cache_repository import (
+    EmbeddingCacheRepository,
+    embedding_cache_repository,
+)
+from app.modules.rag.metrics.collectors.embedding_cache_collector import (
+    inc_embedding_cache_hits,
+    inc_embedding_cache_misses,
+    inc_embedding_cache_evictions,
+)
+from app.shared.utils.hashing import blake2b_hex
+
+logger = logging.getLogger(__name__)
+
+
+def embedding_text_hash(text: str) -> str:
+    """Hash del texto con espacios colapsados (64 caracteres hex)."""
+    return blake2b_hex(" ".join((text or "").split()))
+
+
+class EmbeddingCacheService:
+    """
+    Fachada sobre EmbeddingCacheRepository con métricas y eviction periódica.
+
+    Métricas en proceso (get_stats) y Prometheus
+    (rag_embedding_cache_{hits,misses,evictions}_total).
+    """
+
+    def __init__(
+        self,
+        repository: Optional[EmbeddingCacheRepository] = None,
+        *,
+        enabled: Optional[bool] = None,
+        max_entries: Optional[int] = None,
+        evict_interval_seconds: Optional[int] = None,
+    ):
+        self.repository = repository or embedding_cache_repository
+        self._enabled = enabled
+        self._max_entries = max_entries
+        self._evict_interval_seconds = evict_interval_seconds
+        self._last_eviction: float = 0.0
+
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+        self._errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return rag_config.embedding_cache_enabled if self._enabled is None else self._enabled
+
+    @property
+    def max_entries(self) -> int:
+        return self._max_entries or rag_config.embedding_cache_max_entries
+
+    @property
+    def evict_interval_seconds(self) -> int:
+        if self._evict_interval_seconds is None:
+            return rag_config.embedding_cache_evict_interval_seconds
+        return self._evict_interval_seconds
+
+    async def lookup(
+        self,
+        db: AsyncSession,
+        embedding_model: str,
+        dimension: int,
+        texts: Sequence[str],
+    ) -> list[Optional[list[float]]]:
+        """
+        Busca vectores cacheados para una lista de textos (una consulta).
+
+        Returns:
+            Lista alineada con `texts`: vector cacheado o None (miss)
+        """
+        if not self.enabled or not texts:
+            return [None] * len(texts)
+
+        hashes = [embedding_text_hash(t) for t in texts]
+        try:
+            async with db.begin_nested():
+                found = await self.repository.get_many(db, embedding_model, dimension, hashes)
+        except Exception as e:
+            self._errors += 1
+            logger.warning(f"[embedding_cache] lookup failed, treating as miss: {e}")
+            found = {}
+
+        vectors = [found.get(h) for h in hashes]
+        hits = sum(1 for v in vectors if v is not None)
+        self._hits += hits
+        self._misses += len(vectors) - hits
+        inc_embedding_cache_hits(embedding_model, hits)
+        inc_embedding_cache_misses(embedding_model, len(vectors) - hits)
+        return vectors
+
+    async def store(
+        self,
+        db: AsyncSession,
+        embedding_model: str,
+        dimension: int,
+        texts: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+    ) -> None:
+        """Guarda vectores recién generados (sin commit; lo hace el llamador)."""
+        if not self.enabled or not texts:
+            return
+        try:
+            async with db.begin_nested():
+                await self.repository.put_many(
+                    db,
+                    embedding_model,
+                    dimension,
+                    {embedding_text_hash(t): v for t, v in zip(texts, vectors)},
+                )
+            self._stores += len(texts)
+        except Exception as e:
+            self._errors += 1
+            logger.warning(f"[embedding_cache] store failed: {e}")
+
+    async def maybe_evict(self, db: AsyncSession) -> int:
+        """
+        Aplica la eviction LRU si pasó el intervalo mínimo desde la anterior.
+
+        Returns:
+            Número de entradas eliminadas
+        """
+        if not self.enabled:
+            return 0
+        now = time.monotonic()
+        if self._last_eviction and now - self._last_eviction < self.evict_interval_seconds:
+            return 0
+        self._last_eviction = now
+        try:
+            async with db.begin_nested():
+                removed = await self.repository.evict_to_size(db, self.max_entries)
+        except Exception as e:
+            self._errors += 1
+            logger.warning(f"[embedding_cache] eviction failed: {e}")
+            return 0
+        if removed:
+            self._evictions += removed
+            inc_embedding_cache_evictions(removed)
+            logger.info(f"[embedding_cache] evicted {removed} entries (max_entries={self.max_entries})")
+        return removed
+
+    def get_stats(self) -> dict:
+        """Estadísticas en proceso, con el mismo formato que CacheBackend.get_stats."""
+        total = self._hits + self._misses
+        return {
+            "name": "rag_embeddings",
+            "max_size": self.max_entries,
+            "hits": self._hits,
+            "misses": self._misses,
+            "stores": self._stores,
+            "evictions": self._evictions,
+            "errors": self._errors,
+            "hit_rate_percent": round(self._hits / total * 100, 2) if total else 0.0,
+            "total_requests": total,
+        }
+
+
+# Instancia global
+embedding_cache_service = EmbeddingCacheService()
+
+
+__all__ = [
+    "EmbeddingCacheService",
+    "embedding_cache_service",
+    "embedding_text_hash",
+]
+
+# Fin del archivo backend/app/modules/rag/services/embedding_cache_service.py
@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/modules/rag/services/job_queue.py
+
+Cola durable de jobs de indexación RAG.
+
+El endpoint HTTP solo crea el RagJob y lo encola (202 Accepted); el
+pipeline lo ejecuta un worker separado (app.modules.rag.jobs.indexing_worker)
+que reclama tareas de la cola.
+
+Implementaciones:
+- PostgresJobQueue: tabla rag_job_queue con FOR UPDATE SKIP LOCKED,
+  heartbeats y reintentos con backoff. Es la de producción. Cuando una fila
+  pasa a 'dead', su RagJob se marca failed en la misma transacción
+  (fail_dead_indexing_job) y puede reintentarse con requeue_indexing_job.
+- InMemoryJobQueue: misma semántica en memoria de proceso, para tests y
+  desarrollo local sin base de datos.
+
+Autor: DoxAI
+Fecha: 2025-12-10
+Actualizado: 2025-12-20 - Filas 'dead' fallan su RagJob y liberan la reserva
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Optional, Protocol, Sequence
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.modules.rag.config import rag_config
+from app.modules.rag.models.job_queue_models import (
+    QUEUE_STATUS_PENDING,
+    QUEUE_STATUS_CLAIMED,
+    QUEUE_STATUS_DONE,
+    QUEUE_STATUS_DEAD,
+)
+from app.modules.rag.repositories.rag_job_queue_repository import (
+    HEARTBEAT_LOST_ERROR,
+    rag_job_queue_repository,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueuedIndexingTask:
+    """Parámetros para ejecutar el pipeline de un RagJob ya creado."""
+    job_id: UUID
+    project_id: UUID
+    file_id: UUID
+    user_id: UUID
+    mime_type: str
+    needs_ocr: bool
+    ocr_strategy: str
+    source_uri: str
+    attempts: int = 0
+
+
+class RagJobQueue(Protocol):
+    """Contrato de la cola de jobs RAG."""
+
+    async def enqueue(self, db: AsyncSession, task: QueuedIndexingTask) -> None:
+        """Encola la tarea dentro de la transacción del caller."""
+        ...
+
+    async def claim(self, worker_id: str) -> Optional[QueuedIndexingTask]:
+        """Reclama la siguiente tarea disponible, o None si no hay."""
+        ...
+
+    async def heartbeat(self, job_id: UUID, worker_id: str) -> bool:
+        """Renueva el lease; False si el worker ya no es dueño de la tarea."""
+        ...
+
+    async def complete(self, job_id: UUID, worker_id: str) -> None:
+        """Marca la tarea como terminada."""
+        ...
+
+    async def release(self, job_id: UUID, worker_id: str, error: str) -> Optional[str]:
+        """Devuelve la tarea para reintento (o la marca 'dead'); retorna el nuevo estado."""
+        ...
+
+    async def requeue(self, db: AsyncSession, job_id: UUID) -> Optional[QueuedIndexingTask]:
+        """Re-encola una tarea terminada (transacción del caller); None si no aplica."""
+        ...
+
+
+def _task_from_item(item) -> QueuedIndexingTask:
+    return QueuedIndexingTask(
+        job_id=item.job_id,
+        project_id=item.project_id,
+        file_id=item.file_id,
+        user_id=item.user_id,
+        mime_type=item.mime_type,
+        needs_ocr=item.needs_ocr,
+        ocr_strategy=item.ocr_strategy,
+        source_uri=item.source_uri,
+        attempts=item.attempts,
+    )
+
+
+class PostgresJobQueue:
+    """
+    Cola sobre rag_job_queue.
+
+    enqueue usa la sesión del request (atómico con la creación del RagJob);
+    claim/heartbeat/complete/release abren transacciones cortas propias para
+    no retener locks mientras corre el pipeline.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], AsyncSession]] = None,
+        *,
+        max_attempts: Optional[int] = None,
+        stale_after_seconds: Optional[int] = None,
+        retry_backoff_seconds: Optional[int] = None,
+    ):
+        self._session_factory = session_factory
+        self.max_attempts = max_attempts or rag_config.worker_max_attempts
+        self.stale_after_seconds = stale_after_seconds or rag_config.worker_stale_after_seconds
+        self.retry_backoff_seconds = retry_backoff_seconds or rag_config.worker_retry_backoff_seconds
+        self._repo = rag_job_queue_repository
+
+    def _session(self) -> AsyncSession:
+        if self._session_factory is None:
+            from app.shared.database.database import SessionLocal
+
+            if SessionLocal is None:
+                raise RuntimeError("Database not initialized (SKIP_DB_INIT=1)")
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    async def _fail_dead_jobs(self, session: AsyncSession, job_ids: Sequence[UUID], error: str) -> None:
+        """Marca failed los RagJob de filas recién pasadas a 'dead' (misma transacción)."""
+        # Import diferido: orchestrator_facade importa este módulo
+        from app.modules.rag.facades.orchestrator_facade import fail_dead_indexing_job
+
+        for job_id in job_ids:
+            await fail_dead_indexing_job(session, job_id, error=error)
+
+    async def enqueue(self, db: AsyncSession, task: QueuedIndexingTask) -> None:
+        await self._repo.enqueue(
+            db,
+            job_id=task.job_id,
+            project_id=task.project_id,
+            file_id=task.file_id,
+            user_id=task.user_id,
+            mime_type=task.mime_type,
+            needs_ocr=task.needs_ocr,
+            ocr_strategy=task.ocr_strategy,
+            source_uri=task.source_uri,
+            max_attempts=self.max_attempts,
+        )
+
+    async def claim(self, worker_id: str) -> Optional[QueuedIndexingTask]:
+        async with self._session() as session:
+            async with session.begin():
+                dead = await self._repo.mark_exhausted_dead(
+                    session, stale_after_seconds=self.stale_after_seconds
+                )
+                if dead:
+                    logger.warning(f"[job_queue] {len(dead)} job(s) marked dead after lost heartbeat")
+                    await self._fail_dead_jobs(session, dead, HEARTBEAT_LOST_ERROR)
+                item = await self._repo.claim_next(
+                    session, worker_id, stale_after_seconds=self.stale_after_seconds
+                )
+                if item is None:
+                    return None
+                return _task_from_item(item)
+
+    async def heartbeat(self, job_id: UUID, worker_id: str) -> bool:
+        async with self._session() as session:
+            async with session.begin():
+                return await self._repo.heartbeat(session, job_id, worker_id)
+
+    async def complete(self, job_id: UUID, worker_id: str) -> None:
+        async with self._session() as session:
+            async with session.begin():
+                await self._repo.complete(session, job_id, worker_id)
+
+    async def release(self, job_id: UUID, worker_id: str, error: str) -> Optional[str]:
+        async with self._session() as session:
+            async with session.begin():
+                status = await self._repo.release(
+                    session,
+                    job_id,
+                    worker_id,
+                    error=error,
+                    retry_delay_seconds=self.retry_backoff_seconds,
+                )
+                if status == QUEUE_STATUS_DEAD:
+                    await self._fail_dead_jobs(session, [job_id], error[:500])
+                return status
+
+    async def requeue(self, db: AsyncSession, job_id: UUID) -> Optional[QueuedIndexingTask]:
+        item = await self._repo.requeue(db, job_id)
+        return _task_from_item(item) if item is not None else None
+
+
+@dataclass
+class _MemoryEntry:
+    task: QueuedIndexingTask
+    status: str = QUEUE_STATUS_PENDING
+    available_at: float = 0.0
+    locked_by: Optional[str] = None
+    heartbeat_at: float = 0.0
+    last_error: Optional[str] = None
+
+
+class InMemoryJobQueue:
+    """
+    Stand-in en memoria con la semántica de PostgresJobQueue (claim
+    exclusivo, leases con heartbeat, backoff y 'dead' al agotar intentos).
+    No es durable: solo para tests y desarrollo local.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_attempts: int = 3,
+        stale_after_seconds: float = 120.0,
+        retry_backoff_seconds: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_attempts = max_attempts
+        self.stale_after_seconds = stale_after_seconds
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._clock = clock
+        self._entries: Dict[UUID, _MemoryEntry] = {}
+        self._lock = asyncio.Lock()
+
+    def status_of(self, job_id: UUID) -> Optional[str]:
+        entry = self._entries.get(job_id)
+        return entry.status if entry else None
+
+    async def enqueue(self, db: AsyncSession, task: QueuedIndexingTask) -> None:
+        async with self._lock:
+            self._entries[task.job_id] = _MemoryEntry(task=replace(task, attempts=0), available_at=self._clock())
+
+    async def claim(self, worker_id: str) -> Optional[QueuedIndexingTask]:
+        async with self._lock:
+            now = self._clock()
+            for entry in sorted(self._entries.values(), key=lambda e: e.available_at):
+                stale = (
+                    entry.status == QUEUE_STATUS_CLAIMED
+                    and now - entry.heartbeat_at > self.stale_after_seconds
+                )
+                if stale and entry.task.attempts >= self.max_attempts:
+                    entry.status, entry.locked_by = QUEUE_STATUS_DEAD, None
+                    continue
+                ready = entry.status == QUEUE_STATUS_PENDING and entry.available_at <= now
+                if (ready or stale) and entry.task.attempts < self.max_attempts:
+                    entry.task.attempts += 1
+                    entry.status, entry.locked_by, entry.heartbeat_at = QUEUE_STATUS_CLAIMED, worker_id, now
+                    return replace(entry.task)
+            return None
+
+    async def heartbeat(self, job_id: UUID, worker_id: str) -> bool:
+        async with self._lock:
+            entry = self._entries.get(job_id)
+            if entry is None or entry.status != QUEUE_STATUS_CLAIMED or entry.locked_by != worker_id:
+                return False
+            entry.heartbeat_at = self._clock()
+            return True
+
+    async def complete(self, job_id: UUID, worker_id: str) -> None:
+        async with self._lock:
+            entry = self._entries.get(job_id)
+            if entry is not None and entry.locked_by == worker_id:
+                entry.status, entry.locked_by = QUEUE_STATUS_DONE, None
+
+    async def release(self, job_id: UUID, worker_id: str, error: str) -> Optional[str]:
+        async with self._lock:
+            entry = self._entries.get(job_id)
+            if entry is None or entry.locked_by != worker_id:
+                return None
+            entry.locked_by, entry.last_error = None, error[:500]
+            if entry.task.attempts >= self.max_attempts:
+                entry.status = QUEUE_STATUS_DEAD
+            else:
+                entry.status = QUEUE_STATUS_PENDING
+                entry.available_at = self._clock() + self.retry_backoff_seconds
+            return entry.status
+
+    async def requeue(self, db: AsyncSession, job_id: UUID) -> Optional[QueuedIndexingTask]:
+        async with self._lock:
+            entry = self._entries.get(job_id)
+            if entry is None or entry.status not in (QUEUE_STATUS_DONE, QUEUE_STATUS_DEAD):
+                return None
+            entry.task.attempts = 0
+            entry.status, entry.locked_by, entry.last_error = QUEUE_STATUS_PENDING, None, None
+            entry.available_at = self._clock()
+            return replace(entry.task)
+
+
+_default_queue: Optional[RagJobQueue] = None
+
+
+def get_job_queue() -> RagJobQueue:
+    """Devuelve la cola por defecto (PostgresJobQueue, singleton de proceso)."""
+    global _default_queue
+    if _default_queue is None:
+        _default_queue = PostgresJobQueue()
+    return _default_queue
+
+
+__all__ = [
+    "QueuedIndexingTask",
+    "RagJobQueue",
+    "PostgresJobQueue",
+    "InMemoryJobQueue",
+    "get_job_queue",
+]
+
+# Fin del archivo backend/app/modules/rag/services/job_queue.py
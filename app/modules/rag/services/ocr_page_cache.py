@@ -0,0 +1,414 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/modules/rag/services/ocr_page_cache.py
+
+Caché OCR por página direccionada por contenido.
+
+Clave: blake2b(estrategia | api_version | digest de la página). El digest cubre
+lo que determina el resultado OCR de una página PDF: mediabox, rotación,
+content stream y bytes crudos de sus XObjects (imágenes escaneadas). Un PDF
+reeditado solo cambia el digest de las páginas tocadas, así que al reprocesarlo
+solo esas páginas se envían a Azure (como un PDF con ese subconjunto).
+
+Cada página cacheada es un JSON en el bucket de páginas
+(CacheEvictionSettings.pages_bucket, `{prefix}ocr/{kk}/{key}.json`) indexado en
+rag_ocr_page_cache con expires_at = now() + ttl_ocr_results; la limpieza por
+TTL la hace cleanup_ocr_page_cache (scheduler/jobs/cache_cleanup_job).
+
+Igual que la caché de embeddings es best-effort: cualquier error se registra y
+se trata como miss; el índice se toca en SAVEPOINTs.
+
+El PDF puede llegar como bytes o como archivo seekable (el spool de storage):
+digests y páginas a enviar se leen de él por bloques de páginas.
+
+Autor: DoxAI
+Fecha: 2025-12-15
+Actualizado: 2025-12-20 - Lectura desde archivo seekable y envío por índices de página
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.modules.rag.config import rag_config
+from app.modules.rag.repositories.ocr_page_cache_repository import (
+    OcrPageCacheRepository,
+    ocr_page_cache_repository,
+)
+from app.shared.config.settings_eviction import CacheEvictionSettings
+from app.shared.integrations.azure_document_intelligence import (
+    AzureDocumentIntelligenceClient,
+    AzureOcrResult,
+    DocumentSource,
+    _count_pdf_pages,
+    _extract_pdf_pages,
+    _pdf_reader,
+)
+from app.shared.utils.hashing import blake2b_hex
+
+logger = logging.getLogger(__name__)
+
+# Páginas digeridas por lector pypdf: cada lector cachea los objetos que
+# resuelve (imágenes incluidas), así que se renueva para acotar la memoria.
+DIGEST_PAGES_PER_READER = 16
+
+
+def _hash_resources(resources: Any, update, seen: set) -> None:
+    """Añade al hash los bytes crudos de los XObjects (imágenes y forms) de una página."""
+    if resources is None:
+        return
+    resources = resources.get_object()
+    xobjects = resources.get("/XObject")
+    if xobjects is None:
+        return
+    xobjects = xobjects.get_object()
+    for name in sorted(xobjects.keys()):
+        ref = xobjects.raw_get(name)
+        ident = getattr(ref, "idnum", None)
+        if ident is not None:
+            if ident in seen:
+                continue
+            seen.add(ident)
+        xobject = ref.get_object()
+        update(name.encode())
+        raw = getattr(xobject, "_data", None)
+        if raw is None and hasattr(xobject, "get_data"):
+            raw = xobject.get_data()
+        update(raw or b"")
+        _hash_resources(xobject.get("/Resources"), update, seen)
+
+
+def _page_digest(page: Any) -> str:
+    """Digest de una página: mediabox, rotación, content stream y XObjects."""
+    parts: List[bytes] = [
+        repr([float(v) for v in page.mediabox]).encode(),
+        str(page.rotation).encode(),
+    ]
+    contents = page.get_contents()
+    parts.append(contents.get_data() if contents is not None else b"")
+    _hash_resources(page.get("/Resources"), parts.append, set())
+    return blake2b_hex(b"\x00".join(parts))
+
+
+def pdf_page_digests(source: DocumentSource) -> List[str]:
+    """
+    Digest de contenido de cada página de un PDF (pypdf, CPU).
+
+    Args:
+        source: PDF como bytes o archivo binario seekable
+
+    Returns:
+        Lista alineada con las páginas (64 caracteres hex cada una)
+    """
+    total = _count_pdf_pages(source)
+    digests: List[str] = []
+    for start in range(0, total, DIGEST_PAGES_PER_READER):
+        reader = _pdf_reader(source)
+        for index in range(start, min(start + DIGEST_PAGES_PER_READER, total)):
+            digests.append(_page_digest(reader.pages[index]))
+    return digests
+
+
+def extract_pdf_pages(source: DocumentSource, indices: Sequence[int]) -> bytes:
+    """Construye un PDF con las páginas indicadas (índices desde 0, en ese orden)."""
+    return _extract_pdf_pages(source, indices)
+
+
+def ocr_page_key(page_digest: str, strategy: str, api_version: str) -> str:
+    """Clave de caché de una página para una estrategia y versión de API."""
+    return blake2b_hex(f"{strategy}|{api_version}|{page_digest}")
+
+
+class OcrPageCache:
+    """
+    Caché de páginas OCR: índice en BD (OcrPageCacheRepository) + JSON en storage.
+
+    Métricas en proceso (get_stats) con el formato de CacheBackend.get_stats.
+    """
+
+    def __init__(
+        self,
+        repository: Optional[OcrPageCacheRepository] = None,
+        *,
+        enabled: Optional[bool] = None,
+        bucket: Optional[str] = None,
+        prefix: Optional[str] = None,
+        ttl_seconds: Optional[int] = None,
+        max_concurrency: int = 16,
+    ):
+        self.repository = repository or ocr_page_cache_repository
+        self._enabled = enabled
+        self._bucket = bucket
+        self._prefix = prefix
+        self._ttl_seconds = ttl_seconds
+        self.max_concurrency = max(1, max_concurrency)
+        self._settings: Optional[CacheEvictionSettings] = None
+
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+        self._errors = 0
+
+    @property
+    def settings(self) -> CacheEvictionSettings:
+        if self._settings is None:
+            self._settings = CacheEvictionSettings()
+        return self._settings
+
+    @property
+    def enabled(self) -> bool:
+        return rag_config.ocr_page_cache_enabled if self._enabled is None else self._enabled
+
+    @property
+    def bucket(self) -> str:
+        return self._bucket or self.settings.pages_bucket
+
+    @property
+    def prefix(self) -> str:
+        return self.settings.pages_prefix if self._prefix is None else self._prefix
+
+    @property
+    def ttl_seconds(self) -> int:
+        return self._ttl_seconds or self.settings.ttl_ocr_results
+
+    def object_key(self, cache_key: str) -> str:
+        """Ruta del JSON de una página dentro del bucket."""
+        return f"{self.prefix}ocr/{cache_key[:2]}/{cache_key}.json"
+
+    async def lookup(
+        self,
+        db: AsyncSession,
+        storage_client,
+        cache_keys: Sequence[str],
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Busca páginas cacheadas (una consulta al índice + descargas concurrentes).
+
+        Returns:
+            Dict cache_key -> página cacheada; las ausentes son miss
+        """
+        if not self.enabled or not cache_keys:
+            return {}
+        try:
+            async with db.begin_nested():
+                object_keys = await self.repository.get_many(db, cache_keys)
+        except Exception as e:
+            self._errors += 1
+            logger.warning(f"[ocr_page_cache] lookup failed, treating as miss: {e}")
+            object_keys = {}
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _load(cache_key: str, object_key: str) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    chunks = [b async for b in storage_client.iter_bytes(self.bucket, object_key)]
+                    return json.loads(b"".join(chunks))
+                except Exception as e:
+                    self._errors += 1
+                    logger.warning(f"[ocr_page_cache] could not load {object_key}, treating as miss: {e}")
+                    return None
+
+        loaded = await asyncio.gather(*(_load(k, v) for k, v in object_keys.items()))
+        found = {k: page for k, page in zip(object_keys, loaded) if page is not None}
+
+        hits = sum(1 for k in cache_keys if k in found)
+        self._hits += hits
+        self._misses += len(cache_keys) - hits
+        return found
+
+    async def store(
+        self,
+        db: AsyncSession,
+        storage_client,
+        pages_by_key: Mapping[str, Dict[str, Any]],
+    ) -> None:
+        """Sube las páginas recién analizadas y las registra (sin commit; lo hace el llamador)."""
+        if not self.enabled or not pages_by_key:
+            return
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _upload(cache_key: str, page: Dict[str, Any]) -> Optional[str]:
+            async with semaphore:
+                object_key = self.object_key(cache_key)
+                try:
+                    await storage_client.upload_bytes(
+                        bucket=self.bucket,
+                        key=object_key,
+                        data=json.dumps(page, ensure_ascii=False).encode("utf-8"),
+                        mime_type="application/json",
+                    )
+                    return object_key
+                except Exception as e:
+                    self._errors += 1
+                    logger.warning(f"[ocr_page_cache] upload failed for {object_key}: {e}")
+                    return None
+
+        uploaded = await asyncio.gather(*(_upload(k, p) for k, p in pages_by_key.items()))
+        object_keys = {k: o for k, o in zip(pages_by_key, uploaded) if o is not None}
+        try:
+            async with db.begin_nested():
+                await self.repository.put_many(db, object_keys, ttl_seconds=self.ttl_seconds)
+            self._stores += len(object_keys)
+        except Exception as e:
+            self._errors += 1
+            logger.warning(f"[ocr_page_cache] store failed: {e}")
+
+    async def evict_expired(
+        self,
+        db: AsyncSession,
+        storage_client,
+        *,
+        limit: int,
+    ) -> int:
+        """
+        Elimina hasta `limit` páginas expiradas: índice primero, luego objetos
+        (best-effort; un objeto huérfano ya no es alcanzable por lookup).
+
+        Returns:
+            Número de entradas eliminadas del índice
+        """
+        object_keys = await self.repository.pop_expired(db, limit=limit)
+        for object_key in object_keys:
+            try:
+                await storage_client.delete_object(bucket=self.bucket, key=object_key)
+            except Exception as e:
+                self._errors += 1
+                logger.warning(f"[ocr_page_cache] could not delete {object_key}: {e}")
+        self._evictions += len(object_keys)
+        return len(object_keys)
+
+    def get_stats(self) -> dict:
+        """Estadísticas en proceso, con el mismo formato que CacheBackend.get_stats."""
+        total = self._hits + self._misses
+        return {
+            "name": "rag_ocr_pages",
+            "hits": self._hits,
+            "misses": self._misses,
+            "stores": self._stores,
+            "evictions": self._evictions,
+            "errors": self._errors,
+            "hit_rate_percent": round(self._hits / total * 100, 2) if total else 0.0,
+            "total_requests": total,
+        }
+
+
+# Instancia global
+ocr_page_cache = OcrPageCache()
+
+
+def _assemble(pages: List[Dict[str, Any]], model_used: str) -> AzureOcrResult:
+    """Une páginas (en orden) en un AzureOcrResult, con confianza ponderada por palabras."""
+    weighted = 0.0
+    total_words = 0
+    for page in pages:
+        words = page.get("words", 0)
+        if page.get("confidence") is not None and words:
+            weighted += page["confidence"] * words
+            total_words += words
+    return AzureOcrResult(
+        text="\n".join(page.get("text", "") for page in pages if page.get("text")),
+        pages=pages,
+        confidence=weighted / total_words if total_words else None,
+        lang=next((page["lang"] for page in pages if page.get("lang")), None),
+        model_used=model_used,
+    )
+
+
+async def analyze_pdf_with_page_cache(
+    db: AsyncSession,
+    *,
+    azure_client: AzureDocumentIntelligenceClient,
+    storage_client,
+    data: DocumentSource,
+    strategy: str,
+    pages: Optional[Sequence[int]] = None,
+    cache: Optional[OcrPageCache] = None,
+) -> AzureOcrResult:
+    """
+    Analiza un PDF enviando a Azure solo las páginas que no están en caché.
+
+    Las páginas nuevas se envían como un único PDF (el cliente lo divide en
+    rangos si es grande y extrae cada rango al enviarlo), se renumeran a su
+    posición original y se cachean. Si Azure no devuelve una página por página
+    enviada, se analiza el documento completo sin cachear.
+
+    Args:
+        data: PDF como bytes o archivo binario seekable (no se carga entero)
+        pages: Índices de página (desde 0) a analizar, p.ej. las páginas de
+            imagen de un PagePlan; None = todas
+    """
+    cache = cache or ocr_page_cache
+    model_used = azure_client._get_model_id(strategy)
+
+    if cache.enabled:
+        digests = await asyncio.to_thread(pdf_page_digests, data)
+        total = len(digests)
+    else:
+        digests = None
+        total = await asyncio.to_thread(_count_pdf_pages, data)
+    selected = list(range(total)) if pages is None else sorted({i for i in pages if 0 <= i < total})
+
+    keys: Dict[int, str] = {}
+    cached: Dict[str, Dict[str, Any]] = {}
+    if digests is not None:
+        keys = {i: ocr_page_key(digests[i], strategy, azure_client.api_version) for i in selected}
+        cached = await cache.lookup(db, storage_client, list(keys.values()))
+    missing = [i for i in selected if keys.get(i) not in cached]
+
+    logger.info(
+        "[ocr_page_cache] page plan",
+        extra={"pages": len(selected), "cached": len(selected) - len(missing), "to_ocr": len(missing)},
+    )
+
+    fresh: Dict[int, Dict[str, Any]] = {}
+    if missing:
+        result = await azure_client.analyze_document_bytes(
+            data,
+            content_type="application/pdf",
+            strategy=strategy,
+            page_indices=None if len(missing) == total else missing,
+        )
+        if len(result.pages) != len(missing):
+            logger.warning(
+                f"[ocr_page_cache] expected {len(missing)} pages, got {len(result.pages)}; "
+                "falling back to full analysis without cache"
+            )
+            if len(missing) != total:
+                result = await azure_client.analyze_document_bytes(
+                    data, content_type="application/pdf", strategy=strategy
+                )
+            if pages is None:
+                return result
+            wanted = set(selected)
+            return _assemble(
+                [p for p in result.pages if p.get("page_number", 0) - 1 in wanted], model_used
+            )
+        for index, page in zip(missing, result.pages):
+            fresh[index] = {**page, "lang": result.lang}
+        await cache.store(db, storage_client, {keys[i]: page for i, page in fresh.items() if i in keys})
+
+    assembled = []
+    for index in selected:
+        page = dict(fresh[index] if index in fresh else cached[keys[index]])
+        page["page_number"] = index + 1
+        assembled.append(page)
+    return _assemble(assembled, model_used)
+
+
+__all__ = [
+    "OcrPageCache",
+    "ocr_page_cache",
+    "ocr_page_key",
+    "pdf_page_digests",
+    "extract_pdf_pages",
+    "analyze_pdf_with_page_cache",
+]
+
+# Fin del archivo backend/app/modules/rag/services/ocr_page_cache.py
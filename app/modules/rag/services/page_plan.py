@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/modules/rag/services/page_plan.py
+
+Clasificador por página nativa vs escaneada para PDFs.
+
+Produce un plan de páginas (PagePlan): las páginas con capa de texto se
+quedan con la extracción nativa de la fase convert y solo las páginas
+"de imagen" (poco texto y mucha superficie cubierta por imágenes) pasan a
+OCR. merge_page_texts une ambos resultados en orden de página con la
+convención "\\f" del chunker.
+
+Señales por página:
+- densidad de la capa de texto (caracteres no blancos)
+- cobertura de imágenes (fracción del área de la página)
+
+Con PyMuPDF (fitz) la cobertura se calcula con las cajas reales de las
+imágenes (get_image_info); sin él se usa pypdf y la cobertura es 1.0 si la
+página dibuja alguna imagen. classify_pdf_pages es síncrona y de nivel de
+módulo para ejecutarse en el pool de extracción (plan_pdf_pages_async).
+
+Autor: DoxAI
+Fecha: 2025-12-16
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from app.modules.rag.config import rag_config
+from app.modules.rag.services.text_extractors import Source, _open_source, get_extraction_pool
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PagePlan:
+    """Plan de extracción de un PDF (índices de página desde 0)."""
+    total_pages: int
+    ocr_pages: List[int] = field(default_factory=list)
+
+    @property
+    def native_pages(self) -> List[int]:
+        ocr = set(self.ocr_pages)
+        return [i for i in range(self.total_pages) if i not in ocr]
+
+
+def is_image_page(
+    text_chars: int,
+    image_coverage: float,
+    *,
+    min_text_chars: int,
+    min_image_coverage: float,
+) -> bool:
+    """Una página va a OCR si casi no tiene texto y está cubierta por imágenes."""
+    return text_chars < min_text_chars and image_coverage >= min_image_coverage
+
+
+def _page_signals_fitz(source: Source) -> List[Tuple[int, float]]:
+    """(caracteres de texto, cobertura de imágenes) por página con PyMuPDF."""
+    import fitz  # PyMuPDF
+
+    if isinstance(source, (bytes, bytearray)):
+        doc = fitz.open(stream=source, filetype="pdf")
+    else:
+        doc = fitz.open(source)
+    try:
+        signals: List[Tuple[int, float]] = []
+        for page in doc:
+            text_chars = sum(1 for c in page.get_text("text") if not c.isspace())
+            area = abs(page.rect) or 1.0
+            covered = 0.0
+            for info in page.get_image_info():
+                box = fitz.Rect(info["bbox"]) & page.rect
+                covered += abs(box)
+            signals.append((text_chars, min(1.0, covered / area)))
+        return signals
+    finally:
+        doc.close()
+
+
+def _page_signals_pypdf(source: Source) -> List[Tuple[int, float]]:
+    """(caracteres de texto, cobertura aproximada) por página con pypdf."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(_open_source(source))
+    signals: List[Tuple[int, float]] = []
+    for page in reader.pages:
+        text = page.extract_text() or ""
+        text_chars = sum(1 for c in text if not c.isspace())
+        try:
+            has_images = len(page.images) > 0
+        except Exception:
+            has_images = False
+        signals.append((text_chars, 1.0 if has_images else 0.0))
+    return signals
+
+
+def classify_pdf_pages(
+    source: Source,
+    *,
+    min_text_chars: Optional[int] = None,
+    min_image_coverage: Optional[float] = None,
+) -> PagePlan:
+    """
+    Clasifica cada página de un PDF (bytes o ruta) como nativa u OCR.
+
+    Returns:
+        PagePlan con el número real de páginas y las que requieren OCR
+    """
+    if min_text_chars is None:
+        min_text_chars = rag_config.page_plan_min_text_chars
+    if min_image_coverage is None:
+        min_image_coverage = rag_config.page_plan_min_image_coverage
+
+    try:
+        signals = _page_signals_fitz(source)
+    except ImportError:
+        signals = _page_signals_pypdf(source)
+
+    ocr_pages = [
+        index
+        for index, (text_chars, coverage) in enumerate(signals)
+        if is_image_page(
+            text_chars,
+            coverage,
+            min_text_chars=min_text_chars,
+            min_image_coverage=min_image_coverage,
+        )
+    ]
+    return PagePlan(total_pages=len(signals), ocr_pages=ocr_pages)
+
+
+async def plan_pdf_pages_async(path: str) -> PagePlan:
+    """classify_pdf_pages en el pool de extracción (solo viaja la ruta)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_extraction_pool(), classify_pdf_pages, path)
+
+
+def merge_page_texts(native_text: str, ocr_texts: Mapping[int, str]) -> str:
+    """
+    Sustituye en el texto nativo ("\\f" entre páginas) las páginas OCR.
+
+    Args:
+        native_text: Salida de la fase convert para el PDF
+        ocr_texts: Dict índice de página (desde 0) -> texto OCR
+
+    Returns:
+        Texto completo en orden de página, separado por "\\f"
+    """
+    pages = native_text.split("\f") if native_text else []
+    last = max(ocr_texts, default=-1)
+    if last >= len(pages):
+        pages.extend([""] * (last + 1 - len(pages)))
+    for index, text in ocr_texts.items():
+        pages[index] = (text or "").strip()
+    return "\f".join(pages)
+
+
+__all__ = [
+    "PagePlan",
+    "classify_pdf_pages",
+    "plan_pdf_pages_async",
+    "merge_page_texts",
+    "is_image_page",
+]
+
+# Fin del archivo backend/app/modules/rag/services/page_plan.py
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/modules/rag/services/phase_limiter.py
+
+Límites de concurrencia por fase del pipeline RAG.
+
+Varios documentos en vuelo comparten un PhaseLimiter: cada uno solo ocupa
+el cupo de la fase que está ejecutando, así que mientras A embebe, B puede
+chunkear y C convertir. Con N documentos el tiempo total tiende al de la
+fase más lenta en lugar de la suma de todas.
+
+Cupos por defecto (rag_config):
+- convert: CPU (pool de procesos de extracción)
+- ocr / embed: red (Azure / OpenAI)
+- chunk: CPU ligero + escritura en DB
+- integrate: DB
+
+Autor: DoxAI
+Fecha: 2025-12-12
+"""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Mapping, Optional
+
+from app.modules.rag.config import rag_config
+from app.modules.rag.enums import RagPhase
+
+
+def default_phase_limits() -> Dict[RagPhase, int]:
+    """Cupos por fase según rag_config."""
+    return {
+        RagPhase.convert: rag_config.phase_concurrency_convert,
+        RagPhase.ocr: rag_config.phase_concurrency_ocr,
+        RagPhase.chunk: rag_config.phase_concurrency_chunk,
+        RagPhase.embed: rag_config.phase_concurrency_embed,
+        RagPhase.integrate: rag_config.phase_concurrency_integrate,
+    }
+
+
+class PhaseLimiter:
+    """
+    Semáforo independiente por fase.
+
+    Las fases sin límite configurado no se acotan. Crear una instancia por
+    event loop (p.ej. una por proceso worker) y compartirla entre jobs.
+    """
+
+    def __init__(self, limits: Optional[Mapping[RagPhase, int]] = None):
+        limits = default_phase_limits() if limits is None else limits
+        self.limits: Dict[RagPhase, int] = {
+            phase: max(1, int(limit)) for phase, limit in limits.items()
+        }
+        self._semaphores: Dict[RagPhase, asyncio.Semaphore] = {
+            phase: asyncio.Semaphore(limit) for phase, limit in self.limits.items()
+        }
+        self._active: Dict[RagPhase, int] = {phase: 0 for phase in self.limits}
+        self._waiting: Dict[RagPhase, int] = {phase: 0 for phase in self.limits}
+
+    @asynccontextmanager
+    async def slot(self, phase: RagPhase) -> AsyncIterator[None]:
+        """Ocupa un cupo de `phase` durante el bloque."""
+        semaphore = self._semaphores.get(phase)
+        if semaphore is None:
+            yield
+            return
+
+        self._waiting[phase] += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self._waiting[phase] -= 1
+        self._active[phase] += 1
+        try:
+            yield
+        finally:
+            self._active[phase] -= 1
+            semaphore.release()
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Ocupación actual por fase (activos, en espera, límite)."""
+        return {
+            phase.value: {
+                "active": self._active[phase],
+                "waiting": self._waiting[phase],
+                "limit": limit,
+            }
+            for phase, limit in self.limits.items()
+        }
+
+
+__all__ = [
+    "PhaseLimiter",
+    "default_phase_limits",
+]
+
+# Fin del archivo backend/app/modules/rag/services/phase_limiter.py
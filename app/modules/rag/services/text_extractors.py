@@ -5,13 +5,246 @@ backend/app/modules/rag/services/text_extractors.py
 Extractores de texto nativo (sin OCR) para diversos formatos.
 Convierte documentos binarios a texto usando su estructura nativa.
 
+Las funciones extract_* son síncronas, puras y de nivel de módulo para
+poder ejecutarse en un pool de procesos acotado (extract_text_file_async):
+el parseo de PDF/DOCX/XLSX es CPU-bound y no debe bloquear el event loop.
+Aceptan bytes o la ruta de un archivo local; el pool trabaja con rutas
+(origen y destino en disco) para no copiar documentos grandes entre procesos.
+
+Salida: texto con "\\f" entre páginas (PDF) u hojas (XLSX) y línea en
+blanco entre párrafos, la convención que consume el chunker.
+
 Autor: DoxAI
 Fecha: 2025-10-28
+Actualizado: 2025-12-08 - Extracción PDF/DOCX/XLSX en pool de procesos
+Actualizado: 2025-12-09 - Extracción archivo→archivo (I/O en streaming)
 """
 
+import asyncio
+import hashlib
+import io
+import logging
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Tuple, Union
 from uuid import UUID
+from xml.etree import ElementTree
+
+from app.modules.rag.config import rag_config
+
+logger = logging.getLogger(__name__)
+
+PDF_MIME = "application/pdf"
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+TEXT_MIMES = frozenset({"text/plain", "text/markdown", "text/html"})
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_S = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+# bytes en memoria o ruta de un archivo local
+Source = Union[bytes, str]
+
+
+def _open_source(source: Source):
+    """Devuelve algo legible por pypdf/zipfile: BytesIO para bytes, la ruta tal cual."""
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+
+def extract_plain_text(source: Source) -> str:
+    """Decodifica texto plano (UTF-8 con fallback latin-1)."""
+    data = source
+    if not isinstance(data, (bytes, bytearray)):
+        with open(data, "rb") as f:
+            data = f.read()
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode("latin-1", errors="replace")
+
+
+def extract_pdf_text(source: Source) -> str:
+    """
+    Extrae el texto nativo de un PDF con pypdf, una página por bloque.
+
+    Páginas escaneadas (sin capa de texto) quedan vacías; son
+    responsabilidad de la fase OCR.
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(_open_source(source))
+    return "\f".join((page.extract_text() or "").strip() for page in reader.pages)
+
+
+def _docx_paragraph_text(paragraph) -> str:
+    parts: List[str] = []
+    for node in paragraph.iter():
+        if node.tag == f"{_W}t" and node.text:
+            parts.append(node.text)
+        elif node.tag == f"{_W}tab":
+            parts.append("\t")
+        elif node.tag in (f"{_W}br", f"{_W}cr"):
+            parts.append("\f" if node.get(f"{_W}type") == "page" else "\n")
+    return "".join(parts).strip(" ")
+
+
+def extract_docx_text(source: Source) -> str:
+    """
+    Extrae párrafos y tablas de un DOCX leyendo word/document.xml.
+
+    Misma salida que word_converter.extract_text_with_docx (celdas de tabla
+    unidas con " | "), pero sin depender de python-docx y en orden de
+    documento.
+    """
+    with zipfile.ZipFile(_open_source(source)) as zf:
+        root = ElementTree.fromstring(zf.read("word/document.xml"))
+
+    body = root.find(f"{_W}body")
+    blocks: List[str] = []
+    for element in (body if body is not None else []):
+        if element.tag == f"{_W}p":
+            text = _docx_paragraph_text(element)
+            if text.strip():
+                blocks.append(text)
+        elif element.tag == f"{_W}tbl":
+            for row in element.iter(f"{_W}tr"):
+                cells = [
+                    " ".join(_docx_paragraph_text(p) for p in cell.iter(f"{_W}p")).strip()
+                    for cell in row.iter(f"{_W}tc")
+                ]
+                cells = [c for c in cells if c]
+                if cells:
+                    blocks.append(" | ".join(cells))
+    return "\n\n".join(blocks)
+
+
+def _xlsx_cell_value(cell, shared_strings: List[str]) -> str:
+    cell_type = cell.get("t")
+    if cell_type == "inlineStr":
+        return "".join(t.text or "" for t in cell.iter(f"{_S}t"))
+    value = cell.find(f"{_S}v")
+    if value is None or value.text is None:
+        return ""
+    if cell_type == "s":
+        return shared_strings[int(value.text)]
+    return value.text
+
+
+def extract_xlsx_text(source: Source) -> str:
+    """
+    Extrae el contenido de un XLSX: una hoja por página, filas con celdas
+    unidas por " | " y el nombre de la hoja como encabezado.
+    """
+    with zipfile.ZipFile(_open_source(source)) as zf:
+        names = set(zf.namelist())
+        shared_strings: List[str] = []
+        if "xl/sharedStrings.xml" in names:
+            sst = ElementTree.fromstring(zf.read("xl/sharedStrings.xml"))
+            shared_strings = [
+                "".join(t.text or "" for t in si.iter(f"{_S}t"))
+                for si in sst.iter(f"{_S}si")
+            ]
+
+        workbook = ElementTree.fromstring(zf.read("xl/workbook.xml"))
+        rels = ElementTree.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+        targets = {rel.get("Id"): rel.get("Target") for rel in rels.iter(f"{_PKG_REL}Relationship")}
+
+        pages: List[str] = []
+        for sheet in workbook.iter(f"{_S}sheet"):
+            target = targets.get(sheet.get(f"{_R}id"), "")
+            path = target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+            if path not in names:
+                continue
+            rows = [sheet.get("name", "")]
+            for row in ElementTree.fromstring(zf.read(path)).iter(f"{_S}row"):
+                cells = [_xlsx_cell_value(c, shared_strings).strip() for c in row.iter(f"{_S}c")]
+                cells = [c for c in cells if c]
+                if cells:
+                    rows.append(" | ".join(cells))
+            pages.append("\n".join(rows))
+    return "\f".join(pages)
+
+
+_EXTRACTORS: Dict[str, Callable[[Source], str]] = {
+    PDF_MIME: extract_pdf_text,
+    DOCX_MIME: extract_docx_text,
+    XLSX_MIME: extract_xlsx_text,
+    **{mime: extract_plain_text for mime in TEXT_MIMES},
+}
+
+
+def extract_native_text(mime_type: str, source: Source) -> str:
+    """
+    Extrae texto nativo según mime_type (síncrono; apto para el pool).
+
+    Raises:
+        ValueError: Si el mime_type no es soportado
+    """
+    extractor = _EXTRACTORS.get(mime_type)
+    if extractor is None:
+        raise ValueError(f"Mime type no soportado para extracción: {mime_type}")
+    return extractor(source)
+
+
+def extract_text_file(mime_type: str, src_path: str, dst_path: str) -> Tuple[int, str]:
+    """
+    Extrae el texto de src_path y lo escribe en UTF-8 en dst_path.
+
+    Returns:
+        Tupla (byte_size, checksum SHA-256) del texto escrito
+    """
+    encoded = extract_native_text(mime_type, src_path).encode("utf-8")
+    with open(dst_path, "wb") as f:
+        f.write(encoded)
+    return len(encoded), hashlib.sha256(encoded).hexdigest()
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    """Pool de procesos compartido para extracción (creado de forma perezosa)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = max(1, rag_config.convert_max_workers)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            logger.info(f"[text_extractors] Pool de extracción iniciado ({workers} procesos)")
+        return _pool
+
+
+def shutdown_extraction_pool(wait: bool = True) -> None:
+    """Detiene el pool de extracción (shutdown del lifespan)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+        logger.info("✅ Pool de extracción de texto detenido")
+
+
+async def extract_text_file_async(mime_type: str, src_path: str, dst_path: str) -> Tuple[int, str]:
+    """
+    Versión async de extract_text_file: se ejecuta en el pool de procesos
+    acotado por rag_config.convert_max_workers, sin bloquear el event loop.
+
+    Solo viajan rutas entre procesos; el documento nunca se carga en el
+    proceso de la API.
+
+    Raises:
+        ValueError: Si el mime_type no es soportado
+    """
+    if mime_type not in _EXTRACTORS:
+        raise ValueError(f"Mime type no soportado para extracción: {mime_type}")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_extraction_pool(), extract_text_file, mime_type, src_path, dst_path
+    )
 
 
 @dataclass
@@ -27,8 +260,8 @@ class TextExtractorService:
     Servicio para extraer texto nativo de documentos.
     
     Formatos soportados:
-        - PDF: PyPDF2/pdfplumber para texto nativo
-        - DOCX: python-docx
+        - PDF: pypdf para texto nativo
+        - DOCX/XLSX: lectura directa del paquete OOXML
         - TXT: lectura directa
         - HTML/XML: BeautifulSoup
     """
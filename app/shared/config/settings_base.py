@@ -96,6 +96,11 @@ class BaseAppSettings(BaseSettings):
     supabase_url: Optional[HttpUrl] = Field(default=None, validation_alias="SUPABASE_URL")
     supabase_service_role_key: Optional[str] = Field(default=None, validation_alias="SUPABASE_SERVICE_ROLE_KEY")
     supabase_bucket_name: str = Field(default="users-files", validation_alias="SUPABASE_BUCKET_NAME")
+    # Subidas reanudables (TUS): objetos de al menos este tamaño van por partes
+    supabase_resumable_threshold_mb: int = Field(default=20, validation_alias="SUPABASE_RESUMABLE_THRESHOLD_MB")
+    # Supabase exige partes de 6 MB (salvo la última)
+    supabase_resumable_chunk_size_mb: int = Field(default=6, validation_alias="SUPABASE_RESUMABLE_CHUNK_SIZE_MB")
+    supabase_resumable_max_retries: int = Field(default=3, validation_alias="SUPABASE_RESUMABLE_MAX_RETRIES")
 
     # =========================
     # CORS / Frontend
@@ -217,6 +222,9 @@ class BaseAppSettings(BaseSettings):
     warmup_http_health_timeout_sec: float = Field(default=5.0, validation_alias="WARMUP_HTTP_HEALTH_TIMEOUT_SEC")
     warmup_timeout_sec: int = Field(default=30, validation_alias="WARMUP_TIMEOUT_SEC")
     warmup_silence_pdfminer: bool = Field(default=True, validation_alias="WARMUP_SILENCE_PDFMINER")
+    warmup_pdf_worker_pool: bool = Field(default=False, validation_alias="WARMUP_PDF_WORKER_POOL")
+    pdf_worker_pool_size: int = Field(default=2, validation_alias="PDF_WORKER_POOL_SIZE")
+    pdf_worker_pool_max_tasks_per_child: int = Field(default=50, validation_alias="PDF_WORKER_POOL_MAX_TASKS_PER_CHILD")
 
     # =========================
     # Cliente HTTP global
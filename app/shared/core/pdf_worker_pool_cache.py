@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+backend/app/shared/core/pdf_worker_pool_cache.py
+
+Pool de procesos persistente y precalentado para el procesamiento de
+páginas PDF.
+
+Cada proceso hijo ejecuta _init_pdf_worker al arrancar: silencia pdfminer y
+carga los singletons de model_singletons_cache (Fast Parser y, opcionalmente,
+Table Agent), de modo que los lotes ya no pagan arranque de intérprete,
+imports de Unstructured/OpenCV ni carga de modelos. max_tasks_per_child
+recicla los procesos para acotar fugas de memoria de las librerías nativas.
+
+Autor: DoxAI
+Fecha: 2025-12-18
+"""
+
+from __future__ import annotations
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait as wait_futures
+from multiprocessing import resource_tracker
+from typing import Optional
+
+from .model_singletons_cache import get_fast_parser, get_table_agent, quiet_pdf_parsers
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_TASKS_PER_CHILD = 50
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+
+def _init_pdf_worker(load_table_model: bool) -> None:
+    """Initializer de cada proceso: carga modelos una vez por proceso."""
+    quiet_pdf_parsers()
+    try:
+        get_fast_parser()
+        if load_table_model:
+            get_table_agent()
+    except Exception as e:
+        # El worker sigue siendo útil: los modelos se cargarán on-demand
+        logger.warning(f"⚠️ Warm-up de worker PDF incompleto (pid={os.getpid()}): {e}")
+
+
+def _ping_worker(delay_sec: float) -> int:
+    """Tarea vacía para forzar el arranque de cada proceso del pool."""
+    time.sleep(delay_sec)
+    return os.getpid()
+
+
+def _pool_settings() -> tuple[int, int, bool]:
+    """(tamaño, max_tasks_per_child, cargar Table Agent) desde settings."""
+    try:
+        from app.shared.config import settings
+        return (
+            getattr(settings, "pdf_worker_pool_size", DEFAULT_POOL_SIZE),
+            getattr(settings, "pdf_worker_pool_max_tasks_per_child", DEFAULT_MAX_TASKS_PER_CHILD),
+            getattr(settings, "warmup_preload_table_model", False),
+        )
+    except Exception:
+        return DEFAULT_POOL_SIZE, DEFAULT_MAX_TASKS_PER_CHILD, False
+
+
+def get_pdf_worker_pool() -> ProcessPoolExecutor:
+    """Pool compartido de procesos para páginas PDF (creado una sola vez)."""
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None:
+            size, max_tasks, load_table_model = _pool_settings()
+            _pool_size = max(1, int(size))
+            # Los hijos heredan el resource tracker del padre: la memoria
+            # compartida de páginas (PageImageRing) que adjuntan queda
+            # registrada una sola vez y solo el dueño la libera
+            resource_tracker.ensure_running()
+            _pool = ProcessPoolExecutor(
+                max_workers=_pool_size,
+                max_tasks_per_child=max(1, int(max_tasks)),
+                initializer=_init_pdf_worker,
+                initargs=(bool(load_table_model),),
+            )
+            logger.info(
+                f"⚙️ Pool de workers PDF iniciado ({_pool_size} procesos, "
+                f"max_tasks_per_child={max_tasks})"
+            )
+        return _pool
+
+
+def warm_pdf_worker_pool(timeout_sec: float) -> int:
+    """
+    Arranca todos los procesos del pool y espera a que terminen su initializer.
+
+    Returns:
+        Número de procesos distintos que respondieron dentro del timeout
+    """
+    pool = get_pdf_worker_pool()
+    # El retardo evita que un solo proceso ya caliente atienda todos los pings
+    futures = [pool.submit(_ping_worker, 0.05) for _ in range(_pool_size)]
+    done, _ = wait_futures(futures, timeout=timeout_sec)
+    pids = {f.result() for f in done if f.exception() is None}
+    return len(pids)
+
+
+def shutdown_pdf_worker_pool(wait: bool = True) -> None:
+    """Detiene el pool de workers PDF (shutdown del lifespan)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+        logger.info("✅ Pool de workers PDF detenido")
+
+
+# Fin del archivo backend/app/shared/core/pdf_worker_pool_cache.py
@@ -10,6 +10,7 @@ Fecha: 05/09/2025
 Actualizado:
 - 07/09/2025: Cierre blindado con shield + timeout
 - 2025-10-24: Extraído de resource_cache.py para mejor modularidad
+- 2025-12-18: Detiene el pool persistente de workers PDF
 """
 
 from __future__ import annotations
@@ -18,6 +19,7 @@ import logging
 
 from .warmup_status_cache import WarmupStatus
 from .resources_cache import resources
+from .pdf_worker_pool_cache import shutdown_pdf_worker_pool
 
 logger = logging.getLogger(__name__)
 
@@ -54,6 +56,12 @@ async def shutdown_all() -> None:
             resources.http_client = None
             logger.info("✅ Cliente HTTP cerrado")
 
+    # Pool de workers PDF (procesos hijo)
+    try:
+        shutdown_pdf_worker_pool(wait=False)
+    except Exception as e:
+        logger.warning(f"⚠️ Error deteniendo pool de workers PDF: {e}")
+
     # Reset de warmup
     resources.warmup_completed = False
     resources.warmup_status = WarmupStatus()
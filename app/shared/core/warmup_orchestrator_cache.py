@@ -9,9 +9,11 @@ Autor: Ixchel Beristain
 Fecha: 05/09/2025
 Actualizado:
 - 2025-10-24: Extraído de resource_cache.py para mejor modularidad
+- 2025-12-18: Precarga opcional del pool de workers PDF
 """
 
 from __future__ import annotations
+import asyncio
 import time
 import logging
 
@@ -26,6 +28,7 @@ from .warmup_preload_cache import (
     preload_unstructured_fast,
     preload_unstructured_hires,
     preload_table_model,
+    preload_pdf_worker_pool,
 )
 from .http_client_cache import create_http_client
 from .model_singletons_cache import quiet_pdf_parsers, get_warmup_asset_path
@@ -151,6 +154,14 @@ async def run_warmup_once() -> WarmupStatus:
                 # Precarga tabla deshabilitada: marcar como OK (no requerido)
                 status.table_model_ok = True
 
+            # 5b. Pool persistente de workers PDF (opcional; no bloquea is_ready)
+            if getattr(settings, "warmup_pdf_worker_pool", False):
+                status.pdf_worker_pool_ok = await asyncio.to_thread(
+                    preload_pdf_worker_pool, settings.warmup_timeout_sec
+                )
+                if not status.pdf_worker_pool_ok:
+                    status.warnings.append("Pool de workers PDF no precalentado")
+
             # 6. Crear cliente HTTP
             # REQUISITO: httpx>=0.26.0 para AsyncHTTPTransport(retries=N)
             # Ver: backend/app/shared/core/DEPLOYMENT.md sección "Dependencias"
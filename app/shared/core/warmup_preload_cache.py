@@ -9,6 +9,7 @@ Autor: Ixchel Beristain
 Fecha: 05/09/2025
 Actualizado:
 - 2025-10-24: Extraído de resource_cache.py para mejor modularidad
+- 2025-12-18: Precarga del pool persistente de workers PDF
 """
 
 from __future__ import annotations
@@ -17,6 +18,7 @@ from concurrent.futures import ThreadPoolExecutor, TimeoutError
 import logging
 
 from .model_singletons_cache import get_fast_parser, get_table_agent, quiet_pdf_parsers
+from .pdf_worker_pool_cache import warm_pdf_worker_pool
 
 logger = logging.getLogger(__name__)
 
@@ -104,4 +106,23 @@ def preload_table_model(timeout_sec: int) -> bool:
         return False
 
 
+def preload_pdf_worker_pool(timeout_sec: int) -> bool:
+    """Arranca el pool persistente de workers PDF con sus modelos cargados."""
+    try:
+        logger.info("⚙️ Precalentando pool de workers PDF...")
+
+        warmed = warm_pdf_worker_pool(timeout_sec)
+
+        if warmed:
+            logger.info(f"✅ Pool de workers PDF listo ({warmed} procesos calientes)")
+            return True
+        else:
+            logger.warning(f"⚠️ Ningún worker PDF respondió en {timeout_sec}s")
+            return False
+
+    except Exception as e:
+        logger.warning(f"⚠️ Error precalentando pool de workers PDF: {e}")
+        return False
+
+
 # Fin del archivo backend/app/shared/core/warmup_preload_cache.py
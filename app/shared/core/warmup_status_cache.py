@@ -9,6 +9,7 @@ Autor: Ixchel Beristain
 Fecha: 05/09/2025
 Actualizado:
 - 2025-10-24: Extraído de resource_cache.py para mejor modularidad
+- 2025-12-18: pdf_worker_pool_ok
 """
 
 from __future__ import annotations
@@ -27,6 +28,7 @@ class WarmupStatus:
     table_model_ok: bool = False
     http_client_ok: bool = False
     http_health_ok: bool = False
+    pdf_worker_pool_ok: bool = True  # opcional; False solo si la precarga falla
     tesseract_ok: bool = True  # assume true; detect and set false if missing
     ghostscript_ok: bool = False
     ghostscript_path: Optional[str] = None
@@ -6,7 +6,12 @@ Clientes de integración con servicios externos.
 """
 
 from .azure_document_intelligence import AzureDocumentIntelligenceClient, AzureOcrResult
-from .openai_embeddings_client import generate_embeddings
+from .openai_embeddings_client import (
+    generate_embeddings,
+    OpenAIEmbeddingsClient,
+    get_openai_embeddings_client,
+    close_openai_embeddings_client,
+)
 from .azure_types import (
     AzureAnalysisStatus,
     AzureModelId,
@@ -36,6 +41,9 @@ __all__ = [
     "AzureConfig",
     # OpenAI
     "generate_embeddings",
+    "OpenAIEmbeddingsClient",
+    "get_openai_embeddings_client",
+    "close_openai_embeddings_client",
     # Email
     "IEmailSender",
     "EmailSender",
@@ -5,14 +5,27 @@ backend/app/shared/integrations/azure_document_intelligence.py
 Cliente para Azure Document Intelligence (Cognitive Services OCR).
 Soporta análisis de documentos con extracción de texto, tablas y layout.
 
+- Sesión aiohttp de larga vida (pool keep-alive) por cliente, como el cliente
+  de embeddings OpenAI; se libera con aclose().
+- Polling adaptativo: respeta Retry-After de la operación y, si no viene,
+  espera con backoff creciente (polling_interval_sec → polling_max_interval_sec).
+- analyze_document_bytes: PDFs grandes se dividen en rangos de páginas que se
+  envían en paralelo (max_parallel_requests) y se unen en orden. Acepta bytes
+  o un archivo seekable: el documento completo se sube por bloques y cada rango
+  se extrae al enviarse, sin cargar el archivo entero en memoria.
+
 Autor: DoxAI
 Fecha: 2025-11-28
+Actualizado: 2025-12-14 - Pool keep-alive, polling adaptativo y envío por rangos de páginas
+Actualizado: 2025-12-19 - Offsets de spans en code points y cierre de la sesión al cambiar de loop
+Actualizado: 2025-12-20 - Origen en archivo seekable y envío de un subconjunto de páginas
 """
 
 import asyncio
+import io
 import logging
 from dataclasses import dataclass
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple, BinaryIO, AsyncIterator, Sequence, Union
 import aiohttp
 
 from .azure_types import (
@@ -20,9 +33,20 @@ from .azure_types import (
     AzureModelId,
     AzureDocumentResult,
 )
+from .openai_embeddings_client import RETRYABLE_STATUS, _parse_retry_after
 
 logger = logging.getLogger(__name__)
 
+# Los spans de la respuesta se cortan sobre un str de Python (_page_text):
+# se piden en code points, no en UTF-16 (el valor por defecto de la API).
+STRING_INDEX_TYPE = "unicodeCodePoint"
+
+# Bloque de lectura al subir un documento desde archivo
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+# Documento a analizar: bytes o archivo binario seekable (p.ej. SpooledTemporaryFile)
+DocumentSource = Union[bytes, BinaryIO]
+
 
 @dataclass
 class AzureOcrResult:
@@ -34,6 +58,80 @@ class AzureOcrResult:
     model_used: str = "prebuilt-read"
 
 
+def _page_text(content: str, page: Dict[str, Any]) -> str:
+    """Texto de una página: sus spans sobre `content` (o sus líneas si no hay spans)."""
+    spans = page.get("spans") or []
+    if spans:
+        return "".join(content[s["offset"]:s["offset"] + s["length"]] for s in spans)
+    return "\n".join(line.get("content", "") for line in page.get("lines", []))
+
+
+def _average_confidence(words: List[Dict[str, Any]]) -> Optional[float]:
+    """Confianza media de las palabras que la informan (None si ninguna)."""
+    confidences = [w["confidence"] for w in words if "confidence" in w]
+    return sum(confidences) / len(confidences) if confidences else None
+
+
+def page_ranges(page_count: int, pages_per_request: int) -> List[Tuple[int, int]]:
+    """Divide 1..page_count en rangos consecutivos (inicio, fin) inclusivos."""
+    step = max(1, pages_per_request)
+    return [
+        (first, min(first + step - 1, page_count))
+        for first in range(1, page_count + 1, step)
+    ]
+
+
+def _pdf_reader(source: DocumentSource):
+    """
+    PdfReader sobre bytes o sobre un archivo seekable.
+
+    Con un archivo, pypdf lee los objetos bajo demanda (seek/read) en lugar de
+    cargar el documento; pero cachea cada objeto resuelto, así que un lector
+    no debe recorrer todas las páginas de un PDF grande.
+    """
+    from pypdf import PdfReader
+
+    if isinstance(source, (bytes, bytearray)):
+        return PdfReader(io.BytesIO(source))
+    source.seek(0)
+    return PdfReader(source)
+
+
+def _source_size(source: DocumentSource) -> int:
+    """Tamaño en bytes del documento (bytes o archivo seekable)."""
+    if isinstance(source, (bytes, bytearray)):
+        return len(source)
+    return source.seek(0, io.SEEK_END)
+
+
+def _count_pdf_pages(source: DocumentSource) -> int:
+    """Número de páginas de un PDF (pypdf)."""
+    return len(_pdf_reader(source).pages)
+
+
+def _extract_pdf_pages(source: DocumentSource, indices: Sequence[int]) -> bytes:
+    """PDF independiente con las páginas indicadas (índices desde 0, en ese orden; pypdf, CPU)."""
+    from pypdf import PdfWriter
+
+    reader = _pdf_reader(source)
+    writer = PdfWriter()
+    for index in indices:
+        writer.add_page(reader.pages[index])
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+async def _iter_upload(fileobj: BinaryIO) -> AsyncIterator[bytes]:
+    """Lee un archivo desde el inicio en bloques de UPLOAD_CHUNK_BYTES (cuerpo del POST)."""
+    fileobj.seek(0)
+    while True:
+        block = fileobj.read(UPLOAD_CHUNK_BYTES)
+        if not block:
+            return
+        yield block
+
+
 class AzureDocumentIntelligenceClient:
     """
     Cliente async para Azure Document Intelligence API.
@@ -41,6 +139,8 @@ class AzureDocumentIntelligenceClient:
     Uso:
         client = AzureDocumentIntelligenceClient(endpoint, api_key)
         result = await client.analyze_document(file_uri, strategy="balanced")
+        result = await client.analyze_document_bytes(pdf_bytes, strategy="balanced")
+        await client.aclose()
     """
     
     def __init__(
@@ -51,7 +151,14 @@ class AzureDocumentIntelligenceClient:
         api_version: str = "2024-07-31-preview",
         timeout_sec: int = 300,
         max_retries: int = 3,
-        polling_interval_sec: int = 2,
+        polling_interval_sec: float = 1.0,
+        polling_max_interval_sec: float = 10.0,
+        polling_backoff: float = 1.5,
+        pool_limit: int = 16,
+        keepalive_timeout: float = 60.0,
+        max_parallel_requests: int = 4,
+        pages_per_request: int = 50,
+        split_min_pages: int = 100,
     ):
         """
         Inicializa el cliente de Azure Document Intelligence.
@@ -62,7 +169,15 @@ class AzureDocumentIntelligenceClient:
             api_version: Versión de la API (default: 2024-07-31-preview)
             timeout_sec: Timeout total para el análisis (default: 300s)
             max_retries: Reintentos en caso de error transitorio (default: 3)
-            polling_interval_sec: Intervalo de polling para resultados (default: 2s)
+            polling_interval_sec: Primer intervalo de polling si Azure no envía
+                Retry-After (default: 1s)
+            polling_max_interval_sec: Intervalo máximo de polling (default: 10s)
+            polling_backoff: Factor de crecimiento del intervalo (default: 1.5)
+            pool_limit: Conexiones máximas del pool HTTP
+            keepalive_timeout: Segundos que una conexión ociosa se mantiene abierta
+            max_parallel_requests: Rangos de páginas analizándose a la vez
+            pages_per_request: Páginas por rango al dividir un PDF
+            split_min_pages: PDFs con al menos estas páginas se dividen
         """
         self.endpoint = endpoint.rstrip("/")
         self.api_key = api_key
@@ -70,11 +185,50 @@ class AzureDocumentIntelligenceClient:
         self.timeout_sec = timeout_sec
         self.max_retries = max_retries
         self.polling_interval_sec = polling_interval_sec
+        self.polling_max_interval_sec = polling_max_interval_sec
+        self.polling_backoff = polling_backoff
+        self.pool_limit = pool_limit
+        self.keepalive_timeout = keepalive_timeout
+        self.max_parallel_requests = max(1, max_parallel_requests)
+        self.pages_per_request = max(1, pages_per_request)
+        self.split_min_pages = split_min_pages
         
         self.headers = {
             "Ocp-Apim-Subscription-Key": self.api_key,
             "Content-Type": "application/json",
         }
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Devuelve la sesión compartida, creándola si no existe para el loop actual."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            # La sesión de otro loop se cierra antes de sustituirla (no deja su pool abierto)
+            await self._close_session()
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_limit,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._loop = loop
+            logger.debug(f"Azure OCR: nueva sesión HTTP (pool_limit={self.pool_limit})")
+        return self._session
+    
+    async def _close_session(self) -> None:
+        """Cierra la sesión actual (si la hay) y olvida el loop al que estaba ligada."""
+        session, self._session, self._loop = self._session, None, None
+        if session is None or session.closed:
+            return
+        try:
+            await session.close()
+        except RuntimeError as e:
+            # Transportes de un loop que ya no puede programar callbacks
+            logger.debug(f"Azure OCR: cierre parcial de la sesión anterior ({e})")
+    
+    async def aclose(self) -> None:
+        """Cierra la sesión y libera el pool de conexiones."""
+        await self._close_session()
     
     async def analyze_document(
         self,
@@ -108,13 +262,14 @@ class AzureDocumentIntelligenceClient:
             f"model={model_id}, locale={locale}"
         )
         
+        payload: Dict[str, Any] = {"urlSource": file_uri}
+        if locale:
+            payload["locale"] = locale
+        if pages:
+            payload["pages"] = pages
+        
         # 1. Iniciar análisis
-        operation_location = await self._start_analysis(
-            file_uri=file_uri,
-            model_id=model_id,
-            locale=locale,
-            pages=pages,
-        )
+        operation_location = await self._start_analysis(model_id, json=payload)
         
         # 2. Polling hasta completar
         result = await self._poll_analysis(operation_location)
@@ -129,124 +284,285 @@ class AzureDocumentIntelligenceClient:
         
         return ocr_result
     
-    async def _start_analysis(
+    async def analyze_document_bytes(
         self,
-        file_uri: str,
+        data: DocumentSource,
+        *,
+        content_type: str = "application/pdf",
+        locale: Optional[str] = None,
+        strategy: str = "balanced",
+        page_indices: Optional[Sequence[int]] = None,
+    ) -> AzureOcrResult:
+        """
+        Analiza un documento enviando su contenido binario.
+        
+        PDFs con split_min_pages páginas o más se dividen en rangos de
+        pages_per_request páginas que se analizan en paralelo (hasta
+        max_parallel_requests a la vez); el resultado se une en orden y
+        conserva la numeración de páginas del documento enviado.
+        
+        Con un archivo seekable como origen, el documento completo se sube
+        leyéndolo por bloques y cada rango se extrae justo antes de enviarse:
+        en memoria solo están los rangos en vuelo.
+        
+        Args:
+            data: Contenido del documento (bytes o archivo binario seekable)
+            content_type: MIME del documento (application/pdf, image/png, ...)
+            locale: Código de idioma (ej: "en-US", "es-ES")
+            strategy: Estrategia de optimización ("fast", "accurate", "balanced")
+            page_indices: Solo para PDF: páginas a enviar (índices desde 0, en
+                ese orden); el resultado las numera 1..len(page_indices)
+            
+        Returns:
+            AzureOcrResult con texto extraído y metadatos
+        """
+        model_id = self._get_model_id(strategy)
+        if page_indices is not None and not page_indices:
+            raise ValueError("page_indices no puede estar vacío")
+        
+        # Páginas de cada request; vacío = documento completo en un request
+        groups: List[List[int]] = []
+        if content_type == "application/pdf":
+            if page_indices is None:
+                indices = list(range(await asyncio.to_thread(_count_pdf_pages, data)))
+            else:
+                indices = list(page_indices)
+            if len(indices) >= self.split_min_pages:
+                groups = [
+                    indices[first - 1:last]
+                    for first, last in page_ranges(len(indices), self.pages_per_request)
+                ]
+            if page_indices is None and len(groups) < 2:
+                groups = []
+            elif not groups:
+                groups = [indices]
+        
+        if not groups:
+            logger.info(
+                f"Iniciando análisis Azure OCR: {_source_size(data)} bytes, model={model_id}, locale={locale}"
+            )
+            return await self._analyze_part(data, content_type, model_id, locale)
+        
+        logger.info(
+            f"Iniciando análisis Azure OCR por rangos: {sum(map(len, groups))} páginas en "
+            f"{len(groups)} rangos (paralelo={self.max_parallel_requests}), model={model_id}"
+        )
+        semaphore = asyncio.Semaphore(self.max_parallel_requests)
+        # Un archivo de origen tiene una sola posición de lectura: extracciones en serie
+        extract_lock = asyncio.Lock()
+        
+        async def _run(group: List[int], page_offset: int) -> AzureOcrResult:
+            async with semaphore:
+                async with extract_lock:
+                    part = await asyncio.to_thread(_extract_pdf_pages, data, group)
+                return await self._analyze_part(
+                    part, content_type, model_id, locale, page_offset=page_offset,
+                )
+        
+        offsets = [sum(len(g) for g in groups[:i]) for i in range(len(groups))]
+        results = await asyncio.gather(
+            *(_run(group, offset) for group, offset in zip(groups, offsets))
+        )
+        ocr_result = self._merge_results(list(results), model_id)
+        
+        logger.info(
+            f"Análisis Azure OCR completado: {len(ocr_result.text)} chars, "
+            f"{len(ocr_result.pages)} pages"
+        )
+        return ocr_result
+    
+    async def _analyze_part(
+        self,
+        data: DocumentSource,
+        content_type: str,
         model_id: str,
         locale: Optional[str],
-        pages: Optional[str],
+        *,
+        page_offset: int = 0,
+    ) -> AzureOcrResult:
+        """Envía un documento (o rango) binario, espera el resultado y lo parsea."""
+        params = {"locale": locale} if locale else None
+        operation_location = await self._start_analysis(
+            model_id, data=data, content_type=content_type, extra_params=params,
+        )
+        result = await self._poll_analysis(operation_location)
+        return self._parse_result(result, model_id, page_offset=page_offset)
+    
+    async def _start_analysis(
+        self,
+        model_id: str,
+        *,
+        json: Optional[Dict[str, Any]] = None,
+        data: Optional[DocumentSource] = None,
+        content_type: Optional[str] = None,
+        extra_params: Optional[Dict[str, str]] = None,
     ) -> str:
         """
         Inicia el análisis y retorna operation_location para polling.
         
         FASE C: Implementa retry con backoff exponencial para errores transitorios:
-        - 429 (rate limiting)
+        - 429 (rate limiting), respetando Retry-After
         - 5xx (errores de servidor)
-        - Timeouts
+        - Timeouts y conexiones keep-alive cerradas
+        
+        Un `data` de tipo archivo se sube por bloques desde el inicio en cada intento.
         """
         url = f"{self.endpoint}/documentintelligence/documentModels/{model_id}:analyze"
-        params = {"api-version": self.api_version}
-        
-        payload: Dict[str, Any] = {"urlSource": file_uri}
-        if locale:
-            payload["locale"] = locale
-        if pages:
-            payload["pages"] = pages
+        params = {
+            "api-version": self.api_version,
+            "stringIndexType": STRING_INDEX_TYPE,
+            **(extra_params or {}),
+        }
+        if data is not None:
+            headers = {
+                "Ocp-Apim-Subscription-Key": self.api_key,
+                "Content-Type": content_type or "application/octet-stream",
+            }
+            if not isinstance(data, (bytes, bytearray)):
+                headers["Content-Length"] = str(_source_size(data))
+        else:
+            headers = self.headers
         
-        async with aiohttp.ClientSession() as session:
-            for attempt in range(self.max_retries):
-                try:
-                    async with session.post(
-                        url,
-                        headers=self.headers,
-                        params=params,
-                        json=payload,
-                        timeout=aiohttp.ClientTimeout(total=30),
-                    ) as resp:
-                        if resp.status == 202:
-                            operation_location = resp.headers.get("Operation-Location")
-                            if not operation_location:
-                                raise RuntimeError("Missing Operation-Location header")
-                            return operation_location
-                        
-                        error_text = await resp.text()
-                        
-                        # FASE C: Detectar errores transitorios (429, 5xx)
-                        is_rate_limit = resp.status == 429
-                        is_server_error = resp.status >= 500
-                        is_transient = is_rate_limit or is_server_error
-                        
-                        if is_transient and attempt < self.max_retries - 1:
-                            wait_time = 2 ** attempt
-                            error_type = "Rate limit (429)" if is_rate_limit else f"Server error ({resp.status})"
-                            logger.warning(
-                                f"[Azure OCR] {error_type} - Retry {attempt+1}/{self.max_retries} "
-                                f"after {wait_time}s: {error_text[:200]}"
-                            )
-                            await asyncio.sleep(wait_time)
-                            continue
-                        
-                        # Error no transitorio o agotados los reintentos
-                        raise RuntimeError(
-                            f"Azure Document Intelligence error {resp.status}: {error_text}"
-                        )
-                
-                except asyncio.TimeoutError:
-                    if attempt < self.max_retries - 1:
-                        wait_time = 2 ** attempt
+        session = await self._get_session()
+        for attempt in range(self.max_retries):
+            last_attempt = attempt >= self.max_retries - 1
+            try:
+                async with session.post(
+                    url,
+                    headers=headers,
+                    params=params,
+                    json=json,
+                    data=data if data is None or isinstance(data, (bytes, bytearray)) else _iter_upload(data),
+                    timeout=aiohttp.ClientTimeout(total=30 if data is None else 120),
+                ) as resp:
+                    if resp.status == 202:
+                        operation_location = resp.headers.get("Operation-Location")
+                        if not operation_location:
+                            raise RuntimeError("Missing Operation-Location header")
+                        return operation_location
+                    
+                    error_text = await resp.text()
+                    
+                    # FASE C: Detectar errores transitorios (429, 5xx)
+                    if resp.status in RETRYABLE_STATUS and not last_attempt:
+                        wait_time = self._retry_delay(attempt, resp.headers)
+                        error_type = "Rate limit (429)" if resp.status == 429 else f"Server error ({resp.status})"
                         logger.warning(
-                            f"[Azure OCR] Timeout - Retry {attempt+1}/{self.max_retries} after {wait_time}s"
+                            f"[Azure OCR] {error_type} - Retry {attempt+1}/{self.max_retries} "
+                            f"after {wait_time:.2f}s: {error_text[:200]}"
                         )
                         await asyncio.sleep(wait_time)
                         continue
-                    raise TimeoutError("Azure Document Intelligence timeout al iniciar análisis")
+                    
+                    # Error no transitorio o agotados los reintentos
+                    raise RuntimeError(
+                        f"Azure Document Intelligence error {resp.status}: {error_text}"
+                    )
+            
+            except asyncio.TimeoutError:
+                if not last_attempt:
+                    wait_time = self._retry_delay(attempt)
+                    logger.warning(
+                        f"[Azure OCR] Timeout - Retry {attempt+1}/{self.max_retries} after {wait_time:.2f}s"
+                    )
+                    await asyncio.sleep(wait_time)
+                    continue
+                raise TimeoutError("Azure Document Intelligence timeout al iniciar análisis")
+            
+            except aiohttp.ClientConnectionError as e:
+                if not last_attempt:
+                    logger.warning(f"[Azure OCR] Error de conexión - Retry {attempt+1}/{self.max_retries}: {e}")
+                    await asyncio.sleep(self._retry_delay(attempt))
+                    continue
+                raise RuntimeError(f"Azure Document Intelligence connection error: {e}") from e
         
         raise RuntimeError("No se pudo iniciar análisis Azure después de reintentos")
     
     async def _poll_analysis(self, operation_location: str) -> AzureDocumentResult:
-        """Hace polling hasta que el análisis se complete."""
-        start_time = asyncio.get_event_loop().time()
-        
-        async with aiohttp.ClientSession() as session:
-            while True:
-                elapsed = asyncio.get_event_loop().time() - start_time
-                if elapsed > self.timeout_sec:
-                    raise TimeoutError(
-                        f"Azure análisis timeout después de {self.timeout_sec}s"
-                    )
+        """
+        Hace polling hasta que el análisis se complete.
+        
+        Espera lo que indique Retry-After; sin cabecera, el intervalo crece
+        de polling_interval_sec a polling_max_interval_sec. Errores 429/5xx
+        del polling se reintentan (hasta max_retries seguidos).
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout_sec
+        interval = self.polling_interval_sec
+        transient_errors = 0
+        session = await self._get_session()
+        
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise TimeoutError(
+                    f"Azure análisis timeout después de {self.timeout_sec}s"
+                )
+            
+            async with session.get(
+                operation_location,
+                headers={"Ocp-Apim-Subscription-Key": self.api_key},
+                timeout=aiohttp.ClientTimeout(total=30),
+            ) as resp:
+                server_delay = _parse_retry_after(resp.headers)
                 
-                async with session.get(
-                    operation_location,
-                    headers={"Ocp-Apim-Subscription-Key": self.api_key},
-                    timeout=aiohttp.ClientTimeout(total=30),
-                ) as resp:
-                    if resp.status != 200:
-                        error_text = await resp.text()
-                        raise RuntimeError(
-                            f"Error polling Azure status {resp.status}: {error_text}"
+                if resp.status != 200:
+                    error_text = await resp.text()
+                    transient_errors += 1
+                    if resp.status in RETRYABLE_STATUS and transient_errors < self.max_retries:
+                        wait_time = self._retry_delay(transient_errors - 1, resp.headers)
+                        logger.warning(
+                            f"[Azure OCR] Polling error {resp.status} - Retry "
+                            f"{transient_errors}/{self.max_retries} after {wait_time:.2f}s"
                         )
-                    
-                    result = await resp.json()
-                    status = result.get("status", "")
-                    
-                    if status == AzureAnalysisStatus.SUCCEEDED.value:
-                        return result
-                    
-                    if status in [
-                        AzureAnalysisStatus.FAILED.value,
-                        AzureAnalysisStatus.CANCELED.value,
-                    ]:
-                        raise RuntimeError(f"Azure análisis falló con status: {status}")
-                    
-                    # En progreso: esperar antes de siguiente poll
-                    await asyncio.sleep(self.polling_interval_sec)
+                        await asyncio.sleep(min(wait_time, remaining))
+                        continue
+                    raise RuntimeError(
+                        f"Error polling Azure status {resp.status}: {error_text}"
+                    )
+                
+                transient_errors = 0
+                result = await resp.json()
+                status = result.get("status", "")
+                
+                if status == AzureAnalysisStatus.SUCCEEDED.value:
+                    return result
+                
+                if status in [
+                    AzureAnalysisStatus.FAILED.value,
+                    AzureAnalysisStatus.CANCELED.value,
+                ]:
+                    raise RuntimeError(f"Azure análisis falló con status: {status}")
+            
+            # En progreso: Retry-After del servidor o backoff adaptativo
+            if server_delay is not None:
+                wait_time = server_delay
+            else:
+                wait_time = interval
+                interval = min(interval * self.polling_backoff, self.polling_max_interval_sec)
+            await asyncio.sleep(min(wait_time, remaining))
+    
+    def _retry_delay(self, attempt: int, headers=None) -> float:
+        """Espera antes del siguiente intento: Retry-After si existe, si no 2**attempt."""
+        if headers is not None:
+            server_delay = _parse_retry_after(headers)
+            if server_delay is not None:
+                return server_delay
+        return float(2 ** attempt)
     
     def _parse_result(
         self,
         result: AzureDocumentResult,
         model_used: str,
+        *,
+        page_offset: int = 0,
     ) -> AzureOcrResult:
-        """Parsea la respuesta de Azure a formato interno."""
+        """
+        Parsea la respuesta de Azure a formato interno.
+        
+        page_offset desplaza page_number cuando el resultado corresponde a un
+        rango extraído del documento (la página 1 del rango es page_offset + 1).
+        """
         analyze_result = result.get("analyzeResult", {})
         
         # Extraer texto completo
@@ -256,23 +572,21 @@ class AzureDocumentIntelligenceClient:
         pages = analyze_result.get("pages", [])
         pages_metadata = [
             {
-                "page_number": p.get("pageNumber", i + 1),
+                "page_number": p.get("pageNumber", i + 1) + page_offset,
                 "width": p.get("width"),
                 "height": p.get("height"),
                 "unit": p.get("unit", "pixel"),
                 "angle": p.get("angle", 0),
                 "lines": len(p.get("lines", [])),
                 "words": len(p.get("words", [])),
+                "text": _page_text(content, p),
+                "confidence": _average_confidence(p.get("words", [])),
             }
             for i, p in enumerate(pages)
         ]
         
         # Calcular confianza promedio si hay palabras
-        all_words = [w for p in pages for w in p.get("words", [])]
-        avg_confidence = None
-        if all_words:
-            confidences = [w.get("confidence", 0) for w in all_words if "confidence" in w]
-            avg_confidence = sum(confidences) / len(confidences) if confidences else None
+        avg_confidence = _average_confidence([w for p in pages for w in p.get("words", [])])
         
         # Detectar idioma (si está disponible en result)
         lang = analyze_result.get("languages", [{}])[0].get("locale") if analyze_result.get("languages") else None
@@ -285,6 +599,31 @@ class AzureDocumentIntelligenceClient:
             model_used=model_used,
         )
     
+    def _merge_results(
+        self,
+        parts: List[AzureOcrResult],
+        model_used: str,
+    ) -> AzureOcrResult:
+        """Une resultados de rangos consecutivos (en orden) en uno solo."""
+        pages = [page for part in parts for page in part.pages]
+        
+        # Confianza media ponderada por palabras de cada rango
+        weighted = 0.0
+        total_words = 0
+        for part in parts:
+            words = sum(page.get("words", 0) for page in part.pages)
+            if part.confidence is not None and words:
+                weighted += part.confidence * words
+                total_words += words
+        
+        return AzureOcrResult(
+            text="\n".join(part.text for part in parts if part.text),
+            pages=pages,
+            confidence=weighted / total_words if total_words else None,
+            lang=next((part.lang for part in parts if part.lang), None),
+            model_used=model_used,
+        )
+    
     def _get_model_id(self, strategy: str) -> str:
         """Mapea estrategia a model_id de Azure."""
         mapping = {
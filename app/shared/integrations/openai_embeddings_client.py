@@ -5,85 +5,158 @@ backend/app/shared/integrations/openai_embeddings_client.py
 Cliente para generar embeddings con OpenAI API.
 Soporta modelos text-embedding-3-large, text-embedding-3-small.
 
+Usa una sesión aiohttp de larga vida (pool de conexiones con keep-alive)
+compartida por proceso, en lugar de abrir TCP+TLS en cada lote. La sesión
+se cierra en el shutdown del lifespan (close_openai_embeddings_client).
+
 Autor: DoxAI
 Fecha: 2025-11-28
+Actualizado: 2025-12-04 - Cliente con pool keep-alive y soporte de Retry-After
+Actualizado: 2025-12-19 - Cierre de la sesión anterior al cambiar de event loop
 """
 
+import asyncio
 import logging
+import random
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
 from typing import List, Optional
+
 import aiohttp
 
 logger = logging.getLogger(__name__)
 
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
 
-async def generate_embeddings(
-    texts: List[str],
-    *,
-    api_key: str,
-    model: str = "text-embedding-3-large",
-    dimension: int = 1536,
-    endpoint: str = "https://api.openai.com/v1",
-    max_retries: int = 3,
-) -> List[List[float]]:
+
+def _parse_retry_after(headers) -> Optional[float]:
     """
-    Genera embeddings para una lista de textos usando OpenAI API.
-    
-    Args:
-        texts: Lista de textos a embedir (máx ~8192 tokens por texto)
-        api_key: API key de OpenAI
-        model: Modelo de embeddings (default: text-embedding-3-large)
-        dimension: Dimensión del vector (default: 1536)
-        endpoint: Base URL de la API (default: https://api.openai.com/v1)
-        max_retries: Número de reintentos en caso de error transitorio
-        
-    Returns:
-        Lista de vectores (cada vector es List[float] de longitud `dimension`)
-        
-    Raises:
-        ValueError: Si texts está vacío o dimension inválida
-        RuntimeError: Si la API devuelve error no recuperable
-        TimeoutError: Si el request tarda demasiado
-        
-    Notes:
-        - Valida dimension vs model antes de llamar a la API
-        - Maneja rate limits con backoff exponencial
-        - Batch size recomendado: 100-200 textos por llamada
+    Obtiene la espera sugerida por el servidor en segundos.
+
+    Soporta `retry-after-ms` (OpenAI), `Retry-After` en segundos y
+    `Retry-After` como fecha HTTP. Devuelve None si no hay cabecera válida.
     """
-    if not texts:
-        raise ValueError("texts no puede estar vacío")
-    
-    # Validar dimensión
-    _validate_dimension(model, dimension)
-    
-    logger.info(
-        f"Generando embeddings OpenAI: {len(texts)} texts, "
-        f"model={model}, dimension={dimension}"
-    )
-    
-    url = f"{endpoint.rstrip('/')}/embeddings"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-    payload = {
-        "input": texts,
-        "model": model,
-        "dimensions": dimension,
-    }
-    
-    async with aiohttp.ClientSession() as session:
+    retry_ms = headers.get("retry-after-ms")
+    if retry_ms:
+        try:
+            return max(0.0, float(retry_ms) / 1000.0)
+        except ValueError:
+            pass
+
+    retry_after = headers.get("Retry-After")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(retry_after)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class OpenAIEmbeddingsClient:
+    """
+    Cliente de embeddings OpenAI con sesión HTTP reutilizable.
+
+    - Pool de conexiones con keep-alive (TCPConnector), creado de forma perezosa
+      y ligado al event loop en el que se creó.
+    - Reintentos en 429/5xx/errores de conexión; respeta Retry-After y usa
+      backoff exponencial con jitter solo si el servidor no indica espera.
+    """
+
+    def __init__(
+        self,
+        *,
+        pool_limit: int = 32,
+        keepalive_timeout: float = 60.0,
+        request_timeout: float = 60.0,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        self.pool_limit = pool_limit
+        self.keepalive_timeout = keepalive_timeout
+        self.request_timeout = request_timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Devuelve la sesión compartida, creándola si no existe para el loop actual."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            # La sesión de otro loop se cierra antes de sustituirla (no deja su pool abierto)
+            await self._close_session()
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_limit,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            )
+            self._loop = loop
+            logger.debug(f"OpenAI embeddings: nueva sesión HTTP (pool_limit={self.pool_limit})")
+        return self._session
+
+    def _retry_delay(self, attempt: int, headers=None) -> float:
+        """Espera antes del siguiente intento: Retry-After si existe, si no backoff con jitter."""
+        if headers is not None:
+            server_delay = _parse_retry_after(headers)
+            if server_delay is not None:
+                return min(server_delay, self.max_delay)
+        delay = min(self.base_delay * (2 ** attempt), self.max_delay)
+        return delay + random.uniform(0, 0.2 * delay)
+
+    async def generate_embeddings(
+        self,
+        texts: List[str],
+        *,
+        api_key: str,
+        model: str = "text-embedding-3-large",
+        dimension: int = 1536,
+        endpoint: str = "https://api.openai.com/v1",
+        max_retries: int = 3,
+    ) -> List[List[float]]:
+        """
+        Genera embeddings para una lista de textos usando OpenAI API.
+
+        Ver generate_embeddings (función de módulo) para el contrato completo.
+        """
+        if not texts:
+            raise ValueError("texts no puede estar vacío")
+
+        # Validar dimensión
+        _validate_dimension(model, dimension)
+
+        logger.info(
+            f"Generando embeddings OpenAI: {len(texts)} texts, "
+            f"model={model}, dimension={dimension}"
+        )
+
+        url = f"{endpoint.rstrip('/')}/embeddings"
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        }
+        payload = {
+            "input": texts,
+            "model": model,
+            "dimensions": dimension,
+        }
+
+        session = await self._get_session()
         for attempt in range(max_retries):
+            last_attempt = attempt >= max_retries - 1
             try:
-                async with session.post(
-                    url,
-                    headers=headers,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=60),
-                ) as resp:
+                async with session.post(url, headers=headers, json=payload) as resp:
                     if resp.status == 200:
                         result = await resp.json()
                         embeddings = [item["embedding"] for item in result["data"]]
-                        
+
                         # Validar que todos tienen la dimensión esperada
                         for i, emb in enumerate(embeddings):
                             if len(emb) != dimension:
@@ -91,39 +164,126 @@ async def generate_embeddings(
                                     f"Embedding {i} tiene dimensión {len(emb)}, "
                                     f"esperada {dimension}"
                                 )
-                        
+
                         logger.info(
                             f"Embeddings OpenAI generados exitosamente: "
                             f"{len(embeddings)} vectores"
                         )
                         return embeddings
-                    
+
+                    error_text = await resp.text()
+
                     # Rate limit o error de servidor: reintentar
-                    if resp.status in [429, 500, 502, 503] and attempt < max_retries - 1:
-                        wait_time = 2 ** attempt
-                        error_text = await resp.text()
+                    if resp.status in RETRYABLE_STATUS and not last_attempt:
+                        wait_time = self._retry_delay(attempt, resp.headers)
                         logger.warning(
                             f"OpenAI error {resp.status} (retry {attempt+1}/{max_retries}): "
-                            f"{error_text}. Esperando {wait_time}s"
+                            f"{error_text}. Esperando {wait_time:.2f}s"
                         )
                         await asyncio.sleep(wait_time)
                         continue
-                    
+
                     # Error no recuperable
-                    error_text = await resp.text()
                     raise RuntimeError(
                         f"OpenAI Embeddings API error {resp.status}: {error_text}"
                     )
-            
+
             except asyncio.TimeoutError:
-                if attempt < max_retries - 1:
+                if not last_attempt:
                     logger.warning(f"Timeout en intento {attempt+1}/{max_retries}")
-                    await asyncio.sleep(2 ** attempt)
+                    await asyncio.sleep(self._retry_delay(attempt))
                     continue
                 raise TimeoutError("OpenAI Embeddings API timeout")
-        
+
+            except aiohttp.ClientConnectionError as e:
+                # Conexión keep-alive cerrada por el servidor, reset, DNS...
+                if not last_attempt:
+                    logger.warning(f"Error de conexión en intento {attempt+1}/{max_retries}: {e}")
+                    await asyncio.sleep(self._retry_delay(attempt))
+                    continue
+                raise RuntimeError(f"OpenAI Embeddings API connection error: {e}") from e
+
         raise RuntimeError("No se pudieron generar embeddings después de reintentos")
 
+    async def _close_session(self) -> None:
+        """Cierra la sesión actual (si la hay) y olvida el loop al que estaba ligada."""
+        session, self._session, self._loop = self._session, None, None
+        if session is None or session.closed:
+            return
+        try:
+            await session.close()
+        except RuntimeError as e:
+            # Transportes de un loop que ya no puede programar callbacks
+            logger.debug(f"OpenAI embeddings: cierre parcial de la sesión anterior ({e})")
+
+    async def aclose(self) -> None:
+        """Cierra la sesión y libera el pool de conexiones."""
+        await self._close_session()
+
+
+_client: Optional[OpenAIEmbeddingsClient] = None
+
+
+def get_openai_embeddings_client() -> OpenAIEmbeddingsClient:
+    """Obtiene el cliente de embeddings compartido por proceso."""
+    global _client
+    if _client is None:
+        _client = OpenAIEmbeddingsClient()
+    return _client
+
+
+async def close_openai_embeddings_client() -> None:
+    """Cierra el cliente compartido (shutdown del lifespan)."""
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
+        logger.info("✅ Cliente OpenAI embeddings cerrado")
+
+
+async def generate_embeddings(
+    texts: List[str],
+    *,
+    api_key: str,
+    model: str = "text-embedding-3-large",
+    dimension: int = 1536,
+    endpoint: str = "https://api.openai.com/v1",
+    max_retries: int = 3,
+) -> List[List[float]]:
+    """
+    Genera embeddings para una lista de textos usando OpenAI API.
+
+    Args:
+        texts: Lista de textos a embedir (máx ~8192 tokens por texto)
+        api_key: API key de OpenAI
+        model: Modelo de embeddings (default: text-embedding-3-large)
+        dimension: Dimensión del vector (default: 1536)
+        endpoint: Base URL de la API (default: https://api.openai.com/v1)
+        max_retries: Número de reintentos en caso de error transitorio
+
+    Returns:
+        Lista de vectores (cada vector es List[float] de longitud `dimension`)
+
+    Raises:
+        ValueError: Si texts está vacío o dimension inválida
+        RuntimeError: Si la API devuelve error no recuperable
+        TimeoutError: Si el request tarda demasiado
+
+    Notes:
+        - Valida dimension vs model antes de llamar a la API
+        - Reutiliza la sesión HTTP compartida (keep-alive)
+        - Maneja rate limits respetando Retry-After (backoff exponencial si falta)
+        - Batch size recomendado: 100-200 textos por llamada
+    """
+    return await get_openai_embeddings_client().generate_embeddings(
+        texts,
+        api_key=api_key,
+        model=model,
+        dimension=dimension,
+        endpoint=endpoint,
+        max_retries=max_retries,
+    )
+
 
 def _validate_dimension(model: str, dimension: int):
     """Valida que la dimensión sea válida para el modelo especificado."""
@@ -132,16 +292,12 @@ def _validate_dimension(model: str, dimension: int):
         "text-embedding-3-small": [256, 512, 1536],
         "text-embedding-ada-002": [1536],
     }
-    
+
     if model not in valid_dims:
         raise ValueError(f"Modelo desconocido: {model}")
-    
+
     if dimension not in valid_dims[model]:
         raise ValueError(
             f"Dimensión {dimension} inválida para modelo {model}. "
             f"Dimensiones válidas: {valid_dims[model]}"
         )
-
-
-# Import asyncio for sleep
-import asyncio
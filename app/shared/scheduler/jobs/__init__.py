@@ -8,7 +8,12 @@ Autor: DoxAI
 Fecha: 2025-11-05
 """
 
-from .cache_cleanup_job import cleanup_expired_cache, register_cache_cleanup_job
+from .cache_cleanup_job import (
+    cleanup_expired_cache,
+    register_cache_cleanup_job,
+    cleanup_ocr_page_cache,
+    register_ocr_page_cache_cleanup_job,
+)
 
 # Importar job de reconciliación de archivos fantasma
 try:
@@ -33,6 +38,8 @@ except ImportError:
 __all__ = [
     "cleanup_expired_cache",
     "register_cache_cleanup_job",
+    "cleanup_ocr_page_cache",
+    "register_ocr_page_cache_cleanup_job",
     # Reconcile ghost files job
     "RECONCILE_GHOST_FILES_JOB_ID",
     "reconcile_ghost_files_job",
@@ -10,6 +10,7 @@ Diseñado para ser genérico y reutilizable con cualquier implementación de Cac
 Autor: DoxAI
 Fecha: 2025-11-05
 Actualizado: 2025-12-27 - Refactor para soportar múltiples cachés (Files, RAG, etc.)
+Actualizado: 2025-12-15 - Eviction por TTL de la caché OCR por página (rag-cache-pages)
 """
 
 import logging
@@ -220,4 +221,99 @@ def register_cache_cleanup_job(scheduler) -> str:
     return job_id
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Caché OCR por página (índice rag_ocr_page_cache + bucket rag-cache-pages)
+# ─────────────────────────────────────────────────────────────────────────────
+
+async def cleanup_ocr_page_cache() -> Dict[str, Any]:
+    """
+    Elimina páginas OCR expiradas (TTL ttl_ocr_results) del índice y del bucket.
+
+    Procesa lotes de CacheEvictionSettings.page_size entradas, hasta max_pages
+    lotes por ejecución; cada lote se confirma por separado.
+
+    Returns:
+        Dict con estadísticas de la limpieza
+    """
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from app.modules.files.services.storage_client_factory import get_storage_client
+    from app.modules.rag.services.ocr_page_cache import ocr_page_cache
+    from app.shared.database import engine
+
+    start_time = datetime.utcnow()
+    settings = ocr_page_cache.settings
+    removed = 0
+    db = AsyncSession(bind=engine, expire_on_commit=False)
+    try:
+        storage_client = await get_storage_client()
+        for _ in range(settings.max_pages):
+            batch = await ocr_page_cache.evict_expired(
+                db, storage_client, limit=settings.page_size
+            )
+            await db.commit()
+            removed += batch
+            if batch < settings.page_size:
+                break
+    except Exception as e:
+        logger.error("[cache_cleanup] cache=rag_ocr_pages error: %s", str(e), exc_info=True)
+        await db.rollback()
+        return {
+            "cache_name": "rag_ocr_pages",
+            "timestamp": start_time.isoformat(),
+            "error": str(e),
+            "removed_expired": removed,
+        }
+    finally:
+        await db.close()
+
+    duration_ms = (datetime.utcnow() - start_time).total_seconds() * 1000
+    stats = ocr_page_cache.get_stats()
+    logger.info(
+        "[cache_cleanup] cache=rag_ocr_pages removed_expired=%d duration_ms=%.2f hit_rate=%.1f%%",
+        removed,
+        duration_ms,
+        stats["hit_rate_percent"],
+    )
+    return {
+        "cache_name": "rag_ocr_pages",
+        "timestamp": start_time.isoformat(),
+        "removed_expired": removed,
+        "duration_ms": round(duration_ms, 2),
+        "hit_rate_percent": stats["hit_rate_percent"],
+    }
+
+
+def register_ocr_page_cache_cleanup_job(scheduler) -> str | None:
+    """
+    Registra la limpieza horaria de la caché OCR por página.
+
+    Se omite si CACHE_EVICTION_ENABLED=false.
+
+    Args:
+        scheduler: Instancia de SchedulerService
+
+    Returns:
+        ID del job registrado, o None si está deshabilitado
+    """
+    from app.shared.config.settings_eviction import CacheEvictionSettings
+
+    if not CacheEvictionSettings().enabled:
+        logger.info("[cache_cleanup] OCR page cache cleanup disabled (CACHE_EVICTION_ENABLED)")
+        return None
+
+    job_id = "ocr_page_cache_cleanup_hourly"
+    scheduler.add_interval_job(
+        func=cleanup_ocr_page_cache,
+        job_id=job_id,
+        hours=1,
+        minutes=0,
+        seconds=0,
+    )
+
+    logger.info("[cache_cleanup] Job '%s' registered: hourly cleanup", job_id)
+
+    return job_id
+
+
 # Fin del archivo backend/app/shared/scheduler/jobs/cache_cleanup_job.py
@@ -8,6 +8,10 @@ Optimizado con:
 - Connection pooling para mejor rendimiento
 - Compresión automática de uploads
 - Manejo robusto de errores
+- Descarga/subida en streaming (iter_bytes / upload_stream) con memoria acotada
+- Subidas reanudables (TUS) por partes para objetos grandes (upload_resumable)
+- Movimiento de objetos dentro del bucket (move_file), p.ej. publicar un
+  resultado subido bajo una clave temporal
 
 Este cliente mantiene la misma funcionalidad que el cliente oficial pero con control
 total sobre las requests HTTP y mejor manejo de errores.
@@ -16,14 +20,17 @@ Autor: Ixchel Beristain
 Fecha: 10/07/2025 (optimizado: 05/11/2025)
 """
 
+import asyncio
+import base64
 import logging
 import httpx
 import threading
-from typing import List, Dict, Any, Optional, Union
-from urllib.parse import quote
+from typing import AsyncIterable, AsyncIterator, List, Dict, Any, Optional, Tuple, Union
+from urllib.parse import quote, urljoin
 
 from app.shared.config import settings
-from app.shared.utils.storage_errors import StorageRequestError
+from app.shared.core.http_retry_utils import retry_with_backoff
+from app.shared.utils.storage_errors import ResumableUploadError, StorageRequestError
 
 # Usar connection pool si está disponible
 try:
@@ -37,6 +44,18 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Tamaño de bloque por defecto para iter_bytes
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# Subidas reanudables (protocolo TUS de Supabase Storage)
+TUS_VERSION = "1.0.0"
+RESUMABLE_CHUNK_SIZE = 6 * 1024 * 1024
+RESUMABLE_THRESHOLD = 20 * 1024 * 1024
+RESUMABLE_MAX_RETRIES = 3
+RESUMABLE_READ_AHEAD = 2
+# 409 en PATCH = offset desincronizado: se reintenta tras consultar el offset
+_RESUMABLE_RETRY_STATUS = {409, 429, 500, 502, 503, 504}
+
 if USE_CONNECTION_POOL:
     logger.info("🚀 HTTP Storage Client using optimized connection pool")
 
@@ -183,6 +202,58 @@ async def storage_exists(storage_path: str) -> bool:
         return False
 
 
+def _resumable_settings() -> Tuple[int, int, int]:
+    """(umbral, tamaño de parte, reintentos por parte) desde settings."""
+    mb = 1024 * 1024
+    return (
+        int(getattr(settings, "supabase_resumable_threshold_mb", RESUMABLE_THRESHOLD // mb)) * mb,
+        int(getattr(settings, "supabase_resumable_chunk_size_mb", RESUMABLE_CHUNK_SIZE // mb)) * mb,
+        int(getattr(settings, "supabase_resumable_max_retries", RESUMABLE_MAX_RETRIES)),
+    )
+
+
+def _tus_metadata(**values: str) -> str:
+    """Cabecera Upload-Metadata: pares 'clave base64(valor)' separados por coma."""
+    return ",".join(
+        f"{key} {base64.b64encode(value.encode('utf-8')).decode('ascii')}"
+        for key, value in values.items()
+    )
+
+
+async def _iter_parts(
+    data: Union[bytes, AsyncIterable[bytes]],
+    part_size: int,
+    skip: int = 0,
+) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Parte data en bloques de part_size (el último puede ser menor) y los
+    entrega como (offset, bytes), omitiendo los primeros skip bytes.
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        view = memoryview(data)
+        for offset in range(skip, len(view), part_size):
+            yield offset, bytes(view[offset:offset + part_size])
+        return
+
+    offset = 0
+    buffer = bytearray()
+    async for block in data:
+        if offset + len(block) <= skip:
+            # Ya confirmado por el servidor (reanudación)
+            offset += len(block)
+            continue
+        if offset < skip:
+            block = block[skip - offset:]
+            offset = skip
+        buffer += block
+        while len(buffer) >= part_size:
+            yield offset, bytes(buffer[:part_size])
+            del buffer[:part_size]
+            offset += part_size
+    if buffer:
+        yield offset, bytes(buffer)
+
+
 class SupabaseStorageHTTPClient:
     """
     Cliente HTTP para operaciones de Supabase Storage.
@@ -226,6 +297,19 @@ class SupabaseStorageHTTPClient:
         Raises:
             RuntimeError: Si la operación falla
         """
+        threshold, _, _ = _resumable_settings()
+        if len(file_data) >= threshold:
+            # Objetos grandes: por partes, reanudable ante cortes
+            result = await self.upload_resumable(
+                bucket, path, file_data, content_type=content_type, overwrite=overwrite
+            )
+            if result.get("duplicate") and not overwrite:
+                logger.debug(f"📄 File exists, retrying with upsert: {path}")
+                result = await self.upload_resumable(
+                    bucket, path, file_data, content_type=content_type, overwrite=True
+                )
+            return result
+
         encoded_path = _encode_path(path)
         url = f"{self.base_url}/storage/v1/object/{bucket}/{encoded_path}"
         headers = {
@@ -453,6 +537,351 @@ class SupabaseStorageHTTPClient:
             logger.error(f"🔥 Error de conexión al descargar archivo: {str(e)}")
             raise RuntimeError(f"Error de conexión: {str(e)}")
     
+    async def iter_bytes(
+        self,
+        bucket: str,
+        path: str,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> AsyncIterator[bytes]:
+        """
+        Descarga un archivo en streaming, en bloques de hasta chunk_size bytes.
+
+        A diferencia de download_file, nunca materializa el objeto completo:
+        la memoria queda acotada por chunk_size.
+
+        Raises:
+            FileNotFoundError: Si el archivo no existe (404 o 400 con body "not found")
+            StorageRequestError: Si hay error de storage (400/401/403/5xx)
+            RuntimeError: Si la operación falla por conexión
+        """
+        encoded_path = _encode_path(path)
+        url = f"{self.base_url}/storage/v1/object/{bucket}/{encoded_path}"
+        headers = {
+            "Authorization": f"Bearer {settings.supabase_service_role_key}"
+        }
+
+        try:
+            client = await get_pooled_client()
+            async with client.stream("GET", url, headers=headers) as response:
+                if response.status_code != 200:
+                    body_snippet = (await response.aread())[:300].decode("utf-8", errors="replace")
+                    if _is_not_found(response) or _is_not_found_body(response.status_code, body_snippet):
+                        raise FileNotFoundError(f"El archivo '{path}' no existe en el bucket '{bucket}'")
+                    logger.warning(
+                        "storage_stream_download_failed status=%d bucket=%s path=%s body=%s",
+                        response.status_code, bucket, path, body_snippet
+                    )
+                    raise StorageRequestError(
+                        status_code=response.status_code,
+                        url=url,
+                        bucket=bucket,
+                        path=path,
+                        body_snippet=body_snippet,
+                    )
+
+                async for block in response.aiter_bytes(chunk_size):
+                    yield block
+
+        except httpx.RequestError as e:
+            logger.error(f"🔥 Error de conexión al descargar archivo (stream): {str(e)}")
+            raise RuntimeError(f"Error de conexión: {str(e)}")
+
+    async def upload_stream(
+        self,
+        bucket: str,
+        path: str,
+        stream: AsyncIterable[bytes],
+        content_type: Optional[str] = None,
+        overwrite: bool = True,
+        content_length: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Sube un archivo a partir de un stream de bloques (transfer chunked).
+
+        Un stream no se puede reenviar, por eso por defecto usa upsert en
+        lugar del reintento ante 409 de upload_file.
+
+        Args:
+            bucket (str): Nombre del bucket
+            path (str): Ruta completa del archivo en el bucket
+            stream: Iterable asíncrono de bloques de bytes
+            content_type (str): Tipo MIME del archivo
+            overwrite (bool): Si True, sobrescribe archivos existentes (x-upsert)
+            content_length (int): Tamaño total si se conoce (evita chunked encoding)
+
+        Returns:
+            Dict[str, Any]: Respuesta de la API de Supabase
+
+        Raises:
+            RuntimeError: Si la operación falla
+        """
+        threshold, _, _ = _resumable_settings()
+        if content_length is not None and content_length >= threshold:
+            # Tamaño conocido y grande: por partes, reanudable ante cortes
+            return await self.upload_resumable(
+                bucket,
+                path,
+                stream,
+                content_length=content_length,
+                content_type=content_type or "application/octet-stream",
+                overwrite=overwrite,
+            )
+
+        encoded_path = _encode_path(path)
+        url = f"{self.base_url}/storage/v1/object/{bucket}/{encoded_path}"
+        headers = {
+            "Authorization": f"Bearer {settings.supabase_service_role_key}",
+            "Content-Type": content_type or "application/octet-stream",
+        }
+        if overwrite:
+            headers["x-upsert"] = "true"
+        if content_length is not None:
+            headers["Content-Length"] = str(content_length)
+
+        try:
+            client = await get_pooled_client()
+            response = await client.post(url, headers=headers, content=stream)
+
+            if response.status_code == 409:
+                logger.info(f"📄 Archivo ya existe en Storage: {path}")
+                return {"message": "File already exists", "duplicate": True}
+            elif response.status_code not in [200, 201]:
+                logger.error(f"❌ Error al subir archivo (stream): {response.status_code} - {response.text}")
+                raise RuntimeError(f"Error al subir archivo a Supabase: {response.status_code}")
+
+            logger.info(f"✅ Archivo subido en streaming: {path}")
+            return response.json() if response.content else {}
+
+        except httpx.RequestError as e:
+            logger.error(f"🔥 Error de conexión al subir archivo (stream): {str(e)}")
+            raise RuntimeError(f"Error de conexión: {str(e)}")
+
+    async def upload_resumable(
+        self,
+        bucket: str,
+        path: str,
+        data: Union[bytes, AsyncIterable[bytes]],
+        *,
+        content_length: Optional[int] = None,
+        content_type: str = "application/octet-stream",
+        overwrite: bool = False,
+        chunk_size: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        read_ahead: int = RESUMABLE_READ_AHEAD,
+        upload_url: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Sube un archivo por partes con el protocolo reanudable (TUS).
+
+        - Cada parte (PATCH) se reintenta con backoff (retry_with_backoff);
+          antes de reintentar se consulta el offset confirmado (HEAD) y solo
+          se reenvía lo que falta, así un corte al 95% no reinicia la subida.
+        - TUS exige partes en orden de offset, por eso no se envían en
+          paralelo: la lectura de las siguientes `read_ahead` partes se
+          solapa con el envío de la actual.
+        - Si se agotan los reintentos lanza ResumableUploadError con
+          upload_url y offset; pasando upload_url se reanuda la misma subida
+          (data debe volver a darse completo; lo confirmado se omite).
+
+        Args:
+            bucket (str): Nombre del bucket
+            path (str): Ruta completa del archivo en el bucket
+            data: Bytes o iterable asíncrono de bloques
+            content_length (int): Tamaño total (obligatorio si data es un stream)
+            content_type (str): Tipo MIME del archivo
+            overwrite (bool): Si True, sobrescribe archivos existentes (x-upsert)
+            chunk_size (int): Tamaño de parte (por defecto settings, 6 MB)
+            max_retries (int): Reintentos por parte (por defecto settings)
+            read_ahead (int): Partes leídas por adelantado
+            upload_url (str): URL de una subida previa a reanudar
+
+        Returns:
+            Dict[str, Any]: {"upload_url", "size", "path"}, o {"duplicate": True}
+            si el archivo ya existe y no se pidió sobrescribir
+
+        Raises:
+            ValueError: Si data es un stream sin content_length
+            ResumableUploadError: Si la subida no pudo completarse
+        """
+        _, default_chunk, default_retries = _resumable_settings()
+        part_size = chunk_size or default_chunk
+        retries = default_retries if max_retries is None else max_retries
+
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            size = len(data)
+        elif content_length is None:
+            raise ValueError("content_length es obligatorio para subir un stream por partes")
+        else:
+            size = content_length
+
+        tus_headers = {
+            "Authorization": f"Bearer {settings.supabase_service_role_key}",
+            "Tus-Resumable": TUS_VERSION,
+        }
+        client = await get_pooled_client()
+
+        if upload_url is None:
+            create_headers = {
+                **tus_headers,
+                "Upload-Length": str(size),
+                "Upload-Metadata": _tus_metadata(
+                    bucketName=bucket,
+                    objectName=path,
+                    contentType=content_type,
+                    cacheControl="3600",
+                ),
+                "x-upsert": "true" if overwrite else "false",
+            }
+            try:
+                response = await retry_with_backoff(
+                    client.post,
+                    f"{self.base_url}/storage/v1/upload/resumable",
+                    headers=create_headers,
+                    max_retries=retries,
+                )
+            except httpx.HTTPError as e:
+                raise ResumableUploadError(f"No se pudo iniciar la subida reanudable: {e}") from e
+
+            if response.status_code == 409:
+                logger.info(f"📄 Archivo ya existe en Storage: {path}")
+                return {"message": "File already exists", "duplicate": True}
+            location = response.headers.get("location")
+            if response.status_code != 201 or not location:
+                logger.error(f"❌ Error al iniciar subida reanudable: {response.status_code} - {response.text}")
+                raise ResumableUploadError(
+                    f"Error al iniciar subida reanudable: {response.status_code}",
+                    status_code=response.status_code,
+                )
+            upload_url = urljoin(f"{self.base_url}/", location)
+            offset = 0
+        else:
+            offset = await self._resumable_offset(client, upload_url, tus_headers, retries)
+
+        # Lectura por adelantado: la siguiente parte se prepara mientras se envía la actual
+        parts: asyncio.Queue = asyncio.Queue(maxsize=max(1, read_ahead))
+        _done = object()
+
+        async def produce() -> None:
+            try:
+                async for part in _iter_parts(data, part_size, skip=offset):
+                    await parts.put(part)
+                await parts.put(_done)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # error del stream de origen: al consumidor
+                await parts.put(e)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                item = await parts.get()
+                if item is _done:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                part_offset, part = item
+                offset = await self._send_part(
+                    client, upload_url, tus_headers, part_offset, part, retries
+                )
+        finally:
+            producer.cancel()
+
+        if offset != size:
+            raise ResumableUploadError(
+                f"Subida reanudable incompleta: {offset} de {size} bytes",
+                upload_url=upload_url,
+                offset=offset,
+            )
+
+        logger.info(f"✅ Archivo subido por partes: {path} ({size} bytes)")
+        return {"upload_url": upload_url, "size": size, "path": path}
+
+    async def _resumable_offset(
+        self,
+        client: httpx.AsyncClient,
+        upload_url: str,
+        tus_headers: Dict[str, str],
+        max_retries: int,
+    ) -> int:
+        """Offset confirmado por el servidor para upload_url (HEAD)."""
+        try:
+            response = await retry_with_backoff(
+                client.head, upload_url, headers=tus_headers, max_retries=max_retries
+            )
+        except httpx.HTTPError as e:
+            raise ResumableUploadError(
+                f"No se pudo consultar la subida reanudable: {e}", upload_url=upload_url
+            ) from e
+        if response.status_code != 200 or "upload-offset" not in response.headers:
+            raise ResumableUploadError(
+                f"Subida reanudable no disponible: {response.status_code}",
+                upload_url=upload_url,
+                status_code=response.status_code,
+            )
+        return int(response.headers["upload-offset"])
+
+    async def _send_part(
+        self,
+        client: httpx.AsyncClient,
+        upload_url: str,
+        tus_headers: Dict[str, str],
+        part_offset: int,
+        part: bytes,
+        max_retries: int,
+    ) -> int:
+        """
+        Envía una parte con reintentos; tras un fallo reenvía solo lo que el
+        servidor no confirmó. Devuelve el nuevo offset.
+        """
+        end = part_offset + len(part)
+        state = {"offset": part_offset, "resync": False}
+
+        async def attempt() -> httpx.Response:
+            if state["resync"]:
+                # Errores de transporte del HEAD también los reintenta retry_with_backoff
+                head = await client.head(upload_url, headers=tus_headers)
+                if head.status_code != 200 or "upload-offset" not in head.headers:
+                    return head
+                state["offset"] = int(head.headers["upload-offset"])
+                if state["offset"] >= end:
+                    return httpx.Response(204, headers={"Upload-Offset": str(state["offset"])})
+            # Cualquier fallo de este intento obliga a consultar el offset
+            state["resync"] = True
+            response = await client.patch(
+                upload_url,
+                headers={
+                    **tus_headers,
+                    "Upload-Offset": str(state["offset"]),
+                    "Content-Type": "application/offset+octet-stream",
+                },
+                content=part[state["offset"] - part_offset:],
+            )
+            if response.status_code == 204:
+                state["resync"] = False
+            return response
+
+        try:
+            response = await retry_with_backoff(
+                attempt,
+                max_retries=max_retries,
+                retry_on_status=_RESUMABLE_RETRY_STATUS,
+            )
+        except httpx.HTTPError as e:
+            raise ResumableUploadError(
+                f"Parte en offset {part_offset} no se pudo subir: {e}",
+                upload_url=upload_url,
+                offset=state["offset"],
+            ) from e
+
+        if response.status_code != 204:
+            raise ResumableUploadError(
+                f"Parte en offset {part_offset} rechazada: {response.status_code}",
+                upload_url=upload_url,
+                offset=state["offset"],
+                status_code=response.status_code,
+            )
+        return int(response.headers.get("upload-offset", end))
+
     async def _download_via_signed_url(self, bucket: str, path: str) -> Optional[bytes]:
         """
         Fallback: descarga archivo usando signed URL.
@@ -548,6 +977,44 @@ class SupabaseStorageHTTPClient:
             logger.error(f"💥 Error inesperado al eliminar archivo {path}: {str(e)}")
             raise RuntimeError(f"Error inesperado: {str(e)}")
     
+    async def move_file(self, bucket: str, source_path: str, dest_path: str) -> bool:
+        """
+        Mueve (renombra) un objeto dentro del bucket sin volver a transferirlo.
+        
+        Args:
+            bucket (str): Nombre del bucket
+            source_path (str): Ruta actual del objeto
+            dest_path (str): Ruta destino (no debe existir)
+            
+        Returns:
+            bool: True si se movió correctamente
+            
+        Raises:
+            FileNotFoundError: Si el objeto origen no existe (404)
+            FileExistsError: Si ya existe un objeto en dest_path (409)
+            RuntimeError: Si la operación falla por otras causas
+        """
+        url = f"{self.base_url}/storage/v1/object/move"
+        payload = {"bucketId": bucket, "sourceKey": source_path, "destinationKey": dest_path}
+        
+        try:
+            client = await get_pooled_client()
+            response = await client.post(url, headers=self.headers, json=payload)
+        except httpx.RequestError as e:
+            logger.error(f"🔥 Error de conexión al mover archivo {source_path}: {str(e)}")
+            raise RuntimeError(f"Error de conexión: {str(e)}")
+        
+        if response.status_code == 404:
+            raise FileNotFoundError(f"El archivo '{source_path}' no existe en el bucket '{bucket}'")
+        if response.status_code == 409 or (response.status_code == 400 and "already exists" in response.text):
+            raise FileExistsError(f"Ya existe '{dest_path}' en el bucket '{bucket}'")
+        if response.status_code != 200:
+            logger.error(f"❌ Error HTTP {response.status_code} al mover archivo {source_path}: {response.text}")
+            raise RuntimeError(f"Error HTTP {response.status_code} al mover archivo: {response.text}")
+        
+        logger.info(f"📦 Archivo movido: {source_path} -> {dest_path}")
+        return True
+    
     async def list_files(
         self, 
         bucket: str, 
@@ -665,6 +1132,7 @@ def get_http_storage_client() -> SupabaseStorageHTTPClient:
         mock_client.upload_file = MagicMock(return_value={})
         mock_client.download_file = MagicMock(return_value={"content": b"test", "etag": "test123", "not_modified": False})
         mock_client.delete_file = MagicMock(return_value=True)  
+        mock_client.move_file = MagicMock(return_value=True)
         mock_client.list_files = MagicMock(return_value=[])
         mock_client.get_file_metadata = MagicMock(return_value={"exists": True, "etag": "test123"})
         mock_client.create_signed_url = MagicMock(return_value="https://example.com/signed-url")
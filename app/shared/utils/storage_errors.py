@@ -6,6 +6,7 @@ Excepciones semánticas para operaciones de Storage.
 
 Autor: DoxAI
 Fecha: 2026-01-22
+Actualizado: 2025-12-19 - ResumableUploadError
 """
 
 from __future__ import annotations
@@ -56,4 +57,32 @@ class StorageRequestError(Exception):
         }
 
 
-__all__ = ["StorageRequestError"]
+class ResumableUploadError(RuntimeError):
+    """
+    Subida reanudable (TUS) interrumpida tras agotar los reintentos.
+
+    Hereda de RuntimeError como el resto de fallos de subida del cliente.
+    Con upload_url se puede reanudar la misma subida desde `offset`
+    (upload_resumable(..., upload_url=e.upload_url)).
+
+    Attributes:
+        upload_url: URL de la subida en el servidor (None si no llegó a crearse)
+        offset: Bytes confirmados por el servidor
+        status_code: Último código HTTP recibido, si lo hubo
+    """
+
+    def __init__(
+        self,
+        message: str,
+        *,
+        upload_url: Optional[str] = None,
+        offset: int = 0,
+        status_code: Optional[int] = None,
+    ) -> None:
+        self.upload_url = upload_url
+        self.offset = offset
+        self.status_code = status_code
+        super().__init__(message)
+
+
+__all__ = ["StorageRequestError", "ResumableUploadError"]
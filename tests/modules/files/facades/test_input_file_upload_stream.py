@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Tests para InputFileUploadStream (subida de insumos por bloques).
+
+Cubre:
+- Entrega el contenido en bloques y calcula tamaño y SHA-256 al vuelo.
+- Rechaza antes de leer si el tamaño declarado excede el límite.
+- Corta la subida en cuanto el contenido leído supera el límite.
+"""
+
+import hashlib
+import io
+
+import pytest
+
+from app.modules.files.facades.errors import FileValidationError
+from app.modules.files.facades.input_files.upload_stream import InputFileUploadStream
+
+
+class FakeUploadFile:
+    """Imita UploadFile: read(n) asíncrono sobre un buffer."""
+
+    def __init__(self, data: bytes):
+        self._buffer = io.BytesIO(data)
+        self.reads = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        self.reads += 1
+        return self._buffer.read(size)
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_chunks_and_checksum():
+    data = b"x" * 2500 + b"fin"
+    stream = InputFileUploadStream(FakeUploadFile(data), max_bytes=10_000, chunk_size=1000)
+
+    assert stream.checksum is None
+    chunks = [chunk async for chunk in stream]
+
+    assert max(len(c) for c in chunks) <= 1000
+    assert b"".join(chunks) == data
+    assert stream.size_bytes == len(data)
+    assert stream.checksum == hashlib.sha256(data).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_declared_size_over_limit_rejected_before_reading():
+    source = FakeUploadFile(b"abc")
+    stream = InputFileUploadStream(source, max_bytes=100, declared_size=101)
+
+    with pytest.raises(FileValidationError):
+        stream.check_declared_size()
+    assert source.reads == 0
+    assert stream.limit_exceeded
+
+
+@pytest.mark.asyncio
+async def test_stream_stops_when_limit_exceeded():
+    stream = InputFileUploadStream(FakeUploadFile(b"y" * 5000), max_bytes=2500, chunk_size=1000)
+    received = []
+
+    with pytest.raises(FileValidationError):
+        async for chunk in stream:
+            received.append(chunk)
+
+    assert sum(len(c) for c in received) <= 2500
+    assert stream.limit_exceeded
+    assert stream.checksum is None
@@ -8,12 +8,14 @@ Endpoints:
 - GET /files/product/project/{project_id}
 - GET /files/product/{product_file_id}/download-url
 - DELETE /files/product/{product_file_id}
+
+También: el adaptador de storage implementa AsyncStorageClient completo.
 """
 
 import pytest
 from uuid import uuid4
 from fastapi.testclient import TestClient
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from app.main import app
 
@@ -97,4 +99,28 @@ class TestProductFilesRoutesV2:
         assert response.status_code in (200, 204, 404, 500)
 
 
+async def test_storage_client_implements_streaming_protocol():
+    """get_storage_client expone iter_bytes/upload_stream delegando al cliente HTTP."""
+    from app.modules.files.routes.product_files_routes import get_storage_client
+    from app.modules.files.services.storage_ops_service import AsyncStorageClient
+
+    http_client = MagicMock()
+    http_client.upload_stream = AsyncMock()
+    with patch("app.shared.utils.http_storage_client.get_http_storage_client", return_value=http_client):
+        storage = await get_storage_client()
+
+    assert isinstance(storage, AsyncStorageClient)
+
+    stream = storage.iter_bytes("bucket", "users/u/projects/p/out.pdf", 4096)
+    assert stream is http_client.iter_bytes.return_value
+    http_client.iter_bytes.assert_called_once_with("bucket", "users/u/projects/p/out.pdf", 4096)
+
+    await storage.upload_stream("bucket", "users/u/projects/p/out.pdf", object(), mime_type="application/pdf")
+    args, kwargs = http_client.upload_stream.await_args
+    assert args[:2] == ("bucket", "users/u/projects/p/out.pdf")
+    assert kwargs["content_type"] == "application/pdf"
+    # Los productos nunca sobrescriben un objeto existente
+    assert kwargs["overwrite"] is False
+
+
 # Fin del archivo
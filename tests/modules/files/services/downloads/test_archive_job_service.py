@@ -0,0 +1,190 @@
+# tests/modules/files/services/downloads/test_archive_job_service.py
+# -*- coding: utf-8 -*-
+"""
+Tests para los jobs de ZIP prearmado (ArchiveJobManager).
+
+Cubre:
+- El hash del manifiesto depende de las versiones (ETag), no del orden.
+- Un build sube un ZIP válido y deja el job en 'ready'.
+- Repetir la solicitud sin cambios sirve el ZIP guardado sin reconstruirlo.
+- Si faltan todos los archivos el job falla sin build.
+- Si un miembro no se puede leer el job falla y el ZIP incompleto no queda
+  cacheado bajo el hash del manifiesto.
+- Un build interrumpido a mitad de la subida no deja nada en la clave final.
+"""
+
+import asyncio
+import io
+import zipfile
+
+import pytest
+
+from app.modules.files.services.archive_job_service import (
+    ARCHIVE_STATUS_FAILED,
+    ARCHIVE_STATUS_READY,
+    ArchiveJobManager,
+    ArchiveMember,
+    compute_manifest_hash,
+)
+
+PREFIX = "users/u1/projects/p1/"
+
+
+class FakeStorage:
+    """Cliente de storage en memoria con la interfaz usada por el gestor."""
+
+    def __init__(self, objects, broken=()):
+        self.objects = dict(objects)
+        self.broken = set(broken)
+        self.uploads = 0
+        self.uploaded_paths = []
+
+    async def get_file_metadata(self, bucket, path):
+        data = self.objects.get(path)
+        if data is None:
+            return {"exists": False}
+        return {"exists": True, "etag": f"etag-{hash(data)}", "content_length": len(data)}
+
+    async def iter_bytes(self, bucket, path):
+        data = self.objects.get(path)
+        if data is None:
+            raise FileNotFoundError(path)
+        if path in self.broken:
+            raise ConnectionError(f"storage read failed: {path}")
+        for i in range(0, len(data), 1000):
+            await asyncio.sleep(0)
+            yield data[i:i + 1000]
+
+    async def upload_stream(self, bucket, path, stream, content_type=None, overwrite=True):
+        self.uploads += 1
+        self.uploaded_paths.append(path)
+        self.objects[path] = b"".join([block async for block in stream])
+        return {}
+
+    async def move_file(self, bucket, source_path, dest_path):
+        if dest_path in self.objects:
+            raise FileExistsError(dest_path)
+        self.objects[dest_path] = self.objects.pop(source_path)
+        return True
+
+    async def delete_file(self, bucket, path):
+        if self.objects.pop(path, None) is None:
+            raise FileNotFoundError(path)
+        return True
+
+    async def create_signed_url(self, bucket, path, expires_in=3600):
+        return f"https://storage.test/{path}?token=x"
+
+
+def _manager(storage):
+    return ArchiveJobManager(bucket="test", storage_client_factory=lambda: storage)
+
+
+async def _wait_done(manager, job):
+    for _ in range(200):
+        if job.is_done:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError("archive job did not finish")
+
+
+def test_manifest_hash_tracks_versions_not_order():
+    a = ArchiveMember(PREFIX + "a.txt", "a.txt", 3, "e1")
+    b = ArchiveMember(PREFIX + "b.txt", "b.txt", 3, "e2")
+    b_changed = ArchiveMember(PREFIX + "b.txt", "b.txt", 3, "e3")
+
+    assert compute_manifest_hash("p1", [a, b]) == compute_manifest_hash("p1", [b, a])
+    assert compute_manifest_hash("p1", [a, b]) != compute_manifest_hash("p1", [a, b_changed])
+
+
+async def test_build_uploads_archive_and_reuses_it():
+    storage = FakeStorage({
+        PREFIX + "a.txt": b"hola " * 500,
+        PREFIX + "b.pdf": b"%PDF-1.7 contenido",
+    })
+    manager = _manager(storage)
+    paths = [PREFIX + "a.txt", PREFIX + "b.pdf"]
+
+    job = await _wait_done(manager, await manager.submit("p1", PREFIX, paths))
+    assert job.status == ARCHIVE_STATUS_READY
+    assert not job.cached
+    assert job.storage_path == f"{PREFIX}.archives/{job.job_id}.zip"
+    # Se sube a la clave temporal y se publica con un move
+    assert storage.uploaded_paths == [job.storage_path + ".partial"]
+    assert job.storage_path + ".partial" not in storage.objects
+
+    with zipfile.ZipFile(io.BytesIO(storage.objects[job.storage_path])) as zf:
+        assert sorted(zf.namelist()) == ["a.txt", "b.pdf"]
+        assert zf.read("a.txt") == b"hola " * 500
+
+    # Otra instancia (sin estado en memoria) encuentra el ZIP en storage
+    other = _manager(storage)
+    again = await other.submit("p1", PREFIX, list(reversed(paths)))
+    assert again.job_id == job.job_id
+    assert again.status == ARCHIVE_STATUS_READY and again.cached
+    assert storage.uploads == 1
+    assert (await other.signed_url(again)).startswith("https://storage.test/")
+
+
+async def test_all_missing_fails_without_build():
+    storage = FakeStorage({})
+    manager = _manager(storage)
+
+    job = await manager.submit("p1", PREFIX, [PREFIX + "nope.txt"])
+
+    assert job.status == ARCHIVE_STATUS_FAILED
+    assert job.missing_paths == [PREFIX + "nope.txt"]
+    assert storage.uploads == 0
+
+
+async def test_failed_member_is_not_cached():
+    storage = FakeStorage(
+        {
+            PREFIX + "a.txt": b"hola " * 500,
+            PREFIX + "b.txt": b"adios " * 500,
+        },
+        broken={PREFIX + "b.txt"},
+    )
+    manager = _manager(storage)
+    paths = [PREFIX + "a.txt", PREFIX + "b.txt"]
+
+    job = await _wait_done(manager, await manager.submit("p1", PREFIX, paths))
+
+    assert job.status == ARCHIVE_STATUS_FAILED
+    assert job.error == "members_failed"
+    assert job.failed_members == ["b.txt"]
+    assert job.storage_path not in storage.objects
+    assert job.storage_path + ".partial" not in storage.objects
+    with pytest.raises(ValueError):
+        await manager.signed_url(job)
+
+    # Otra instancia no encuentra un ZIP cacheado: vuelve a construir
+    storage.broken.clear()
+    other = _manager(storage)
+    retry = await _wait_done(other, await other.submit("p1", PREFIX, paths))
+    assert retry.job_id == job.job_id
+    assert retry.status == ARCHIVE_STATUS_READY and not retry.cached
+    assert storage.uploads == 2
+
+
+async def test_interrupted_upload_never_reaches_final_key():
+    storage = FakeStorage({PREFIX + "a.txt": b"hola " * 500})
+    started = asyncio.Event()
+
+    async def hanging_upload(bucket, path, stream, content_type=None, overwrite=True):
+        # Sube el primer bloque y se queda colgado (instancia que muere a mitad)
+        storage.objects[path] = await stream.__anext__()
+        started.set()
+        await asyncio.Event().wait()
+
+    storage.upload_stream = hanging_upload
+    manager = _manager(storage)
+
+    job = await manager.submit("p1", PREFIX, [PREFIX + "a.txt"])
+    await asyncio.wait_for(started.wait(), timeout=2)
+
+    assert job.storage_path + ".partial" in storage.objects
+    assert job.storage_path not in storage.objects
+    # Otra instancia no confunde el ZIP a medias con uno terminado
+    assert await _manager(storage).get(PREFIX, job.job_id) is None
+    await manager.shutdown()
@@ -0,0 +1,50 @@
+# tests/modules/files/services/downloads/test_zip_compression_policy.py
+# -*- coding: utf-8 -*-
+"""
+Tests para la política de compresión por miembro de los ZIP exportados.
+
+Cubre:
+- Formatos ya comprimidos (PDF, imágenes, Office) se guardan sin deflate.
+- Texto se comprime con el nivel por defecto.
+- Contenido de alta entropía sin tipo conocido se guarda.
+- create_zip_from_bytes aplica la política a cada miembro.
+"""
+
+import io
+import os
+import zipfile
+
+from app.modules.files.services.zip_compression_policy import (
+    DEFLATE_DEFAULT,
+    STORED,
+    choose_zip_compression,
+)
+from app.modules.files.services.zip_creator_service import create_zip_from_bytes
+
+
+def test_already_compressed_types_are_stored():
+    for name in ("doc.pdf", "scan.jpg", "report.docx", "sheet.xlsx", "bundle.zip"):
+        assert choose_zip_compression(name, size=100_000) == STORED, name
+
+
+def test_text_is_deflated_with_default_level():
+    text = b"lorem ipsum dolor sit amet " * 1000
+    assert choose_zip_compression("notes.txt", sample=text, size=len(text)) == DEFLATE_DEFAULT
+
+
+def test_high_entropy_unknown_type_is_stored():
+    blob = os.urandom(64 * 1024)
+    assert choose_zip_compression("data.bin", sample=blob, size=len(blob)) == STORED
+
+
+def test_create_zip_from_bytes_applies_policy_per_member():
+    text = b"linea de texto repetida\n" * 2000
+    pdf = b"%PDF-1.7\n" + os.urandom(32 * 1024)
+
+    zip_bytes = create_zip_from_bytes({"a.txt": text, "b.pdf": pdf})
+
+    with zipfile.ZipFile(io.BytesIO(zip_bytes), "r") as zf:
+        assert zf.getinfo("a.txt").compress_type == zipfile.ZIP_DEFLATED
+        assert zf.getinfo("b.pdf").compress_type == zipfile.ZIP_STORED
+        assert zf.read("a.txt") == text
+        assert zf.read("b.pdf") == pdf
@@ -0,0 +1,89 @@
+# tests/modules/files/services/downloads/test_zip_stream_service.py
+# -*- coding: utf-8 -*-
+"""
+Tests para la generación de ZIP en streaming.
+
+Cubre:
+- ZIP válido con data descriptors, en el orden pedido.
+- Entradas cuyo stream falla antes de empezar se omiten.
+- Read-ahead acotado: nunca más descargas simultáneas que las pedidas.
+"""
+
+import asyncio
+import io
+import zipfile
+
+import pytest
+
+from app.modules.files.services.zip_stream_service import (
+    ZipStreamEntry,
+    ZipStreamStats,
+    stream_zip,
+)
+
+
+def _source(data: bytes, chunk: int = 1000, fail: bool = False, tracker=None):
+    async def open_stream():
+        if tracker is not None:
+            tracker["active"] += 1
+            tracker["peak"] = max(tracker["peak"], tracker["active"])
+        try:
+            if fail:
+                raise FileNotFoundError("missing")
+            for i in range(0, len(data), chunk):
+                await asyncio.sleep(0)
+                yield data[i:i + chunk]
+        finally:
+            if tracker is not None:
+                tracker["active"] -= 1
+    return open_stream
+
+
+async def _collect(entries, **kwargs) -> bytes:
+    return b"".join([block async for block in stream_zip(entries, **kwargs)])
+
+
+@pytest.mark.asyncio
+async def test_stream_zip_produces_valid_archive():
+    payload = bytes(range(256)) * 400
+    entries = [
+        ZipStreamEntry("a.txt", _source(b"hola" * 5000)),
+        ZipStreamEntry("b.bin", _source(payload), size=len(payload)),
+        ZipStreamEntry("vacio.txt", _source(b"")),
+    ]
+
+    zf = zipfile.ZipFile(io.BytesIO(await _collect(entries)))
+
+    assert zf.testzip() is None
+    assert zf.namelist() == ["a.txt", "b.bin", "vacio.txt"]
+    assert zf.read("b.bin") == payload
+    assert all(info.flag_bits & 0x08 for info in zf.infolist())  # data descriptor
+
+
+@pytest.mark.asyncio
+async def test_failed_entry_is_skipped():
+    stats = ZipStreamStats()
+    entries = [
+        ZipStreamEntry("ok.txt", _source(b"ok")),
+        ZipStreamEntry("falla.txt", _source(b"", fail=True)),
+    ]
+
+    zf = zipfile.ZipFile(io.BytesIO(await _collect(entries, stats=stats)))
+
+    assert zf.namelist() == ["ok.txt"]
+    assert stats.entries_written == 1
+    assert [name for name, _ in stats.failed] == ["falla.txt"]
+
+
+@pytest.mark.asyncio
+async def test_read_ahead_is_bounded():
+    tracker = {"active": 0, "peak": 0}
+    entries = [
+        ZipStreamEntry(f"f{i}.txt", _source(b"x" * 20000, tracker=tracker))
+        for i in range(10)
+    ]
+
+    zf = zipfile.ZipFile(io.BytesIO(await _collect(entries, read_ahead=2, queue_chunks=1)))
+
+    assert len(zf.namelist()) == 10
+    assert tracker["peak"] <= 2
@@ -0,0 +1,55 @@
+# tests/modules/files/services/test_storage_client_factory.py
+# -*- coding: utf-8 -*-
+"""
+Tests para la fábrica del cliente de storage real (storage_client_factory).
+
+Cubre:
+- El adaptador implementa AsyncStorageClient completo.
+- Insumos/productos no sobrescriben; el pipeline RAG sí.
+- Rutas, worker RAG y scheduler comparten la misma fábrica.
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.modules.files.services import storage_client_factory
+from app.modules.files.services.storage_ops_service import AsyncStorageClient
+
+HTTP_CLIENT = "app.shared.utils.http_storage_client.get_http_storage_client"
+
+
+def _http_client():
+    client = MagicMock()
+    client.upload_file = AsyncMock()
+    client.upload_stream = AsyncMock()
+    return client
+
+
+@pytest.mark.parametrize(
+    "factory, overwrite",
+    [
+        (storage_client_factory.get_storage_client, False),
+        (storage_client_factory.get_pipeline_storage_client, True),
+    ],
+)
+async def test_factories_set_overwrite_policy(factory, overwrite):
+    http_client = _http_client()
+    with patch(HTTP_CLIENT, return_value=http_client):
+        storage = await factory()
+
+    assert isinstance(storage, AsyncStorageClient)
+
+    await storage.upload_bytes("bucket", "k.txt", b"abc", mime_type="text/plain")
+    await storage.upload_stream("bucket", "k.bin", object())
+
+    assert http_client.upload_file.await_args.kwargs["overwrite"] is overwrite
+    assert http_client.upload_stream.await_args.kwargs["overwrite"] is overwrite
+    assert http_client.upload_stream.await_args.kwargs["content_type"] == "application/octet-stream"
+
+
+def test_routes_reuse_the_service_factory():
+    from app.modules.files.routes import input_files_routes, product_files_routes
+
+    assert input_files_routes.get_storage_client is storage_client_factory.get_storage_client
+    assert product_files_routes.get_storage_client is storage_client_factory.get_storage_client
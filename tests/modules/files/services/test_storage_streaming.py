@@ -0,0 +1,117 @@
+# tests/modules/files/services/test_storage_streaming.py
+# -*- coding: utf-8 -*-
+"""
+Tests para los helpers de I/O en streaming de storage_ops_service.
+
+Cubre:
+- Parseo de URIs bucket/key (con y sin esquema).
+- spool_object: descarga por bloques a un SpooledTemporaryFile rebobinado.
+- upload_file_stream + iter_file_chunks: subida por bloques sin materializar.
+- download_to_file: escritura incremental y conteo de bytes.
+"""
+
+import io
+
+import pytest
+
+from app.modules.files.services.storage_ops_service import (
+    download_to_file,
+    iter_file_chunks,
+    iter_text_chunks,
+    spool_object,
+    split_storage_uri,
+    upload_file_stream,
+)
+
+
+class FakeStreamingStorage:
+    """Storage en memoria que expone iter_bytes/upload_stream."""
+
+    def __init__(self, objects=None):
+        self.objects = dict(objects or {})
+        self.uploaded_blocks = []
+
+    async def iter_bytes(self, bucket, key, chunk_size=1024):
+        if (bucket, key) not in self.objects:
+            raise FileNotFoundError(f"{bucket}/{key}")
+        data = self.objects[(bucket, key)]
+        for i in range(0, len(data), chunk_size):
+            yield data[i:i + chunk_size]
+
+    async def upload_stream(self, bucket, key, stream, mime_type=None):
+        blocks = [block async for block in stream]
+        self.uploaded_blocks = blocks
+        self.objects[(bucket, key)] = b"".join(blocks)
+
+
+@pytest.mark.parametrize(
+    "uri, expected",
+    [
+        ("rag-cache-jobs/123/converted.txt", ("rag-cache-jobs", "123/converted.txt")),
+        ("supabase://users-files/a/b.pdf", ("users-files", "a/b.pdf")),
+    ],
+)
+def test_split_storage_uri(uri, expected):
+    assert split_storage_uri(uri) == expected
+
+
+def test_split_storage_uri_without_key_raises():
+    with pytest.raises(ValueError):
+        split_storage_uri("solo-bucket")
+
+
+@pytest.mark.asyncio
+async def test_spool_object_rolls_over_and_rewinds():
+    """Un objeto mayor que max_memory pasa a disco y queda listo para leer."""
+    data = b"linea\n" * 1000
+    storage = FakeStreamingStorage({("b", "k"): data})
+
+    spooled = await spool_object(storage, bucket="b", key="k", chunk_size=64, max_memory=512)
+    with spooled:
+        assert spooled._rolled
+        text = io.TextIOWrapper(spooled, encoding="utf-8")
+        assert sum(1 for _ in text) == 1000
+
+
+@pytest.mark.asyncio
+async def test_spool_object_missing_propagates_not_found():
+    with pytest.raises(FileNotFoundError):
+        await spool_object(FakeStreamingStorage(), bucket="b", key="nope")
+
+
+@pytest.mark.asyncio
+async def test_upload_file_stream_sends_bounded_blocks():
+    storage = FakeStreamingStorage()
+    data = bytes(range(256)) * 10
+
+    await upload_file_stream(
+        storage,
+        bucket="b",
+        key="k",
+        stream=iter_file_chunks(io.BytesIO(data), chunk_size=100),
+    )
+
+    assert storage.objects[("b", "k")] == data
+    assert max(len(b) for b in storage.uploaded_blocks) <= 100
+
+
+@pytest.mark.asyncio
+async def test_iter_text_chunks_round_trips_utf8():
+    text = "ñandú " * 50
+    blocks = [b async for b in iter_text_chunks(text, chunk_size=7)]
+
+    assert b"".join(blocks).decode("utf-8") == text
+
+
+@pytest.mark.asyncio
+async def test_download_to_file_counts_bytes():
+    data = b"x" * 3000
+    storage = FakeStreamingStorage({("b", "k"): data})
+    out = io.BytesIO()
+
+    written = await download_to_file(storage, out, bucket="b", key="k", chunk_size=256)
+
+    assert written == len(data)
+    assert out.getvalue() == data
+
+# Fin del archivo tests/modules/files/services/test_storage_streaming.py
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+backend/tests/modules/rag/converters/pdf/test_pdf_document_cache.py
+
+Tests para la cache por proceso de documentos PyMuPDF (PDFDocumentCache).
+
+Cubre:
+- Reutilización del handle y desalojo LRU más allá de max_open.
+- Un documento prestado no se desaloja hasta devolverlo.
+- Invalidación por (tamaño, mtime_ns) cuando el archivo se reescribe.
+- release() al terminar un job y descarte de archivos borrados.
+
+Autor: DoxAI
+Fecha: 2025-12-19
+"""
+
+import os
+
+import pytest
+
+cache_module = pytest.importorskip(
+    "app.modules.rag.converters.pdf.rendering.pdf_document_cache",
+    reason="Se omite si el paquete de conversores PDF no se puede importar",
+)
+PDFDocumentCache = cache_module.PDFDocumentCache
+
+
+class _FakeDocument:
+    def __init__(self, path):
+        self.path = path
+        self.closed = False
+
+    def __len__(self):
+        return 1
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeFitz:
+    """Sustituto de fitz que registra cada apertura."""
+
+    def __init__(self):
+        self.opened = []
+
+    def open(self, path):
+        doc = _FakeDocument(path)
+        self.opened.append(doc)
+        return doc
+
+
+@pytest.fixture
+def fake_fitz(monkeypatch):
+    fitz = _FakeFitz()
+    monkeypatch.setattr(cache_module, "fitz", fitz, raising=False)
+    monkeypatch.setattr(cache_module, "HAS_PYMUPDF", True)
+    return fitz
+
+
+@pytest.fixture
+def pdfs(tmp_path):
+    paths = {}
+    for name in ("a", "b", "c"):
+        path = tmp_path / f"{name}.pdf"
+        path.write_bytes(b"%PDF-1.7 " + name.encode())
+        paths[name] = path
+    return paths
+
+
+def _open(cache, path):
+    with cache.open(path) as doc:
+        return doc
+
+
+def test_reuses_handle_and_evicts_least_recently_used(fake_fitz, pdfs):
+    cache = PDFDocumentCache(max_open=2)
+
+    a = _open(cache, pdfs["a"])
+    assert _open(cache, pdfs["a"]) is a
+    b = _open(cache, pdfs["b"])
+    _open(cache, pdfs["a"])  # a pasa a ser el más reciente
+    c = _open(cache, pdfs["c"])
+
+    assert b.closed
+    assert not a.closed and not c.closed
+    assert cache.get_stats()["size"] == 2
+    assert cache.opens == 3 and cache.hits == 2
+
+
+def test_borrowed_document_is_not_evicted(fake_fitz, pdfs):
+    cache = PDFDocumentCache(max_open=1)
+
+    with cache.open(pdfs["a"]) as a:
+        b = _open(cache, pdfs["b"])
+        # a es el menos reciente pero está prestado: se desaloja b
+        assert b.closed
+        assert not a.closed
+        assert cache.get_stats()["size"] == 1
+    assert not a.closed
+
+    # Ya devuelto, a sí se desaloja como cualquier otro
+    c = _open(cache, pdfs["c"])
+    assert a.closed and not c.closed
+
+
+def test_rewritten_file_is_reopened(fake_fitz, pdfs):
+    cache = PDFDocumentCache()
+    path = pdfs["a"]
+
+    first = _open(cache, path)
+    stat = os.stat(path)
+    path.write_bytes(b"%PDF-1.7 otra version, mas larga")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    second = _open(cache, path)
+
+    assert second is not first
+    assert first.closed
+    assert cache.opens == 2
+    assert cache.get_stats()["size"] == 1
+
+
+def test_same_size_new_mtime_is_reopened(fake_fitz, pdfs):
+    cache = PDFDocumentCache()
+    path = pdfs["a"]
+
+    first = _open(cache, path)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert _open(cache, path) is not first
+
+
+def test_release_closes_handles_of_the_job_pdf(fake_fitz, pdfs):
+    cache = PDFDocumentCache()
+    a = _open(cache, pdfs["a"])
+    b = _open(cache, pdfs["b"])
+
+    cache.release(pdfs["a"])
+
+    assert a.closed and not b.closed
+    assert _open(cache, pdfs["a"]) is not a
+
+
+def test_deleted_files_are_dropped_on_next_miss(fake_fitz, pdfs):
+    cache = PDFDocumentCache()
+    a = _open(cache, pdfs["a"])
+    os.unlink(pdfs["a"])
+
+    _open(cache, pdfs["b"])
+
+    assert a.closed
+    assert cache.get_stats()["size"] == 1
+
+
+def test_release_pdf_document_uses_process_cache(fake_fitz, pdfs):
+    with cache_module.open_pdf_document(pdfs["c"]) as c:
+        pass
+
+    cache_module.release_pdf_document(pdfs["c"])
+    cache_module.release_pdf_document(pdfs["c"])  # idempotente
+
+    assert c.closed
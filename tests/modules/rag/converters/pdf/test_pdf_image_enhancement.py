@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+backend/tests/modules/rag/converters/pdf/test_pdf_image_enhancement.py
+
+Tests para los fallbacks numpy del realce de imágenes de página.
+
+Cubre:
+- Umbral de Otsu en una imagen bimodal y en una imagen uniforme.
+- Estimación de inclinación por proyección sobre líneas con pendiente conocida.
+- Warp afín por mapeo inverso: identidad, traslación y rotación de 90°.
+- Decisión de etapas (plan_enhancements) a partir de las métricas.
+- Calibración del estimador de ruido: una página de texto limpia no se
+  suaviza y una con ruido sí.
+
+Autor: DoxAI
+Fecha: 2025-12-19
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+enhancement = pytest.importorskip(
+    "app.modules.rag.converters.pdf.preprocessing.pdf_image_enhancement",
+    reason="Se omite si el paquete de conversores PDF no se puede importar",
+)
+
+
+def _bimodal(seed=3):
+    rng = np.random.default_rng(seed)
+    dark = rng.normal(40, 8, size=(60, 100))
+    light = rng.normal(200, 8, size=(60, 100))
+    return np.clip(np.vstack([dark, light]), 0, 255).astype(np.uint8)
+
+
+def _sloped_lines(angle_deg, shape=(400, 600), spacing=30, thickness=2):
+    """Página blanca con líneas oscuras que bajan hacia la derecha angle_deg grados."""
+    h, w = shape
+    page = np.full(shape, 255, dtype=np.uint8)
+    xs = np.arange(w)
+    drop = np.rint(xs * np.tan(np.radians(angle_deg))).astype(np.int64)
+    for y0 in range(20, h - 60, spacing):
+        for t in range(thickness):
+            ys = y0 + drop + t
+            ok = (ys >= 0) & (ys < h)
+            page[ys[ok], xs[ok]] = 0
+    return page
+
+
+def test_otsu_separates_bimodal_image():
+    image = _bimodal()
+
+    threshold = enhancement._otsu_threshold(image)
+
+    assert 70 < threshold < 170
+    assert (image[:60] <= threshold).all()
+    assert (image[60:] > threshold).all()
+
+
+@pytest.mark.parametrize("value", [0, 128, 255])
+def test_otsu_uniform_image_returns_midpoint(value):
+    image = np.full((20, 30), value, dtype=np.uint8)
+
+    assert enhancement._otsu_threshold(image) == enhancement.MIDPOINT_THRESHOLD
+
+
+def test_binarizing_blank_page_keeps_it_white(monkeypatch):
+    monkeypatch.setattr(enhancement, "HAS_CV2", False)
+    page = np.full((20, 30), 250, dtype=np.uint8)
+
+    binary = enhancement.PDFImageEnhancer().apply_binarization(page)
+
+    assert (binary == 255).all()
+
+
+@pytest.mark.parametrize("angle", [-4.0, 0.0, 3.0])
+def test_skew_by_projection_recovers_known_slope(angle):
+    page = _sloped_lines(angle)
+
+    assert enhancement._skew_by_projection(page) == pytest.approx(angle, abs=0.25)
+
+
+def test_skew_by_projection_ignores_pages_without_lines():
+    speck = np.full((100, 100), 255, dtype=np.uint8)
+    speck[50, 50] = 0
+    solid = np.zeros((100, 100), dtype=np.uint8)
+
+    assert enhancement._skew_by_projection(speck) == 0.0
+    assert enhancement._skew_by_projection(solid) == 0.0
+
+
+def test_warp_identity_returns_same_pixels():
+    image = _bimodal()
+    identity = np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
+
+    np.testing.assert_array_equal(enhancement._warp_affine_numpy(image, identity), image)
+
+
+def test_warp_translation_fills_uncovered_pixels():
+    image = np.arange(4 * 6, dtype=np.uint8).reshape(4, 6)
+    shift = np.array([[1.0, 0.0, 2.0], [0.0, 1.0, 0.0]])
+
+    out = enhancement._warp_affine_numpy(image, shift, fill=255)
+
+    np.testing.assert_array_equal(out[:, 2:], image[:, :-2])
+    assert (out[:, :2] == 255).all()
+
+
+def test_warp_quarter_turn_matches_rot90():
+    n = 9
+    image = np.arange(n * n, dtype=np.uint8).reshape(n, n)
+    c = (n - 1) / 2.0
+    # Misma forma que apply_deskewing con angle=90 alrededor del centro del píxel
+    quarter = np.array([[0.0, 1.0, c - c], [-1.0, 0.0, c + c]])
+
+    np.testing.assert_array_equal(enhancement._warp_affine_numpy(image, quarter), np.rot90(image))
+
+
+def _metrics(**overrides):
+    metrics = {
+        'image_shape': (100, 80),
+        'skew_angle': 0.0,
+        'binary_fraction': 0.5,
+        'noise_score': 1.0,
+    }
+    metrics.update(overrides)
+    return metrics
+
+
+def test_plan_skips_stages_a_clean_page_does_not_need():
+    enhancer = enhancement.PDFImageEnhancer()
+    clean = _metrics(binary_fraction=0.99)
+
+    plan = enhancer.plan_enhancements(clean, grayscale=True, deskew=True, binarize=True, noise_reduction=True)
+
+    assert plan == {'grayscale': False, 'deskew': False, 'binarize': False, 'noise_reduction': False}
+
+
+def test_plan_runs_stages_the_metrics_call_for():
+    enhancer = enhancement.PDFImageEnhancer()
+    rough = _metrics(
+        image_shape=(100, 80, 3),
+        skew_angle=enhancement.MIN_SKEW_DEGREES + 1.0,
+        noise_score=enhancement.NOISE_THRESHOLD + 1.0,
+    )
+
+    plan = enhancer.plan_enhancements(rough, grayscale=True, deskew=True, binarize=True, noise_reduction=True)
+    assert all(plan.values())
+
+    # Lo que la configuración desactiva nunca se ejecuta
+    assert not any(enhancer.plan_enhancements(rough).values())
+
+
+def test_plan_without_metrics_follows_configuration():
+    enhancer = enhancement.PDFImageEnhancer()
+
+    plan = enhancer.plan_enhancements({'error': 'boom'}, grayscale=True, deskew=False, binarize=True)
+
+    assert plan == {'grayscale': True, 'deskew': False, 'binarize': True, 'noise_reduction': False}
+
+
+def _text_page(shape=(1100, 850), seed=0):
+    """Página blanca con renglones densos de glifos antialiasados."""
+    rng = np.random.default_rng(seed)
+    h, w = shape
+    page = np.full(shape, 255, dtype=np.uint8)
+    for y in range(60, h - 60, 22):
+        x = 60
+        while x < w - 60:
+            glyph_w = int(rng.integers(5, 12))
+            page[y:y + 12, x:x + glyph_w] = 0
+            page[y + 3:y + 9, x + 2:x + glyph_w - 2] = 255
+            x += glyph_w + int(rng.integers(2, 8))
+    return enhancement._box_mean_3x3(enhancement._box_mean_3x3(page))
+
+
+def _with_noise(page, sigma, seed=1):
+    rng = np.random.default_rng(seed)
+    return np.clip(page + rng.normal(0, sigma, page.shape), 0, 255).astype(np.uint8)
+
+
+@pytest.mark.parametrize("grain", [0.0, 1.5])
+def test_clean_text_page_is_not_denoised(grain):
+    enhancer = enhancement.PDFImageEnhancer()
+    page = _with_noise(_text_page(), grain)
+
+    metrics = enhancer.get_image_quality_metrics(page, with_skew=False)
+    plan = enhancer.plan_enhancements(metrics, noise_reduction=True)
+
+    # Los bordes del texto no cuentan como ruido
+    assert metrics['noise_score'] < enhancement.NOISE_THRESHOLD
+    assert plan['noise_reduction'] is False
+
+
+def test_noisy_text_page_is_denoised():
+    enhancer = enhancement.PDFImageEnhancer()
+    page = _with_noise(_text_page(), 15.0)
+
+    metrics = enhancer.get_image_quality_metrics(page, with_skew=False)
+
+    assert metrics['noise_score'] > enhancement.NOISE_THRESHOLD
+    assert enhancer.plan_enhancements(metrics, noise_reduction=True)['noise_reduction'] is True
+
+
+def test_noise_sigma_recovers_gaussian_noise_on_flat_page():
+    flat = np.full((300, 300), 128, dtype=np.uint8)
+
+    assert enhancement._noise_sigma(flat) == 0.0
+    assert enhancement._noise_sigma(_with_noise(flat, 6.0)) == pytest.approx(6.0, rel=0.15)
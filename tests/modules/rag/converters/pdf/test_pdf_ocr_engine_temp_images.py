@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+backend/tests/modules/rag/converters/pdf/test_pdf_ocr_engine_temp_images.py
+
+Tests para las imágenes temporales del motor OCR: si el directorio en RAM
+(/dev/shm) se llena, la escritura cae al directorio temporal normal.
+
+Autor: DoxAI
+Fecha: 2025-12-19
+"""
+
+import errno
+import os
+
+import pytest
+
+engine = pytest.importorskip(
+    "app.modules.rag.converters.pdf.ocr.pdf_ocr_engine",
+    reason="Se omite si el paquete de conversores PDF no se puede importar",
+)
+
+
+class _FakeImage:
+    """Sustituto de PIL.Image que simula un tmpfs lleno en full_dir."""
+
+    def __init__(self, full_dir):
+        self.full_dir = str(full_dir)
+
+    def fromarray(self, image):
+        return self
+
+    def save(self, fp, format=None, compress_level=None):
+        if os.path.dirname(fp.name) == self.full_dir:
+            fp.write(b"\x89PNG partial")
+            raise OSError(errno.ENOSPC, "No space left on device")
+        fp.write(b"\x89PNG ok")
+
+
+def test_enospc_in_ram_dir_falls_back_to_default_temp_dir(tmp_path, monkeypatch):
+    shm_dir = tmp_path / "shm"
+    shm_dir.mkdir()
+    monkeypatch.setattr(engine, "_TEMP_IMAGE_DIR", str(shm_dir))
+    monkeypatch.setattr(engine, "Image", _FakeImage(shm_dir), raising=False)
+
+    path = engine._write_temp_png(object())
+    try:
+        assert os.path.dirname(path) != str(shm_dir)
+        with open(path, "rb") as f:
+            assert f.read() == b"\x89PNG ok"
+        # El archivo parcial se borró y /dev/shm deja de usarse en el proceso
+        assert list(shm_dir.iterdir()) == []
+        assert engine._TEMP_IMAGE_DIR is None
+    finally:
+        os.unlink(path)
+
+
+def test_other_write_errors_are_not_swallowed(tmp_path, monkeypatch):
+    class _Broken(_FakeImage):
+        def save(self, fp, format=None, compress_level=None):
+            raise OSError(errno.EIO, "I/O error")
+
+    monkeypatch.setattr(engine, "_TEMP_IMAGE_DIR", str(tmp_path))
+    monkeypatch.setattr(engine, "Image", _Broken(tmp_path), raising=False)
+
+    with pytest.raises(OSError):
+        engine._write_temp_png(object())
+    assert list(tmp_path.iterdir()) == []
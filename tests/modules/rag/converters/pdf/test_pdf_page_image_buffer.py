@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+backend/tests/modules/rag/converters/pdf/test_pdf_page_image_buffer.py
+
+Tests para el anillo de imágenes de página en memoria compartida
+(PageImageRing).
+
+Cubre:
+- acquire/release de ranuras: exclusividad, espera con timeout, liberación
+  idempotente y despertar de un acquire bloqueado.
+- Ida y vuelta escritura/lectura con un proceso spawn: solo viaja el handle.
+- Comprobación de capacidad de /dev/shm.
+
+Autor: DoxAI
+Fecha: 2025-12-19
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+np = pytest.importorskip("numpy")
+buffer = pytest.importorskip(
+    "app.modules.rag.converters.pdf.rendering.pdf_page_image_buffer",
+    reason="Se omite si el paquete de conversores PDF no se puede importar",
+)
+
+SLOT_BYTES = 64 * 1024
+
+
+@pytest.fixture
+def ring():
+    with buffer.PageImageRing(slots=2, slot_bytes=SLOT_BYTES) as r:
+        yield r
+
+
+def test_acquire_hands_out_distinct_slots_until_exhausted(ring):
+    a = ring.acquire()
+    b = ring.acquire()
+
+    assert {a.slot, b.slot} == {0, 1}
+    assert a.ring_name == b.ring_name == ring.name
+    with pytest.raises(TimeoutError):
+        ring.acquire(timeout=0.05)
+
+    ring.release(a)
+    ring.release(a)  # liberar dos veces no duplica la ranura
+    assert ring.acquire(timeout=0).slot == a.slot
+    with pytest.raises(TimeoutError):
+        ring.acquire(timeout=0)
+
+
+def test_release_wakes_a_blocked_acquire(ring):
+    held = [ring.acquire(), ring.acquire()]
+    acquired = []
+
+    waiter = threading.Thread(target=lambda: acquired.append(ring.acquire(timeout=5)))
+    waiter.start()
+    ring.release(held[1])
+    waiter.join(timeout=5)
+
+    assert not waiter.is_alive()
+    assert acquired[0].slot == held[1].slot
+
+
+def test_write_rejects_images_larger_than_a_slot(ring):
+    handle = ring.acquire()
+    with pytest.raises(ValueError):
+        ring.write(handle, np.zeros(SLOT_BYTES + 1, dtype=np.uint8))
+
+
+def test_round_trip_through_spawned_process(ring):
+    rng = np.random.default_rng(7)
+    page = rng.integers(0, 256, size=(120, 90, 3), dtype=np.uint8)
+    reply = rng.integers(0, 256, size=(40, 30), dtype=np.uint8)
+
+    sent = ring.write(ring.acquire(), page)
+    assert sent.shape == (120, 90, 3)
+    reply_slot = ring.acquire()
+
+    spawn = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+        # Lectura en el hijo: adjunta el bloque por nombre y ve los mismos píxeles
+        seen = pool.submit(buffer.read_page_image, sent).result(timeout=60)
+        # Escritura en el hijo: el padre la lee sin copia desde su ranura
+        filled = pool.submit(buffer.write_page_image, reply_slot, reply).result(timeout=60)
+
+    np.testing.assert_array_equal(seen, page)
+    assert filled.slot == reply_slot.slot and filled.shape == (40, 30)
+    view = ring.view(filled)
+    np.testing.assert_array_equal(view, reply)
+    del view
+
+
+@pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="Sin /dev/shm")
+def test_shared_memory_fits_checks_dev_shm_capacity():
+    assert buffer.shared_memory_fits(0)
+    assert not buffer.shared_memory_fits(1 << 62)
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+backend/tests/modules/rag/converters/pdf/test_pdf_parallel_executor.py
+
+Tests para PDFParallelExecutor: ventana de envío acotada y etapas
+render/OCR comunicadas por el anillo de memoria compartida.
+
+Autor: DoxAI
+Fecha: 2025-12-19
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+
+import pytest
+
+executor_module = pytest.importorskip(
+    "app.modules.rag.converters.pdf.parallel.pdf_parallel_executor",
+    reason="Se omite si el paquete de conversores PDF no se puede importar",
+)
+PDFParallelExecutor = executor_module.PDFParallelExecutor
+
+
+class _InFlightProbe:
+    """Worker falso que registra cuántas páginas están en curso a la vez."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+
+    def __call__(self, pdf_path_str, page_idx, strategy, timeout_sec, max_retries):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+        time.sleep(0.01)
+        with self._lock:
+            self.current -= 1
+        return page_idx, {"text": f"page {page_idx}", "tables": []}
+
+
+@pytest.fixture
+def wide_pool(monkeypatch):
+    # Pool mucho más ancho que max_workers: el límite debe venir del executor
+    pool = ThreadPoolExecutor(max_workers=16)
+    probe = _InFlightProbe()
+    monkeypatch.setattr(executor_module, "HAS_DEPENDENCIES", True)
+    monkeypatch.setattr(executor_module, "get_pdf_worker_pool", lambda: pool)
+    monkeypatch.setattr(executor_module, "process_single_page_worker", probe)
+    yield probe
+    pool.shutdown(wait=True)
+
+
+def test_max_workers_bounds_pages_in_flight(wide_pool):
+    executor = PDFParallelExecutor(max_workers=3, page_timeout=10, log_per_page=False, use_shared_images=False)
+
+    results = executor.execute_parallel_processing("doc.pdf", list(range(12)), "fast", None)
+
+    assert sorted(results) == list(range(12))
+    assert results[5]["text"] == "page 5"
+    assert 1 <= wide_pool.peak <= 3
+
+
+def test_cancellation_stops_feeding_the_pool(wide_pool, monkeypatch):
+    pool = executor_module.get_pdf_worker_pool()
+    submitted = []
+
+    def counting_submit(fn, *args):
+        submitted.append(args[1])
+        return ThreadPoolExecutor.submit(pool, fn, *args)
+
+    monkeypatch.setattr(pool, "submit", counting_submit)
+    executor = PDFParallelExecutor(
+        max_workers=2,
+        page_timeout=10,
+        log_per_page=False,
+        is_cancelled=lambda job_id: len(submitted) >= 4,
+        use_shared_images=False,
+    )
+
+    results = executor.execute_parallel_processing("doc.pdf", list(range(20)), "fast", "job-1")
+
+    assert len(submitted) == 4
+    assert set(results) <= set(submitted)
+
+
+def test_shared_images_hand_slots_from_render_to_ocr(wide_pool, monkeypatch):
+    if not executor_module.HAS_SHARED_IMAGES:
+        pytest.skip("numpy / shared memory no disponibles")
+    ocr_slots = []
+
+    def fake_render(pdf_path_str, page_idx, handle, dpi=None):
+        return page_idx, replace(handle, shape=(4, 4))
+
+    def fake_ocr(handle, page_idx, strategy="hi_res", infer_tables=True):
+        ocr_slots.append(handle.slot)
+        time.sleep(0.005)
+        return page_idx, {"text": f"page {page_idx}", "tables": []}
+
+    monkeypatch.setattr(executor_module, "render_page_to_shared_worker", fake_render)
+    monkeypatch.setattr(executor_module, "ocr_shared_page_worker", fake_ocr)
+    executor = PDFParallelExecutor(max_workers=2, page_timeout=10, log_per_page=False, slot_bytes=1024)
+
+    results = executor.execute_parallel_processing("doc.pdf", list(range(10)), "fast", None)
+
+    assert sorted(results) == list(range(10))
+    assert results[7]["text"] == "page 7"
+    # Una ranura por página en vuelo; se reciclan entre páginas
+    assert len(ocr_slots) == 10
+    assert set(ocr_slots) <= {0, 1}
+    # El worker de página completa no se usa en este camino
+    assert wide_pool.peak == 0
+
+
+def test_page_too_large_for_slot_falls_back_to_page_worker(wide_pool, monkeypatch):
+    if not executor_module.HAS_SHARED_IMAGES:
+        pytest.skip("numpy / shared memory no disponibles")
+    ocr_pages = []
+
+    def fake_render(pdf_path_str, page_idx, handle, dpi=None):
+        # La página 3 no cabe en la ranura: el worker real devuelve None
+        if page_idx == 3:
+            return page_idx, None
+        return page_idx, replace(handle, shape=(4, 4))
+
+    def fake_ocr(handle, page_idx, strategy="hi_res", infer_tables=True):
+        ocr_pages.append(page_idx)
+        return page_idx, {"text": f"page {page_idx}", "tables": []}
+
+    monkeypatch.setattr(executor_module, "render_page_to_shared_worker", fake_render)
+    monkeypatch.setattr(executor_module, "ocr_shared_page_worker", fake_ocr)
+    executor = PDFParallelExecutor(max_workers=2, page_timeout=10, log_per_page=False, slot_bytes=1024)
+
+    results = executor.execute_parallel_processing("doc.pdf", list(range(6)), "fast", None)
+
+    # La página no se pierde: la procesa el worker de página completa
+    assert sorted(results) == list(range(6))
+    assert results[3]["text"] == "page 3"
+    assert 3 not in ocr_pages
+    assert wide_pool.peak == 1
@@ -38,16 +38,17 @@ def test_convert_to_text_signature_minimal():
     assert not missing, f"convert_to_text requiere parámetros {missing}"
 
 @pytest.mark.asyncio
-async def test_convert_to_text_currently_not_implemented():
-    """Verificar que PDF aún lanza NotImplementedError."""
+async def test_convert_to_text_invalid_pdf_raises_runtime_error():
+    """Un PDF corrupto falla como error de conversión (ya no NotImplementedError)."""
     # Mock simple de storage_client para que la validación pase
     class MockStorageClient:
-        async def read(self, uri: str) -> bytes:
-            return b"fake pdf content"
-        async def write(self, uri: str, data: bytes, content_type: str):
-            pass
+        async def iter_bytes(self, bucket: str, key: str, chunk_size: int = 1024):
+            yield b"fake pdf content"
+        async def upload_stream(self, bucket: str, key: str, stream, mime_type=None):
+            async for _ in stream:
+                pass
     
-    with pytest.raises(NotImplementedError):
+    with pytest.raises(RuntimeError, match="Error en conversión"):
         await convert_to_text(
             db=None,
             job_id=uuid4(),
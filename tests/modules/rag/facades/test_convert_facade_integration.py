@@ -21,10 +21,15 @@ from app.modules.rag.enums import RagPhase
 
 @pytest.fixture
 def mock_storage_client():
-    """Mock del cliente de storage."""
+    """Mock del cliente de storage (API de streaming)."""
+    async def iter_bytes(bucket, key, chunk_size=1024):
+        data = b"Sample text content from document"
+        for i in range(0, len(data), 8):
+            yield data[i:i + 8]
+
     client = Mock()
-    client.read = AsyncMock(return_value=b"Sample text content from document")
-    client.write = AsyncMock(return_value="rag-cache-jobs/test-job/converted.txt")
+    client.iter_bytes = Mock(side_effect=iter_bytes)
+    client.upload_stream = AsyncMock(return_value=None)
     return client
 
 
@@ -68,8 +73,8 @@ async def test_convert_to_text_plain_text_success(
     assert len(result.checksum) == 64  # SHA-256 hex
     
     # Validar que se llamó al storage
-    mock_storage_client.read.assert_called_once_with(source_uri)
-    mock_storage_client.write.assert_called_once()
+    assert mock_storage_client.iter_bytes.call_args.args[:2] == ("users-files", "test.txt")
+    mock_storage_client.upload_stream.assert_awaited_once()
     
     # Validar eventos registrados (inicio y fin)
     assert event_repo.log_event.call_count == 2
@@ -101,20 +106,17 @@ async def test_convert_to_text_unsupported_mime_type(
             db=adb,
             job_id=job_id,
             file_id=file_id,
-            source_uri="users-files/doc.pdf",
-            mime_type="application/pdf",  # No implementado aún
+            source_uri="users-files/image.png",
+            mime_type="image/png",  # Requiere OCR, no extracción nativa
             storage_client=mock_storage_client,
             job_repo=job_repo,
             event_repo=event_repo,
         )
     
-    # NotImplementedError se propaga sin envolver (contrato de fase no implementada)
-    assert "PDF text extraction requires PyPDF2" in str(exc_info.value)
-    
-    # NotImplementedError no registra evento phase_failed (se propaga directamente)
-    # Solo debe haber registrado phase_started
-    assert event_repo.log_event.call_count == 1
-    assert event_repo.log_event.call_args_list[0].kwargs["event_type"] == "phase_started"
+    # ValueError se envuelve en RuntimeError y registra phase_failed
+    assert "Mime type no soportado" in str(exc_info.value)
+    assert event_repo.log_event.call_count == 2
+    assert event_repo.log_event.call_args_list[-1].kwargs["event_type"] == "phase_failed"
 
 
 @pytest.mark.asyncio
@@ -149,7 +151,10 @@ async def test_convert_to_text_markdown_success(
     file_id = uuid4()
     
     # Simular contenido markdown
-    mock_storage_client.read.return_value = b"# Title\\n\\nSome markdown content"
+    async def iter_markdown(bucket, key, chunk_size=1024):
+        yield b"# Title\\n\\nSome markdown content"
+
+    mock_storage_client.iter_bytes.side_effect = iter_markdown
     
     job_repo, event_repo = mock_repositories
     
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+backend/tests/modules/rag/facades/test_embed_facade_batching.py
+
+Tests de lotes por tokens, concurrencia acotada, persistencia por lote
+y consultas set-based en embed_facade.
+
+Autor: DoxAI
+Fecha: 2025-12-02
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.modules.rag.facades.embed_facade import (
+    generate_embeddings,
+    ChunkSelector,
+    _build_batches,
+)
+from app.modules.rag.models import ChunkMetadata
+from app.modules.rag.services.embedding_cache_service import EmbeddingCacheService
+from app.modules.rag.repositories import (
+    RagJobRepository,
+    RagJobEventRepository,
+    ChunkMetadataRepository,
+    DocumentEmbeddingRepository,
+)
+
+OPENAI = "app.modules.rag.facades.embed_facade.openai_generate_embeddings"
+
+
+def _chunks(n: int, token_count: int = 10) -> list[ChunkMetadata]:
+    file_id = uuid4()
+    return [
+        ChunkMetadata(
+            chunk_id=uuid4(),
+            file_id=file_id,
+            chunk_index=i,
+            chunk_text=f"chunk {i}",
+            token_count=token_count,
+        )
+        for i in range(n)
+    ]
+
+
+def _repos(chunks):
+    event_repo = Mock(spec=RagJobEventRepository)
+    event_repo.log_event = AsyncMock()
+    chunk_repo = Mock(spec=ChunkMetadataRepository)
+    chunk_repo.list_by_file = AsyncMock(return_value=chunks)
+    embedding_repo = Mock(spec=DocumentEmbeddingRepository)
+    embedding_repo.list_embedded_chunk_indexes = AsyncMock(return_value=set())
+    embedding_repo.bulk_insert_embeddings = AsyncMock(side_effect=lambda db, rows: [uuid4() for _ in rows])
+    return dict(
+        job_repo=Mock(spec=RagJobRepository),
+        event_repo=event_repo,
+        chunk_repo=chunk_repo,
+        embedding_repo=embedding_repo,
+        embedding_cache=EmbeddingCacheService(enabled=False),
+    )
+
+
+def test_build_batches_respects_token_and_item_limits():
+    """Los lotes no exceden el presupuesto de tokens ni el máximo de ítems."""
+    chunks = _chunks(10, token_count=30)
+
+    by_tokens = _build_batches(chunks, max_tokens=100, max_items=100)
+    by_items = _build_batches(chunks, max_tokens=10_000, max_items=4)
+
+    assert [len(b) for b in by_tokens] == [3, 3, 3, 1]
+    assert [len(b) for b in by_items] == [4, 4, 2]
+    assert [c.chunk_index for b in by_tokens for c in b] == list(range(10))
+
+
+def test_build_batches_oversized_chunk_goes_alone():
+    """Un chunk mayor que el presupuesto forma su propio lote."""
+    chunks = _chunks(3, token_count=10)
+    chunks[1].token_count = 500
+
+    batches = _build_batches(chunks, max_tokens=100, max_items=100)
+
+    assert [len(b) for b in batches] == [1, 1, 1]
+
+
+@pytest.mark.asyncio
+async def test_generate_embeddings_batches_with_bounded_concurrency():
+    """Cada lote es un request, con no más de max_concurrency en vuelo."""
+    chunks = _chunks(10)
+    repos = _repos(chunks)
+    in_flight = 0
+    peak = 0
+
+    async def fake_openai(texts, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return [[0.1] * 1536 for _ in texts]
+
+    db = AsyncMock()
+    with patch(OPENAI, new=AsyncMock(side_effect=fake_openai)) as mock_openai:
+        result = await generate_embeddings(
+            db=db,
+            job_id=uuid4(),
+            file_id=chunks[0].file_id,
+            embedding_model="text-embedding-3-large",
+            selector=ChunkSelector(),
+            openai_api_key="test-key",
+            batch_max_tokens=20,
+            max_concurrency=2,
+            **repos,
+        )
+
+    assert result.embedded == 10
+    assert mock_openai.await_count == 5
+    assert peak == 2
+    assert repos["embedding_repo"].bulk_insert_embeddings.await_count == 5
+    assert db.commit.await_count == 5
+
+
+@pytest.mark.asyncio
+async def test_generate_embeddings_keeps_completed_batches_on_failure():
+    """Un lote fallido no descarta los lotes ya persistidos."""
+    chunks = _chunks(6)
+    repos = _repos(chunks)
+
+    async def fake_openai(texts, **kwargs):
+        if "chunk 4" in texts:
+            raise RuntimeError("rate limited")
+        return [[0.1] * 1536 for _ in texts]
+
+    db = AsyncMock()
+    with patch(OPENAI, new=AsyncMock(side_effect=fake_openai)):
+        with pytest.raises(RuntimeError, match="rate limited"):
+            await generate_embeddings(
+                db=db,
+                job_id=uuid4(),
+                file_id=chunks[0].file_id,
+                embedding_model="text-embedding-3-large",
+                selector=ChunkSelector(),
+                openai_api_key="test-key",
+                batch_max_items=2,
+                max_concurrency=1,
+                **repos,
+            )
+
+    persisted = [
+        e["chunk_index"]
+        for call in repos["embedding_repo"].bulk_insert_embeddings.await_args_list
+        for e in call.args[1]
+    ]
+    assert persisted == [0, 1, 2, 3]
+    assert db.commit.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_generate_embeddings_awaits_cancelled_batches_on_failure():
+    """Los lotes en vuelo se cancelan y terminan antes de propagar el error."""
+    chunks = _chunks(6)
+    repos = _repos(chunks)
+    cancelled = []
+
+    async def fake_openai(texts, **kwargs):
+        if "chunk 0" in texts:
+            raise RuntimeError("rate limited")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(texts[0])
+            raise
+        return [[0.1] * 1536 for _ in texts]
+
+    db = AsyncMock()
+    with patch(OPENAI, new=AsyncMock(side_effect=fake_openai)):
+        with pytest.raises(RuntimeError, match="rate limited"):
+            await generate_embeddings(
+                db=db,
+                job_id=uuid4(),
+                file_id=chunks[0].file_id,
+                embedding_model="text-embedding-3-large",
+                selector=ChunkSelector(),
+                openai_api_key="test-key",
+                batch_max_items=2,
+                max_concurrency=3,
+                **repos,
+            )
+
+    assert sorted(cancelled) == ["chunk 2", "chunk 4"]
+    repos["embedding_repo"].bulk_insert_embeddings.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_generate_embeddings_uses_bulk_lookups():
+    """Selección por IDs e idempotencia cuestan una consulta cada una."""
+    chunks = _chunks(50)
+    repos = _repos(chunks)
+    repos["chunk_repo"].get_by_ids = AsyncMock(return_value=chunks)
+    repos["embedding_repo"].list_embedded_chunk_indexes = AsyncMock(
+        return_value=set(range(0, 50, 2))
+    )
+
+    with patch(OPENAI, new=AsyncMock(side_effect=lambda texts, **kw: [[0.1] * 1536 for _ in texts])):
+        result = await generate_embeddings(
+            db=AsyncMock(),
+            job_id=uuid4(),
+            file_id=chunks[0].file_id,
+            embedding_model="text-embedding-3-large",
+            selector=ChunkSelector(chunk_ids=[c.chunk_id for c in chunks]),
+            openai_api_key="test-key",
+            **repos,
+        )
+
+    assert result.embedded == 25
+    repos["chunk_repo"].get_by_ids.assert_awaited_once()
+    repos["embedding_repo"].list_embedded_chunk_indexes.assert_awaited_once()
+    embedded = [
+        e["chunk_index"]
+        for call in repos["embedding_repo"].bulk_insert_embeddings.await_args_list
+        for e in call.args[1]
+    ]
+    assert sorted(embedded) == list(range(1, 50, 2))
+
+
+# Fin del archivo backend/tests/modules/rag/facades/test_embed_facade_batching.py
@@ -64,9 +64,9 @@ async def test_generate_embeddings_with_index_range_full(sample_chunks_for_range
     chunk_repo.list_by_file = AsyncMock(return_value=sample_chunks_for_range)
     
     embedding_repo = Mock(spec=DocumentEmbeddingRepository)
-    embedding_repo.exists_for_file_and_chunk = AsyncMock(return_value=False)
-    embedding_repo.insert_embeddings = AsyncMock(
-        side_effect=lambda db, embs: embs  # Retorna los embeddings tal cual
+    embedding_repo.list_embedded_chunk_indexes = AsyncMock(return_value=set())
+    embedding_repo.bulk_insert_embeddings = AsyncMock(
+        side_effect=lambda db, rows: [uuid4() for _ in rows]  # Un ID por fila
     )
     
     # Mock OpenAI embeddings function
@@ -117,9 +117,9 @@ async def test_generate_embeddings_with_index_range_partial(sample_chunks_for_ra
     chunk_repo.list_by_file = AsyncMock(return_value=sample_chunks_for_range)
     
     embedding_repo = Mock(spec=DocumentEmbeddingRepository)
-    embedding_repo.exists_for_file_and_chunk = AsyncMock(return_value=False)
-    embedding_repo.insert_embeddings = AsyncMock(
-        side_effect=lambda db, embs: embs
+    embedding_repo.list_embedded_chunk_indexes = AsyncMock(return_value=set())
+    embedding_repo.bulk_insert_embeddings = AsyncMock(
+        side_effect=lambda db, rows: [uuid4() for _ in rows]
     )
     
     # Mock OpenAI embeddings function
@@ -172,9 +172,9 @@ async def test_generate_embeddings_with_index_range_middle(sample_chunks_for_ran
     chunk_repo.list_by_file = AsyncMock(return_value=sample_chunks_for_range)
     
     embedding_repo = Mock(spec=DocumentEmbeddingRepository)
-    embedding_repo.exists_for_file_and_chunk = AsyncMock(return_value=False)
-    embedding_repo.insert_embeddings = AsyncMock(
-        side_effect=lambda db, embs: embs
+    embedding_repo.list_embedded_chunk_indexes = AsyncMock(return_value=set())
+    embedding_repo.bulk_insert_embeddings = AsyncMock(
+        side_effect=lambda db, rows: [uuid4() for _ in rows]
     )
     
     # Mock OpenAI embeddings function
@@ -227,9 +227,9 @@ async def test_generate_embeddings_with_index_range_single(sample_chunks_for_ran
     chunk_repo.list_by_file = AsyncMock(return_value=sample_chunks_for_range)
     
     embedding_repo = Mock(spec=DocumentEmbeddingRepository)
-    embedding_repo.exists_for_file_and_chunk = AsyncMock(return_value=False)
-    embedding_repo.insert_embeddings = AsyncMock(
-        side_effect=lambda db, embs: embs
+    embedding_repo.list_embedded_chunk_indexes = AsyncMock(return_value=set())
+    embedding_repo.bulk_insert_embeddings = AsyncMock(
+        side_effect=lambda db, rows: [uuid4() for _ in rows]
     )
     
     # Mock OpenAI embeddings function
@@ -38,8 +38,8 @@ def mock_repositories():
     
     chunk_repo = Mock(spec=ChunkMetadataRepository)
     embedding_repo = Mock(spec=DocumentEmbeddingRepository)
-    embedding_repo.exists_for_file_and_chunk = AsyncMock(return_value=False)
-    embedding_repo.insert_embeddings = AsyncMock(return_value=[Mock(), Mock()])
+    embedding_repo.list_embedded_chunk_indexes = AsyncMock(return_value=set())
+    embedding_repo.bulk_insert_embeddings = AsyncMock(return_value=[uuid4(), uuid4()])
     
     return job_repo, event_repo, chunk_repo, embedding_repo
 
@@ -114,7 +114,7 @@ async def test_generate_embeddings_success(
     chunk_repo.list_by_file.assert_called_once_with(adb, file_id)
     
     # Validar que se insertaron embeddings
-    embedding_repo.insert_embeddings.assert_called_once()
+    embedding_repo.bulk_insert_embeddings.assert_called_once()
     
     # Validar eventos (inicio y fin)
     assert event_repo.log_event.call_count == 2
@@ -142,11 +142,11 @@ async def test_generate_embeddings_with_selector_by_ids(
     
     job_repo, event_repo, chunk_repo, embedding_repo = mock_repositories
     
-    # Mock para get_by_id: solo devuelve el primer chunk
-    chunk_repo.get_by_id = AsyncMock(return_value=sample_chunks[0])
+    # Mock para get_by_ids: solo devuelve el primer chunk
+    chunk_repo.get_by_ids = AsyncMock(return_value=[sample_chunks[0]])
     
-    # Configurar insert_embeddings para devolver solo 1 embedding (no 2 como el default)
-    embedding_repo.insert_embeddings = AsyncMock(return_value=[Mock()])
+    # Configurar bulk_insert_embeddings para devolver solo 1 embedding (no 2 como el default)
+    embedding_repo.bulk_insert_embeddings = AsyncMock(return_value=[uuid4()])
     
     selector = ChunkSelector(chunk_ids=[sample_chunks[0].chunk_id])
     
@@ -187,8 +187,8 @@ async def test_generate_embeddings_with_index_range(
     job_repo, event_repo, chunk_repo, embedding_repo = mock_repositories
     chunk_repo.list_by_file = AsyncMock(return_value=sample_chunks)
     
-    # Configurar insert_embeddings para devolver solo 1 embedding
-    embedding_repo.insert_embeddings = AsyncMock(return_value=[Mock()])
+    # Configurar bulk_insert_embeddings para devolver solo 1 embedding
+    embedding_repo.bulk_insert_embeddings = AsyncMock(return_value=[uuid4()])
     
     # Selector: solo chunk_index 0
     selector = ChunkSelector(index_range=(0, 0))
@@ -233,7 +233,7 @@ async def test_generate_embeddings_idempotency(
     chunk_repo.list_by_file = AsyncMock(return_value=sample_chunks)
     
     # Mock: todos los chunks ya tienen embeddings
-    embedding_repo.exists_for_file_and_chunk = AsyncMock(return_value=True)
+    embedding_repo.list_embedded_chunk_indexes = AsyncMock(return_value={0, 1})
     
     result = await generate_embeddings(
         db=adb,
@@ -252,8 +252,8 @@ async def test_generate_embeddings_idempotency(
     assert result.embedded == 0
     assert result.skipped == 2
     
-    # No debe haber llamado a insert_embeddings
-    embedding_repo.insert_embeddings.assert_not_called()
+    # No debe haber llamado a bulk_insert_embeddings
+    embedding_repo.bulk_insert_embeddings.assert_not_called()
 
 
 @pytest.mark.asyncio
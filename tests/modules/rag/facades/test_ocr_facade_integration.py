@@ -46,7 +46,7 @@ def mock_azure_client():
 def mock_storage_client():
     """Mock del cliente de storage."""
     client = Mock()
-    client.write = AsyncMock(return_value="rag-cache-pages/test-job/ocr_result.txt")
+    client.upload_stream = AsyncMock(return_value=None)
     return client
 
 
@@ -98,7 +98,9 @@ async def test_run_ocr_success(
     assert call_kwargs["strategy"] == "balanced"
 
     # Validar que se guardó en storage
-    mock_storage_client.write.assert_called_once()
+    mock_storage_client.upload_stream.assert_awaited_once()
+    bucket, key = mock_storage_client.upload_stream.await_args.args[:2]
+    assert (bucket, key) == ("rag-cache-pages", f"{job_id}/ocr_result.txt")
 
     # Validar eventos (inicio y fin)
     assert event_repo.log_event.call_count == 2
@@ -250,3 +252,45 @@ async def test_run_ocr_azure_error_handling(
     last_call = event_repo.log_event.call_args_list[-1]
     assert last_call.kwargs["event_type"] == "phase_failed"
     assert last_call.kwargs["rag_phase"] == RagPhase.ocr
+
+
+@pytest.mark.asyncio
+async def test_run_ocr_uses_job_mime_type_for_extensionless_keys(
+    adb: AsyncSession,
+    mock_repositories,
+):
+    """Una imagen en storage sin extensión debe enviarse con su tipo MIME, no como PDF."""
+    job_id = uuid4()
+    _, event_repo = mock_repositories
+
+    storage_client = Mock()
+    storage_client.upload_stream = AsyncMock(return_value=None)
+
+    async def iter_bytes(bucket, key, chunk_size=None):
+        yield b"\x89PNG\r\n\x1a\n fake image"
+
+    storage_client.iter_bytes = iter_bytes
+
+    azure_client = Mock()
+    azure_client.analyze_document_bytes = AsyncMock(return_value=AzureOcrResult(
+        text="Texto de la imagen",
+        pages=[{"page_number": 1, "width": 100, "height": 100, "unit": "pixel"}],
+        confidence=0.9,
+        lang="es",
+        model_used="prebuilt-read",
+    ))
+
+    result = await run_ocr(
+        db=adb,
+        job_id=job_id,
+        file_id=uuid4(),
+        source_uri="users-files/users/u1/projects/p1/input/3f2a9c",
+        azure_client=azure_client,
+        storage_client=storage_client,
+        event_repo=event_repo,
+        mime_type="Image/PNG",
+    )
+
+    assert isinstance(result, OcrText)
+    azure_client.analyze_document_bytes.assert_awaited_once()
+    assert azure_client.analyze_document_bytes.await_args.kwargs["content_type"] == "image/png"
@@ -10,9 +10,10 @@ Fecha: 2025-11-28 (FASE 3)
 
 import pytest
 from uuid import uuid4
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 from types import SimpleNamespace
 
+from app.modules.rag.facades.embed_facade import EmbeddingResult
 from app.modules.rag.facades.orchestrator_facade import run_indexing_job, OrchestrationSummary
 from app.modules.rag.enums import RagJobPhase, RagPhase
 
@@ -62,9 +63,11 @@ async def test_orchestrator_pipeline_success(adb):
     file_id = input_file.file_id
     
     # Mock storage client
+    async def iter_text(bucket, key, chunk_size=1024):
+        yield b"Sample text for chunking and embeddings"
+
     mock_storage = AsyncMock()
-    mock_storage.download_file.return_value = b"Sample text for chunking and embeddings"
-    mock_storage.upload_file.return_value = "rag-cache-jobs/test.txt"
+    mock_storage.iter_bytes = Mock(side_effect=iter_text)
     
     # Mock Azure OCR client
     mock_azure = AsyncMock()
@@ -104,7 +107,7 @@ async def test_orchestrator_pipeline_success(adb):
         # Mock facades
         mock_convert.return_value = SimpleNamespace(result_uri="rag-cache-jobs/converted.txt")
         mock_ocr.return_value = SimpleNamespace(result_uri="rag-cache-pages/ocr.txt", total_pages=1)
-        mock_embed.return_value = SimpleNamespace(total_embeddings=5, embedding_ids=[uuid4() for _ in range(5)])
+        mock_embed.return_value = EmbeddingResult(total_chunks=5, embedded=5)
         
         # Execute pipeline
         summary = await run_indexing_job(
@@ -182,7 +185,7 @@ async def test_orchestrator_pipeline_failure_releases_credits(adb):
     
     # Mock storage client
     mock_storage = AsyncMock()
-    mock_storage.download_file.side_effect = Exception("Storage error")
+    mock_storage.iter_bytes = Mock(side_effect=Exception("Storage error"))
     
     # Mock Payments services
     mock_wallet = SimpleNamespace(wallet_id=1, user_id=user_id, balance_total=1000)
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+backend/tests/modules/rag/facades/test_orchestrator_resume.py
+
+Tests de checkpoints por fase y resume en run_indexing_job.
+
+Autor: DoxAI
+Fecha: 2025-12-11
+"""
+
+import hashlib
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.modules.rag.enums import RagJobPhase, RagPhase
+from app.modules.rag.facades.embed_facade import EmbeddingResult
+from app.modules.rag.facades.orchestrator_facade import fail_dead_indexing_job, run_indexing_job
+
+ORCH = "app.modules.rag.facades.orchestrator_facade"
+CONVERTED = b"texto convertido del documento"
+
+
+def _event(event_type, phase=None, payload=None):
+    return SimpleNamespace(event_type=event_type, rag_phase=phase, event_payload=payload or {})
+
+
+def _convert_completed(job_id, data=CONVERTED):
+    return _event(
+        "phase_completed",
+        RagPhase.convert,
+        {
+            "checksum": hashlib.sha256(data).hexdigest(),
+            "byte_size": len(data),
+            "result_uri": f"rag-cache-jobs/{job_id}/converted.txt",
+        },
+    )
+
+
+def _storage(objects: dict):
+    async def iter_bytes(bucket, key, chunk_size=1024):
+        data = objects.get(f"{bucket}/{key}")
+        if data is None:
+            raise FileNotFoundError(key)
+        yield data
+
+    storage = AsyncMock()
+    storage.iter_bytes = Mock(side_effect=iter_bytes)
+    return storage
+
+
+async def _run(job, events, storage, *, persisted_chunks=0, needs_ocr=False):
+    """Ejecuta run_indexing_job en modo resume con repos y fases mockeados."""
+    events_repo = AsyncMock()
+    events_repo.list_by_types = AsyncMock(return_value=events)
+    chunks_repo = AsyncMock()
+    chunks_repo.count_by_file = AsyncMock(return_value=persisted_chunks)
+
+    with patch(f"{ORCH}.RagJobRepository") as MockJobRepo, \
+         patch(f"{ORCH}.rag_job_event_repository", events_repo), \
+         patch(f"{ORCH}.chunk_metadata_repository", chunks_repo), \
+         patch(f"{ORCH}.ReservationService") as MockReservation, \
+         patch("app.modules.rag.facades.convert_facade.convert_to_text", new=AsyncMock(
+             return_value=SimpleNamespace(result_uri=f"rag-cache-jobs/{job.job_id}/converted.txt"),
+         )) as mock_convert, \
+         patch("app.modules.rag.facades.ocr_facade.run_ocr", new=AsyncMock(
+             return_value=SimpleNamespace(result_uri="rag-cache-pages/x/ocr_result.txt", total_pages=2),
+         )) as mock_ocr, \
+         patch("app.modules.rag.facades.chunk_facade.chunk_text", new=AsyncMock(
+             return_value=SimpleNamespace(total_chunks=4),
+         )) as mock_chunk, \
+         patch("app.modules.rag.facades.embed_facade.generate_embeddings", new=AsyncMock(
+             return_value=EmbeddingResult(total_chunks=4, embedded=4),
+         )) as mock_embed, \
+         patch("app.modules.rag.facades.integrate_facade.integrate_vector_index", new=AsyncMock(
+             return_value=SimpleNamespace(ready=True, integrity_valid=True),
+         )):
+        MockJobRepo.return_value.get_by_id = AsyncMock(return_value=job)
+        MockJobRepo.return_value.advance_phase = AsyncMock()
+        reservations = MockReservation.return_value
+        reservations.create_reservation = AsyncMock(return_value=SimpleNamespace(reservation_id=7))
+        reservations.consume_reservation = AsyncMock()
+        reservations.cancel_reservation = AsyncMock()
+
+        summary = await run_indexing_job(
+            db=AsyncMock(),
+            project_id=job.project_id,
+            file_id=job.file_id,
+            user_id=uuid4(),
+            mime_type="application/pdf",
+            needs_ocr=needs_ocr,
+            storage_client=storage,
+            source_uri="users-files/doc.pdf",
+            queued_job_id=job.job_id,
+            resume=True,
+        )
+
+    mocks = SimpleNamespace(
+        convert=mock_convert,
+        ocr=mock_ocr,
+        chunk=mock_chunk,
+        embed=mock_embed,
+        reservations=reservations,
+        events=events_repo,
+        advance=MockJobRepo.return_value.advance_phase,
+    )
+    return summary, mocks
+
+
+def _job(status=RagJobPhase.failed):
+    return SimpleNamespace(
+        job_id=uuid4(),
+        project_id=uuid4(),
+        file_id=uuid4(),
+        status=status,
+        phase_current=RagPhase.embed,
+    )
+
+
+@pytest.mark.asyncio
+async def test_resume_after_embed_failure_skips_convert_and_chunk():
+    """Un reintento tras fallar embed solo re-ejecuta embed e integrate."""
+    job = _job()
+    events = [
+        _convert_completed(job.job_id),
+        _event("phase_completed", RagPhase.chunk, {"total_chunks": 4}),
+        _event("job_failed", RagPhase.chunk),
+    ]
+    storage = _storage({f"rag-cache-jobs/{job.job_id}/converted.txt": CONVERTED})
+
+    summary, mocks = await _run(job, events, storage, persisted_chunks=4)
+
+    assert summary.job_status == RagJobPhase.completed
+    assert summary.phases_skipped == [RagPhase.convert, RagPhase.chunk]
+    assert RagPhase.convert not in summary.phases_done
+    assert summary.total_chunks == 4
+    mocks.convert.assert_not_awaited()
+    mocks.chunk.assert_not_awaited()
+    mocks.embed.assert_awaited_once()
+
+    # Reserva nueva por intento: la del intento fallido quedó cancelada
+    op_id = mocks.reservations.create_reservation.await_args.kwargs["operation_id"]
+    assert op_id == f"rag_job_{job.job_id}:retry1"
+    # job_resumed viaja en el mismo statement que el paso a running
+    first = mocks.advance.await_args_list[0]
+    assert first.kwargs["status"] == RagJobPhase.running
+    assert [e["event_type"] for e in first.kwargs["events"]] == ["job_resumed"]
+    mocks.events.log_event.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_resume_reruns_from_convert_when_artifact_changed():
+    """Checksum distinto en converted.txt invalida convert y todas las fases siguientes."""
+    job = _job()
+    events = [
+        _convert_completed(job.job_id),
+        _event("phase_completed", RagPhase.chunk, {"total_chunks": 4}),
+    ]
+    storage = _storage({f"rag-cache-jobs/{job.job_id}/converted.txt": b"otro contenido"})
+
+    summary, mocks = await _run(job, events, storage, persisted_chunks=4)
+
+    assert summary.phases_skipped == []
+    mocks.convert.assert_awaited_once()
+    mocks.chunk.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_resume_rechunks_when_persisted_chunks_do_not_match():
+    """Un chunk checkpoint con conteo distinto en DB se re-ejecuta (convert se reutiliza)."""
+    job = _job()
+    events = [
+        _convert_completed(job.job_id),
+        _event("phase_completed", RagPhase.chunk, {"total_chunks": 4}),
+    ]
+    storage = _storage({f"rag-cache-jobs/{job.job_id}/converted.txt": CONVERTED})
+
+    summary, mocks = await _run(job, events, storage, persisted_chunks=2)
+
+    assert summary.phases_skipped == [RagPhase.convert]
+    mocks.convert.assert_not_awaited()
+    mocks.chunk.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_resume_reruns_ocr_when_ocr_artifact_missing():
+    """Con needs_ocr, un ocr_result.txt ausente obliga a repetir OCR y chunk."""
+    job = _job()
+    ocr_uri = f"rag-cache-pages/{job.job_id}/ocr_result.txt"
+    events = [
+        _convert_completed(job.job_id),
+        _event(
+            "phase_completed",
+            RagPhase.ocr,
+            {"result_uri": ocr_uri, "checksum": "0" * 64, "byte_size": 10, "pages": 2},
+        ),
+        _event("phase_completed", RagPhase.chunk, {"total_chunks": 4}),
+    ]
+    storage = _storage({f"rag-cache-jobs/{job.job_id}/converted.txt": CONVERTED})
+
+    summary, mocks = await _run(job, events, storage, persisted_chunks=4, needs_ocr=True)
+
+    assert summary.phases_skipped == [RagPhase.convert]
+    mocks.ocr.assert_awaited_once()
+    mocks.chunk.assert_awaited_once()
+    assert mocks.chunk.await_args.kwargs["text_uri"] == "rag-cache-pages/x/ocr_result.txt"
+
+
+@pytest.mark.asyncio
+async def test_first_attempt_keeps_original_operation_id():
+    """Sin eventos previos no hay checkpoints y la reserva usa rag_job_{id}."""
+    job = _job(status=RagJobPhase.queued)
+
+    summary, mocks = await _run(job, [], _storage({}))
+
+    assert summary.phases_skipped == []
+    assert RagPhase.convert in summary.phases_done
+    op_id = mocks.reservations.create_reservation.await_args.kwargs["operation_id"]
+    assert op_id == f"rag_job_{job.job_id}"
+
+
+
+def _nested_db():
+    db = AsyncMock()
+    db.begin_nested = Mock(return_value=AsyncMock())
+    return db
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status", [RagJobPhase.running, RagJobPhase.queued])
+async def test_dead_queue_task_fails_job_and_releases_reservation(status):
+    """Una tarea muerta deja el job failed (reintentable) y cancela la reserva del intento."""
+    job = _job(status=status)
+    events_repo = AsyncMock()
+    events_repo.list_by_types = AsyncMock(return_value=[_event("job_failed", RagPhase.chunk)])
+
+    with patch(f"{ORCH}.RagJobRepository") as MockJobRepo, \
+         patch(f"{ORCH}.rag_job_event_repository", events_repo), \
+         patch(f"{ORCH}.ReservationService") as MockReservation:
+        MockJobRepo.return_value.get_by_id = AsyncMock(return_value=job)
+        MockJobRepo.return_value.advance_phase = AsyncMock()
+        MockReservation.return_value.cancel_reservation = AsyncMock()
+
+        failed = await fail_dead_indexing_job(_nested_db(), job.job_id, error="heartbeat lost")
+
+    assert failed is True
+    advance = MockJobRepo.return_value.advance_phase.await_args
+    assert advance.kwargs["status"] == RagJobPhase.failed
+    [event] = advance.kwargs["events"]
+    assert event["event_type"] == "job_failed"
+    assert event["event_payload"]["queue_status"] == "dead"
+    # Segundo intento fallido: su reserva es la de :retry1
+    cancel = MockReservation.return_value.cancel_reservation.await_args
+    assert cancel.kwargs["operation_id"] == f"rag_job_{job.job_id}:retry1"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status", [RagJobPhase.completed, RagJobPhase.failed, RagJobPhase.cancelled])
+async def test_dead_queue_task_leaves_finished_jobs_alone(status):
+    """Un job ya terminado no se toca (p.ej. el orquestador ya lo marcó failed)."""
+    job = _job(status=status)
+
+    with patch(f"{ORCH}.RagJobRepository") as MockJobRepo, \
+         patch(f"{ORCH}.ReservationService") as MockReservation:
+        MockJobRepo.return_value.get_by_id = AsyncMock(return_value=job)
+        MockJobRepo.return_value.advance_phase = AsyncMock()
+
+        assert await fail_dead_indexing_job(_nested_db(), job.job_id, error="boom") is False
+
+    MockJobRepo.return_value.advance_phase.assert_not_awaited()
+    MockReservation.assert_not_called()
+
+
+# Fin del archivo backend/tests/modules/rag/facades/test_orchestrator_resume.py
@@ -9,6 +9,7 @@ Fecha: 2025-11-28
 """
 
 import pytest
+from unittest.mock import AsyncMock
 from uuid import uuid4, UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -227,3 +228,34 @@ async def test_insert_chunks_persists_to_db_with_roundtrip(adb: AsyncSession):
         assert chunk.chunk_text == f"Persistent chunk {i}"
         assert chunk.token_count == 15
         assert chunk.chunk_id is not None
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_chunks_single_executemany():
+    """bulk_insert_chunks emite un único INSERT multi-fila y devuelve IDs en orden."""
+    session = AsyncMock()
+    file_id = uuid4()
+    rows = [
+        {"chunk_index": i, "chunk_text": f"Bulk chunk {i}", "token_count": 3, "source_page_start": 1}
+        for i in range(3)
+    ]
+
+    chunk_ids = await chunk_metadata_repository.bulk_insert_chunks(session, file_id, rows)
+
+    session.execute.assert_awaited_once()
+    stmt, params = session.execute.await_args.args
+    assert stmt.table.name == ChunkMetadata.__tablename__
+    assert [p["chunk_id"] for p in params] == chunk_ids
+    assert len(set(chunk_ids)) == 3
+    assert all(p["file_id"] == file_id for p in params)
+    assert [p["chunk_index"] for p in params] == [0, 1, 2]
+    assert params[0]["metadata_json"] == {}
+    session.add_all.assert_not_called()
+    session.flush.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_chunks_empty_is_noop():
+    session = AsyncMock()
+    assert await chunk_metadata_repository.bulk_insert_chunks(session, uuid4(), []) == []
+    session.execute.assert_not_awaited()
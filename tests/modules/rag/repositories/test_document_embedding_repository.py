@@ -9,7 +9,9 @@ Fecha: 2025-11-28
 """
 
 import pytest
+from unittest.mock import AsyncMock
 from uuid import uuid4, UUID
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.modules.rag.repositories import document_embedding_repository
@@ -254,6 +256,45 @@ async def test_exists_for_file_and_chunk(adb: AsyncSession):
     assert not_exists is False
 
 
+@pytest.mark.asyncio
+async def test_list_embedded_chunk_indexes(adb: AsyncSession):
+    """Test obtener en una consulta los índices ya embebidos."""
+    project = await _create_test_project(adb)
+    input_file = await _create_test_input_file(adb, project.id)
+    file_id = input_file.file_id
+    model = "text-embedding-ada-002"
+
+    embeddings = []
+    for i in (0, 2, 3):
+        chunk = await _create_test_chunk(adb, file_id=file_id, chunk_index=i)
+        embeddings.append(
+            DocumentEmbedding(
+                file_id=file_id,
+                chunk_id=chunk.chunk_id,
+                file_category=FileCategory.input,
+                chunk_index=i,
+                embedding_vector=[0.1] * 1536,
+                embedding_model=model,
+                is_active=True,
+            )
+        )
+    await document_embedding_repository.insert_embeddings(adb, embeddings)
+
+    all_indexes = await document_embedding_repository.list_embedded_chunk_indexes(
+        adb, file_id, model
+    )
+    subset = await document_embedding_repository.list_embedded_chunk_indexes(
+        adb, file_id, model, chunk_indexes=[0, 1]
+    )
+    other_model = await document_embedding_repository.list_embedded_chunk_indexes(
+        adb, file_id, "text-embedding-3-large"
+    )
+
+    assert all_indexes == {0, 2, 3}
+    assert subset == {0}
+    assert other_model == set()
+
+
 @pytest.mark.asyncio
 async def test_mark_inactive(adb: AsyncSession):
     """Test marcar embeddings como inactivos."""
@@ -335,3 +376,90 @@ async def test_insert_embeddings_persists_to_db_with_roundtrip(adb: AsyncSession
         assert emb.chunk_index == i
         assert emb.is_active is True
         assert emb.embedding_id is not None
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_embeddings_skips_orm_refresh():
+    """bulk_insert_embeddings emite un único INSERT sin flush ni refresh por fila."""
+    session = AsyncMock()
+    file_id = uuid4()
+    rows = [
+        {
+            "file_id": file_id,
+            "chunk_id": uuid4(),
+            "file_category": FileCategory.INPUT,
+            "chunk_index": i,
+            "embedding_vector": [0.1] * 1536,
+            "embedding_model": "text-embedding-3-large",
+        }
+        for i in range(4)
+    ]
+
+    embedding_ids = await document_embedding_repository.bulk_insert_embeddings(session, rows)
+
+    session.execute.assert_awaited_once()
+    stmt, params = session.execute.await_args.args
+    assert stmt.table.name == DocumentEmbedding.__tablename__
+    assert [p["embedding_id"] for p in params] == embedding_ids
+    assert [p["chunk_id"] for p in params] == [r["chunk_id"] for r in rows]
+    assert all(p["is_active"] is True for p in params)
+    session.refresh.assert_not_called()
+    session.flush.assert_not_called()
+
+
+def _unit(axis: int, jitter: float = 0.0) -> list[float]:
+    vector = [0.0] * 1536
+    vector[axis] = 1.0
+    vector[(axis + 7) % 1536] = jitter
+    return vector
+
+
+async def _insert_vectors(adb: AsyncSession, file_id: UUID, vectors: list[list[float]]) -> None:
+    embeddings = []
+    for i, vector in enumerate(vectors):
+        chunk = await _create_test_chunk(adb, file_id=file_id, chunk_index=i)
+        embeddings.append(
+            DocumentEmbedding(
+                file_id=file_id,
+                chunk_id=chunk.chunk_id,
+                file_category=FileCategory.input,
+                chunk_index=i,
+                embedding_vector=vector,
+                embedding_model="text-embedding-3-large",
+                is_active=True,
+            )
+        )
+    await document_embedding_repository.insert_embeddings(adb, embeddings)
+
+
+@pytest.mark.asyncio
+async def test_filtered_ann_search_keeps_recall(adb: AsyncSession):
+    """
+    Los vecinos más cercanos son de otro proyecto: sin iterative scan el HNSW
+    los descarta al filtrar y devuelve menos de top_k; con él se llena top_k.
+    """
+    version = (await adb.execute(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'"))).scalar()
+    if version is None or tuple(int(p) for p in version.split(".")[:2]) < (0, 8):
+        pytest.skip("hnsw.iterative_scan requiere pgvector >= 0.8")
+
+    crowded = await _create_test_project(adb)
+    crowded_file = await _create_test_input_file(adb, crowded.id)
+    await _insert_vectors(adb, crowded_file.file_id, [_unit(0, 0.001 * i) for i in range(60)])
+    target = await _create_test_project(adb)
+    target_file = await _create_test_input_file(adb, target.id)
+    await _insert_vectors(adb, target_file.file_id, [_unit(1, 0.01 * i) for i in range(3)])
+
+    # Forzar el índice: con tan pocas filas el planner elegiría seq scan
+    await adb.execute(text("SET LOCAL enable_seqscan = off"))
+    matches = await document_embedding_repository.search_similar(
+        adb,
+        _unit(0),
+        top_k=3,
+        project_id=target.id,
+        ef_search=10,
+        iterative_scan="relaxed_order",
+    )
+
+    assert len(matches) == 3
+    assert {m.file_id for m in matches} == {target_file.file_id}
+    assert [m.distance for m in matches] == sorted(m.distance for m in matches)
@@ -183,3 +183,32 @@ async def test_get_latest_event(adb: AsyncSession):
     assert retrieved.job_event_id == latest.job_event_id
     assert retrieved.event_type == "phase_updated"
     assert retrieved.rag_phase == RagPhase.ocr
+
+
+@pytest.mark.asyncio
+async def test_event_buffer_flushes_in_one_insert():
+    """RagJobEventBuffer acumula sin I/O y escribe todo en un INSERT multi-fila."""
+    from unittest.mock import AsyncMock
+    from sqlalchemy.dialects import postgresql
+    from app.modules.rag.repositories import RagJobEventBuffer
+
+    session = AsyncMock()
+    job_id = uuid4()
+    buffer = RagJobEventBuffer()
+    for event_type in ("phase_started", "phase_completed", "job_completed"):
+        await buffer.log_event(session, job_id=job_id, event_type=event_type, rag_phase=RagPhase.chunk)
+
+    session.execute.assert_not_awaited()
+    assert buffer.pending == 3
+
+    assert await buffer.flush(session) == 3
+    assert buffer.pending == 0
+    session.execute.assert_awaited_once()
+    stmt = session.execute.await_args.args[0]
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("INSERT INTO rag_job_events")
+    assert sql.count("VALUES") == 1 and "), (" in sql
+
+    # Buffer vacío: no hay statement
+    assert await buffer.flush(session) == 0
+    session.execute.assert_awaited_once()
@@ -320,3 +320,63 @@ async def test_update_phase_and_status_persists_both(adb: AsyncSession):
     assert retrieved is not None
     assert retrieved.phase_current == RagPhase.embed
     assert retrieved.status == RagJobPhase.running
+
+
+@pytest.mark.asyncio
+async def test_advance_phase_writes_phase_status_and_events(adb: AsyncSession):
+    """Test avanzar fase + estado y registrar eventos en un solo statement."""
+    from app.modules.rag.repositories import RagJobEventBuffer, rag_job_event_repository
+
+    project = await _create_test_project(adb)
+    input_file = await _create_test_input_file(adb, project.id)
+    user_id = uuid4()
+
+    job = await rag_job_repository.create(
+        adb,
+        project_id=project.id,
+        file_id=input_file.file_id,
+        created_by=user_id,
+    )
+
+    events = RagJobEventBuffer()
+    await events.log_event(job_id=job.job_id, event_type="phase_started", rag_phase=RagPhase.chunk)
+    await events.log_event(job_id=job.job_id, event_type="phase_completed", rag_phase=RagPhase.chunk)
+
+    await rag_job_repository.advance_phase(
+        adb,
+        job.job_id,
+        RagPhase.chunk,
+        status=RagJobPhase.failed,
+        events=events.drain(),
+    )
+    assert events.pending == 0
+
+    # advance_phase escribe vía Core: refrescar la instancia del identity map
+    await adb.refresh(job)
+    assert job.phase_current == RagPhase.chunk
+    assert job.status == RagJobPhase.failed
+    assert job.failed_at is not None
+
+    timeline = await rag_job_event_repository.get_timeline(adb, job.job_id)
+    assert [e.event_type for e in timeline][-2:] == ["phase_started", "phase_completed"]
+
+
+@pytest.mark.asyncio
+async def test_advance_phase_is_single_statement():
+    """advance_phase con eventos compila a WITH (UPDATE ... RETURNING) INSERT."""
+    from unittest.mock import AsyncMock
+    from sqlalchemy.dialects import postgresql
+    from app.modules.rag.repositories import RagJobEventBuffer
+
+    session = AsyncMock()
+    job_id = uuid4()
+    events = RagJobEventBuffer()
+    await events.log_event(job_id=job_id, event_type="phase_completed", rag_phase=RagPhase.embed)
+
+    await rag_job_repository.advance_phase(session, job_id, RagPhase.embed, events=events.drain())
+
+    session.execute.assert_awaited_once()
+    sql = str(session.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("WITH job_advanced AS")
+    assert "UPDATE rag_jobs" in sql
+    assert "INSERT INTO rag_job_events" in sql
@@ -24,7 +24,7 @@ def test_client():
 
 
 def test_create_indexing_job_endpoint(test_client: TestClient):
-    """Test: POST /rag/projects/{project_id}/jobs/indexing crea job correctamente."""
+    """Test: POST /rag/projects/{project_id}/jobs/indexing encola el job y retorna 202."""
     
     project_id = uuid4()
     file_id = uuid4()
@@ -39,46 +39,97 @@ def test_create_indexing_job_endpoint(test_client: TestClient):
         "needs_ocr": False,
     }
     
-    # Mock storage client y facades
-    mock_storage = AsyncMock()
-    mock_summary = SimpleNamespace(
-        job_id=job_id,
-        phases_done=[],
-        job_status="completed",
-        total_chunks=5,
-        total_embeddings=5,
-        credits_used=20,
-        reservation_id=1,
-    )
-    
-    # Mock job creado
+    # Mock job encolado
     mock_job = SimpleNamespace(
         job_id=job_id,
         project_id=project_id,
         file_id=file_id,
         created_by=user_id,
-        status="completed",
-        phase_current="ready",
+        status="queued",
+        phase_current="convert",
         created_at="2025-11-28T10:00:00Z",
-        updated_at="2025-11-28T10:10:00Z",
+        updated_at="2025-11-28T10:00:00Z",
     )
     
-    with patch('app.modules.rag.routes.indexing.routes_indexing_jobs.get_storage_client', return_value=mock_storage), \
-         patch('app.modules.rag.routes.indexing.routes_indexing_jobs.run_indexing_job', return_value=mock_summary), \
-         patch('app.modules.rag.routes.indexing.routes_indexing_jobs.RagJobRepository') as MockRepo:
-        
-        mock_repo = MockRepo.return_value
-        mock_repo.get_by_id = AsyncMock(return_value=mock_job)
+    with patch(
+        'app.modules.rag.routes.indexing.routes_indexing_jobs.enqueue_indexing_job',
+        new=AsyncMock(return_value=mock_job),
+    ) as mock_enqueue:
         
         response = test_client.post(
             f"/rag/projects/{project_id}/jobs/indexing",
             json=payload,
         )
         
-        assert response.status_code == 201
+        assert response.status_code == 202
         data = response.json()
-        assert "job_id" in data
+        assert data["job_id"] == str(job_id)
         assert data["project_id"] == str(project_id)
+        assert data["phase"] == "queued"
+        
+        mock_enqueue.assert_awaited_once()
+        assert mock_enqueue.await_args.kwargs["source_uri"] == f"users-files/{file_id}"
+
+
+def test_create_indexing_job_project_mismatch(test_client: TestClient):
+    """Test: project_id del path distinto al del payload retorna 400 sin encolar."""
+    
+    payload = {
+        "project_id": str(uuid4()),
+        "file_id": str(uuid4()),
+        "user_id": str(uuid4()),
+    }
+    
+    with patch(
+        'app.modules.rag.routes.indexing.routes_indexing_jobs.enqueue_indexing_job',
+        new=AsyncMock(),
+    ) as mock_enqueue:
+        response = test_client.post(
+            f"/rag/projects/{uuid4()}/jobs/indexing",
+            json=payload,
+        )
+        
+        assert response.status_code == 400
+        mock_enqueue.assert_not_awaited()
+
+
+def test_retry_indexing_job_endpoint(test_client: TestClient):
+    """Test: POST /rag/jobs/{job_id}/retry re-encola un job fallido (202)."""
+    
+    job_id = uuid4()
+    user_id = uuid4()
+    mock_job = SimpleNamespace(
+        job_id=job_id,
+        project_id=uuid4(),
+        status="queued",
+        created_at="2025-11-28T10:00:00Z",
+        updated_at="2025-11-28T10:20:00Z",
+    )
+    mock_task = SimpleNamespace(job_id=job_id, user_id=user_id)
+    
+    with patch(
+        'app.modules.rag.routes.indexing.routes_indexing_jobs.requeue_indexing_job',
+        new=AsyncMock(return_value=(mock_job, mock_task)),
+    ):
+        response = test_client.post(f"/rag/jobs/{job_id}/retry")
+        
+        assert response.status_code == 202
+        data = response.json()
+        assert data["job_id"] == str(job_id)
+        assert data["started_by"] == str(user_id)
+        assert data["phase"] == "queued"
+
+
+def test_retry_indexing_job_not_failed_returns_409(test_client: TestClient):
+    """Test: reintentar un job que no está en failed retorna 409."""
+    
+    with patch(
+        'app.modules.rag.routes.indexing.routes_indexing_jobs.requeue_indexing_job',
+        new=AsyncMock(side_effect=ValueError("Only failed jobs can be retried")),
+    ):
+        response = test_client.post(f"/rag/jobs/{uuid4()}/retry")
+        
+        assert response.status_code == 409
 
 
 def test_get_job_progress_endpoint(test_client: TestClient):
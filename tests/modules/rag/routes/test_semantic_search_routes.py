@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+backend/tests/modules/rag/routes/test_semantic_search_routes.py
+
+Tests para la ruta de búsqueda semántica top-k.
+
+Autor: DoxAI
+Fecha: 2025-12-01
+"""
+
+import pytest
+from types import SimpleNamespace
+from uuid import uuid4
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+from app.main import app
+from app.modules.rag.repositories.document_embedding_repository import (
+    DocumentEmbeddingRepository,
+    SimilarityMatch,
+)
+
+ROUTES = "app.modules.rag.routes.search.routes_semantic_search"
+
+
+@pytest.fixture
+def test_client():
+    """Fixture de TestClient para FastAPI."""
+    return TestClient(app)
+
+
+def _match(distance: float) -> SimilarityMatch:
+    return SimilarityMatch(
+        embedding_id=uuid4(),
+        file_id=uuid4(),
+        chunk_id=uuid4(),
+        chunk_index=0,
+        embedding_model="text-embedding-3-large",
+        distance=distance,
+        chunk_text="hola",
+    )
+
+
+def test_semantic_search_small_project_uses_exact(test_client: TestClient):
+    """Con pocos candidatos se usa búsqueda exacta y se devuelven scores."""
+    project_id = uuid4()
+
+    with patch(f"{ROUTES}.DocumentEmbeddingRepository") as MockRepo:
+        repo = MockRepo.return_value
+        repo.count_search_candidates = AsyncMock(return_value=12)
+        repo.search_similar = AsyncMock(return_value=[_match(0.1), _match(0.3)])
+
+        response = test_client.post(
+            f"/rag/projects/{project_id}/semantic-search",
+            json={"query_vector": [0.0] * 1536, "top_k": 2},
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["exact"] is True
+        assert data["candidates"] == 12
+        assert [round(r["score"], 2) for r in data["results"]] == [0.9, 0.7]
+        assert repo.search_similar.await_args.kwargs["exact"] is True
+        assert repo.search_similar.await_args.kwargs["project_id"] == project_id
+        # El conteo se corta en umbral + 1
+        assert repo.count_search_candidates.await_args.kwargs["limit"] == 20001
+
+
+def test_semantic_search_large_project_uses_ann(test_client: TestClient):
+    """Por encima del umbral se usa el índice ANN."""
+    with patch(f"{ROUTES}.DocumentEmbeddingRepository") as MockRepo, \
+         patch(f"{ROUTES}.rag_config") as cfg:
+        cfg.vector_search_exact_threshold = 100
+        cfg.vector_search_ef_search = 40
+        cfg.vector_search_iterative_scan = "relaxed_order"
+        repo = MockRepo.return_value
+        repo.count_search_candidates = AsyncMock(return_value=101)
+        repo.search_similar = AsyncMock(return_value=[])
+
+        response = test_client.post(
+            f"/rag/projects/{uuid4()}/semantic-search",
+            json={"query_vector": [0.0] * 1536, "top_k": 50},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["exact"] is False
+        kwargs = repo.search_similar.await_args.kwargs
+        assert kwargs["exact"] is False
+        assert kwargs["ef_search"] == 50  # ef_search >= top_k
+        assert kwargs["iterative_scan"] == "relaxed_order"
+        assert repo.count_search_candidates.await_args.kwargs["limit"] == 101
+
+
+def test_semantic_search_empty_project_skips_search(test_client: TestClient):
+    """Sin candidatos no se ejecuta la consulta vectorial."""
+    with patch(f"{ROUTES}.DocumentEmbeddingRepository") as MockRepo:
+        repo = MockRepo.return_value
+        repo.count_search_candidates = AsyncMock(return_value=0)
+        repo.search_similar = AsyncMock()
+
+        response = test_client.post(
+            f"/rag/projects/{uuid4()}/semantic-search",
+            json={"query_vector": [0.0] * 1536},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["results"] == []
+        repo.search_similar.assert_not_awaited()
+
+
+def test_semantic_search_rejects_invalid_query(test_client: TestClient):
+    """Se requiere exactamente uno de query_text/query_vector con dimensión 1536."""
+    project_id = uuid4()
+    both = test_client.post(
+        f"/rag/projects/{project_id}/semantic-search",
+        json={"query_text": "x", "query_vector": [0.0] * 1536},
+    )
+    wrong_dim = test_client.post(
+        f"/rag/projects/{project_id}/semantic-search",
+        json={"query_vector": [0.0] * 3},
+    )
+    assert both.status_code == 422
+    assert wrong_dim.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_search_similar_exact_mode_bypasses_index():
+    """El modo exacto ordena por (distancia + 0) para no usar el índice HNSW."""
+    session = AsyncMock()
+    session.execute = AsyncMock(return_value=[])
+    repo = DocumentEmbeddingRepository()
+
+    await repo.search_similar(session, [0.0] * 1536, top_k=5, exact=True)
+    exact_sql = str(session.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+
+    session.execute.reset_mock()
+    await repo.search_similar(session, [0.0] * 1536, top_k=5, exact=False)
+    ann_sql = str(session.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+
+    assert "<=>" in exact_sql and "+" in exact_sql.split("ORDER BY")[1]
+    assert "+" not in ann_sql.split("ORDER BY")[1]
+
+
+def _statements(session) -> list[str]:
+    return [
+        str(call.args[0].compile(dialect=postgresql.dialect()))
+        for call in session.execute.await_args_list
+    ]
+
+
+@pytest.mark.asyncio
+async def test_count_search_candidates_is_bounded():
+    """Con limit el COUNT corre sobre un subquery con LIMIT, no sobre toda la tabla."""
+    session = AsyncMock()
+    repo = DocumentEmbeddingRepository()
+
+    await repo.count_search_candidates(session, project_id=uuid4(), limit=20001)
+
+    [sql] = _statements(session)
+    assert "count(*)" in sql
+    assert "LIMIT" in sql
+
+
+@pytest.mark.asyncio
+async def test_filtered_ann_search_enables_iterative_scan_and_reorders():
+    """
+    Con filtros, el ANN activa hnsw.iterative_scan (el índice sigue
+    recorriendo hasta llenar top_k) y reordena lo que relaxed_order devuelve.
+    """
+    rows = [
+        SimpleNamespace(
+            embedding_id=uuid4(), file_id=uuid4(), chunk_id=uuid4(), chunk_index=i,
+            embedding_model="m", distance=d, chunk_text=None,
+        )
+        for i, d in enumerate([0.30, 0.10, 0.20])
+    ]
+    session = AsyncMock()
+    session.execute = AsyncMock(side_effect=[None, None, rows])
+    repo = DocumentEmbeddingRepository()
+
+    matches = await repo.search_similar(
+        session, [0.0] * 1536, top_k=3, project_id=uuid4(), ef_search=40, iterative_scan="relaxed_order",
+    )
+
+    statements = _statements(session)
+    assert statements[1] == "SET LOCAL hnsw.iterative_scan = relaxed_order"
+    assert [m.distance for m in matches] == [0.10, 0.20, 0.30]
+
+
+@pytest.mark.asyncio
+async def test_iterative_scan_skipped_for_exact_or_unfiltered_search():
+    session = AsyncMock()
+    session.execute = AsyncMock(return_value=[])
+    repo = DocumentEmbeddingRepository()
+
+    await repo.search_similar(session, [0.0] * 1536, top_k=3, project_id=uuid4(), exact=True,
+                              iterative_scan="relaxed_order")
+    await repo.search_similar(session, [0.0] * 1536, top_k=3, only_active=False, iterative_scan="relaxed_order")
+    await repo.search_similar(session, [0.0] * 1536, top_k=3, project_id=uuid4(), iterative_scan="off")
+
+    assert not any("iterative_scan" in sql for sql in _statements(session))
+    with pytest.raises(ValueError):
+        await repo.search_similar(session, [0.0] * 1536, top_k=3, project_id=uuid4(), iterative_scan="1; DROP")
+
+
+# Fin del archivo backend/tests/modules/rag/routes/test_semantic_search_routes.py
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+backend/tests/modules/rag/services/test_chunker.py
+
+Tests para el motor de chunking streaming (ChunkerService.iter_chunks).
+
+Usa el tokenizer de respaldo por palabras para ser determinista sin
+descargar codificaciones de tiktoken.
+
+Autor: DoxAI
+Fecha: 2025-12-05
+"""
+
+import itertools
+
+import pytest
+
+from app.modules.rag.services.chunker import (
+    ChunkerService,
+    ChunkParams,
+    _ApproxTokenizer,
+)
+
+
+@pytest.fixture
+def chunker():
+    return ChunkerService(tokenizer=_ApproxTokenizer())
+
+
+def _words(prefix: str, n: int) -> str:
+    return " ".join(f"{prefix}{i}" for i in range(n))
+
+
+def test_chunks_respect_max_tokens_and_keep_paragraphs_whole(chunker):
+    """Los párrafos que caben se agrupan completos sin exceder max_tokens."""
+    text = "\n\n".join(_words(p, 10) for p in "abcde")
+
+    chunks = list(chunker.iter_chunks([text], ChunkParams(max_tokens=25, overlap=0)))
+
+    assert [c.index for c in chunks] == list(range(len(chunks)))
+    assert all(c.token_count <= 25 for c in chunks)
+    assert chunks[0].text.startswith("a0") and chunks[0].text.endswith("b9")
+    assert "c0" not in chunks[0].text
+
+
+def test_long_paragraph_split_with_overlap(chunker):
+    """Un párrafo mayor que max_tokens se parte en ventanas con overlap."""
+    chunks = list(chunker.iter_chunks([_words("w", 100)], ChunkParams(max_tokens=40, overlap=10)))
+
+    assert all(c.token_count <= 40 for c in chunks)
+    first, second = chunks[0].text.split(), chunks[1].text.split()
+    assert first[-10:] == second[:10]
+    assert chunks[-1].text.split()[-1] == "w99"
+
+
+def test_page_breaks_populate_source_pages(chunker):
+    """El form feed separa páginas y se reflejan en source_page_start/end."""
+    pages = [_words(f"p{n}_", 15) for n in range(1, 5)]
+    text = "\f".join(pages)
+
+    chunks = list(chunker.iter_chunks([text], ChunkParams(max_tokens=32, overlap=0)))
+
+    assert (chunks[0].source_page_start, chunks[0].source_page_end) == (1, 2)
+    assert (chunks[-1].source_page_start, chunks[-1].source_page_end) == (3, 4)
+
+
+def test_streaming_input_is_consumed_lazily(chunker):
+    """El primer chunk sale sin leer todo el stream (memoria acotada)."""
+    consumed = 0
+
+    def endless():
+        nonlocal consumed
+        for i in itertools.count():
+            consumed += 1
+            yield f"palabra{i} "
+            if i % 20 == 19:
+                yield "\n\n"
+
+    first = next(chunker.iter_chunks(endless(), ChunkParams(max_tokens=50, overlap=5)))
+
+    assert first.token_count <= 50
+    assert consumed < 200
+
+
+def test_fragmented_stream_matches_whole_text(chunker):
+    """Partir el texto en fragmentos arbitrarios no cambia el resultado."""
+    text = "\n\n".join(_words(p, 12) for p in "abcdefgh") + "\fúltima página"
+    params = ChunkParams(max_tokens=30, overlap=5)
+
+    whole = list(chunker.iter_chunks([text], params))
+    pieces = [text[i:i + 7] for i in range(0, len(text), 7)]
+    streamed = list(chunker.iter_chunks(pieces, params))
+
+    assert [(c.text, c.source_page_start, c.source_page_end) for c in whole] == \
+        [(c.text, c.source_page_start, c.source_page_end) for c in streamed]
+
+
+def test_empty_text_produces_no_chunks(chunker):
+    assert list(chunker.iter_chunks(["\n\n \f  \n"], ChunkParams())) == []
+
+
+# Fin del archivo backend/tests/modules/rag/services/test_chunker.py
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+backend/tests/modules/rag/services/test_embedding_cache_service.py
+
+Tests para la caché de embeddings direccionada por contenido y su uso
+desde embed_facade.
+
+Autor: DoxAI
+Fecha: 2025-12-03
+"""
+
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.modules.rag.facades.embed_facade import generate_embeddings, ChunkSelector
+from app.modules.rag.models import ChunkMetadata
+from app.modules.rag.repositories import (
+    RagJobRepository,
+    RagJobEventRepository,
+    ChunkMetadataRepository,
+    DocumentEmbeddingRepository,
+    EmbeddingCacheRepository,
+)
+from app.modules.rag.services.embedding_cache_service import (
+    EmbeddingCacheService,
+    embedding_text_hash,
+)
+
+OPENAI = "app.modules.rag.facades.embed_facade.openai_generate_embeddings"
+MODEL = "text-embedding-3-large"
+
+
+class _FakeCacheRepository(EmbeddingCacheRepository):
+    """Repositorio en memoria con la misma interfaz que EmbeddingCacheRepository."""
+
+    def __init__(self):
+        self.rows: dict[tuple, list[float]] = {}
+
+    async def get_many(self, session, embedding_model, dimension, text_hashes):
+        return {
+            h: self.rows[(embedding_model, dimension, h)]
+            for h in text_hashes
+            if (embedding_model, dimension, h) in self.rows
+        }
+
+    async def put_many(self, session, embedding_model, dimension, vectors_by_hash):
+        for h, v in vectors_by_hash.items():
+            self.rows.setdefault((embedding_model, dimension, h), list(v))
+
+    async def evict_to_size(self, session, max_entries):
+        excess = max(0, len(self.rows) - max_entries)
+        for key in list(self.rows)[:excess]:
+            del self.rows[key]
+        return excess
+
+
+def _db():
+    db = AsyncMock()
+
+    @asynccontextmanager
+    async def _nested():
+        yield
+
+    db.begin_nested = MagicMock(side_effect=_nested)
+    return db
+
+
+def _chunks(texts):
+    file_id = uuid4()
+    return [
+        ChunkMetadata(chunk_id=uuid4(), file_id=file_id, chunk_index=i, chunk_text=t, token_count=5)
+        for i, t in enumerate(texts)
+    ]
+
+
+def _repos(chunks):
+    event_repo = Mock(spec=RagJobEventRepository)
+    event_repo.log_event = AsyncMock()
+    chunk_repo = Mock(spec=ChunkMetadataRepository)
+    chunk_repo.list_by_file = AsyncMock(return_value=chunks)
+    embedding_repo = Mock(spec=DocumentEmbeddingRepository)
+    embedding_repo.list_embedded_chunk_indexes = AsyncMock(return_value=set())
+    embedding_repo.bulk_insert_embeddings = AsyncMock(side_effect=lambda db, rows: [uuid4() for _ in rows])
+    return dict(
+        job_repo=Mock(spec=RagJobRepository),
+        event_repo=event_repo,
+        chunk_repo=chunk_repo,
+        embedding_repo=embedding_repo,
+    )
+
+
+def test_text_hash_ignores_whitespace_only():
+    """El hash colapsa espacios pero distingue mayúsculas y contenido."""
+    assert embedding_text_hash("hola   mundo\n") == embedding_text_hash(" hola mundo")
+    assert embedding_text_hash("Hola mundo") != embedding_text_hash("hola mundo")
+    assert len(embedding_text_hash("x")) == 64
+
+
+@pytest.mark.asyncio
+async def test_lookup_and_store_track_hits_and_misses():
+    """Los vectores guardados se sirven después como hits, por modelo y dimensión."""
+    cache = EmbeddingCacheService(_FakeCacheRepository(), enabled=True)
+    db = _db()
+
+    assert await cache.lookup(db, MODEL, 1536, ["a", "b"]) == [None, None]
+    await cache.store(db, MODEL, 1536, ["a"], [[0.5] * 1536])
+
+    result = await cache.lookup(db, MODEL, 1536, ["a", "b"])
+    other_model = await cache.lookup(db, "text-embedding-3-small", 1536, ["a"])
+
+    assert result[0] == [0.5] * 1536 and result[1] is None
+    assert other_model == [None]
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["stores"]) == (1, 4, 1)
+    assert stats["hit_rate_percent"] == 20.0
+
+
+@pytest.mark.asyncio
+async def test_lookup_errors_are_treated_as_misses():
+    """Un fallo de la caché nunca propaga: se trata como miss."""
+    repo = _FakeCacheRepository()
+    repo.get_many = AsyncMock(side_effect=RuntimeError("db down"))
+    cache = EmbeddingCacheService(repo, enabled=True)
+
+    assert await cache.lookup(_db(), MODEL, 1536, ["a"]) == [None]
+    assert cache.get_stats()["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_maybe_evict_is_size_bounded_and_throttled():
+    """La eviction recorta al máximo de entradas y respeta el intervalo."""
+    repo = _FakeCacheRepository()
+    cache = EmbeddingCacheService(repo, enabled=True, max_entries=2, evict_interval_seconds=3600)
+    db = _db()
+    await cache.store(db, MODEL, 1536, ["a", "b", "c"], [[0.1] * 1536] * 3)
+
+    assert await cache.maybe_evict(db) == 1
+    assert len(repo.rows) == 2
+
+    await cache.store(db, MODEL, 1536, ["d"], [[0.1] * 1536])
+    assert await cache.maybe_evict(db) == 0  # dentro del intervalo
+    assert cache.get_stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_reindex_reuses_cached_vectors():
+    """Un segundo embed del mismo contenido no llama a OpenAI."""
+    cache = EmbeddingCacheService(_FakeCacheRepository(), enabled=True)
+    texts = ["uno", "dos", "tres"]
+
+    async def run(chunks):
+        repos = _repos(chunks)
+        with patch(OPENAI, new=AsyncMock(side_effect=lambda t, **kw: [[0.2] * 1536 for _ in t])) as mock_openai:
+            result = await generate_embeddings(
+                db=_db(),
+                job_id=uuid4(),
+                file_id=chunks[0].file_id,
+                embedding_model=MODEL,
+                selector=ChunkSelector(),
+                openai_api_key="test-key",
+                embedding_cache=cache,
+                **repos,
+            )
+        return result, mock_openai
+
+    first, first_openai = await run(_chunks(texts))
+    second, second_openai = await run(_chunks(texts + ["cuatro"]))
+
+    assert first.embedded == 3 and first_openai.await_count == 1
+    assert second.embedded == 4
+    assert second_openai.await_args.args[0] == ["cuatro"]
+    assert cache.get_stats()["hits"] == 3
+
+
+@pytest.mark.asyncio
+async def test_put_many_compiles_to_upsert_do_nothing():
+    """La inserción en caché es idempotente (ON CONFLICT DO NOTHING)."""
+    session = AsyncMock()
+    await EmbeddingCacheRepository().put_many(session, MODEL, 1536, {"h": [0.0] * 1536})
+
+    sql = str(session.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (embedding_model, dimension, text_hash) DO NOTHING" in sql
+
+
+# Fin del archivo backend/tests/modules/rag/services/test_embedding_cache_service.py
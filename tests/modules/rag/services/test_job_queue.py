@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""
+backend/tests/modules/rag/services/test_job_queue.py
+
+Tests para la cola durable de jobs RAG (InMemoryJobQueue como stand-in de
+PostgresJobQueue), el SQL de claim del repositorio y el IndexingWorker
+(incluido un recorrido del pipeline real hasta 'completed').
+
+Autor: DoxAI
+Fecha: 2025-12-10
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.modules.rag.enums import RagJobPhase, RagPhase
+from app.modules.rag.jobs.indexing_worker import IndexingWorker
+from app.modules.rag.repositories.rag_job_queue_repository import RagJobQueueRepository
+from app.modules.rag.repositories.rag_job_queue_repository import HEARTBEAT_LOST_ERROR
+from app.modules.rag.services.job_queue import InMemoryJobQueue, PostgresJobQueue, QueuedIndexingTask
+
+RUN_JOB = "app.modules.rag.jobs.indexing_worker.run_indexing_job"
+FAIL_DEAD = "app.modules.rag.facades.orchestrator_facade.fail_dead_indexing_job"
+ORCH = "app.modules.rag.facades.orchestrator_facade"
+EMBED = "app.modules.rag.facades.embed_facade"
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _task() -> QueuedIndexingTask:
+    return QueuedIndexingTask(
+        job_id=uuid4(),
+        project_id=uuid4(),
+        file_id=uuid4(),
+        user_id=uuid4(),
+        mime_type="application/pdf",
+        needs_ocr=False,
+        ocr_strategy="balanced",
+        source_uri="users-files/doc.pdf",
+    )
+
+
+def _session_factory():
+    db = AsyncMock()
+
+    @asynccontextmanager
+    async def factory():
+        yield db
+
+    factory.db = db
+    return factory
+
+
+def _worker(queue, **kwargs) -> IndexingWorker:
+    return IndexingWorker(
+        queue=queue,
+        session_factory=_session_factory(),
+        storage_client=AsyncMock(),
+        poll_interval=0.01,
+        heartbeat_interval=0.01,
+        worker_id="w1",
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_claim_is_exclusive_until_lease_goes_stale():
+    """Una tarea reclamada no se entrega a otro worker mientras haya heartbeat."""
+    clock = _Clock()
+    queue = InMemoryJobQueue(stale_after_seconds=10, clock=clock)
+    task = _task()
+    await queue.enqueue(None, task)
+
+    claimed = await queue.claim("w1")
+    assert claimed.job_id == task.job_id and claimed.attempts == 1
+    assert await queue.claim("w2") is None
+
+    clock.now = 5
+    assert await queue.heartbeat(task.job_id, "w1") is True
+    clock.now = 12
+    assert await queue.claim("w2") is None
+
+    # w1 deja de latir: w2 la reclama y w1 pierde el lease
+    clock.now = 30
+    reclaimed = await queue.claim("w2")
+    assert reclaimed.job_id == task.job_id and reclaimed.attempts == 2
+    assert await queue.heartbeat(task.job_id, "w1") is False
+
+
+@pytest.mark.asyncio
+async def test_release_backs_off_then_dies_after_max_attempts():
+    """release reintenta con backoff y marca 'dead' al agotar intentos."""
+    clock = _Clock()
+    queue = InMemoryJobQueue(max_attempts=2, retry_backoff_seconds=30, clock=clock)
+    task = _task()
+    await queue.enqueue(None, task)
+
+    await queue.claim("w1")
+    assert await queue.release(task.job_id, "w1", "db down") == "pending"
+    assert await queue.claim("w1") is None  # dentro del backoff
+
+    clock.now = 31
+    assert (await queue.claim("w1")).attempts == 2
+    assert await queue.release(task.job_id, "w1", "db down") == "dead"
+    clock.now = 100
+    assert await queue.claim("w1") is None
+    assert queue.status_of(task.job_id) == "dead"
+
+
+@pytest.mark.asyncio
+async def test_requeue_only_finished_tasks():
+    """requeue reinicia intentos de una tarea terminada; no toca las activas."""
+    queue = InMemoryJobQueue(max_attempts=1)
+    task = _task()
+    await queue.enqueue(None, task)
+
+    await queue.claim("w1")
+    assert await queue.requeue(None, task.job_id) is None  # sigue reclamada
+    assert await queue.release(task.job_id, "w1", "boom") == "dead"
+
+    requeued = await queue.requeue(None, task.job_id)
+    assert requeued.user_id == task.user_id
+    assert (await queue.claim("w2")).attempts == 1
+
+
+@pytest.mark.asyncio
+async def test_claim_sql_uses_skip_locked():
+    """El claim del repositorio compila a UPDATE ... FOR UPDATE SKIP LOCKED."""
+    session = AsyncMock()
+    await RagJobQueueRepository().claim_next(session, "w1", stale_after_seconds=60)
+
+    sql = str(session.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE rag_job_queue")
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "RETURNING" in sql
+
+
+@pytest.mark.asyncio
+async def test_mark_exhausted_dead_sql_returns_job_ids():
+    """mark_exhausted_dead devuelve los job_id marcados (RETURNING)."""
+    job_id = uuid4()
+    session = AsyncMock()
+    session.execute.return_value = Mock(scalars=Mock(return_value=Mock(all=Mock(return_value=[job_id]))))
+
+    dead = await RagJobQueueRepository().mark_exhausted_dead(session, stale_after_seconds=60)
+
+    sql = str(session.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "RETURNING rag_job_queue.job_id" in sql
+    assert dead == [job_id]
+
+
+def _postgres_queue():
+    session = AsyncMock()
+    session.begin = MagicMock(return_value=AsyncMock())
+
+    @asynccontextmanager
+    async def factory():
+        yield session
+
+    return PostgresJobQueue(factory, max_attempts=3, stale_after_seconds=60, retry_backoff_seconds=5), session
+
+
+@pytest.mark.asyncio
+async def test_postgres_release_to_dead_fails_rag_job_in_same_session():
+    """Agotar intentos marca el RagJob failed en la transacción del release."""
+    queue, session = _postgres_queue()
+    job_id = uuid4()
+
+    with patch.object(queue._repo, "release", AsyncMock(return_value="dead")), \
+         patch(FAIL_DEAD, AsyncMock(return_value=True)) as fail_dead:
+        assert await queue.release(job_id, "w1", "boom") == "dead"
+
+    fail_dead.assert_awaited_once_with(session, job_id, error="boom")
+
+
+@pytest.mark.asyncio
+async def test_postgres_release_with_retries_left_keeps_job_running():
+    queue, _ = _postgres_queue()
+
+    with patch.object(queue._repo, "release", AsyncMock(return_value="queued")), \
+         patch(FAIL_DEAD, AsyncMock()) as fail_dead:
+        assert await queue.release(uuid4(), "w1", "boom") == "queued"
+
+    fail_dead.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_postgres_claim_fails_jobs_whose_lease_died():
+    """Filas muertas por heartbeat perdido fallan su RagJob antes del claim."""
+    queue, session = _postgres_queue()
+    dead_id = uuid4()
+
+    with patch.object(queue._repo, "mark_exhausted_dead", AsyncMock(return_value=[dead_id])), \
+         patch.object(queue._repo, "claim_next", AsyncMock(return_value=None)), \
+         patch(FAIL_DEAD, AsyncMock(return_value=True)) as fail_dead:
+        assert await queue.claim("w1") is None
+
+    fail_dead.assert_awaited_once_with(session, dead_id, error=HEARTBEAT_LOST_ERROR)
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_queued_job_and_completes_it():
+    """run_once ejecuta el pipeline sobre el job encolado y cierra la tarea."""
+    queue = InMemoryJobQueue()
+    task = _task()
+    await queue.enqueue(None, task)
+    worker = _worker(queue)
+    summary = SimpleNamespace(job_status=RagJobPhase.completed)
+
+    with patch(RUN_JOB, new=AsyncMock(return_value=summary)) as mock_run:
+        assert await worker.run_once() is True
+        assert await worker.run_once() is False
+
+    kwargs = mock_run.await_args.kwargs
+    assert kwargs["queued_job_id"] == task.job_id
+    assert kwargs["resume"] is True
+    assert kwargs["source_uri"] == task.source_uri
+    worker.session_factory.db.commit.assert_awaited_once()
+    assert queue.status_of(task.job_id) == "done"
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_real_pipeline_to_completed():
+    """
+    El worker ejecuta run_indexing_job real (solo I/O mockeado): embed recibe
+    la API key configurada y el job termina en 'completed'.
+    """
+    queue = InMemoryJobQueue()
+    task = _task()
+    await queue.enqueue(None, task)
+    worker = _worker(queue)
+    job = SimpleNamespace(
+        job_id=task.job_id,
+        project_id=task.project_id,
+        file_id=task.file_id,
+        status=RagJobPhase.queued,
+        phase_current=RagPhase.convert,
+    )
+    chunks = [
+        SimpleNamespace(chunk_id=uuid4(), chunk_index=i, chunk_text=f"chunk {i}", token_count=3)
+        for i in range(3)
+    ]
+    events_repo = AsyncMock()
+    events_repo.list_by_types = AsyncMock(return_value=[])
+    openai = AsyncMock(side_effect=lambda texts, **kwargs: [[0.1] * 1536 for _ in texts])
+
+    with patch(f"{ORCH}.RagJobRepository") as MockJobRepo, \
+         patch(f"{ORCH}.rag_job_event_repository", events_repo), \
+         patch(f"{ORCH}.ReservationService") as MockReservation, \
+         patch(f"{ORCH}.rag_config.embeddings_api_key", "sk-test"), \
+         patch("app.modules.rag.facades.convert_facade.convert_to_text", new=AsyncMock(
+             return_value=SimpleNamespace(result_uri=f"rag-cache-jobs/{task.job_id}/converted.txt"),
+         )), \
+         patch("app.modules.rag.facades.ocr_facade.run_ocr", new=AsyncMock(
+             return_value=SimpleNamespace(result_uri="rag-cache-pages/x/ocr_result.txt", total_pages=1),
+         )), \
+         patch("app.modules.rag.facades.chunk_facade.chunk_text", new=AsyncMock(
+             return_value=SimpleNamespace(total_chunks=len(chunks)),
+         )), \
+         patch(f"{EMBED}.ChunkMetadataRepository") as MockChunks, \
+         patch(f"{EMBED}.document_embedding_repository") as embeddings_repo, \
+         patch(f"{EMBED}.embedding_cache_service") as cache, \
+         patch(f"{EMBED}.openai_generate_embeddings", openai), \
+         patch("app.modules.rag.facades.integrate_facade.integrate_vector_index", new=AsyncMock(
+             return_value=SimpleNamespace(ready=True, integrity_valid=True),
+         )):
+        MockJobRepo.return_value.get_by_id = AsyncMock(return_value=job)
+        MockJobRepo.return_value.advance_phase = AsyncMock()
+        reservations = MockReservation.return_value
+        reservations.create_reservation = AsyncMock(return_value=SimpleNamespace(reservation_id=7))
+        reservations.consume_reservation = AsyncMock()
+        MockChunks.return_value.list_by_file = AsyncMock(return_value=chunks)
+        embeddings_repo.list_embedded_chunk_indexes = AsyncMock(return_value=set())
+        embeddings_repo.bulk_insert_embeddings = AsyncMock(side_effect=lambda db, rows: rows)
+        cache.lookup = AsyncMock(return_value=[None] * len(chunks))
+        cache.store = AsyncMock()
+        cache.maybe_evict = AsyncMock(return_value=False)
+
+        assert await worker.run_once() is True
+
+    assert openai.await_args.kwargs["api_key"] == "sk-test"
+    final = MockJobRepo.return_value.advance_phase.await_args_list[-1]
+    assert final.kwargs["status"] == RagJobPhase.completed
+    reservations.consume_reservation.assert_awaited_once()
+    assert queue.status_of(task.job_id) == "done"
+
+
+@pytest.mark.asyncio
+async def test_worker_error_returns_task_to_queue():
+    """Un error inesperado del worker (p.ej. commit fallido) devuelve la tarea."""
+    queue = InMemoryJobQueue(max_attempts=3)
+    task = _task()
+    await queue.enqueue(None, task)
+    worker = _worker(queue)
+
+    with patch(RUN_JOB, new=AsyncMock(side_effect=RuntimeError("connection reset"))):
+        await worker.run_once()
+
+    assert queue.status_of(task.job_id) == "pending"
+    assert queue._entries[task.job_id].last_error == "connection reset"
+
+
+@pytest.mark.asyncio
+async def test_worker_respects_concurrency_limit():
+    """run() no ejecuta más de `concurrency` jobs a la vez y drena al parar."""
+    queue = InMemoryJobQueue()
+    for _ in range(5):
+        await queue.enqueue(None, _task())
+    worker = _worker(queue, concurrency=2)
+    active = peak = 0
+
+    async def fake_run(**kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.02)
+        active -= 1
+        return SimpleNamespace(job_status=RagJobPhase.completed)
+
+    async def stop_when_drained():
+        while any(queue.status_of(j) != "done" for j in list(queue._entries)):
+            await asyncio.sleep(0.01)
+        worker.stop()
+
+    with patch(RUN_JOB, new=fake_run):
+        await asyncio.wait_for(asyncio.gather(worker.run(), stop_when_drained()), timeout=5)
+
+    assert peak == 2
+    assert all(queue.status_of(j) == "done" for j in queue._entries)
+
+
+# Fin del archivo backend/tests/modules/rag/services/test_job_queue.py
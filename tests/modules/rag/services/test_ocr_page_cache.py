@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+backend/tests/modules/rag/services/test_ocr_page_cache.py
+
+Tests para la caché OCR por página: reprocesar un PDF editado solo envía
+a Azure las páginas cambiadas.
+
+Autor: DoxAI
+Fecha: 2025-12-15
+"""
+
+import importlib
+import io
+import tempfile
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, Mock
+
+import pytest
+from pypdf import PdfReader, PdfWriter
+from sqlalchemy.dialects import postgresql
+
+from app.modules.rag.repositories import OcrPageCacheRepository
+from app.modules.rag.services.ocr_page_cache import (
+    OcrPageCache,
+    analyze_pdf_with_page_cache,
+    pdf_page_digests,
+)
+from app.shared.integrations.azure_document_intelligence import AzureOcrResult
+
+# El paquete services reexporta la instancia ocr_page_cache con el nombre del módulo
+ocr_page_cache_module = importlib.import_module("app.modules.rag.services.ocr_page_cache")
+
+
+class _FakeIndex(OcrPageCacheRepository):
+    """Índice en memoria con la misma interfaz que OcrPageCacheRepository."""
+
+    def __init__(self):
+        self.rows: dict[str, str] = {}
+
+    async def get_many(self, session, cache_keys):
+        return {k: self.rows[k] for k in cache_keys if k in self.rows}
+
+    async def put_many(self, session, object_keys_by_key, *, ttl_seconds):
+        self.rows.update(object_keys_by_key)
+
+    async def pop_expired(self, session, *, limit):
+        return []
+
+
+class _FakeStorage:
+    def __init__(self):
+        self.objects: dict[tuple, bytes] = {}
+
+    async def upload_bytes(self, bucket, key, data, mime_type=None):
+        self.objects[(bucket, key)] = data
+
+    async def iter_bytes(self, bucket, key, chunk_size=1024 * 1024):
+        yield self.objects[(bucket, key)]
+
+
+def _db():
+    db = AsyncMock()
+
+    @asynccontextmanager
+    async def _nested():
+        yield
+
+    db.begin_nested = MagicMock(side_effect=_nested)
+    return db
+
+
+def _pdf(widths) -> bytes:
+    """PDF con una página en blanco por ancho (el ancho identifica la página)."""
+    writer = PdfWriter()
+    for width in widths:
+        writer.add_blank_page(width=width, height=200)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def _azure():
+    """Cliente Azure falso: una página de resultado por página del PDF enviado."""
+    client = Mock()
+    client.api_version = "2024-07-31-preview"
+    client._get_model_id = Mock(return_value="prebuilt-read")
+    sent: list[list[int]] = []
+
+    async def analyze(data, *, content_type, strategy, page_indices=None):
+        reader = PdfReader(io.BytesIO(data) if isinstance(data, bytes) else data)
+        indices = range(len(reader.pages)) if page_indices is None else page_indices
+        widths = [int(reader.pages[i].mediabox.width) for i in indices]
+        sent.append(widths)
+        return AzureOcrResult(
+            text="\n".join(f"page-w{w}" for w in widths),
+            pages=[
+                {"page_number": i + 1, "words": 1, "text": f"page-w{w}", "confidence": 0.9}
+                for i, w in enumerate(widths)
+            ],
+            confidence=0.9,
+            lang="es",
+        )
+
+    client.analyze_document_bytes = AsyncMock(side_effect=analyze)
+    return client, sent
+
+
+@pytest.mark.asyncio
+async def test_edited_pdf_only_ocrs_changed_pages():
+    """La segunda pasada solo envía a Azure la página editada."""
+    cache = OcrPageCache(_FakeIndex(), enabled=True, bucket="rag-cache-pages", prefix="", ttl_seconds=3600)
+    storage = _FakeStorage()
+    azure, sent = _azure()
+
+    first = await analyze_pdf_with_page_cache(
+        _db(), azure_client=azure, storage_client=storage,
+        data=_pdf([101, 102, 103]), strategy="balanced", cache=cache,
+    )
+    second = await analyze_pdf_with_page_cache(
+        _db(), azure_client=azure, storage_client=storage,
+        data=_pdf([101, 202, 103]), strategy="balanced", cache=cache,
+    )
+
+    assert sent == [[101, 102, 103], [202]]
+    assert first.text.split("\n") == ["page-w101", "page-w102", "page-w103"]
+    assert second.text.split("\n") == ["page-w101", "page-w202", "page-w103"]
+    assert [p["page_number"] for p in second.pages] == [1, 2, 3]
+    assert second.confidence == pytest.approx(0.9)
+    assert second.lang == "es"
+    assert cache.get_stats()["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_strategy_is_part_of_the_key():
+    """El mismo PDF con otra estrategia no reutiliza páginas."""
+    cache = OcrPageCache(_FakeIndex(), enabled=True, bucket="b", prefix="", ttl_seconds=3600)
+    storage = _FakeStorage()
+    azure, sent = _azure()
+    data = _pdf([101, 102])
+
+    await analyze_pdf_with_page_cache(_db(), azure_client=azure, storage_client=storage,
+                                      data=data, strategy="fast", cache=cache)
+    await analyze_pdf_with_page_cache(_db(), azure_client=azure, storage_client=storage,
+                                      data=data, strategy="accurate", cache=cache)
+
+    assert sent == [[101, 102], [101, 102]]
+
+
+@pytest.mark.asyncio
+async def test_spooled_pdf_is_read_from_the_file():
+    """Un PDF en archivo seekable se digiere y envía sin pasarlo a bytes."""
+    cache = OcrPageCache(_FakeIndex(), enabled=True, bucket="b", prefix="", ttl_seconds=3600)
+    storage = _FakeStorage()
+    azure, sent = _azure()
+    await analyze_pdf_with_page_cache(_db(), azure_client=azure, storage_client=storage,
+                                      data=_pdf([101, 102, 103]), strategy="fast", cache=cache)
+
+    with tempfile.SpooledTemporaryFile(max_size=16) as spooled:
+        spooled.write(_pdf([101, 202, 103]))
+        result = await analyze_pdf_with_page_cache(_db(), azure_client=azure, storage_client=storage,
+                                                   data=spooled, strategy="fast", cache=cache)
+
+    assert sent == [[101, 102, 103], [202]]
+    assert azure.analyze_document_bytes.await_args.args[0] is spooled
+    assert azure.analyze_document_bytes.await_args.kwargs["page_indices"] == [1]
+    assert result.text.split("\n") == ["page-w101", "page-w202", "page-w103"]
+
+
+def test_page_digests_match_across_readers(monkeypatch):
+    """Renovar el lector pypdf cada pocas páginas no cambia los digests."""
+    data = _pdf(range(101, 111))
+    expected = pdf_page_digests(data)
+
+    monkeypatch.setattr(ocr_page_cache_module, "DIGEST_PAGES_PER_READER", 3)
+
+    assert pdf_page_digests(data) == expected
+    assert len(set(expected)) == 10
+
+
+def test_page_digest_depends_on_page_content_only():
+    """Páginas iguales en documentos distintos comparten digest."""
+    a = pdf_page_digests(_pdf([101, 102]))
+    b = pdf_page_digests(_pdf([300, 102]))
+    assert a[1] == b[1]
+    assert a[0] != b[0]
+
+
+@pytest.mark.asyncio
+async def test_repository_uses_single_statements():
+    """get_many / put_many / pop_expired ejecutan una sentencia cada uno."""
+    repo = OcrPageCacheRepository()
+    session = AsyncMock()
+    session.execute.return_value = Mock(all=Mock(return_value=[]), scalars=Mock(return_value=Mock(all=Mock(return_value=[]))))
+
+    await repo.get_many(session, ["a", "b"])
+    await repo.put_many(session, {"a": "ocr/a.json"}, ttl_seconds=60)
+    await repo.pop_expired(session, limit=10)
+
+    assert session.execute.await_count == 3
+    sql = [str(c.args[0].compile(dialect=postgresql.dialect())) for c in session.execute.await_args_list]
+    assert sql[0].startswith("UPDATE rag_ocr_page_cache") and "RETURNING" in sql[0]
+    assert "ON CONFLICT (cache_key) DO UPDATE" in sql[1]
+    assert sql[2].startswith("DELETE FROM rag_ocr_page_cache") and "RETURNING" in sql[2]
+
+
+# Fin del archivo backend/tests/modules/rag/services/test_ocr_page_cache.py
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+backend/tests/modules/rag/services/test_page_plan.py
+
+Tests del plan de páginas nativa/escaneada: clasificación, fusión en orden
+de página y OCR restringido a las páginas de imagen.
+
+Autor: DoxAI
+Fecha: 2025-12-16
+"""
+
+import hashlib
+import io
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+from uuid import uuid4
+
+import pytest
+from pypdf import PdfReader, PdfWriter
+
+from app.modules.rag.facades.ocr_facade import run_ocr
+from app.modules.rag.facades.orchestrator_facade import _ocr_page_plan
+from app.modules.rag.services import page_plan
+from app.modules.rag.services.ocr_page_cache import OcrPageCache
+from app.modules.rag.services.page_plan import classify_pdf_pages, merge_page_texts
+from app.shared.integrations.azure_document_intelligence import AzureOcrResult
+
+
+def test_classifier_routes_only_image_pages_to_ocr():
+    """Páginas con texto → nativas; sin texto y cubiertas por imagen → OCR."""
+    signals = [(1800, 0.0), (900, 0.7), (0, 0.95), (3, 0.0), (5, 1.0)]
+    with patch.object(page_plan, "_page_signals_fitz", return_value=signals):
+        plan = classify_pdf_pages(b"%PDF", min_text_chars=32, min_image_coverage=0.5)
+
+    assert plan.total_pages == 5
+    assert plan.ocr_pages == [2, 4]
+    assert plan.native_pages == [0, 1, 3]
+
+
+def test_classifier_falls_back_to_pypdf_without_pymupdf():
+    """Sin PyMuPDF se usa pypdf: páginas en blanco sin imágenes son nativas."""
+    writer = PdfWriter()
+    writer.add_blank_page(width=200, height=200)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+
+    with patch.object(page_plan, "_page_signals_fitz", side_effect=ImportError):
+        plan = classify_pdf_pages(buffer.getvalue())
+
+    assert plan.total_pages == 1
+    assert plan.ocr_pages == []
+
+
+def test_merge_keeps_page_order():
+    native = "uno\f\fTres\f"
+    assert merge_page_texts(native, {1: " dos ocr ", 3: "cuatro ocr"}) == "uno\fdos ocr\fTres\fcuatro ocr"
+
+
+def test_orchestrator_plan_decision():
+    """needs_ocr sigue mandando; con plan solo corren las páginas de imagen."""
+    assert _ocr_page_plan(False, SimpleNamespace(ocr_pages=[1])) == (False, None)
+    assert _ocr_page_plan(True, SimpleNamespace(ocr_pages=None)) == (True, None)
+    assert _ocr_page_plan(True, SimpleNamespace(ocr_pages=[])) == (False, [])
+    assert _ocr_page_plan(True, SimpleNamespace(ocr_pages=[2, 5])) == (True, [2, 5])
+
+
+@pytest.mark.asyncio
+async def test_run_ocr_sends_only_planned_pages_and_merges():
+    """run_ocr envía a Azure solo las páginas del plan y las fusiona con el texto nativo."""
+    writer = PdfWriter()
+    for width in (101, 102, 103):
+        writer.add_blank_page(width=width, height=200)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+
+    objects = {
+        ("users-files", "doc.pdf"): buffer.getvalue(),
+        ("rag-cache-jobs", "j/converted.txt"): "nativa uno\f\fnativa tres".encode("utf-8"),
+    }
+
+    async def iter_bytes(bucket, key, chunk_size=1024):
+        yield objects[(bucket, key)]
+
+    async def upload_stream(bucket, key, stream, mime_type=None):
+        objects[(bucket, key)] = b"".join([block async for block in stream])
+
+    storage = Mock(iter_bytes=iter_bytes, upload_stream=upload_stream)
+
+    async def analyze(data, *, content_type, strategy, page_indices=None):
+        reader = PdfReader(data)
+        indices = range(len(reader.pages)) if page_indices is None else page_indices
+        widths = [int(reader.pages[i].mediabox.width) for i in indices]
+        return AzureOcrResult(
+            text="\n".join(f"ocr-w{w}" for w in widths),
+            pages=[{"page_number": i + 1, "words": 1, "text": f"ocr-w{w}", "confidence": 0.9}
+                   for i, w in enumerate(widths)],
+            confidence=0.9,
+        )
+
+    azure = Mock(api_version="v", _get_model_id=Mock(return_value="prebuilt-read"))
+    azure.analyze_document_bytes = AsyncMock(side_effect=analyze)
+    event_repo = Mock(log_event=AsyncMock())
+    job_id = uuid4()
+
+    result = await run_ocr(
+        db=AsyncMock(),
+        job_id=job_id,
+        file_id=uuid4(),
+        source_uri="users-files/doc.pdf",
+        azure_client=azure,
+        storage_client=storage,
+        event_repo=event_repo,
+        page_cache=OcrPageCache(enabled=False),
+        pages=[1],
+        native_text_uri="rag-cache-jobs/j/converted.txt",
+    )
+
+    azure.analyze_document_bytes.assert_awaited_once()
+    assert azure.analyze_document_bytes.await_args.kwargs["page_indices"] == [1]
+    stored_bytes = objects[("rag-cache-pages", f"{job_id}/ocr_result.txt")]
+    assert stored_bytes.decode("utf-8") == "nativa uno\focr-w102\fnativa tres"
+    completed = event_repo.log_event.await_args_list[-1].kwargs["event_payload"]
+    assert completed["checksum"] == hashlib.sha256(stored_bytes).hexdigest()
+    assert completed["byte_size"] == len(stored_bytes)
+    assert result.total_pages == 1
+
+
+# Fin del archivo backend/tests/modules/rag/services/test_page_plan.py
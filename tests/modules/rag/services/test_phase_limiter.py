@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+backend/tests/modules/rag/services/test_phase_limiter.py
+
+Tests para los cupos por fase (PhaseLimiter) y el batch de proyecto con
+pipelining (run_project_indexing).
+
+Autor: DoxAI
+Fecha: 2025-12-12
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.modules.rag.enums import RagJobPhase, RagPhase
+from app.modules.rag.facades.orchestrator_facade import ProjectDocument, run_project_indexing
+from app.modules.rag.services.phase_limiter import PhaseLimiter
+
+RUN_JOB = "app.modules.rag.facades.orchestrator_facade.run_indexing_job"
+PHASES = [RagPhase.convert, RagPhase.chunk, RagPhase.embed, RagPhase.integrate]
+
+
+def _session_factory():
+    sessions = []
+
+    @asynccontextmanager
+    async def factory():
+        db = AsyncMock()
+        sessions.append(db)
+        yield db
+
+    factory.sessions = sessions
+    return factory
+
+
+def _documents(n):
+    return [
+        ProjectDocument(file_id=uuid4(), mime_type="application/pdf", source_uri=f"users-files/{i}")
+        for i in range(n)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_slot_caps_each_phase_independently():
+    """Cada fase tiene su propio cupo; una fase llena no bloquea a otra."""
+    limiter = PhaseLimiter({RagPhase.convert: 1, RagPhase.embed: 2})
+
+    async with limiter.slot(RagPhase.convert):
+        async with limiter.slot(RagPhase.embed), limiter.slot(RagPhase.embed):
+            stats = limiter.get_stats()
+            assert stats["convert"]["active"] == 1
+            assert stats["embed"]["active"] == 2
+
+        blocked = asyncio.create_task(limiter.slot(RagPhase.convert).__aenter__())
+        await asyncio.sleep(0)
+        assert not blocked.done()
+        assert limiter.get_stats()["convert"]["waiting"] == 1
+
+    await asyncio.wait_for(blocked, timeout=1)
+    # Fases sin límite configurado no se acotan
+    async with limiter.slot(RagPhase.ocr):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_project_batch_pipelines_documents_across_phases():
+    """Con cupo 1 por fase, documentos distintos ocupan fases distintas a la vez."""
+    limiter = PhaseLimiter({phase: 1 for phase in PHASES})
+    active: dict = {phase: 0 for phase in PHASES}
+    peak: dict = {phase: 0 for phase in PHASES}
+    overlap = 0
+
+    async def fake_run(**kwargs):
+        nonlocal overlap
+        for phase in PHASES:
+            async with kwargs["phase_limiter"].slot(phase):
+                active[phase] += 1
+                peak[phase] = max(peak[phase], active[phase])
+                overlap = max(overlap, sum(1 for p in PHASES if active[p]))
+                await asyncio.sleep(0.01)
+                active[phase] -= 1
+        return SimpleNamespace(job_id=uuid4(), job_status=RagJobPhase.completed)
+
+    factory = _session_factory()
+    with patch(RUN_JOB, new=fake_run):
+        result = await run_project_indexing(
+            uuid4(),
+            uuid4(),
+            _documents(6),
+            session_factory=factory,
+            storage_client=AsyncMock(),
+            max_in_flight=4,
+            phase_limiter=limiter,
+        )
+
+    assert len(result.summaries) == 6 and not result.errors
+    assert all(n == 1 for n in peak.values())
+    assert overlap >= 3
+    assert all(db.commit.await_count == 1 for db in factory.sessions)
+
+
+@pytest.mark.asyncio
+async def test_project_batch_isolates_document_failures():
+    """Un documento que falla antes de crear job no detiene el batch."""
+    docs = _documents(3)
+
+    async def fake_run(**kwargs):
+        if kwargs["file_id"] == docs[1].file_id:
+            raise RuntimeError("RAG pipeline failed before creating job")
+        return SimpleNamespace(job_id=uuid4(), job_status=RagJobPhase.completed)
+
+    with patch(RUN_JOB, new=fake_run):
+        result = await run_project_indexing(
+            uuid4(),
+            uuid4(),
+            docs,
+            session_factory=_session_factory(),
+            storage_client=AsyncMock(),
+            phase_limiter=PhaseLimiter({}),
+        )
+
+    assert len(result.summaries) == 2
+    assert list(result.errors) == [docs[1].file_id]
+
+
+# Fin del archivo backend/tests/modules/rag/services/test_phase_limiter.py
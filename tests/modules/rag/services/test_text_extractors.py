@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+backend/tests/modules/rag/services/test_text_extractors.py
+
+Tests para la extracción nativa de texto (PDF/DOCX/XLSX) y su despacho
+al pool de procesos desde convert_facade.
+
+Los documentos se generan en memoria (PDF mínimo y paquetes OOXML con
+zipfile) para no depender de archivos de fixtures.
+
+Autor: DoxAI
+Fecha: 2025-12-08
+"""
+
+import hashlib
+import io
+import zipfile
+from uuid import uuid4
+
+import pytest
+
+from app.modules.rag.facades.convert_facade import convert_to_text
+from app.modules.rag.services import text_extractors
+from app.modules.rag.services.text_extractors import (
+    DOCX_MIME,
+    PDF_MIME,
+    XLSX_MIME,
+    extract_docx_text,
+    extract_native_text,
+    extract_pdf_text,
+    extract_text_file,
+    extract_xlsx_text,
+)
+
+
+def _pdf(pages):
+    """PDF mínimo con una línea de texto por página y xref válida."""
+    n = len(pages)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(n))
+        + b"] /Count %d >>" % n,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(pages):
+        stream = b"BT /F1 12 Tf 72 720 Td (" + text.encode("latin-1") + b") Tj ET"
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % num + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def _zip(files):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+    return buf.getvalue()
+
+
+_W_NS = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def _docx():
+    body = (
+        "<w:p><w:r><w:t>Primer párrafo</w:t></w:r></w:p>"
+        "<w:p><w:r><w:t xml:space=\"preserve\">Segundo </w:t></w:r><w:r><w:t>párrafo</w:t></w:r></w:p>"
+        "<w:tbl><w:tr><w:tc><w:p><w:r><w:t>Precio</w:t></w:r></w:p></w:tc>"
+        "<w:tc><w:p><w:r><w:t>100</w:t></w:r></w:p></w:tc></w:tr></w:tbl>"
+        "<w:p><w:r><w:br w:type=\"page\"/><w:t>Tras salto</w:t></w:r></w:p>"
+    )
+    return _zip({"word/document.xml": f"<w:document {_W_NS}><w:body>{body}</w:body></w:document>"})
+
+
+def _xlsx():
+    main = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+    rel_ns = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+    return _zip({
+        "xl/workbook.xml": (
+            f"<workbook {main} {rel_ns}><sheets>"
+            '<sheet name="Ventas" sheetId="1" r:id="rId1"/>'
+            '<sheet name="Costos" sheetId="2" r:id="rId2"/>'
+            "</sheets></workbook>"
+        ),
+        "xl/_rels/workbook.xml.rels": (
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Target="worksheets/sheet1.xml"/>'
+            '<Relationship Id="rId2" Target="worksheets/sheet2.xml"/>'
+            "</Relationships>"
+        ),
+        "xl/sharedStrings.xml": f"<sst {main}><si><t>Producto</t></si><si><t>Total</t></si></sst>",
+        "xl/worksheets/sheet1.xml": (
+            f"<worksheet {main}><sheetData>"
+            '<row><c t="s"><v>0</v></c><c t="s"><v>1</v></c></row>'
+            "<row><c><v>42</v></c><c><v>3.5</v></c></row>"
+            "</sheetData></worksheet>"
+        ),
+        "xl/worksheets/sheet2.xml": (
+            f"<worksheet {main}><sheetData>"
+            '<row><c t="inlineStr"><is><t>Renta</t></is></c></row>'
+            "</sheetData></worksheet>"
+        ),
+    })
+
+
+def test_extract_pdf_text_separates_pages_with_form_feed():
+    text = extract_pdf_text(_pdf(["Hola pagina uno", "Adios pagina dos"]))
+
+    assert text.split("\f") == ["Hola pagina uno", "Adios pagina dos"]
+
+
+def test_extract_docx_text_keeps_paragraphs_tables_and_page_breaks():
+    text = extract_docx_text(_docx())
+
+    assert text.startswith("Primer párrafo\n\nSegundo párrafo\n\nPrecio | 100")
+    assert "\fTras salto" in text
+
+
+def test_extract_xlsx_text_one_page_per_sheet():
+    pages = extract_xlsx_text(_xlsx()).split("\f")
+
+    assert pages == ["Ventas\nProducto | Total\n42 | 3.5", "Costos\nRenta"]
+
+
+def test_extract_native_text_rejects_unknown_mime():
+    with pytest.raises(ValueError, match="no soportado"):
+        extract_native_text("image/png", b"")
+
+
+def test_extract_text_file_writes_utf8_and_checksum(tmp_path):
+    """extract_text_file trabaja archivo → archivo y devuelve tamaño y SHA-256."""
+    src, dst = tmp_path / "doc.docx", tmp_path / "doc.txt"
+    src.write_bytes(_docx())
+
+    byte_size, checksum = extract_text_file(DOCX_MIME, str(src), str(dst))
+
+    written = dst.read_bytes()
+    assert written.decode("utf-8") == extract_docx_text(_docx())
+    assert byte_size == len(written)
+    assert checksum == hashlib.sha256(written).hexdigest()
+
+
+class _MemoryStorage:
+    """Storage en memoria con la API de streaming de AsyncStorageClient."""
+
+    def __init__(self, objects):
+        self.objects = dict(objects)
+
+    async def iter_bytes(self, bucket, key, chunk_size=1024):
+        data = self.objects[(bucket, key)]
+        for i in range(0, len(data), 16):
+            yield data[i:i + 16]
+
+    async def upload_stream(self, bucket, key, stream, mime_type=None):
+        self.objects[(bucket, key)] = b"".join([block async for block in stream])
+
+
+@pytest.mark.asyncio
+async def test_convert_to_text_extracts_documents_in_process_pool():
+    """convert_to_text despacha PDF/DOCX/XLSX al pool y guarda el texto."""
+    documents = {PDF_MIME: _pdf(["Contrato de prueba"]), DOCX_MIME: _docx(), XLSX_MIME: _xlsx()}
+    try:
+        for mime_type, data in documents.items():
+            storage = _MemoryStorage({("users-files", "doc"): data})
+            job_id = uuid4()
+
+            result = await convert_to_text(
+                db=None,
+                job_id=job_id,
+                file_id=uuid4(),
+                source_uri="users-files/doc",
+                mime_type=mime_type,
+                storage_client=storage,
+            )
+
+            written = storage.objects[("rag-cache-jobs", f"{job_id}/converted.txt")].decode("utf-8")
+            assert written == extract_native_text(mime_type, data)
+            assert result.byte_size == len(written.encode("utf-8"))
+        assert text_extractors._pool is not None
+    finally:
+        text_extractors.shutdown_extraction_pool()
+
+    assert text_extractors._pool is None
+
+
+# Fin del archivo backend/tests/modules/rag/services/test_text_extractors.py
@@ -21,6 +21,7 @@ class DummySettings:
     warmup_preload_hires = False
     warmup_preload_table_model = False
     warmup_timeout_sec = 2
+    warmup_pdf_worker_pool = False
 
     warmup_http_client = False
     warmup_http_health_check = False
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+
+@pytest.fixture
+def pool_mod(monkeypatch):
+    from app.shared.core import pdf_worker_pool_cache as P
+
+    monkeypatch.setattr(P, "_pool_settings", lambda: (2, 5, False))
+    yield P
+    P.shutdown_pdf_worker_pool(wait=True)
+
+
+def test_pool_is_created_once_and_reused(pool_mod):
+    first = pool_mod.get_pdf_worker_pool()
+    assert pool_mod.get_pdf_worker_pool() is first
+    assert first._max_tasks_per_child == 5
+
+
+def test_warm_starts_every_worker(pool_mod):
+    assert pool_mod.warm_pdf_worker_pool(timeout_sec=60) == 2
+
+
+def test_shutdown_allows_recreation(pool_mod):
+    first = pool_mod.get_pdf_worker_pool()
+    pool_mod.shutdown_pdf_worker_pool(wait=True)
+    assert pool_mod.get_pdf_worker_pool() is not first
+# Fin del archivo
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+backend/tests/shared/integrations/test_azure_document_intelligence.py
+
+Tests del cliente Azure Document Intelligence contra un servidor aiohttp
+local que imita la API (analyze → Operation-Location → polling):
+Retry-After, polling adaptativo y envío de PDFs por rangos en paralelo.
+
+Autor: DoxAI
+Fecha: 2025-12-14
+"""
+
+import io
+import tempfile
+from itertools import count
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from aiohttp import web
+from pypdf import PdfReader, PdfWriter
+
+from app.shared.integrations.azure_document_intelligence import (
+    AzureDocumentIntelligenceClient,
+    page_ranges,
+)
+
+SLEEP = "app.shared.integrations.azure_document_intelligence.asyncio.sleep"
+
+
+class _FakeAzure:
+    """Servidor Document Intelligence mínimo en memoria."""
+
+    def __init__(self, *, running_polls=0, retry_after=None):
+        self.running_polls = running_polls
+        self.retry_after = retry_after
+        self.operations = {}
+        self.ids = count(1)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.peers = set()
+        self.queries = []
+        self.base_url = ""
+
+    async def analyze(self, request):
+        self.peers.add(request.transport.get_extra_info("peername"))
+        self.queries.append(dict(request.query))
+        if request.content_type == "application/json":
+            pages = [{"pageNumber": 1, "width": 1, "words": [{"confidence": 0.9}]}]
+        else:
+            reader = PdfReader(io.BytesIO(await request.read()))
+            pages = [
+                {
+                    "pageNumber": i + 1,
+                    "width": float(page.mediabox.width),
+                    "words": [{"confidence": 0.8}],
+                }
+                for i, page in enumerate(reader.pages)
+            ]
+        op_id = str(next(self.ids))
+        self.operations[op_id] = {"polls": 0, "pages": pages}
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        return web.Response(
+            status=202,
+            headers={"Operation-Location": f"{self.base_url}/operations/{op_id}"},
+        )
+
+    async def poll(self, request):
+        self.peers.add(request.transport.get_extra_info("peername"))
+        op = self.operations[request.match_info["op_id"]]
+        op["polls"] += 1
+        if op["polls"] <= self.running_polls:
+            headers = {"Retry-After": self.retry_after} if self.retry_after else {}
+            return web.json_response({"status": "running"}, headers=headers)
+        if not op.get("done"):
+            op["done"] = True
+            self.in_flight -= 1
+        content = "\n".join(f"page-w{int(p['width'])}" for p in op["pages"])
+        return web.json_response(
+            {"status": "succeeded", "analyzeResult": {"content": content, "pages": op["pages"]}}
+        )
+
+
+async def _start(fake: _FakeAzure):
+    app = web.Application()
+    app.router.add_post("/documentintelligence/documentModels/{model}", fake.analyze)
+    app.router.add_get("/operations/{op_id}", fake.poll)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    fake.base_url = f"http://127.0.0.1:{port}"
+    return runner
+
+
+def _pdf(page_count: int) -> bytes:
+    """PDF con páginas en blanco de ancho 101, 102, ... (identifican la página)."""
+    writer = PdfWriter()
+    for i in range(page_count):
+        writer.add_blank_page(width=101 + i, height=200)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_polling_honors_retry_after():
+    """Mientras la operación corre, se espera lo indicado en Retry-After."""
+    fake = _FakeAzure(running_polls=2, retry_after="3")
+    runner = await _start(fake)
+    client = AzureDocumentIntelligenceClient(fake.base_url, "k")
+    sleep = AsyncMock()
+    try:
+        with patch(SLEEP, sleep):
+            result = await client.analyze_document("https://example.com/doc.pdf")
+    finally:
+        await client.aclose()
+        await runner.cleanup()
+
+    assert result.text == "page-w1"
+    assert [c.args[0] for c in sleep.await_args_list] == [3.0, 3.0]
+    assert fake.queries[0]["stringIndexType"] == "unicodeCodePoint"
+
+
+@pytest.mark.asyncio
+async def test_polling_backs_off_without_retry_after():
+    """Sin Retry-After el intervalo crece hasta polling_max_interval_sec."""
+    fake = _FakeAzure(running_polls=4)
+    runner = await _start(fake)
+    client = AzureDocumentIntelligenceClient(
+        fake.base_url, "k", polling_interval_sec=1.0, polling_backoff=2.0, polling_max_interval_sec=5.0,
+    )
+    sleep = AsyncMock()
+    try:
+        with patch(SLEEP, sleep):
+            await client.analyze_document("https://example.com/doc.pdf")
+    finally:
+        await client.aclose()
+        await runner.cleanup()
+
+    assert [c.args[0] for c in sleep.await_args_list] == [1.0, 2.0, 4.0, 5.0]
+
+
+@pytest.mark.asyncio
+async def test_large_pdf_is_split_into_parallel_page_ranges():
+    """Un PDF grande se envía por rangos en paralelo y se une en orden."""
+    fake = _FakeAzure(running_polls=1, retry_after="0")
+    runner = await _start(fake)
+    client = AzureDocumentIntelligenceClient(
+        fake.base_url,
+        "k",
+        pages_per_request=2,
+        split_min_pages=4,
+        max_parallel_requests=3,
+    )
+    try:
+        result = await client.analyze_document_bytes(_pdf(7))
+    finally:
+        await client.aclose()
+        await runner.cleanup()
+
+    assert len(fake.operations) == 4
+    assert 2 <= fake.peak_in_flight <= 3
+    assert result.text.split("\n") == [f"page-w{101 + i}" for i in range(7)]
+    assert [p["page_number"] for p in result.pages] == list(range(1, 8))
+    assert result.confidence == pytest.approx(0.8)
+
+
+@pytest.mark.asyncio
+async def test_small_pdf_is_sent_in_one_request():
+    """Por debajo de split_min_pages no se divide."""
+    fake = _FakeAzure()
+    runner = await _start(fake)
+    client = AzureDocumentIntelligenceClient(fake.base_url, "k", split_min_pages=10)
+    try:
+        result = await client.analyze_document_bytes(_pdf(3))
+    finally:
+        await client.aclose()
+        await runner.cleanup()
+
+    assert len(fake.operations) == 1
+    assert len(result.pages) == 3
+    assert fake.queries[0]["stringIndexType"] == "unicodeCodePoint"
+
+
+@pytest.mark.asyncio
+async def test_spooled_pdf_is_streamed_and_split_from_the_file():
+    """Un archivo seekable se sube por bloques o se divide por rangos sin leerlo entero."""
+    fake = _FakeAzure()
+    runner = await _start(fake)
+    client = AzureDocumentIntelligenceClient(
+        fake.base_url, "k", pages_per_request=2, split_min_pages=4,
+    )
+    try:
+        with tempfile.SpooledTemporaryFile(max_size=16) as small, \
+                tempfile.SpooledTemporaryFile(max_size=16) as large:
+            small.write(_pdf(3))
+            large.write(_pdf(5))
+            whole = await client.analyze_document_bytes(small)
+            split = await client.analyze_document_bytes(large)
+            subset = await client.analyze_document_bytes(large, page_indices=[4, 1])
+    finally:
+        await client.aclose()
+        await runner.cleanup()
+
+    assert whole.text.split("\n") == ["page-w101", "page-w102", "page-w103"]
+    assert split.text.split("\n") == [f"page-w{101 + i}" for i in range(5)]
+    assert len(fake.operations) == 1 + 3 + 1
+    # Las páginas elegidas se envían en ese orden y se numeran 1..n
+    assert subset.text.split("\n") == ["page-w105", "page-w102"]
+    assert [p["page_number"] for p in subset.pages] == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_loop_change_closes_stale_session():
+    """Al cambiar de event loop, la sesión anterior se cierra antes de crear otra."""
+    client = AzureDocumentIntelligenceClient("https://example.com", "k")
+    stale = await client._get_session()
+    client._loop = object()  # la sesión quedó ligada a otro loop
+
+    fresh = await client._get_session()
+
+    assert stale.closed
+    assert fresh is not stale and not fresh.closed
+    await client.aclose()
+
+
+def test_page_ranges_cover_document():
+    """Los rangos son consecutivos, inclusivos y cubren todas las páginas."""
+    assert page_ranges(7, 3) == [(1, 3), (4, 6), (7, 7)]
+    assert page_ranges(2, 50) == [(1, 2)]
+
+
+# Fin del archivo backend/tests/shared/integrations/test_azure_document_intelligence.py
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+backend/tests/shared/integrations/test_openai_embeddings_client.py
+
+Tests del cliente OpenAI embeddings contra un servidor aiohttp local:
+reutilización de conexiones (keep-alive) y respeto de Retry-After.
+
+Autor: DoxAI
+Fecha: 2025-12-04
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from aiohttp import web
+
+from app.shared.integrations.openai_embeddings_client import (
+    OpenAIEmbeddingsClient,
+    _parse_retry_after,
+)
+
+
+async def _start_server(handler):
+    app = web.Application()
+    app.router.add_post("/v1/embeddings", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/v1"
+
+
+def _ok_response(payload):
+    return web.json_response(
+        {"data": [{"embedding": [0.1] * payload["dimensions"]} for _ in payload["input"]]}
+    )
+
+
+@pytest.mark.asyncio
+async def test_client_reuses_connections_across_calls():
+    """Varias llamadas comparten la misma conexión TCP (keep-alive)."""
+    peers = []
+
+    async def handler(request):
+        peers.append(request.transport.get_extra_info("peername"))
+        return _ok_response(await request.json())
+
+    runner, endpoint = await _start_server(handler)
+    client = OpenAIEmbeddingsClient()
+    try:
+        for _ in range(3):
+            vectors = await client.generate_embeddings(["a", "b"], api_key="k", endpoint=endpoint)
+            assert len(vectors) == 2 and len(vectors[0]) == 1536
+    finally:
+        await client.aclose()
+        await runner.cleanup()
+
+    assert len(peers) == 3
+    assert len(set(peers)) == 1
+
+
+@pytest.mark.asyncio
+async def test_client_honors_retry_after_header():
+    """Un 429 con Retry-After espera lo indicado por el servidor."""
+    calls = {"n": 0}
+
+    async def handler(request):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            return web.Response(status=429, text="slow down", headers={"Retry-After": "7"})
+        return _ok_response(await request.json())
+
+    runner, endpoint = await _start_server(handler)
+    client = OpenAIEmbeddingsClient()
+    sleep = AsyncMock()
+    try:
+        with patch("app.shared.integrations.openai_embeddings_client.asyncio.sleep", sleep):
+            await client.generate_embeddings(["a"], api_key="k", endpoint=endpoint)
+    finally:
+        await client.aclose()
+        await runner.cleanup()
+
+    assert calls["n"] == 2
+    sleep.assert_awaited_once_with(7.0)
+
+
+def test_parse_retry_after_variants():
+    """retry-after-ms tiene prioridad; fechas pasadas se tratan como 0."""
+    assert _parse_retry_after({"retry-after-ms": "250", "Retry-After": "9"}) == 0.25
+    assert _parse_retry_after({"Retry-After": "3"}) == 3.0
+    assert _parse_retry_after({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}) == 0.0
+    assert _parse_retry_after({"Retry-After": "soon"}) is None
+    assert _parse_retry_after({}) is None
+
+
+@pytest.mark.asyncio
+async def test_aclose_releases_session():
+    """aclose cierra la sesión y la siguiente llamada abre una nueva."""
+    client = OpenAIEmbeddingsClient()
+    session = await client._get_session()
+    await client.aclose()
+
+    assert session.closed
+    assert await client._get_session() is not session
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_loop_change_closes_stale_session():
+    """Al cambiar de event loop, la sesión anterior se cierra antes de crear otra."""
+    client = OpenAIEmbeddingsClient()
+    stale = await client._get_session()
+    client._loop = object()  # la sesión quedó ligada a otro loop
+
+    fresh = await client._get_session()
+
+    assert stale.closed
+    assert fresh is not stale and not fresh.closed
+    await client.aclose()
+
+
+# Fin del archivo backend/tests/shared/integrations/test_openai_embeddings_client.py
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+backend/tests/shared/utils/test_http_storage_resumable.py
+
+Tests de SupabaseStorageHTTPClient.upload_resumable contra un servidor
+aiohttp local que imita el endpoint TUS de Supabase Storage
+(POST /upload/resumable → Location; HEAD → Upload-Offset; PATCH por partes).
+
+Autor: DoxAI
+Fecha: 2025-12-19
+"""
+
+import base64
+import os
+from itertools import count
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+from aiohttp import web
+
+from app.shared.config import settings
+from app.shared.utils.http_storage_client import SupabaseStorageHTTPClient
+from app.shared.utils.storage_errors import ResumableUploadError
+
+SLEEP = "app.shared.core.http_retry_utils.asyncio.sleep"
+POOL = "app.shared.utils.http_storage_client.get_pooled_client"
+
+
+class _FakeTus:
+    """Servidor TUS mínimo en memoria; fail_patches simula cortes."""
+
+    def __init__(self, *, fail_patches=()):
+        self.fail_patches = set(fail_patches)
+        self.uploads = {}
+        self.objects = {}
+        self.ids = count(1)
+        self.patches = 0
+        self.bytes_received = 0
+
+    async def create(self, request):
+        meta = {}
+        for pair in request.headers["Upload-Metadata"].split(","):
+            key, value = pair.split(" ")
+            meta[key] = base64.b64decode(value).decode()
+        name = (meta["bucketName"], meta["objectName"])
+        if name in self.objects and request.headers.get("x-upsert") != "true":
+            return web.Response(status=409)
+        upload_id = str(next(self.ids))
+        self.uploads[upload_id] = {
+            "name": name,
+            "length": int(request.headers["Upload-Length"]),
+            "data": bytearray(),
+        }
+        return web.Response(status=201, headers={"Location": f"/storage/v1/upload/resumable/{upload_id}"})
+
+    async def head(self, request):
+        upload = self.uploads[request.match_info["upload_id"]]
+        return web.Response(
+            status=200,
+            headers={"Upload-Offset": str(len(upload["data"])), "Upload-Length": str(upload["length"])},
+        )
+
+    async def patch(self, request):
+        upload = self.uploads[request.match_info["upload_id"]]
+        self.patches += 1
+        if int(request.headers["Upload-Offset"]) != len(upload["data"]):
+            return web.Response(status=409)
+        body = await request.read()
+        self.bytes_received += len(body)
+        if self.patches in self.fail_patches:
+            # Corte a mitad de la parte: el servidor conserva lo recibido
+            upload["data"] += body[: len(body) // 2]
+            return web.Response(status=503)
+        upload["data"] += body
+        if len(upload["data"]) == upload["length"]:
+            self.objects[upload["name"]] = bytes(upload["data"])
+        return web.Response(status=204, headers={"Upload-Offset": str(len(upload["data"]))})
+
+
+async def _start(fake: _FakeTus):
+    app = web.Application()
+    app.router.add_post("/storage/v1/upload/resumable", fake.create)
+    app.router.add_route("HEAD", "/storage/v1/upload/resumable/{upload_id}", fake.head)
+    app.router.add_patch("/storage/v1/upload/resumable/{upload_id}", fake.patch)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+@pytest.fixture
+async def storage(monkeypatch):
+    """(fake, cliente) con el cliente apuntando al servidor local."""
+    monkeypatch.setattr(settings, "supabase_url", "http://127.0.0.1", raising=False)
+    monkeypatch.setattr(settings, "supabase_service_role_key", "test-key", raising=False)
+
+    async def make(**fake_kwargs):
+        fake = _FakeTus(**fake_kwargs)
+        runner, base_url = await _start(fake)
+        client = SupabaseStorageHTTPClient()
+        client.base_url = base_url
+        cleanups.append(runner)
+        return fake, client
+
+    cleanups = []
+    http = httpx.AsyncClient()
+    with patch(POOL, AsyncMock(return_value=http)), patch(SLEEP, AsyncMock()):
+        yield make
+    await http.aclose()
+    for runner in cleanups:
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_upload_in_parts(storage):
+    fake, client = await storage()
+    data = os.urandom(2500)
+
+    result = await client.upload_resumable("bucket", "a/b.bin", data, chunk_size=1000)
+
+    assert result["size"] == 2500
+    assert fake.objects[("bucket", "a/b.bin")] == data
+    assert fake.patches == 3
+
+
+@pytest.mark.asyncio
+async def test_interrupted_part_resumes_from_server_offset(storage):
+    fake, client = await storage(fail_patches={2})
+    data = os.urandom(3000)
+
+    await client.upload_resumable("bucket", "big.bin", data, chunk_size=1000)
+
+    assert fake.objects[("bucket", "big.bin")] == data
+    # Solo se reenvía la mitad no confirmada de la parte cortada
+    assert fake.bytes_received == len(data) + 500
+
+
+@pytest.mark.asyncio
+async def test_stream_upload_can_be_resumed_with_upload_url(storage):
+    fake, client = await storage(fail_patches={2})
+    data = os.urandom(2200)
+
+    async def stream():
+        for i in range(0, len(data), 300):
+            yield data[i:i + 300]
+
+    with pytest.raises(ResumableUploadError) as exc_info:
+        await client.upload_resumable(
+            "bucket", "s.bin", stream(), content_length=len(data), chunk_size=1000, max_retries=0,
+        )
+    error = exc_info.value
+    assert error.upload_url and error.offset == 1000
+
+    await client.upload_resumable(
+        "bucket", "s.bin", stream(), content_length=len(data), chunk_size=1000,
+        upload_url=error.upload_url,
+    )
+    assert fake.objects[("bucket", "s.bin")] == data
+
+
+@pytest.mark.asyncio
+async def test_existing_object_without_overwrite_is_duplicate(storage):
+    fake, client = await storage()
+    fake.objects[("bucket", "x.bin")] = b"old"
+
+    result = await client.upload_resumable("bucket", "x.bin", b"new", chunk_size=1000)
+
+    assert result.get("duplicate") is True
+    assert fake.objects[("bucket", "x.bin")] == b"old"